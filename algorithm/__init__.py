@@ -1,9 +1,52 @@
 # algorithm/__init__.py
-from .framework_agent import AgentFramework, main
-from .utils.database import write_lineage_log, read_lineage_log
-from .utils.file_utils import dump_json_record, read_json_records, clear_json_file, get_file_stats
-from .utils.tracers import LogTracer, log_trace_id
-from .plugins.sql_lineage_agent.lineage_agent import SqlLineageAgent, create_sql_lineage_agent, get_plugin_info
+import importlib
+from typing import TYPE_CHECKING
+
+# Public symbols and the modules defining them. They are imported on first
+# access, so importing algorithm (or algorithm.lineage) does not pull in the
+# agents SDK, the model clients or the plugins.
+_LAZY_IMPORTS = {
+    'AgentFramework': '.framework_agent',
+    'main': '.framework_agent',
+    'write_lineage_log': '.utils.database',
+    'read_lineage_log': '.utils.database',
+    'dump_json_record': '.utils.file_utils',
+    'read_json_records': '.utils.file_utils',
+    'clear_json_file': '.utils.file_utils',
+    'get_file_stats': '.utils.file_utils',
+    'add_dump_listener': '.utils.file_utils',
+    'remove_dump_listener': '.utils.file_utils',
+    'extract_json': '.utils.json_extract',
+    'JSONExtractionError': '.utils.json_extract',
+    'LogTracer': '.utils.tracers',
+    'log_trace_id': '.utils.tracers',
+    'SqlLineageAgent': '.plugins.sql_lineage_agent.lineage_agent',
+    'create_sql_lineage_agent': '.plugins.sql_lineage_agent.lineage_agent',
+    'get_plugin_info': '.plugins.sql_lineage_agent.lineage_agent',
+}
+
+if TYPE_CHECKING:
+    from .framework_agent import AgentFramework, main
+    from .utils.database import write_lineage_log, read_lineage_log
+    from .utils.file_utils import (dump_json_record, read_json_records, clear_json_file, get_file_stats,
+                                   add_dump_listener, remove_dump_listener)
+    from .utils.json_extract import extract_json, JSONExtractionError
+    from .utils.tracers import LogTracer, log_trace_id
+    from .plugins.sql_lineage_agent.lineage_agent import SqlLineageAgent, create_sql_lineage_agent, get_plugin_info
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __all__ = [
     'AgentFramework',
@@ -14,9 +57,13 @@ __all__ = [
     'read_json_records',
     'clear_json_file',
     'get_file_stats',
+    'add_dump_listener',
+    'remove_dump_listener',
+    'extract_json',
+    'JSONExtractionError',
     'LogTracer',
     'log_trace_id',
     'SqlLineageAgent',
     'create_sql_lineage_agent',
     'get_plugin_info'
-] 
\ No newline at end of file
+]
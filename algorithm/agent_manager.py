@@ -1,63 +1,186 @@
+import ast
 import importlib.metadata
+import importlib.util
+import threading
 from typing import Dict, Any, Optional, Type, Callable
 import logging
 
 logger = logging.getLogger(__name__)
 
+PLUGIN_GROUP = 'lineagent.algorithm.plugins'
+
+
+def read_static_info(entry_point: importlib.metadata.EntryPoint) -> Optional[Dict[str, Any]]:
+    """
+    Read a plugin's metadata from its source without importing it.
+
+    The entry point names a plugin-info function (or dict) in a module. When the
+    function returns a dict display, its literal entries (name, description,
+    version, supported_operations, ...) are the metadata; entries such as the
+    factory function only exist once the module is imported.
+
+    Args:
+        entry_point (EntryPoint): The plugin's entry point
+
+    Returns:
+        Optional[Dict[str, Any]]: The literal metadata, or None when it cannot be read statically
+    """
+    module_name, _, attr = entry_point.value.partition(':')
+    attr = attr.strip()
+    try:
+        # Imports the plugin's parent packages, but not the plugin module itself
+        spec = importlib.util.find_spec(module_name.strip())
+        if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+            return None
+        with open(spec.origin, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+    except (ImportError, OSError, SyntaxError, ValueError):
+        return None
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == attr:
+            returns = [child.value for child in ast.walk(node) if isinstance(child, ast.Return)]
+            value = returns[0] if len(returns) == 1 else None
+        elif isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == attr
+                                                  for target in node.targets):
+            value = node.value
+        else:
+            continue
+        if not isinstance(value, ast.Dict):
+            return None
+        info = {}
+        for key, item in zip(value.keys, value.values):
+            try:
+                info[ast.literal_eval(key)] = ast.literal_eval(item)
+            except (ValueError, TypeError):
+                # Not a literal, e.g. the agent class or factory function
+                continue
+        return info
+    return None
+
+
+class PluginEntry:
+    """A discovered plugin, whose module is imported on first use"""
+
+    def __init__(self, entry_point: importlib.metadata.EntryPoint):
+        self.entry_point = entry_point
+        self.static_info = read_static_info(entry_point)
+        self.name = (self.static_info or {}).get('name', entry_point.name)
+        self._loaded: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the plugin's module has been imported"""
+        return self._loaded is not None
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """The plugin's metadata, complete once it is loaded"""
+        if self._loaded is not None:
+            return self._loaded
+        if self.static_info is not None:
+            return self.static_info
+        return self.load()
+
+    def load(self) -> Dict[str, Any]:
+        """Import the plugin's module and return its full plugin info"""
+        with self._lock:
+            if self._loaded is None:
+                agent_info = self.entry_point.load()
+                if callable(agent_info):
+                    # If it's a function, assume it returns plugin info
+                    agent_data = agent_info()
+                else:
+                    # If it's already a dict/object
+                    agent_data = agent_info
+                self._loaded = agent_data
+                logger.info(f"Loaded plugin: {self.name}")
+        return self._loaded
+
 
 class AgentManager:
-    """Manages plugin discovery and loading for the AgentFramework"""
-    
+    """Manages plugin discovery and loading for the AgentFramework
+
+    Plugins are discovered from entry points on first use, and their metadata is
+    read from source where possible. A plugin's module, with its model clients and
+    dependencies, is only imported when an agent of that plugin is created.
+    """
+
     def __init__(self):
-        self.agents: Dict[str, Dict[str, Any]] = {}
-        self.agent_factories: Dict[str, Callable] = {}
-        self._load_plugins()
-    
-    def _load_plugins(self):
-        """Load all available agents plugins using entry points"""
+        self._plugins: Optional[Dict[str, PluginEntry]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def plugins(self) -> Dict[str, PluginEntry]:
+        """The discovered plugins by agent name"""
+        if self._plugins is None:
+            with self._lock:
+                if self._plugins is None:
+                    self._plugins = self._discover_plugins()
+        return self._plugins
+
+    def _discover_plugins(self) -> Dict[str, PluginEntry]:
+        """Discover all available agents plugins using entry points"""
+        plugins = {}
         try:
-            # Load plugins from the 'lineagent.algorithm.plugins' entry point group
-            for entry_point in importlib.metadata.entry_points(group='lineagent.algorithm.plugins'):
+            # Discover plugins from the 'lineagent.algorithm.plugins' entry point group
+            for entry_point in importlib.metadata.entry_points(group=PLUGIN_GROUP):
                 try:
-                    agent_info = entry_point.load()
-                    if callable(agent_info):
-                        # If it's a function, assume it returns plugin info
-                        agent_data = agent_info()
-                    else:
-                        # If it's already a dict/object
-                        agent_data = agent_info
-                    
-                    agent_name = agent_data.get('name', entry_point.name)
-                    self.agents[agent_name] = agent_data
-                    
-                    # Store the factory function if available
-                    if 'factory_function' in agent_data:
-                        self.agent_factories[agent_name] = agent_data['factory_function']
-                    
-                    logger.info(f"Loaded plugin: {agent_name}")
-                    
+                    plugin = PluginEntry(entry_point)
+                    plugins[plugin.name] = plugin
                 except Exception as e:
-                    logger.error(f"Failed to load plugin {entry_point.name}: {e}")
-                    
+                    logger.error(f"Failed to discover plugin {entry_point.name}: {e}")
+        except Exception as e:
+            logger.error(f"Error discovering plugins: {e}")
+        return plugins
+
+    def _info(self, plugin: PluginEntry) -> Optional[Dict[str, Any]]:
+        try:
+            return plugin.info
         except Exception as e:
-            logger.error(f"Error loading plugins: {e}")
-    
+            logger.error(f"Failed to load plugin {plugin.name}: {e}")
+            return None
+
+    @property
+    def agents(self) -> Dict[str, Dict[str, Any]]:
+        """Metadata of every available agent"""
+        agents = {}
+        for agent_name, plugin in self.plugins.items():
+            info = self._info(plugin)
+            if info is not None:
+                agents[agent_name] = info
+        return agents
+
     def get_agent(self, agent_name: str) -> Optional[Dict[str, Any]]:
         """Get agent information by name"""
-        return self.agents.get(agent_name)
-    
+        plugin = self.plugins.get(agent_name)
+        return self._info(plugin) if plugin is not None else None
+
     def list_agents(self) -> Dict[str, Dict[str, Any]]:
-        """List all available agents"""
-        return self.agents.copy()
-    
+        """List all available agents
+
+        Agents whose plugin is not loaded yet are listed with their metadata only,
+        without the agent class and factory function.
+        """
+        return self.agents
+
     def create_agent(self, agent_name: str, **kwargs) -> Any:
         """Create an agent instance using the agent's factory function"""
-        if agent_name not in self.agent_factories:
+        plugin = self.plugins.get(agent_name)
+        if plugin is None:
+            raise ValueError(f"Agent '{agent_name}' not found or has no factory function")
+        try:
+            agent_data = plugin.load()
+        except Exception as e:
+            logger.error(f"Failed to load plugin {agent_name}: {e}")
+            raise ValueError(f"Agent '{agent_name}' could not be loaded: {e}") from e
+        if 'factory_function' not in agent_data:
             raise ValueError(f"Agent '{agent_name}' not found or has no factory function")
-        
-        factory = self.agent_factories[agent_name]
+
+        factory = agent_data['factory_function']
         return factory(agent_name=agent_name, **kwargs)
-    
+
     def get_supported_operations(self) -> Dict[str, list]:
         """Get all supported operations from all agents"""
         operations = {}
@@ -68,12 +191,12 @@ class AgentManager:
                     operations[op] = []
                 operations[op].append(agent_name)
         return operations
-    
+
     def get_agents_for_operation(self, operation: str) -> list:
         """Get all agents that support a specific operation"""
         supported_ops = self.get_supported_operations()
         return supported_ops.get(operation, [])
 
 
-# Global agent manager instance
-agent_manager = AgentManager() 
\ No newline at end of file
+# Global agent manager instance; plugins are discovered on first use
+agent_manager = AgentManager()
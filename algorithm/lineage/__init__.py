@@ -0,0 +1,46 @@
+from .events import LineageEvent, Dataset, Transformation, iter_events
+from .identity import DatasetResolver, NamespaceRule, default_resolver
+from .graph import LineageGraph, iter_dump_records, UPSTREAM, DOWNSTREAM
+from .reachability import ReachabilityIndex
+from .subgraph import extract_subgraph, event_subgraph
+from .snapshot import save_snapshot, load_snapshot
+from .export import export_graph, write_export, EXPORT_FORMATS
+from .search import SearchIndex
+from .diff import diff_lineage, diff_events, load_lineage, format_diff
+from .history import LineageHistory
+from .knowledge_graph import KnowledgeGraphBuilder, build_knowledge_graph
+from .service import LineageService, NodeNotFoundError, AmbiguousNodeError, get_lineage_service
+
+__all__ = [
+    'LineageEvent',
+    'Dataset',
+    'Transformation',
+    'iter_events',
+    'DatasetResolver',
+    'NamespaceRule',
+    'default_resolver',
+    'LineageGraph',
+    'iter_dump_records',
+    'UPSTREAM',
+    'DOWNSTREAM',
+    'ReachabilityIndex',
+    'extract_subgraph',
+    'event_subgraph',
+    'save_snapshot',
+    'load_snapshot',
+    'export_graph',
+    'write_export',
+    'EXPORT_FORMATS',
+    'SearchIndex',
+    'diff_lineage',
+    'diff_events',
+    'load_lineage',
+    'format_diff',
+    'LineageHistory',
+    'KnowledgeGraphBuilder',
+    'build_knowledge_graph',
+    'LineageService',
+    'NodeNotFoundError',
+    'AmbiguousNodeError',
+    'get_lineage_service',
+]
@@ -0,0 +1,385 @@
+"""
+Lineage diffs between two versions of the same jobs.
+
+When a DAG or SQL file changes, the question in review is which datasets
+and column edges the change adds or removes. This module compares the
+lineage each job contributes in two versions and reports, per job:
+
+- inputs and outputs added and removed
+- output columns added and removed
+- column mappings (input column -> output column) added and removed
+- mappings whose transformations changed
+- whether the SQL text changed
+
+plus the datasets no job read or wrote before, or does no longer.
+
+A version is read from composed OpenLineage events, where the latest event
+of each job wins as in LineageGraph, or from a graph (e.g. a snapshot).
+Graphs do not keep transformations, so a diff involving one reports no
+transformation changes. Each version is indexed by name in time linear in
+its size and the diff is made of set differences, so the cost is linear
+in the size of the events compared.
+
+Command line (exit code 1 with --exit-code when something changed):
+
+    python -m algorithm.lineage.diff old_event.json new_event.json
+    python -m algorithm.lineage.diff .lineage-graph.snapshot lineage_extraction_dumps --job "orders_*"
+
+Each side may be an event file (one event, a JSON array of events or a
+dump file), a folder of dump files or a graph snapshot.
+"""
+
+import argparse
+import fnmatch
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .events import LineageEvent, iter_events
+from .graph import (LineageGraph, COLUMN, DATASET, _EDGE_MASK, _EDGE_SHIFT, _is_dataset_key, _is_field, _is_older,
+                    iter_dump_records)
+from .identity import DatasetResolver, default_resolver
+from .snapshot import is_snapshot, load_snapshot
+
+
+DatasetKey = Tuple[Optional[str], str]
+ColumnKey = Tuple[Optional[str], str, str]
+JobKey = Tuple[Optional[str], str]
+# (type, subtype, description, masking) of each transformation of a mapping
+Transformations = Tuple[Tuple[Optional[str], Optional[str], Optional[str], bool], ...]
+
+
+class JobLineage:
+    """
+    The lineage one job contributes, keyed by name so that two versions compare.
+
+    Attributes:
+        inputs: Dataset keys read
+        outputs: Dataset keys written
+        mappings: Output column key -> {input column key: transformations, or None if unknown};
+            columns without input fields are left out, as they add no edge to a graph
+        sql: SQL text, or None
+        event_time: eventTime of the event it was read from, or of the job's latest event in a graph
+    """
+
+    __slots__ = ('inputs', 'outputs', 'mappings', 'sql', 'event_time')
+
+    def __init__(self):
+        self.inputs: Set[DatasetKey] = set()
+        self.outputs: Set[DatasetKey] = set()
+        self.mappings: Dict[ColumnKey, Dict[ColumnKey, Optional[Transformations]]] = {}
+        self.sql: Optional[str] = None
+        self.event_time: Optional[str] = None
+
+    @classmethod
+    def from_event(cls, event: Union[LineageEvent, Dict[str, Any]],
+                   resolver: Optional[DatasetResolver] = None) -> "JobLineage":
+        """Index an event's lineage, resolving dataset names if a resolver is given."""
+        if not isinstance(event, LineageEvent):
+            event = LineageEvent.from_dict(event)
+        resolve = resolver.resolve if resolver is not None else (lambda namespace, name: (namespace, name))
+        lineage = cls()
+        # Read as LineageGraph reads it: datasets and fields without a name are
+        # left out, tables that only appear in column lineage are inputs too,
+        # and columns without input fields add no edge
+        refs = [resolve(*ref) if _is_dataset_key(ref) else None for ref in event.refs]
+        outputs = [resolve(*dataset.key) if _is_dataset_key(dataset.key) else None for dataset in event.outputs]
+        lineage.inputs = {resolve(*dataset.key) for dataset in event.inputs if _is_dataset_key(dataset.key)}
+        lineage.inputs.update(refs[ref] for ref in event.input_ref)
+        lineage.inputs.discard(None)
+        lineage.outputs = set(outputs)
+        lineage.outputs.discard(None)
+        offsets = event.column_offsets
+        for c, out_index in enumerate(event.column_output):
+            sources = {
+                refs[event.input_ref[i]] + (event.input_field[i],): tuple(
+                    (t.type, t.subtype, t.description, bool(t.masking)) for t in event.input_transformations[i] or ()
+                )
+                for i in range(offsets[c], offsets[c + 1])
+                if refs[event.input_ref[i]] is not None and _is_field(event.input_field[i])
+            }
+            if sources and outputs[out_index] is not None and event.column_name[c]:
+                lineage.mappings.setdefault(outputs[out_index] + (event.column_name[c],), {}).update(sources)
+        sql = ((event.job_facets or {}).get("sql") or {})
+        lineage.sql = sql.get("query") if isinstance(sql, dict) else None
+        lineage.event_time = event.event_time
+        return lineage
+
+    @classmethod
+    def from_graph(cls, graph: LineageGraph, job_id: int) -> "JobLineage":
+        """Index the lineage a job owns in a graph; transformations are unknown."""
+        lineage = cls()
+        kinds = graph._kind
+        keys = graph._keys
+        for edge in graph._job_edges.get(job_id, ()):
+            source, target = edge >> _EDGE_SHIFT, edge & _EDGE_MASK
+            if kinds[source] == COLUMN:
+                lineage.mappings.setdefault(keys[target], {})[keys[source]] = None
+            elif kinds[source] == DATASET:
+                lineage.inputs.add(keys[source])
+            elif kinds[target] == DATASET:
+                lineage.outputs.add(keys[target])
+        lineage.sql = graph.job_sql(job_id)
+        lineage.event_time = graph.job_run(job_id)[1]
+        return lineage
+
+
+def lineage_from_events(events: Iterable[Union[LineageEvent, Dict[str, Any]]],
+                        resolver: Optional[DatasetResolver] = None) -> Dict[JobKey, JobLineage]:
+    """
+    Index the lineage of each job from composed events.
+
+    As in LineageGraph, a job's latest event replaces its earlier ones and an
+    event older than the one already seen (by eventTime) is ignored.
+
+    Returns:
+        Dict[JobKey, JobLineage]: (namespace, name) -> lineage
+    """
+    jobs: Dict[JobKey, JobLineage] = {}
+    for event in events:
+        if not isinstance(event, LineageEvent):
+            event = LineageEvent.from_dict(event)
+        current = jobs.get(event.job_key)
+        if current is not None and _is_older(event.event_time, current.event_time):
+            continue
+        jobs[event.job_key] = JobLineage.from_event(event, resolver)
+    return jobs
+
+
+def lineage_from_graph(graph: LineageGraph, jobs: Optional[Iterable[JobKey]] = None) -> Dict[JobKey, JobLineage]:
+    """
+    Index the lineage of each job in a graph.
+
+    Args:
+        graph: The graph
+        jobs: Optional job keys to include; jobs missing from the graph are left out
+
+    Returns:
+        Dict[JobKey, JobLineage]: (namespace, name) -> lineage
+    """
+    if jobs is None:
+        job_ids = list(graph._job_edges)
+    else:
+        job_ids = [job_id for job_id in (graph.find_job(*key) for key in jobs) if job_id is not None]
+    return {graph.key(job_id): JobLineage.from_graph(graph, job_id) for job_id in job_ids}
+
+
+def load_lineage(path: Union[str, Path], resolver: Optional[DatasetResolver] = None) -> Dict[JobKey, JobLineage]:
+    """
+    Index the lineage of each job from a file or folder.
+
+    Args:
+        path: An event file (one event, a JSON array of events or a dump file),
+            a folder of dump files (*.json) or a graph snapshot
+        resolver: Dataset identity resolver applied to event files
+
+    Returns:
+        Dict[JobKey, JobLineage]: (namespace, name) -> lineage
+
+    Raises:
+        OSError: If the path cannot be read
+        ValueError: If a snapshot cannot be read
+    """
+    path = Path(path)
+    if path.is_dir():
+        records = (record for file_path in sorted(path.glob("*.json")) for record in iter_dump_records(file_path))
+        return lineage_from_events(iter_events(records), resolver)
+    if is_snapshot(path):
+        graph, _ = load_snapshot(path, resolver)
+        return lineage_from_graph(graph)
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            data = None
+    if data is None:
+        records = iter_dump_records(path)
+    else:
+        records = data if isinstance(data, list) else [data]
+    return lineage_from_events(iter_events(records), resolver)
+
+
+def diff_lineage(old: Dict[JobKey, JobLineage], new: Dict[JobKey, JobLineage],
+                 jobs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Compare the lineage of two versions of a set of jobs.
+
+    Args:
+        old: Lineage of the old version, by job
+        new: Lineage of the new version, by job
+        jobs: Optional job name patterns (fnmatch) restricting the comparison
+
+    Returns:
+        Dict[str, Any]: {"changed", "summary", "datasets": {"added", "removed"},
+        "jobs": [per changed job: "job", "status" ("added", "removed" or "changed"),
+        "inputs", "outputs", "columns", "mappings" (each {"added", "removed"}),
+        "transformations" and "sqlChanged"]}
+    """
+    if jobs:
+        def wanted(key: JobKey) -> bool:
+            return any(fnmatch.fnmatchcase(key[1], pattern) for pattern in jobs)
+        old = {key: value for key, value in old.items() if wanted(key)}
+        new = {key: value for key, value in new.items() if wanted(key)}
+
+    empty = JobLineage()
+    job_diffs = []
+    summary = {name: 0 for name in ("jobsAdded", "jobsRemoved", "jobsChanged", "mappingsAdded",
+                                    "mappingsRemoved", "transformationsChanged")}
+    for key in sorted(old.keys() | new.keys(), key=_sort_key):
+        before = old.get(key)
+        after = new.get(key)
+        job_diff = _diff_job(before or empty, after or empty)
+        if before is None:
+            status = "added"
+        elif after is None:
+            status = "removed"
+        elif any(job_diff[part]["added"] or job_diff[part]["removed"]
+                 for part in ("inputs", "outputs", "columns", "mappings")) \
+                or job_diff["transformations"] or job_diff["sqlChanged"]:
+            status = "changed"
+        else:
+            continue
+        summary["jobs" + status.capitalize()] += 1
+        summary["mappingsAdded"] += len(job_diff["mappings"]["added"])
+        summary["mappingsRemoved"] += len(job_diff["mappings"]["removed"])
+        summary["transformationsChanged"] += len(job_diff["transformations"])
+        job_diffs.append({"job": {"namespace": key[0], "name": key[1]}, "status": status, **job_diff})
+
+    datasets = {
+        "added": _datasets(_referenced(new.values()) - _referenced(old.values())),
+        "removed": _datasets(_referenced(old.values()) - _referenced(new.values())),
+    }
+    return {
+        "changed": bool(job_diffs),
+        "summary": summary,
+        "datasets": datasets,
+        "jobs": job_diffs,
+    }
+
+
+def diff_events(old: Iterable[Union[LineageEvent, Dict[str, Any]]], new: Iterable[Union[LineageEvent, Dict[str, Any]]],
+                resolver: Optional[DatasetResolver] = None, jobs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Compare two sets of composed events (see diff_lineage)."""
+    return diff_lineage(lineage_from_events(old, resolver), lineage_from_events(new, resolver), jobs)
+
+
+def _diff_job(before: JobLineage, after: JobLineage) -> Dict[str, Any]:
+    old_mappings = {(source, target) for target, sources in before.mappings.items() for source in sources}
+    new_mappings = {(source, target) for target, sources in after.mappings.items() for source in sources}
+    transformations = []
+    for source, target in sorted(old_mappings & new_mappings, key=_sort_key):
+        old_value = before.mappings[target][source]
+        new_value = after.mappings[target][source]
+        if old_value is not None and new_value is not None and old_value != new_value:
+            transformations.append({
+                "input": _column(source),
+                "output": _column(target),
+                "old": _transformations(old_value),
+                "new": _transformations(new_value),
+            })
+    return {
+        "inputs": _added_removed(before.inputs, after.inputs, _datasets),
+        "outputs": _added_removed(before.outputs, after.outputs, _datasets),
+        "columns": _added_removed(before.mappings.keys(), after.mappings.keys(),
+                                  lambda keys: [_column(key) for key in sorted(keys, key=_sort_key)]),
+        "mappings": _added_removed(old_mappings, new_mappings, lambda pairs: [
+            {"input": _column(source), "output": _column(target)} for source, target in sorted(pairs, key=_sort_key)
+        ]),
+        "transformations": transformations,
+        "sqlChanged": before.sql != after.sql and before.sql is not None and after.sql is not None,
+    }
+
+
+def _added_removed(before, after, describe) -> Dict[str, List[Dict[str, Any]]]:
+    before = set(before)
+    after = set(after)
+    return {"added": describe(after - before), "removed": describe(before - after)}
+
+
+def _referenced(jobs: Iterable[JobLineage]) -> Set[DatasetKey]:
+    datasets: Set[DatasetKey] = set()
+    for lineage in jobs:
+        datasets |= lineage.inputs
+        datasets |= lineage.outputs
+    return datasets
+
+
+def _datasets(keys: Iterable[DatasetKey]) -> List[Dict[str, Any]]:
+    return [{"namespace": namespace, "name": name} for namespace, name in sorted(keys, key=_sort_key)]
+
+
+def _column(key: ColumnKey) -> Dict[str, Any]:
+    return {"namespace": key[0], "name": key[1], "field": key[2]}
+
+
+def _transformations(value: Transformations) -> List[Dict[str, Any]]:
+    return [{"type": type_, "subtype": subtype, "description": description, "masking": masking}
+            for type_, subtype, description, masking in value]
+
+
+def _sort_key(value: Any) -> Any:
+    # Namespaces may be None
+    if isinstance(value, tuple):
+        return tuple(_sort_key(part) for part in value)
+    return "" if value is None else value
+
+
+def format_diff(diff: Dict[str, Any]) -> str:
+    """Render a diff as text: one line per change, "+" added, "-" removed, "~" changed."""
+    def dataset(value: Dict[str, Any]) -> str:
+        return f"{value['namespace']}/{value['name']}" if value["namespace"] else value["name"]
+
+    def column(value: Dict[str, Any]) -> str:
+        return f"{dataset(value)}.{value['field']}"
+
+    def transformation(values: List[Dict[str, Any]]) -> str:
+        return ", ".join("/".join(part for part in (t["type"], t["subtype"]) if part) + (" (masking)" if t["masking"] else "")
+                         for t in values) or "none"
+
+    lines = []
+    marks = {"added": "+", "removed": "-", "changed": "~"}
+    for job_diff in diff["jobs"]:
+        lines.append(f"{marks[job_diff['status']]} job {dataset(job_diff['job'])}")
+        for part, label, describe in (("inputs", "input", dataset), ("outputs", "output", dataset),
+                                      ("columns", "column", column)):
+            for change in ("added", "removed"):
+                for value in job_diff[part][change]:
+                    lines.append(f"    {marks[change]} {label} {describe(value)}")
+        for change in ("added", "removed"):
+            for mapping in job_diff["mappings"][change]:
+                lines.append(f"    {marks[change]} mapping {column(mapping['input'])} -> {column(mapping['output'])}")
+        for change in job_diff["transformations"]:
+            lines.append(f"    ~ transformation {column(change['input'])} -> {column(change['output'])}: "
+                         f"{transformation(change['old'])} => {transformation(change['new'])}")
+        if job_diff["sqlChanged"]:
+            lines.append("    ~ sql")
+    for change in ("added", "removed"):
+        for value in diff["datasets"][change]:
+            lines.append(f"{marks[change]} dataset {dataset(value)}")
+    if not lines:
+        return "No lineage changes"
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Compare the lineage of two event files, dump folders or snapshots."""
+    parser = argparse.ArgumentParser(description="Show the lineage changes between two versions of jobs")
+    parser.add_argument("old", help="Old version: event file, dump folder or graph snapshot")
+    parser.add_argument("new", help="New version: event file, dump folder or graph snapshot")
+    parser.add_argument("--job", action="append", default=[], help="Job name pattern; repeatable")
+    parser.add_argument("--json", action="store_true", help="Print the diff as JSON")
+    parser.add_argument("--exit-code", action="store_true", help="Exit with 1 if the lineage changed")
+    args = parser.parse_args(argv)
+
+    resolver = default_resolver()
+    diff = diff_lineage(load_lineage(args.old, resolver), load_lineage(args.new, resolver), args.job)
+    if args.json:
+        print(json.dumps(diff, indent=2))
+    else:
+        print(format_diff(diff))
+    return 1 if args.exit_code and diff["changed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
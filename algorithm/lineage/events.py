@@ -0,0 +1,542 @@
+"""
+Compact in-memory representation of OpenLineage events.
+
+Events are held in `__slots__` classes instead of nested dicts. Namespaces,
+dataset names, field names and facet keys are interned, so the thousands of
+events that mention the same tables share one copy of each string. Column
+lineage is stored as flat parallel arrays rather than a dict per output
+field and a dict per input field.
+"""
+
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+# Strings up to this length are interned; longer ones (SQL text, source code) are kept as-is
+INTERN_MAX_LENGTH = 256
+
+_EMPTY: Tuple = ()
+_intern = sys.intern
+
+# Marks, in an extras dict, a modelled key the source object did not have.
+# Decoded JSON never holds a tuple, so it cannot be mistaken for a value.
+_ABSENT: Tuple = ()
+
+
+def _intern_str(value: Any) -> Any:
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LENGTH:
+        return _intern(value)
+    return value
+
+
+def _intern_tree(value: Any) -> Any:
+    """Intern keys and short string values of a decoded JSON tree in place."""
+    if isinstance(value, dict):
+        return {_intern(k): _intern_tree(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern_tree(v) for v in value]
+    return _intern_str(value)
+
+
+def _list(value: Any) -> Union[List[Any], Tuple]:
+    return value if isinstance(value, list) else _EMPTY
+
+
+def _update(data: Dict[str, Any], extra: Dict[str, Any]) -> None:
+    """Add the extras of an encoded object; a key marked _ABSENT is removed instead."""
+    for key, value in extra.items():
+        if isinstance(value, tuple):
+            data.pop(key, None)
+        else:
+            data[key] = value
+
+
+def _unmodelled(data: Dict[str, Any], keys: Tuple[str, ...]) -> Dict[str, Any]:
+    """Return the keys of data outside the modelled ones, with modelled keys it lacks or has as null."""
+    extra = {k: v for k, v in data.items() if k not in keys}
+    for key in keys:
+        value = data.get(key, _ABSENT)
+        if value is None or value is _ABSENT:
+            extra[key] = value
+    return extra
+
+
+class Transformation:
+    """A column transformation as described by the columnLineage facet."""
+
+    __slots__ = ('type', 'subtype', 'description', 'masking', 'extra')
+
+    def __init__(self, type: str, subtype: Optional[str] = None, description: Optional[str] = None,
+                 masking: Optional[bool] = None, extra: Optional[Dict[str, Any]] = None):
+        self.type = type
+        self.subtype = subtype
+        self.description = description
+        # None when the facet does not say, which the spec reads as False
+        self.masking = masking
+        # Keys outside the modelled ones
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Transformation":
+        masking = data.get("masking")
+        extra = {k: v for k, v in data.items() if k not in _TRANSFORMATION_KEYS}
+        return cls(
+            _intern_str(data.get("type")),
+            _intern_str(data.get("subtype")),
+            data.get("description"),
+            bool(masking) if masking is not None else None,
+            _intern_tree(extra) if extra else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if self.type is not None:
+            data["type"] = self.type
+        if self.subtype is not None:
+            data["subtype"] = self.subtype
+        if self.description is not None:
+            data["description"] = self.description
+        if self.masking is not None:
+            data["masking"] = self.masking
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Transformation) and (
+            (self.type, self.subtype, self.description, bool(self.masking), self.extra)
+            == (other.type, other.subtype, other.description, bool(other.masking), other.extra)
+        )
+
+    def __repr__(self) -> str:
+        return f"Transformation({self.type!r}, {self.subtype!r})"
+
+
+_TRANSFORMATION_KEYS = frozenset(("type", "subtype", "description", "masking"))
+
+
+class Dataset:
+    """An input or output dataset of an event."""
+
+    __slots__ = ('namespace', 'name', 'fields', 'facets', 'field_extra', 'extra')
+
+    def __init__(self, namespace: str, name: str, fields: Tuple[Tuple[str, Optional[str], Optional[str]], ...] = _EMPTY,
+                 facets: Optional[Dict[str, Any]] = None, field_extra: Optional[Dict[int, Dict[str, Any]]] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.namespace = namespace
+        self.name = name
+        # Schema facet fields as (name, type, description) tuples
+        self.fields = fields
+        # Remaining facets other than columnLineage, and the schema facet's own keys.
+        # The schema's "fields" entry is _ABSENT if it had none, and left out
+        # when the fields are the ones above.
+        self.facets = facets
+        # Schema field index -> keys outside name, type and description, or
+        # modelled keys the field lacked (_ABSENT) or had as null; None if there are none
+        self.field_extra = field_extra
+        # Keys outside namespace, name and facets (e.g. inputFacets), and
+        # namespace or name if missing or null; None if there are none
+        self.extra = extra
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.namespace, self.name)
+
+    def __repr__(self) -> str:
+        return f"Dataset({self.namespace!r}, {self.name!r})"
+
+
+class LineageEvent:
+    """
+    A single OpenLineage run event.
+
+    Column lineage is flattened into parallel arrays. Output column `c`
+    belongs to `outputs[column_output[c]]` and is named `column_name[c]`.
+    Its input fields are the entries `column_offsets[c]` to
+    `column_offsets[c + 1]` of `input_ref`, `input_field` and
+    `input_transformations`. Each `input_ref` entry indexes `refs`, the
+    event's table of distinct (namespace, name) pairs. An input field
+    without a transformations list has None in `input_transformations`.
+    """
+
+    __slots__ = (
+        'event_type', 'event_time', 'run_id', 'job_namespace', 'job_name',
+        'run_facets', 'job_facets', 'inputs', 'outputs', 'refs',
+        'column_output', 'column_name', 'column_offsets',
+        'input_ref', 'input_field', 'input_transformations',
+        'column_facet', 'field_extra', 'extra',
+    )
+
+    def __init__(self):
+        self.event_type: Optional[str] = None
+        self.event_time: Optional[str] = None
+        self.run_id: Optional[str] = None
+        self.job_namespace: Optional[str] = None
+        self.job_name: Optional[str] = None
+        self.run_facets: Optional[Dict[str, Any]] = None
+        self.job_facets: Optional[Dict[str, Any]] = None
+        self.inputs: Tuple[Dataset, ...] = _EMPTY
+        self.outputs: Tuple[Dataset, ...] = _EMPTY
+        self.refs: Tuple[Tuple[str, str], ...] = _EMPTY
+        self.column_output = array('i')
+        self.column_name: Tuple[str, ...] = _EMPTY
+        self.column_offsets = array('i', [0])
+        self.input_ref = array('i')
+        self.input_field: Tuple[str, ...] = _EMPTY
+        self.input_transformations: Tuple[Optional[Tuple[Transformation, ...]], ...] = _EMPTY
+        # Per output: the columnLineage facet's own keys (_producer, _schemaURL), or None
+        self.column_facet: Tuple[Optional[Dict[str, Any]], ...] = _EMPTY
+        # Keys outside the modelled ones of output columns and input fields, which
+        # are rare, by ("column", c) or ("input", i); None if there are none.
+        # A column without inputFields has "inputFields": _ABSENT here.
+        self.field_extra: Optional[Dict[Tuple[str, int], Dict[str, Any]]] = None
+        # Top-level keys outside the modelled ones, and modelled keys the event
+        # lacked (_ABSENT) or had as null, where encoding would differ
+        self.extra: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> "LineageEvent":
+        """Decode an event from a JSON document."""
+        return cls.from_dict(json.loads(data))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LineageEvent":
+        """Build an event from its decoded dict form."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected an OpenLineage event object, got {type(data).__name__}")
+
+        event = cls()
+        event.event_type = _intern_str(data.get("eventType"))
+        event.event_time = data.get("eventTime")
+
+        run = data.get("run")
+        run = run if isinstance(run, dict) else {}
+        event.run_id = run.get("runId")
+        run_facets = run.get("facets")
+        event.run_facets = _intern_tree(run_facets) if run_facets is not None else None
+
+        job = data.get("job")
+        job = job if isinstance(job, dict) else {}
+        event.job_namespace = _intern_str(job.get("namespace"))
+        event.job_name = _intern_str(job.get("name"))
+        job_facets = job.get("facets")
+        event.job_facets = _intern_tree(job_facets) if job_facets is not None else None
+
+        ref_index: Dict[Tuple[str, str], int] = {}
+        refs: List[Tuple[str, str]] = []
+
+        def ref(namespace: Any, name: Any) -> int:
+            key = (_intern_str(namespace), _intern_str(name))
+            index = ref_index.get(key)
+            if index is None:
+                index = ref_index[key] = len(refs)
+                refs.append(key)
+            return index
+
+        inputs = []
+        for item in _list(data.get("inputs")):
+            # An input's columnLineage facet is not indexed, only kept with its other facets
+            dataset, _ = _decode_dataset(item, split_column_lineage=False)
+            ref(dataset.namespace, dataset.name)
+            inputs.append(dataset)
+
+        outputs = []
+        column_facets = []
+        column_output = event.column_output
+        column_offsets = event.column_offsets
+        input_ref = event.input_ref
+        column_name: List[str] = []
+        input_field: List[str] = []
+        input_transformations: List[Optional[Tuple[Transformation, ...]]] = []
+        field_extra: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for out_index, item in enumerate(_list(data.get("outputs"))):
+            dataset, column_lineage = _decode_dataset(item)
+            ref(dataset.namespace, dataset.name)
+            outputs.append(dataset)
+            if column_lineage is None:
+                column_facets.append(None)
+                continue
+            facet_keys = {k: v for k, v in column_lineage.items() if k != "fields"}
+            column_facets.append(_intern_tree(facet_keys))
+            for field_name, lineage in (column_lineage.get("fields") or {}).items():
+                lineage = lineage or {}
+                if len(lineage) != 1 or not isinstance(lineage.get("inputFields"), list):
+                    extra = _unmodelled(lineage, ("inputFields",))
+                    field_extra[("column", len(column_name))] = _intern_tree(extra)
+                column_output.append(out_index)
+                column_name.append(_intern(field_name))
+                for input_item in lineage.get("inputFields") or _EMPTY:
+                    if not _INPUT_FIELD_KEYS.issuperset(input_item):
+                        extra = {k: v for k, v in input_item.items() if k not in _INPUT_FIELD_KEYS}
+                        field_extra[("input", len(input_field))] = _intern_tree(extra)
+                    input_ref.append(ref(input_item.get("namespace"), input_item.get("name")))
+                    input_field.append(_intern_str(input_item.get("field")))
+                    transformations = input_item.get("transformations")
+                    if transformations is None:
+                        input_transformations.append(None)
+                    else:
+                        input_transformations.append(
+                            tuple(Transformation.from_dict(t) for t in transformations) if transformations else _EMPTY
+                        )
+                column_offsets.append(len(input_field))
+
+        event.inputs = tuple(inputs)
+        event.outputs = tuple(outputs)
+        event.refs = tuple(refs)
+        event.column_name = tuple(column_name)
+        event.input_field = tuple(input_field)
+        event.input_transformations = tuple(input_transformations)
+        event.column_facet = tuple(column_facets)
+        event.field_extra = field_extra or None
+
+        extra = {k: v for k, v in data.items() if k not in _TOP_LEVEL_KEYS}
+        for key, kind in _CONTAINER_KEYS.items():
+            value = data.get(key, _ABSENT)
+            if not isinstance(value, kind):
+                extra[key] = value
+        for key in ("eventType", "eventTime"):
+            if key in data and data[key] is None:
+                extra[key] = None
+        event.extra = _intern_tree(extra) if extra else None
+        return event
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rebuild the event's dict form."""
+        data: Dict[str, Any] = {}
+        if self.event_type is not None:
+            data["eventType"] = self.event_type
+        if self.event_time is not None:
+            data["eventTime"] = self.event_time
+
+        run: Dict[str, Any] = {}
+        if self.run_id is not None:
+            run["runId"] = self.run_id
+        if self.run_facets is not None:
+            run["facets"] = self.run_facets
+        data["run"] = run
+
+        job: Dict[str, Any] = {}
+        if self.job_namespace is not None:
+            job["namespace"] = self.job_namespace
+        if self.job_name is not None:
+            job["name"] = self.job_name
+        if self.job_facets is not None:
+            job["facets"] = self.job_facets
+        data["job"] = job
+
+        data["inputs"] = [_encode_dataset(dataset, None) for dataset in self.inputs]
+
+        column_lineage: List[Optional[Dict[str, Any]]] = [None] * len(self.outputs)
+        for out_index, facet in enumerate(self.column_facet):
+            if facet is not None:
+                column_lineage[out_index] = dict(facet, fields={})
+        offsets = self.column_offsets
+        refs = self.refs
+        field_extra = self.field_extra or {}
+        for c, out_index in enumerate(self.column_output):
+            input_fields = []
+            for i in range(offsets[c], offsets[c + 1]):
+                namespace, name = refs[self.input_ref[i]]
+                input_item = {"namespace": namespace, "name": name, "field": self.input_field[i]}
+                transformations = self.input_transformations[i]
+                if transformations is not None:
+                    input_item["transformations"] = [t.to_dict() for t in transformations]
+                if field_extra:
+                    input_item.update(field_extra.get(("input", i), ()))
+                input_fields.append(input_item)
+            lineage = {"inputFields": input_fields}
+            if field_extra and ("column", c) in field_extra:
+                _update(lineage, field_extra[("column", c)])
+            column_lineage[out_index]["fields"][self.column_name[c]] = lineage
+        data["outputs"] = [_encode_dataset(dataset, column_lineage[i]) for i, dataset in enumerate(self.outputs)]
+
+        if self.extra:
+            _update(data, self.extra)
+        return data
+
+    def to_json(self) -> str:
+        """Encode the event as compact JSON, the format of the dump files."""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def job_key(self) -> Tuple[Optional[str], str]:
+        """
+        Identify the job that produced this event.
+
+        The composer templates do not always fill job namespace and name, so
+        this falls back to the parent job and then to the set of outputs.
+        """
+        if self.job_name:
+            return (self.job_namespace, self.job_name)
+        parent = (self.run_facets or {}).get("parent") or {}
+        parent_job = parent.get("job") or {}
+        if parent_job.get("name"):
+            return (parent_job.get("namespace"), parent_job["name"])
+        outputs = ",".join(sorted(f"{d.namespace}/{d.name}" for d in self.outputs))
+        return (None, f"outputs:{outputs}")
+
+    @property
+    def column_count(self) -> int:
+        return len(self.column_name)
+
+    def input_keys(self) -> List[Tuple[str, str]]:
+        return [dataset.key for dataset in self.inputs]
+
+    def output_keys(self) -> List[Tuple[str, str]]:
+        return [dataset.key for dataset in self.outputs]
+
+    def iter_column_edges(self) -> Iterator[Tuple[str, str, str, str, str, str]]:
+        """
+        Yield column lineage edges.
+
+        Yields:
+            (input_namespace, input_name, input_field, output_namespace, output_name, output_field)
+        """
+        offsets = self.column_offsets
+        refs = self.refs
+        outputs = self.outputs
+        for c, out_index in enumerate(self.column_output):
+            output = outputs[out_index]
+            field = self.column_name[c]
+            for i in range(offsets[c], offsets[c + 1]):
+                namespace, name = refs[self.input_ref[i]]
+                yield (namespace, name, self.input_field[i], output.namespace, output.name, field)
+
+    def __repr__(self) -> str:
+        return (f"LineageEvent({self.event_type!r}, job={self.job_key!r}, "
+                f"inputs={len(self.inputs)}, outputs={len(self.outputs)}, columns={self.column_count})")
+
+
+_TOP_LEVEL_KEYS = frozenset(("eventType", "eventTime", "run", "job", "inputs", "outputs"))
+
+
+# Top-level keys always encoded, so kept in the extras unless they have these types
+_CONTAINER_KEYS = {"run": dict, "job": dict, "inputs": list, "outputs": list}
+
+
+_DATASET_KEYS = ("namespace", "name", "facets")
+
+
+_SCHEMA_FIELD_KEYS = frozenset(("name", "type", "description"))
+
+
+_INPUT_FIELD_KEYS = frozenset(("namespace", "name", "field", "transformations"))
+
+
+def _decode_dataset(data: Dict[str, Any], split_column_lineage: bool = True) -> Tuple[Dataset, Optional[Dict[str, Any]]]:
+    """Decode a dataset, returning its columnLineage facet separately unless split_column_lineage is False."""
+    raw_facets = data.get("facets")
+    facets = raw_facets if isinstance(raw_facets, dict) else {}
+    schema = facets.get("schema")
+    fields: Tuple = _EMPTY
+    field_extra: Dict[int, Dict[str, Any]] = {}
+    schema_fields = schema.get("fields", _ABSENT) if isinstance(schema, dict) else None
+    # Fields that are not all objects are kept as they are, with the schema's other keys
+    split_fields = isinstance(schema_fields, list) and all(isinstance(f, dict) for f in schema_fields)
+    if split_fields:
+        fields = tuple(
+            (_intern_str(f.get("name")), _intern_str(f.get("type")), _intern_str(f.get("description")))
+            for f in schema_fields
+        )
+        for index, f in enumerate(schema_fields):
+            if "name" not in f or not _SCHEMA_FIELD_KEYS.issuperset(f) or None in f.values():
+                extra = _schema_field_extra(f)
+                if extra:
+                    field_extra[index] = _intern_tree(extra)
+    column_lineage = facets.get("columnLineage") if split_column_lineage else None
+    if not isinstance(column_lineage, dict):
+        column_lineage = None
+    other: Any = raw_facets
+    if isinstance(raw_facets, dict):
+        other = {k: v for k, v in facets.items() if k != "columnLineage" or column_lineage is None}
+        if split_fields:
+            other["schema"] = {k: v for k, v in schema.items() if k != "fields"}
+        elif schema_fields is _ABSENT:
+            other["schema"] = dict(schema, fields=_ABSENT)
+        other = _intern_tree(other)
+    extra = _unmodelled(data, _DATASET_KEYS)
+    # Facets are only encoded when present
+    if extra.get("facets") is _ABSENT:
+        del extra["facets"]
+    dataset = Dataset(_intern_str(data.get("namespace")), _intern_str(data.get("name")), fields, other,
+                      field_extra or None, _intern_tree(extra) if extra else None)
+    return dataset, column_lineage
+
+
+def _schema_field_extra(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return what encoding a schema field from its (name, type, description) tuple would not restore."""
+    extra = {k: v for k, v in data.items() if k not in _SCHEMA_FIELD_KEYS}
+    if "name" not in data:
+        extra["name"] = _ABSENT
+    # Type and description are only encoded when set
+    for key in ("type", "description"):
+        if key in data and data[key] is None:
+            extra[key] = None
+    return extra
+
+
+def _encode_dataset(dataset: Dataset, column_lineage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"namespace": dataset.namespace, "name": dataset.name}
+    facets: Dict[str, Any] = {}
+    if isinstance(dataset.facets, dict):
+        for key, value in dataset.facets.items():
+            if key == "schema" and isinstance(value, dict):
+                schema = dict(value)
+                if isinstance(schema.get("fields"), tuple):
+                    del schema["fields"]
+                elif "fields" not in schema:
+                    field_extra = dataset.field_extra or {}
+                    schema["fields"] = [_encode_schema_field(f, field_extra.get(i))
+                                        for i, f in enumerate(dataset.fields)]
+                facets[key] = schema
+            else:
+                facets[key] = value
+    if column_lineage is not None:
+        facets["columnLineage"] = column_lineage
+    if dataset.facets is not None or column_lineage is not None:
+        data["facets"] = facets if isinstance(dataset.facets, dict) or column_lineage is not None else dataset.facets
+    if dataset.extra:
+        _update(data, dataset.extra)
+    return data
+
+
+def _encode_schema_field(field: Tuple[str, Optional[str], Optional[str]],
+                         extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    name, type_, description = field
+    data: Dict[str, Any] = {"name": name}
+    if type_ is not None:
+        data["type"] = type_
+    if description is not None:
+        data["description"] = description
+    if extra:
+        _update(data, extra)
+    return data
+
+
+def iter_events(records: Any) -> Iterator[LineageEvent]:
+    """
+    Convert dump records to LineageEvent objects, skipping non-event records.
+
+    Args:
+        records: Iterable of decoded dump records (dicts or strings)
+
+    Yields:
+        LineageEvent: One per record that looks like an OpenLineage event
+    """
+    for record in records:
+        if isinstance(record, dict) and ("outputs" in record or "inputs" in record):
+            yield LineageEvent.from_dict(record)
@@ -0,0 +1,281 @@
+"""
+Streaming lineage graph exporters.
+
+Writes the lineage graph as Graphviz DOT, GraphML or CSV node and edge
+lists for other tools. The exporters are generators: they walk the node
+table once and the adjacency lists once, and yield text in chunks of about
+EXPORT_CHUNK_SIZE characters. Nothing beyond the current chunk is
+buffered, so the memory an export adds to a loaded graph, such as the one
+the API serves, does not depend on the size of the graph, and output can
+be written to a file or sent as a chunked HTTP response while it is
+produced. The command line first builds the graph from the dump folder,
+so its own memory use grows with the graph.
+
+Filters take fnmatch patterns on dataset and job names, matched without
+regard to case since the resolver may have folded the names:
+
+- datasets: only datasets matching a pattern, with their columns
+- jobs: only jobs matching a pattern, and the datasets they read or write
+
+With both, a dataset must match a dataset pattern and be read or written
+by a matching job. An edge is exported when both its endpoints are, and a
+column edge under a job filter only when a matching job writes the
+column's table.
+
+Command line:
+
+    python -m algorithm.lineage.export --format graphml --output lineage.graphml --dataset "mart.*"
+"""
+
+import argparse
+import csv
+import fnmatch
+import io
+import sys
+from typing import Callable, Iterator, List, Optional, Sequence, TextIO, Tuple
+from xml.sax.saxutils import escape
+
+from .graph import LineageGraph, COLUMN, DATASET, JOB, NODE_KINDS
+
+
+EXPORT_FORMATS = ("dot", "graphml", "csv", "csv-nodes")
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {
+    "dot": "text/vnd.graphviz",
+    "graphml": "application/xml",
+    "csv": "text/csv",
+    "csv-nodes": "text/csv",
+}
+
+_NODE_FIELDS = ("id", "type", "namespace", "name", "field")
+_EDGE_FIELDS = ("source_id", "source_type", "source_namespace", "source_name", "source_field",
+                "target_id", "target_type", "target_namespace", "target_name", "target_field")
+_DOT_SHAPES = {DATASET: "box", COLUMN: "ellipse", JOB: "hexagon"}
+
+
+class _NodeFilter:
+    """
+    Decides which nodes and edges an export includes, from the graph alone.
+
+    The node count is fixed when the filter is made, so nodes added while
+    an export is streaming, and edges to them, are left out of it.
+    """
+
+    def __init__(self, graph: LineageGraph, datasets: Optional[Sequence[str]], jobs: Optional[Sequence[str]]):
+        self.graph = graph
+        self.datasets = [pattern.lower() for pattern in datasets or []]
+        self.jobs = [pattern.lower() for pattern in jobs or []]
+        self.node_count = graph.node_count
+
+    def nodes(self) -> Iterator[int]:
+        for node_id in range(self.node_count):
+            if self.node(node_id):
+                yield node_id
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        graph = self.graph
+        for source in self.nodes():
+            for target in graph.successors(source):
+                if self.edge(source, target):
+                    yield source, target
+
+    def _job_matches(self, job_id: int) -> bool:
+        return not self.jobs or _matches(self.graph.key(job_id)[1], self.jobs)
+
+    def _dataset_matches(self, dataset_id: int) -> bool:
+        return not self.datasets or _matches(self.graph.key(dataset_id)[1], self.datasets)
+
+    def _dataset_included(self, dataset_id: int) -> bool:
+        if not self._dataset_matches(dataset_id):
+            return False
+        if not self.jobs:
+            return True
+        graph = self.graph
+        return (any(self._job_matches(job) for job in graph.predecessors(dataset_id))
+                or any(self._job_matches(job) for job in graph.successors(dataset_id)))
+
+    def node(self, node_id: int) -> bool:
+        if not self.datasets and not self.jobs:
+            return True
+        graph = self.graph
+        kind = graph._kind[node_id]
+        if kind == DATASET:
+            return self._dataset_included(node_id)
+        if kind == COLUMN:
+            return self._dataset_included(graph.dataset_of(node_id))
+        if not self._job_matches(node_id):
+            return False
+        if not self.datasets:
+            return True
+        return (any(self._dataset_matches(d) for d in graph.predecessors(node_id))
+                or any(self._dataset_matches(d) for d in graph.successors(node_id)))
+
+    def edge(self, source: int, target: int) -> bool:
+        if target >= self.node_count or not self.node(source) or not self.node(target):
+            return False
+        graph = self.graph
+        if self.jobs and graph._kind[target] == COLUMN:
+            return any(self._job_matches(job) for job in graph.predecessors(graph.dataset_of(target)))
+        return True
+
+
+def _matches(name: str, patterns: List[str]) -> bool:
+    if not isinstance(name, str):
+        return False
+    # Patterns are already lower case
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def iter_export_nodes(graph: LineageGraph, datasets: Optional[Sequence[str]] = None,
+                      jobs: Optional[Sequence[str]] = None) -> Iterator[int]:
+    """Yield the node ids an export with these filters includes, in id order."""
+    return _NodeFilter(graph, datasets, jobs).nodes()
+
+
+def iter_export_edges(graph: LineageGraph, datasets: Optional[Sequence[str]] = None,
+                      jobs: Optional[Sequence[str]] = None) -> Iterator[Tuple[int, int]]:
+    """Yield the (source, target) edges an export with these filters includes."""
+    return _NodeFilter(graph, datasets, jobs).edges()
+
+
+def export_graph(graph: LineageGraph, fmt: str, datasets: Optional[Sequence[str]] = None,
+                 jobs: Optional[Sequence[str]] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Stream the graph in an export format.
+
+    Args:
+        graph: The lineage graph
+        fmt: "dot", "graphml", "csv" (edge list) or "csv-nodes" (node list)
+        datasets: Optional dataset name patterns
+        jobs: Optional job name patterns
+        chunk_size: Approximate number of characters per yielded chunk
+
+    Yields:
+        str: Consecutive pieces of the document
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    writers = {"dot": _dot, "graphml": _graphml, "csv": _csv_edges, "csv-nodes": _csv_nodes}
+    if fmt not in writers:
+        raise ValueError(f"Unknown export format: {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    chunk: List[str] = []
+    size = 0
+    for piece in writers[fmt](graph, _NodeFilter(graph, datasets, jobs)):
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def write_export(graph: LineageGraph, fmt: str, out: TextIO, datasets: Optional[Sequence[str]] = None,
+                 jobs: Optional[Sequence[str]] = None) -> None:
+    """Write an export to a text stream chunk by chunk."""
+    for chunk in export_graph(graph, fmt, datasets, jobs):
+        out.write(chunk)
+
+
+def _label(graph: LineageGraph, node_id: int) -> str:
+    key = graph.key(node_id)
+    # Graphs from older snapshots may hold columns without a field name
+    return f"{key[1]}.{key[2]}" if len(key) > 2 and key[2] is not None else str(key[1])
+
+
+def _dot(graph: LineageGraph, include: _NodeFilter) -> Iterator[str]:
+    yield "digraph lineage {\n  rankdir=LR;\n"
+    for node_id in include.nodes():
+        kind = graph._kind[node_id]
+        label = _label(graph, node_id).replace("\\", "\\\\").replace('"', '\\"')
+        yield f'  n{node_id} [label="{label}", shape={_DOT_SHAPES[kind]}, kind={NODE_KINDS[kind]}];\n'
+    for source, target in include.edges():
+        yield f"  n{source} -> n{target};\n"
+    yield "}\n"
+
+
+def _graphml(graph: LineageGraph, include: _NodeFilter) -> Iterator[str]:
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+           '  <key id="type" for="node" attr.name="type" attr.type="string"/>\n'
+           '  <key id="namespace" for="node" attr.name="namespace" attr.type="string"/>\n'
+           '  <key id="name" for="node" attr.name="name" attr.type="string"/>\n'
+           '  <key id="field" for="node" attr.name="field" attr.type="string"/>\n'
+           '  <graph id="lineage" edgedefault="directed">\n')
+    for node_id in include.nodes():
+        key = graph.key(node_id)
+        data = [f'<data key="type">{NODE_KINDS[graph._kind[node_id]]}</data>']
+        if key[0] is not None:
+            data.append(f'<data key="namespace">{escape(str(key[0]))}</data>')
+        data.append(f'<data key="name">{escape(str(key[1]))}</data>')
+        if len(key) > 2 and key[2] is not None:
+            data.append(f'<data key="field">{escape(key[2])}</data>')
+        yield f'    <node id="n{node_id}">{"".join(data)}</node>\n'
+    for source, target in include.edges():
+        yield f'    <edge source="n{source}" target="n{target}"/>\n'
+    yield "  </graph>\n</graphml>\n"
+
+
+def _csv_row_writer() -> Callable[[Sequence], str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def row(values: Sequence) -> str:
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+    return row
+
+
+def _node_columns(graph: LineageGraph, node_id: int) -> list:
+    key = graph.key(node_id)
+    return [node_id, NODE_KINDS[graph._kind[node_id]], key[0], key[1], key[2] if len(key) > 2 else None]
+
+
+def _csv_nodes(graph: LineageGraph, include: _NodeFilter) -> Iterator[str]:
+    row = _csv_row_writer()
+    yield row(_NODE_FIELDS)
+    for node_id in include.nodes():
+        yield row(_node_columns(graph, node_id))
+
+
+def _csv_edges(graph: LineageGraph, include: _NodeFilter) -> Iterator[str]:
+    row = _csv_row_writer()
+    yield row(_EDGE_FIELDS)
+    for source, target in include.edges():
+        yield row(_node_columns(graph, source) + _node_columns(graph, target))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Export the lineage graph built from the dump folder."""
+    from .service import LineageService
+
+    parser = argparse.ArgumentParser(description="Export the lineage graph as DOT, GraphML or CSV")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="graphml",
+                        help="Output format; csv is the edge list, csv-nodes the node list (default: graphml)")
+    parser.add_argument("--output", "-o", default="-", help="Output file, or - for stdout (default: -)")
+    parser.add_argument("--folder", default=None,
+                        help="Dump folder (default: $LINEAGENT_DUMPS_FOLDER or lineage_extraction_dumps)")
+    parser.add_argument("--dataset", action="append", default=[], help="Dataset name pattern; repeatable")
+    parser.add_argument("--job", action="append", default=[], help="Job name pattern; repeatable")
+    args = parser.parse_args(argv)
+
+    # A read-only export: never save a snapshot of what was ingested
+    service = LineageService(args.folder, snapshot_every=0)
+    service.refresh()
+    if args.output == "-":
+        write_export(service.graph, args.format, sys.stdout, args.dataset, args.job)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write_export(service.graph, args.format, f, args.dataset, args.job)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
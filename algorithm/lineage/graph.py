@@ -0,0 +1,616 @@
+"""
+In-memory column-level lineage graph.
+
+Events are ingested into a directed graph with three kinds of nodes:
+datasets, columns and jobs. Every node gets a dense integer id, and each
+node's outgoing and incoming neighbours are kept in `array('i')` lists, so
+traversals touch only machine integers.
+
+Edges:
+    dataset -> job      the job reads the dataset
+    job -> dataset      the job writes the dataset
+    column -> column    the output column is derived from the input column
+
+Each job owns the edges its latest event contributed. Ingesting a newer
+event for the same job swaps the old edge set for the new one, so
+re-extracting a job replaces its lineage instead of accumulating stale
+edges, and events from older runs are ignored. Edges shared by several
+jobs are reference counted and only disappear with their last owner.
+
+With a DatasetResolver (see identity.py), dataset names are resolved to
+their canonical form as events are ingested and when datasets or columns
+are looked up, so differently spelled references share one node.
+
+Composed events do not always name every dataset or column. A dataset
+without a string name, or with a namespace that is not a string, is left
+out at ingest with the column lineage that refers to it, and so is an
+input field without a field name. skipped_references counts them.
+"""
+
+import json
+from array import array
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .events import LineageEvent
+from .identity import DatasetResolver
+
+
+DATASET = 0
+COLUMN = 1
+JOB = 2
+
+NODE_KINDS = ("dataset", "column", "job")
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+
+# Edge keys pack (source, target) into one int; node ids must fit in 32 bits
+_EDGE_SHIFT = 32
+_EDGE_MASK = (1 << _EDGE_SHIFT) - 1
+
+
+class LineageGraph:
+    """
+    Directed lineage graph with integer node ids and array-backed adjacency lists.
+
+    Example:
+        graph = LineageGraph.from_folder("lineage_extraction_dumps")
+        column = graph.find_column("warehouse", "mart.summary", "total")
+        for node_id, depth in graph.upstream(column, max_depth=3).items():
+            print(depth, graph.node_info(node_id))
+    """
+
+    def __init__(self, resolver: Optional[DatasetResolver] = None):
+        # Canonicalises dataset keys, or None to use them as written
+        self.resolver = resolver
+        # Node tables, indexed by node id
+        self._kind = bytearray()
+        self._keys: List[Tuple] = []
+        self._parent = array('i')
+        self._down: List[array] = []
+        self._up: List[array] = []
+        # Key -> node id, one table per kind
+        self._ids: Tuple[Dict[Tuple, int], ...] = ({}, {}, {})
+        # Dataset node id -> its column node ids
+        self._columns: Dict[int, array] = {}
+        # Dataset name -> dataset node ids in any namespace
+        self._dataset_names: Dict[str, List[int]] = {}
+        # Packed edge key -> number of jobs contributing the edge
+        self._edge_refs: Dict[int, int] = {}
+        # Job node id -> packed edge keys contributed by its latest event
+        self._job_edges: Dict[int, array] = {}
+        # Job node id -> (run id, event time) of its latest event
+        self._job_runs: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        # Job node id -> SQL text of its latest event, from the SqlJobFacet
+        self._job_sql: Dict[int, str] = {}
+        # Callables notified as listener(source, target, added) when an edge appears or disappears
+        self._edge_listeners: List[Callable[[int, int, bool], None]] = []
+        # Callables notified as listener(job_id) when a job's event is applied or the job is removed
+        self._job_listeners: List[Callable[[int], None]] = []
+        self.event_count = 0
+        # Dataset references and input fields left out at ingest for want of a name
+        self.skipped_references = 0
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_events(cls, events: Iterable[Union[LineageEvent, Dict[str, Any]]],
+                    resolver: Optional[DatasetResolver] = None) -> "LineageGraph":
+        """Build a graph from LineageEvent objects or event dicts."""
+        graph = cls(resolver)
+        for event in events:
+            graph.add_event(event)
+        return graph
+
+    @classmethod
+    def from_folder(cls, folder: Union[str, Path] = "lineage_extraction_dumps", pattern: str = "*.json",
+                    resolver: Optional[DatasetResolver] = None) -> "LineageGraph":
+        """
+        Build a graph from the newline-delimited dump files written by dump_json_record.
+
+        Args:
+            folder: Folder holding the dump files (default: "lineage_extraction_dumps")
+            pattern: Glob pattern selecting the dump files (default: "*.json")
+            resolver: Optional dataset identity resolver
+
+        Returns:
+            LineageGraph: Graph of every event found, in file order
+        """
+        graph = cls(resolver)
+        folder_path = Path(folder)
+        if not folder_path.is_dir():
+            return graph
+        for file_path in sorted(folder_path.glob(pattern)):
+            graph.add_records(iter_dump_records(file_path))
+        return graph
+
+    def add_records(self, records: Iterable[Any], touched: Optional[Set[int]] = None) -> int:
+        """
+        Ingest decoded dump records, skipping records that are not events.
+
+        A malformed event is skipped with a warning, so it does not keep the
+        records after it from being applied.
+
+        Args:
+            records: Decoded dump records
+            touched: Optional set that receives the endpoints of every added or removed edge
+
+        Returns:
+            int: Number of events applied
+        """
+        count = 0
+        for record in records:
+            if isinstance(record, dict) and ("outputs" in record or "inputs" in record):
+                try:
+                    job = self.add_event(record, touched)
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    print(f"Warning: Skipping malformed lineage event: {e!r}")
+                    continue
+                if job is not None:
+                    count += 1
+        return count
+
+    def add_event(self, event: Union[LineageEvent, Dict[str, Any]], touched: Optional[Set[int]] = None) -> Optional[int]:
+        """
+        Apply one event in O(event size), replacing the edges of the job's earlier event.
+
+        Only the difference between the job's old and new edge sets is
+        applied, so re-ingesting an identical event changes nothing. An
+        event older than the job's current one (by eventTime) is a
+        superseded run and is ignored.
+
+        Args:
+            event: A LineageEvent or its dict form
+            touched: Optional set that receives the endpoints of every added or removed edge
+
+        Returns:
+            Optional[int]: The job's node id, or None if the event was superseded
+        """
+        if not isinstance(event, LineageEvent):
+            event = LineageEvent.from_dict(event)
+
+        job = self._node(JOB, event.job_key)
+        current = self._job_runs.get(job)
+        if current is not None and _is_older(event.event_time, current[1]):
+            return None
+
+        owned = self._event_edges(job, event)
+        previous = self._job_edges.get(job)
+        if previous is not None:
+            old = set(previous)
+            for key in old - owned:
+                self._release(key, touched)
+            owned_new = owned - old
+        else:
+            owned_new = owned
+        for key in owned_new:
+            self._acquire(key, touched)
+
+        self._job_edges[job] = array('q', owned)
+        self._job_runs[job] = (event.run_id, event.event_time)
+        sql = _sql_text(event.job_facets)
+        if sql:
+            self._job_sql[job] = sql
+        else:
+            self._job_sql.pop(job, None)
+        self.event_count += 1
+        for listener in self._job_listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                _listener_failed(listener, e)
+        return job
+
+    def remove_job(self, job_id: int, touched: Optional[Set[int]] = None) -> bool:
+        """
+        Retract every edge contributed by a job.
+
+        Args:
+            job_id: Job node id
+            touched: Optional set that receives the endpoints of every removed edge
+
+        Returns:
+            bool: True if the job had edges to retract
+        """
+        owned = self._job_edges.pop(job_id, None)
+        if owned is None:
+            return False
+        for key in owned:
+            self._release(key, touched)
+        self._job_runs.pop(job_id, None)
+        self._job_sql.pop(job_id, None)
+        for listener in self._job_listeners:
+            try:
+                listener(job_id)
+            except Exception as e:
+                _listener_failed(listener, e)
+        return True
+
+    def _event_edges(self, job: int, event: LineageEvent) -> Set[int]:
+        """Create the event's nodes and return its packed edge keys."""
+        owned = set()
+        # -1 for references that name no dataset
+        datasets = [self._dataset(ref) if _is_dataset_key(ref) else -1 for ref in event.refs]
+        skipped = datasets.count(-1)
+        output_datasets = []
+        for dataset in event.outputs:
+            dataset_id = self._dataset(dataset.key) if _is_dataset_key(dataset.key) else -1
+            output_datasets.append(dataset_id)
+            if dataset_id >= 0:
+                owned.add((job << _EDGE_SHIFT) | dataset_id)
+                self._add_schema_columns(dataset_id, dataset)
+
+        input_ids = set()
+        for dataset in event.inputs:
+            if _is_dataset_key(dataset.key):
+                dataset_id = self._dataset(dataset.key)
+                input_ids.add(dataset_id)
+                self._add_schema_columns(dataset_id, dataset)
+        # Tables that only appear in column lineage are inputs too
+        for ref in event.input_ref:
+            input_ids.add(datasets[ref])
+        input_ids.discard(-1)
+        for dataset_id in input_ids:
+            owned.add((dataset_id << _EDGE_SHIFT) | job)
+
+        offsets = event.column_offsets
+        input_ref = event.input_ref
+        input_field = event.input_field
+        for c, out_index in enumerate(event.column_output):
+            if output_datasets[out_index] < 0 or not event.column_name[c]:
+                continue
+            target = self._column(output_datasets[out_index], event.column_name[c])
+            for i in range(offsets[c], offsets[c + 1]):
+                dataset_id = datasets[input_ref[i]]
+                if dataset_id < 0:
+                    continue
+                if not _is_field(input_field[i]):
+                    skipped += 1
+                    continue
+                source = self._column(dataset_id, input_field[i])
+                owned.add((source << _EDGE_SHIFT) | target)
+        if skipped:
+            self.skipped_references += skipped
+            print(f"Warning: Skipping {skipped} dataset or column reference(s) without a name in an event of job "
+                  f"{self._keys[job][1]}")
+        return owned
+
+    def add_edge_listener(self, listener: Callable[[int, int, bool], None]) -> None:
+        """
+        Register a callable notified whenever an edge is added to or removed from the graph.
+
+        An exception raised by the listener is printed as a warning and does
+        not stop the change.
+
+        Args:
+            listener: Called as listener(source, target, added)
+        """
+        if listener not in self._edge_listeners:
+            self._edge_listeners.append(listener)
+
+    def remove_edge_listener(self, listener: Callable[[int, int, bool], None]) -> None:
+        if listener in self._edge_listeners:
+            self._edge_listeners.remove(listener)
+
+    def add_job_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Register a callable notified after a job's event is applied or the job is removed.
+
+        Nodes created by the event already exist when it is called. An
+        exception raised by the listener is printed as a warning.
+
+        Args:
+            listener: Called as listener(job_id)
+        """
+        if listener not in self._job_listeners:
+            self._job_listeners.append(listener)
+
+    def remove_job_listener(self, listener: Callable[[int], None]) -> None:
+        if listener in self._job_listeners:
+            self._job_listeners.remove(listener)
+
+    def _node(self, kind: int, key: Tuple) -> int:
+        ids = self._ids[kind]
+        node_id = ids.get(key)
+        if node_id is None:
+            node_id = ids[key] = len(self._keys)
+            self._kind.append(kind)
+            self._keys.append(key)
+            self._parent.append(-1)
+            self._down.append(array('i'))
+            self._up.append(array('i'))
+            if kind == DATASET:
+                self._dataset_names.setdefault(key[1], []).append(node_id)
+        return node_id
+
+    def _dataset(self, key: Tuple) -> int:
+        if self.resolver is not None:
+            key = self.resolver.resolve(*key)
+        return self._node(DATASET, key)
+
+    def _column(self, dataset_id: int, field: str) -> int:
+        namespace, name = self._keys[dataset_id]
+        key = (namespace, name, field)
+        node_id = self._ids[COLUMN].get(key)
+        if node_id is None:
+            node_id = self._node(COLUMN, key)
+            self._parent[node_id] = dataset_id
+            columns = self._columns.get(dataset_id)
+            if columns is None:
+                columns = self._columns[dataset_id] = array('i')
+            columns.append(node_id)
+        return node_id
+
+    def _add_schema_columns(self, dataset_id: int, dataset) -> None:
+        for field in dataset.fields:
+            if _is_field(field[0]):
+                self._column(dataset_id, field[0])
+
+    def _acquire(self, key: int, touched: Optional[Set[int]]) -> None:
+        refs = self._edge_refs.get(key)
+        if refs is not None:
+            self._edge_refs[key] = refs + 1
+            return
+        self._edge_refs[key] = 1
+        source, target = key >> _EDGE_SHIFT, key & _EDGE_MASK
+        self._down[source].append(target)
+        self._up[target].append(source)
+        if touched is not None:
+            touched.add(source)
+            touched.add(target)
+        for listener in self._edge_listeners:
+            try:
+                listener(source, target, True)
+            except Exception as e:
+                _listener_failed(listener, e)
+
+    def _release(self, key: int, touched: Optional[Set[int]]) -> None:
+        refs = self._edge_refs[key] - 1
+        if refs:
+            self._edge_refs[key] = refs
+            return
+        del self._edge_refs[key]
+        source, target = key >> _EDGE_SHIFT, key & _EDGE_MASK
+        self._down[source].remove(target)
+        self._up[target].remove(source)
+        if touched is not None:
+            touched.add(source)
+            touched.add(target)
+        for listener in self._edge_listeners:
+            try:
+                listener(source, target, False)
+            except Exception as e:
+                _listener_failed(listener, e)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def find_dataset(self, namespace: Optional[str], name: str) -> Optional[int]:
+        if self.resolver is not None:
+            namespace, name = self.resolver.resolve(namespace, name)
+        return self._ids[DATASET].get((namespace, name))
+
+    def find_datasets(self, name: str) -> List[int]:
+        """Return the node ids of every dataset with this name, whatever its namespace."""
+        if self.resolver is not None:
+            found = []
+            for canonical in self.resolver.canonical_names(name):
+                found.extend(node_id for node_id in self._dataset_names.get(canonical, ()) if node_id not in found)
+            return found
+        return list(self._dataset_names.get(name, ()))
+
+    def find_column(self, namespace: Optional[str], name: str, field: str) -> Optional[int]:
+        if self.resolver is not None:
+            namespace, name = self.resolver.resolve(namespace, name)
+        return self._ids[COLUMN].get((namespace, name, field))
+
+    def find_job(self, namespace: Optional[str], name: str) -> Optional[int]:
+        return self._ids[JOB].get((namespace, name))
+
+    def kind(self, node_id: int) -> str:
+        return NODE_KINDS[self._kind[node_id]]
+
+    def key(self, node_id: int) -> Tuple:
+        """Return (namespace, name) for datasets and jobs, (namespace, name, field) for columns."""
+        return self._keys[node_id]
+
+    def dataset_of(self, column_id: int) -> Optional[int]:
+        """Return the dataset node id owning a column node, or None for other nodes."""
+        parent = self._parent[column_id]
+        return parent if parent >= 0 else None
+
+    def columns_of(self, dataset_id: int) -> List[int]:
+        """Return the column node ids of a dataset."""
+        return list(self._columns.get(dataset_id, ()))
+
+    def job_run(self, job_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """Return (run id, event time) of the latest event ingested for a job."""
+        return self._job_runs.get(job_id, (None, None))
+
+    def job_sql(self, job_id: int) -> Optional[str]:
+        """Return the SQL text of the latest event ingested for a job, if it had a SqlJobFacet."""
+        return self._job_sql.get(job_id)
+
+    def node_info(self, node_id: int) -> Dict[str, Any]:
+        """Describe a node as a JSON-friendly dict."""
+        kind = self._kind[node_id]
+        key = self._keys[node_id]
+        info: Dict[str, Any] = {"id": node_id, "type": NODE_KINDS[kind], "namespace": key[0], "name": key[1]}
+        if kind == COLUMN:
+            info["field"] = key[2]
+        elif kind == JOB:
+            run_id, event_time = self.job_run(node_id)
+            info["runId"] = run_id
+            info["eventTime"] = event_time
+        return info
+
+    def nodes(self, kind: Optional[str] = None) -> Iterator[int]:
+        """Iterate node ids, optionally only those of one kind ("dataset", "column" or "job")."""
+        if kind is None:
+            return iter(range(len(self._keys)))
+        return iter(self._ids[NODE_KINDS.index(kind)].values())
+
+    def iter_edges(self) -> Iterator[Tuple[int, int]]:
+        """Iterate (source, target) node id pairs."""
+        for source, targets in enumerate(self._down):
+            for target in targets:
+                yield source, target
+
+    def has_edge(self, source: int, target: int) -> bool:
+        return ((source << _EDGE_SHIFT) | target) in self._edge_refs
+
+    def successors(self, node_id: int) -> array:
+        return self._down[node_id]
+
+    def predecessors(self, node_id: int) -> array:
+        return self._up[node_id]
+
+    @property
+    def node_count(self) -> int:
+        return len(self._keys)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._edge_refs)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, node_id: int) -> bool:
+        return isinstance(node_id, int) and 0 <= node_id < len(self._keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": self.event_count,
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "datasets": len(self._ids[DATASET]),
+            "columns": len(self._ids[COLUMN]),
+            "jobs": len(self._ids[JOB]),
+            "skipped": self.skipped_references,
+        }
+
+    # ------------------------------------------------------------------
+    # Traversal
+    # ------------------------------------------------------------------
+
+    def downstream(self, node_id: int, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """
+        Find every node reachable from a node.
+
+        Args:
+            node_id: Start node
+            max_depth: Maximum number of edges to follow, or None for no limit
+
+        Returns:
+            Dict[int, int]: Reached node id -> depth, in breadth-first order, excluding the start node
+        """
+        return _walk(self._down, node_id, max_depth)
+
+    def upstream(self, node_id: int, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """
+        Find every node a node is derived from.
+
+        Args:
+            node_id: Start node
+            max_depth: Maximum number of edges to follow, or None for no limit
+
+        Returns:
+            Dict[int, int]: Reached node id -> depth, in breadth-first order, excluding the start node
+        """
+        return _walk(self._up, node_id, max_depth)
+
+    def traverse(self, node_id: int, direction: str = DOWNSTREAM, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """Traverse in the given direction ("upstream" or "downstream")."""
+        if direction == DOWNSTREAM:
+            return self.downstream(node_id, max_depth)
+        if direction == UPSTREAM:
+            return self.upstream(node_id, max_depth)
+        raise ValueError(f"Unknown direction: {direction!r}")
+
+
+def _listener_failed(listener: Callable, error: Exception) -> None:
+    # A listener keeps derived state (search, history); its failure must not stop ingestion part-way
+    print(f"Warning: Lineage graph listener {getattr(listener, '__qualname__', listener)} failed: {error!r}")
+
+
+def _sql_text(job_facets: Optional[Dict[str, Any]]) -> Optional[str]:
+    sql = (job_facets or {}).get("sql")
+    query = sql.get("query") if isinstance(sql, dict) else None
+    return query if isinstance(query, str) else None
+
+
+def _is_dataset_key(key: Tuple) -> bool:
+    """Return True if a (namespace, name) pair names a dataset the graph can hold."""
+    namespace, name = key
+    return isinstance(name, str) and name != "" and (namespace is None or isinstance(namespace, str))
+
+
+def _is_field(field: Any) -> bool:
+    """Return True if a field name can name a column node."""
+    return isinstance(field, str) and field != ""
+
+
+def _is_older(event_time: Optional[str], current_time: Optional[str]) -> bool:
+    """Return True if event_time is strictly before current_time; unknown times never are."""
+    if not event_time or not current_time:
+        return False
+    try:
+        return _parse_time(event_time) < _parse_time(current_time)
+    except (TypeError, ValueError):
+        # Unparseable or mixed naive/aware timestamps: ISO strings still sort
+        return event_time < current_time
+
+
+def _parse_time(value: str) -> datetime:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def _walk(adjacency: List[array], start: int, max_depth: Optional[int]) -> Dict[int, int]:
+    depths = {start: 0}
+    frontier = [start]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            for neighbour in adjacency[node]:
+                if neighbour not in depths:
+                    depths[neighbour] = depth
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    del depths[start]
+    return depths
+
+
+def iter_dump_records(file_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Yield the decoded records of a newline-delimited dump file, skipping unreadable lines.
+
+    Args:
+        file_path: Path to a file written by dump_json_record
+
+    Yields:
+        Any: One decoded JSON value per line
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from decode_dump_lines(f)
+
+
+def decode_dump_lines(lines: Iterable[Union[str, bytes]]) -> Iterator[Any]:
+    """Decode newline-delimited JSON lines, skipping blank and unreadable ones."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
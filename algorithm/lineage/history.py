@@ -0,0 +1,464 @@
+"""
+Versioned lineage edges for as-of queries.
+
+LineageGraph keeps the latest lineage only. LineageHistory follows a graph
+and records, for every edge, the intervals during which it existed, dated
+by the eventTime of the events that added and removed it:
+
+- an edge that is in the graph has an open interval, starting at the
+  time of the earliest event that contributed it since it last appeared
+- an edge that disappears (its last owning job dropped it or was
+  removed) closes that interval; closed intervals are kept per edge as a
+  sorted flat array of disjoint [start, end) pairs
+
+Past edges also get their own adjacency lists. An as-of traversal walks
+the graph's adjacency plus the past one and keeps the edges whose
+intervals cover the requested time, checked by binary search, so it
+costs the same as a traversal of the graph at that time: no events are
+replayed.
+
+Times come from the events' eventTime. An event without a readable time,
+and a removed job, are dated when they are applied. As in the graph, an
+event older than its job's current one is ignored; an event of another
+job that arrives late moves the start of the edges it owns back to its
+time.
+
+Closed intervals are the only part that grows with time. compact()
+drops those that ended before a horizon, and with a retention the
+history compacts itself as they accumulate. As-of queries before the
+horizon are refused rather than answered from incomplete history.
+
+The history can be saved next to a graph snapshot and loaded with it
+(see save and load).
+"""
+
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .graph import LineageGraph, DOWNSTREAM, UPSTREAM, _EDGE_MASK, _EDGE_SHIFT, _parse_time
+
+
+DEFAULT_RETENTION_DAYS = 90
+# Closed intervals accumulated before the first automatic compaction
+COMPACT_MIN_INTERVALS = 4096
+
+_MAGIC = b"LGHIST"
+_VERSION = 1
+_PREFIX = struct.Struct("<6sHQ")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Time = Union[str, datetime]
+
+
+class LineageHistory:
+    """
+    Validity intervals of the edges of a LineageGraph, kept current as events are applied.
+
+    Edges already in the graph when the history is created are dated by
+    the latest event of the jobs owning them, so to keep full history,
+    create it on an empty graph and ingest afterwards.
+
+    Args:
+        graph: The graph to follow
+        retention: Seconds of closed intervals to keep; older ones are compacted
+            away as they accumulate. None keeps everything.
+
+    Example:
+        history = LineageHistory(graph)
+        graph.add_records(records)
+        history.upstream(table, "2026-09-01T00:00:00Z")
+    """
+
+    def __init__(self, graph: LineageGraph, retention: Optional[float] = None):
+        self.graph = graph
+        self.retention = retention
+        # Nothing before this time (microseconds since the epoch) is known
+        self.horizon: Optional[int] = None
+        # Packed edge key -> start of its current interval, for edges in the graph
+        self._since: Dict[int, int] = {}
+        # Packed edge key -> closed intervals as [start, end, start, end, ...]
+        self._closed: Dict[int, array] = {}
+        self._closed_count = 0
+        self._compact_at = COMPACT_MIN_INTERVALS
+        # Node id -> neighbours over edges with closed intervals
+        self._past_down: Dict[int, array] = {}
+        self._past_up: Dict[int, array] = {}
+        # Edges added and removed by the event being applied, dated once it is
+        self._pending: List[Tuple[int, bool]] = []
+        self._latest = 0
+        self._seed()
+        graph.add_edge_listener(self._on_edge)
+        graph.add_job_listener(self._on_job)
+
+    def close(self) -> None:
+        """Stop following changes to the graph."""
+        self.graph.remove_edge_listener(self._on_edge)
+        self.graph.remove_job_listener(self._on_job)
+
+    def _seed(self) -> None:
+        graph = self.graph
+        now = _now()
+        since = self._since
+        for job, owned in graph._job_edges.items():
+            time = _event_micros(graph.job_run(job)[1], now)
+            self._latest = max(self._latest, time)
+            for key in owned:
+                current = since.get(key)
+                if current is None or time < current:
+                    since[key] = time
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _on_edge(self, source: int, target: int, added: bool) -> None:
+        self._pending.append(((source << _EDGE_SHIFT) | target, added))
+
+    def _on_job(self, job: int) -> None:
+        graph = self.graph
+        removed = job not in graph._job_edges
+        time = _now() if removed else _event_micros(graph.job_run(job)[1], _now())
+        since = self._since
+        for key, added in self._pending:
+            if added:
+                since[key] = time
+            else:
+                start = since.pop(key, None)
+                if start is not None:
+                    self._close(key, start, time)
+        self._pending.clear()
+        if not removed and time < self._latest:
+            # A late event: the edges it owns existed from its time on
+            for key in graph._job_edges[job]:
+                if since[key] > time:
+                    since[key] = time
+        self._latest = max(self._latest, time)
+        if self.retention is not None and self._closed_count >= self._compact_at:
+            self.compact(_now() - int(self.retention * 1e6))
+
+    def _close(self, key: int, start: int, end: int) -> None:
+        if end <= start:
+            return
+        intervals = self._closed.get(key)
+        if intervals is None:
+            self._closed[key] = array('q', (start, end))
+            self._closed_count += 1
+            source, target = key >> _EDGE_SHIFT, key & _EDGE_MASK
+            self._past_down.setdefault(source, array('i')).append(target)
+            self._past_up.setdefault(target, array('i')).append(source)
+            return
+        before = len(intervals)
+        if start > intervals[-1]:
+            intervals.append(start)
+            intervals.append(end)
+        elif start >= intervals[-2]:
+            intervals[-1] = max(intervals[-1], end)
+        else:
+            self._closed[key] = intervals = _merge(intervals, start, end)
+        self._closed_count += (len(intervals) - before) // 2
+
+    def compact(self, before: Time) -> int:
+        """
+        Drop the closed intervals that ended before a time, and move the horizon to it.
+
+        Args:
+            before: datetime, ISO 8601 string or microseconds since the epoch
+
+        Returns:
+            int: Number of intervals dropped
+        """
+        before = before if isinstance(before, int) else to_micros(before)
+        dropped = 0
+        for key, intervals in list(self._closed.items()):
+            ended = 0
+            while ended < len(intervals) and intervals[ended + 1] <= before:
+                ended += 2
+            if not ended:
+                continue
+            dropped += ended // 2
+            if ended == len(intervals):
+                del self._closed[key]
+                self._unlink(key)
+            else:
+                del intervals[:ended]
+        self._closed_count -= dropped
+        self._compact_at = max(2 * self._closed_count, COMPACT_MIN_INTERVALS)
+        if self.horizon is None or before > self.horizon:
+            self.horizon = before
+        return dropped
+
+    def _unlink(self, key: int) -> None:
+        source, target = key >> _EDGE_SHIFT, key & _EDGE_MASK
+        for adjacency, node, neighbour in ((self._past_down, source, target), (self._past_up, target, source)):
+            neighbours = adjacency[node]
+            neighbours.remove(neighbour)
+            if not neighbours:
+                del adjacency[node]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def has_edge(self, source: int, target: int, at: Time) -> bool:
+        """Return True if the edge existed at a time."""
+        return self._valid((source << _EDGE_SHIFT) | target, self._time(at))
+
+    def intervals(self, source: int, target: int) -> List[Tuple[str, Optional[str]]]:
+        """
+        Return the intervals during which an edge existed, oldest first.
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: (start, end) as ISO 8601 strings; end is None while the edge exists
+        """
+        key = (source << _EDGE_SHIFT) | target
+        closed = self._closed.get(key, ())
+        pairs = [(closed[i], closed[i + 1]) for i in range(0, len(closed), 2)]
+        start = self._since.get(key)
+        if start is not None:
+            # The open interval absorbs the closed ones it overlaps
+            while pairs and pairs[-1][1] >= start:
+                start = min(start, pairs.pop()[0])
+            pairs.append((start, None))
+        return [(format_micros(pair_start), format_micros(pair_end) if pair_end is not None else None)
+                for pair_start, pair_end in pairs]
+
+    def downstream(self, node_id: int, at: Time, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """
+        Find every node reachable from a node over the edges that existed at a time.
+
+        Args:
+            node_id: Start node
+            at: datetime or ISO 8601 string; naive times are UTC
+            max_depth: Maximum number of edges to follow, or None for no limit
+
+        Returns:
+            Dict[int, int]: Reached node id -> depth, in breadth-first order, excluding the start node
+
+        Raises:
+            ValueError: If the time cannot be read or is before the horizon
+        """
+        return self._walk(node_id, self._time(at), max_depth, True)
+
+    def upstream(self, node_id: int, at: Time, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """Find every node a node was derived from at a time (see downstream)."""
+        return self._walk(node_id, self._time(at), max_depth, False)
+
+    def traverse(self, node_id: int, direction: str, at: Time, max_depth: Optional[int] = None) -> Dict[int, int]:
+        """Traverse in the given direction ("upstream" or "downstream") as of a time."""
+        if direction == DOWNSTREAM:
+            return self.downstream(node_id, at, max_depth)
+        if direction == UPSTREAM:
+            return self.upstream(node_id, at, max_depth)
+        raise ValueError(f"Unknown direction: {direction!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "liveEdges": len(self._since),
+            "pastEdges": len(self._closed),
+            "closedIntervals": self._closed_count,
+            "horizon": format_micros(self.horizon) if self.horizon is not None else None,
+        }
+
+    def _time(self, at: Time) -> int:
+        time = to_micros(at)
+        if self.horizon is not None and time < self.horizon:
+            raise ValueError(f"Lineage history before {format_micros(self.horizon)} was compacted")
+        return time
+
+    def _valid(self, key: int, time: int) -> bool:
+        start = self._since.get(key)
+        if start is not None and start <= time:
+            return True
+        intervals = self._closed.get(key)
+        return intervals is not None and _covers(intervals, time)
+
+    def _walk(self, start: int, time: int, max_depth: Optional[int], forward: bool) -> Dict[int, int]:
+        graph = self.graph
+        if forward:
+            live, past = graph._down, self._past_down
+        else:
+            live, past = graph._up, self._past_up
+        valid = self._valid
+        depths = {start: 0}
+        frontier = [start]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for neighbours in (live[node], past.get(node, ())):
+                    for neighbour in neighbours:
+                        if neighbour in depths:
+                            continue
+                        key = (node << _EDGE_SHIFT) | neighbour if forward else (neighbour << _EDGE_SHIFT) | node
+                        if valid(key, time):
+                            depths[neighbour] = depth
+                            next_frontier.append(neighbour)
+            frontier = next_frontier
+        del depths[start]
+        return depths
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path], meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Write the history to a file, replacing it atomically.
+
+        Args:
+            path: History file path
+            meta: Optional JSON-serialisable metadata stored with it
+        """
+        live_keys = array('q', self._since.keys())
+        live_since = array('q', self._since.values())
+        closed_keys = array('q', self._closed.keys())
+        closed_offsets = array('q', [0])
+        closed = array('q')
+        for intervals in self._closed.values():
+            closed.extend(intervals)
+            closed_offsets.append(len(closed))
+        sections = (live_keys, live_since, closed_keys, closed_offsets, closed)
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "horizon": self.horizon,
+            "latest": self._latest,
+            "meta": meta or {},
+            "counts": [len(data) for data in sections],
+        }).encode("utf-8")
+
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(_PREFIX.pack(_MAGIC, _VERSION, len(header)))
+            f.write(header)
+            for data in sections:
+                f.write(data)
+        temp_path.replace(path)
+
+    @classmethod
+    def load(cls, graph: LineageGraph, path: Union[str, Path],
+             retention: Optional[float] = None) -> Tuple["LineageHistory", Dict[str, Any]]:
+        """
+        Load a history saved for this graph and follow the graph from there.
+
+        Args:
+            graph: The graph the history was saved with, e.g. loaded from the snapshot saved alongside
+            path: History file path
+            retention: Seconds of closed intervals to keep
+
+        Returns:
+            Tuple[LineageHistory, Dict[str, Any]]: The history and the metadata saved with it
+
+        Raises:
+            ValueError: If the file is not a history this version can read
+            OSError: If the file cannot be read
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < _PREFIX.size:
+            raise ValueError("Not a lineage history file")
+        magic, version, header_size = _PREFIX.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a lineage history file, or from another version")
+        header = json.loads(data[_PREFIX.size:_PREFIX.size + header_size])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("History was written with another byte order")
+        sections = []
+        offset = _PREFIX.size + header_size
+        for count in header["counts"]:
+            section = array('q')
+            section.frombytes(data[offset:offset + count * section.itemsize])
+            if len(section) != count:
+                raise ValueError("Truncated lineage history file")
+            sections.append(section)
+            offset += count * section.itemsize
+        live_keys, live_since, closed_keys, closed_offsets, closed = sections
+
+        history = cls.__new__(cls)
+        history.graph = graph
+        history.retention = retention
+        history.horizon = header["horizon"]
+        history._since = dict(zip(live_keys, live_since))
+        history._closed = {}
+        history._past_down = {}
+        history._past_up = {}
+        bounds = closed_offsets.tolist()
+        for i, key in enumerate(closed_keys):
+            history._closed[key] = closed[bounds[i]:bounds[i + 1]]
+            source, target = key >> _EDGE_SHIFT, key & _EDGE_MASK
+            history._past_down.setdefault(source, array('i')).append(target)
+            history._past_up.setdefault(target, array('i')).append(source)
+        history._closed_count = len(closed) // 2
+        history._compact_at = max(2 * history._closed_count, COMPACT_MIN_INTERVALS)
+        history._pending = []
+        history._latest = header["latest"]
+        graph.add_edge_listener(history._on_edge)
+        graph.add_job_listener(history._on_job)
+        return history, header["meta"]
+
+
+def to_micros(value: Time) -> int:
+    """
+    Convert a datetime or ISO 8601 string to microseconds since the epoch; naive times are UTC.
+
+    Raises:
+        ValueError: If the value cannot be read as a time
+    """
+    if isinstance(value, str):
+        try:
+            value = _parse_time(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid time: {value!r}")
+    if not isinstance(value, datetime):
+        raise ValueError(f"Invalid time: {value!r}")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def format_micros(micros: int) -> str:
+    """Format microseconds since the epoch as an ISO 8601 UTC string."""
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat().replace("+00:00", "Z")
+
+
+def _event_micros(event_time: Optional[str], default: int) -> int:
+    if not event_time:
+        return default
+    try:
+        return to_micros(event_time)
+    except ValueError:
+        return default
+
+
+def _now() -> int:
+    return to_micros(datetime.now(timezone.utc))
+
+
+def _covers(intervals: array, time: int) -> bool:
+    """Binary search the disjoint sorted [start, end) pairs for one containing time."""
+    lo, hi = 0, len(intervals) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if intervals[2 * mid] <= time:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo > 0 and time < intervals[2 * lo - 1]
+
+
+def _merge(intervals: array, start: int, end: int) -> array:
+    pairs = sorted([(intervals[i], intervals[i + 1]) for i in range(0, len(intervals), 2)] + [(start, end)])
+    merged = array('q')
+    for pair_start, pair_end in pairs:
+        if merged and pair_start <= merged[-1]:
+            merged[-1] = max(merged[-1], pair_end)
+        else:
+            merged.append(pair_start)
+            merged.append(pair_end)
+    return merged
@@ -0,0 +1,268 @@
+"""
+Dataset identity resolution.
+
+The SQL, Python and Airflow agents name the same dataset in different ways:
+`schema.table` or `db.schema.table`, a file path or a `file://` URI, any
+mix of case and identifier quoting. A DatasetResolver maps every
+(namespace, name) pair to one canonical pair, so the graph gets a single
+node per dataset and lookups by any spelling find it.
+
+Resolution steps:
+
+1. Namespace aliases map a namespace to its canonical namespace, e.g.
+   "postgres://prod-db:5432" -> "warehouse".
+2. File datasets (a "file" or `file://` namespace, a `file://` URI, or an
+   absolute path without a namespace) are moved to the "file" namespace,
+   named by their normalised POSIX path. Paths keep their case.
+3. Table names are split into identifier parts with the quoting removed
+   ("Sales"."Orders", [dbo].[orders], `orders`), case folded, and
+   qualified by the first namespace rule that matches: a default database
+   is dropped and a default schema is added, so `analytics.public.orders`,
+   `public.orders` and `orders` become the same table.
+4. Aliases rename datasets outright, e.g. "legacy_orders" -> "raw.orders".
+
+Canonical pairs are interned and cached per raw pair, so each spelling is
+resolved once.
+
+Configuration file (JSON), see DatasetResolver.from_dict:
+
+    {
+        "case_insensitive": true,
+        "namespaces": {"postgres://prod-db:5432": "warehouse"},
+        "rules": [{"namespace": "warehouse", "default_database": "analytics", "default_schema": "public"}],
+        "aliases": [{"from": "legacy_orders", "to": "raw.orders", "namespace": "warehouse"}]
+    }
+"""
+
+import fnmatch
+import json
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+
+DATASET_RULES_ENV = "LINEAGENT_DATASET_RULES"
+FILE_NAMESPACE = "file"
+
+# One identifier part: "quoted", [bracketed], `backticked` or bare
+_IDENTIFIER_PART_RE = re.compile(r'"((?:[^"]|"")*)"|\[([^\]]*)\]|`([^`]*)`|([^.]+)')
+
+
+class NamespaceRule:
+    """
+    How table names in matching namespaces are qualified.
+
+    Args:
+        namespace: Canonical namespace, or an fnmatch pattern such as "postgres://*"
+        default_database: Database part dropped from three-part names
+        default_schema: Schema added to one-part names
+        case_insensitive: Overrides the resolver's case folding for these namespaces
+    """
+
+    __slots__ = ('namespace', 'default_database', 'default_schema', 'case_insensitive')
+
+    def __init__(self, namespace: str, default_database: Optional[str] = None, default_schema: Optional[str] = None,
+                 case_insensitive: Optional[bool] = None):
+        self.namespace = namespace
+        self.default_database = default_database
+        self.default_schema = default_schema
+        self.case_insensitive = case_insensitive
+
+    def matches(self, namespace: Optional[str]) -> bool:
+        return fnmatch.fnmatchcase(namespace or "", self.namespace)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "default_database": self.default_database,
+            "default_schema": self.default_schema,
+            "case_insensitive": self.case_insensitive,
+        }
+
+
+class DatasetResolver:
+    """
+    Maps raw dataset (namespace, name) pairs to canonical, interned pairs.
+
+    Args:
+        case_insensitive: Fold namespaces and table names to lower case
+        namespaces: Namespace -> canonical namespace
+        rules: Name qualification rules; the first matching one applies
+        aliases: (namespace or None, name) -> canonical (namespace or None, name).
+            Keys may use any spelling; targets must be canonical. A None
+            namespace matches any namespace and keeps the dataset's own
+
+    Example:
+        resolver = DatasetResolver(rules=[NamespaceRule("warehouse", default_database="analytics")])
+        resolver.resolve("warehouse", "Analytics.Sales.Orders")  # ("warehouse", "sales.orders")
+    """
+
+    def __init__(self, case_insensitive: bool = True, namespaces: Optional[Dict[str, str]] = None,
+                 rules: Optional[List[NamespaceRule]] = None,
+                 aliases: Optional[Dict[Tuple[Optional[str], str], Tuple[Optional[str], str]]] = None):
+        self.case_insensitive = case_insensitive
+        self.namespaces = dict(namespaces or {})
+        self.rules = list(rules or [])
+        self.aliases: Dict[Tuple[Optional[str], str], Tuple[Optional[str], str]] = {}
+        self._cache: Dict[Tuple[Optional[str], str], Tuple[Optional[str], str]] = {}
+        for (namespace, name), target in (aliases or {}).items():
+            if namespace is not None:
+                self.aliases[self._normalise(namespace, name)] = target
+                continue
+            # Any namespace: register the name as each namespace rule would spell it
+            for rule_namespace in [None] + [rule.namespace for rule in self.rules]:
+                self.aliases[(None, self._normalise(rule_namespace, name)[1])] = target
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "DatasetResolver":
+        """
+        Build a resolver from its JSON configuration.
+
+        Args:
+            config: Dict with optional "case_insensitive", "namespaces", "rules"
+                (NamespaceRule arguments) and "aliases" ({"from", "to", "namespace",
+                "to_namespace"}) entries
+
+        Returns:
+            DatasetResolver: The configured resolver
+        """
+        aliases = {}
+        for alias in config.get("aliases", []):
+            namespace = alias.get("namespace")
+            aliases[(namespace, alias["from"])] = (alias.get("to_namespace", namespace), alias["to"])
+        return cls(
+            case_insensitive=config.get("case_insensitive", True),
+            namespaces=config.get("namespaces"),
+            rules=[NamespaceRule(**rule) for rule in config.get("rules", [])],
+            aliases=aliases,
+        )
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "DatasetResolver":
+        """Build a resolver from a JSON configuration file (see from_dict)."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the configuration, in canonical form, as a JSON-friendly dict."""
+        return {
+            "case_insensitive": self.case_insensitive,
+            "namespaces": self.namespaces,
+            "rules": [rule.to_dict() for rule in self.rules],
+            "aliases": [
+                {"from": name, "namespace": namespace, "to": target[1], "to_namespace": target[0]}
+                for (namespace, name), target in self.aliases.items()
+            ],
+        }
+
+    def resolve(self, namespace: Optional[str], name: str) -> Tuple[Optional[str], str]:
+        """
+        Return the canonical (namespace, name) of a dataset.
+
+        Args:
+            namespace: Dataset namespace as written in the event
+            name: Dataset name as written in the event
+
+        Returns:
+            Tuple[Optional[str], str]: Canonical namespace and name
+
+        Raises:
+            ValueError: If the name is not a string, or the namespace neither a string nor None
+        """
+        if not isinstance(name, str) or not (namespace is None or isinstance(namespace, str)):
+            raise ValueError(f"Dataset namespace and name must be strings, got ({namespace!r}, {name!r})")
+        key = (namespace, name)
+        canonical = self._cache.get(key)
+        if canonical is not None:
+            return canonical
+        namespace, name = self._normalise(namespace, name)
+        target = self.aliases.get((namespace, name)) or self.aliases.get((None, name))
+        if target is not None:
+            namespace = target[0] if target[0] is not None else namespace
+            name = target[1]
+        canonical = self._cache[key] = (_intern(namespace), sys.intern(name))
+        return canonical
+
+    def canonical_names(self, name: str) -> List[str]:
+        """
+        Return the canonical names a dataset name can have, whatever its namespace.
+
+        Used to look a dataset up by name alone: the name is resolved without
+        a namespace and under each namespace rule.
+        """
+        names = [self.resolve(None, name)[1]]
+        for rule in self.rules:
+            canonical = self.resolve(rule.namespace, name)[1]
+            if canonical not in names:
+                names.append(canonical)
+        return names
+
+    def _normalise(self, namespace: Optional[str], name: str) -> Tuple[Optional[str], str]:
+        namespace = self.namespaces.get(namespace, namespace)
+        if namespace is not None and self.case_insensitive:
+            namespace = self.namespaces.get(namespace.lower(), namespace.lower())
+
+        path = _file_path(namespace, name)
+        if path is not None:
+            return FILE_NAMESPACE, path
+
+        rule = next((rule for rule in self.rules if rule.matches(namespace)), None)
+        fold = self.case_insensitive if rule is None or rule.case_insensitive is None else rule.case_insensitive
+        parts = [_identifier_part(match) for match in _IDENTIFIER_PART_RE.finditer(name.strip())]
+        if not parts:
+            return namespace, name
+        if fold:
+            parts = [part.lower() for part in parts]
+        if rule is not None:
+            database = rule.default_database
+            if database is not None and len(parts) == 3 and parts[0] == (database.lower() if fold else database):
+                parts = parts[1:]
+            if rule.default_schema is not None and len(parts) == 1:
+                parts.insert(0, rule.default_schema.lower() if fold else rule.default_schema)
+        return namespace, ".".join(parts)
+
+
+def _identifier_part(match: "re.Match") -> str:
+    quoted, bracketed, backticked, bare = match.groups()
+    if quoted is not None:
+        return quoted.replace('""', '"')
+    return (bracketed if bracketed is not None else backticked if backticked is not None else bare).strip()
+
+
+def _file_path(namespace: Optional[str], name: str) -> Optional[str]:
+    """Return the normalised path of a file dataset, or None for other datasets."""
+    if name.startswith("file:"):
+        path = unquote(urlparse(name).path)
+    elif namespace == FILE_NAMESPACE or (namespace or "").startswith("file:"):
+        path = name
+    elif not namespace and name.startswith("/"):
+        path = name
+    else:
+        return None
+    path = posixpath.normpath(path.replace("\\", "/"))
+    # normpath keeps a leading "//"
+    return "/" + path.lstrip("/") if path.startswith("//") else path
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def default_resolver() -> DatasetResolver:
+    """
+    Return the resolver configured by $LINEAGENT_DATASET_RULES, or the default one.
+
+    The default resolver folds case and normalises file datasets, with no
+    namespace rules or aliases.
+    """
+    path = os.getenv(DATASET_RULES_ENV)
+    if path:
+        try:
+            return DatasetResolver.from_file(path)
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print(f"Warning: Could not load dataset rules from {path}: {e}")
+    return DatasetResolver()
@@ -0,0 +1,176 @@
+"""
+Deterministic knowledge-graph builder for composed OpenLineage events.
+
+Produces the {nodes, edges} document described by the SQL graph builder
+template (sql_graph_builder in the SQL MCP templates) directly from the
+events, so building the graph needs no model call. Node and edge ids are
+derived from the event, so the same events always give the same graph.
+
+Node types:
+    subquery    the job       id: subq_<job name>
+    table       a dataset     id: tbl_<dataset name>
+    field       a column      id: fld_<dataset name>.<column>
+    operation   a logical operator or a transformation
+
+Edge types:
+    uses_table        subquery -> input table
+    writes_table      subquery -> output table
+    produces_field    subquery -> output field
+    derived_from      output field -> source field
+    transformation    output field -> transformation operation
+    filters_by, grouped_by, ordered_by
+                      operator operation -> source field
+    applies_operator  join operation -> source field
+    joins_with        table -> table joined with it
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .events import LineageEvent, Transformation
+
+
+# Normalised transformation type/subtype -> (operator key, edge type, label)
+_OPERATORS = {
+    "filter": ("filter", "filters_by", "filter"),
+    "where": ("filter", "filters_by", "filter"),
+    "having": ("filter", "filters_by", "filter"),
+    "groupby": ("groupby", "grouped_by", "group by"),
+    "group": ("groupby", "grouped_by", "group by"),
+    "sort": ("orderby", "ordered_by", "order by"),
+    "orderby": ("orderby", "ordered_by", "order by"),
+    "join": ("join", "applies_operator", "join"),
+}
+
+_NON_LETTER_RE = re.compile(r'[^a-z]')
+
+
+def _operator(transformation: Transformation) -> Optional[Tuple[str, str, str]]:
+    for value in (transformation.subtype, transformation.type):
+        if value:
+            operator = _OPERATORS.get(_NON_LETTER_RE.sub('', value.lower()))
+            if operator:
+                return operator
+    return None
+
+
+class KnowledgeGraphBuilder:
+    """
+    Accumulates events into one knowledge graph.
+
+    Example:
+        builder = KnowledgeGraphBuilder()
+        builder.add_event(event)
+        graph = builder.to_dict()
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Dict[str, str]] = {}
+        self._edges: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+        # Operation node id -> details shown in its label
+        self._operation_details: Dict[str, List[str]] = {}
+        self._operation_labels: Dict[str, str] = {}
+
+    def _node(self, node_id: str, node_type: str, label: str) -> str:
+        if node_id not in self._nodes:
+            self._nodes[node_id] = {"id": node_id, "type": node_type, "label": label}
+        return node_id
+
+    def _edge(self, source: str, target: str, edge_type: str) -> None:
+        key = (source, target, edge_type)
+        if key not in self._edges:
+            self._edges[key] = {"source": source, "target": target, "type": edge_type}
+
+    def _table(self, name: str) -> str:
+        return self._node(f"tbl_{name}", "table", name)
+
+    def _field(self, table: str, field: str) -> str:
+        return self._node(f"fld_{table}.{field}", "field", field)
+
+    def add_event(self, event: Union[LineageEvent, Dict[str, Any]]) -> None:
+        """Add the nodes and edges of one event."""
+        if not isinstance(event, LineageEvent):
+            event = LineageEvent.from_dict(event)
+
+        job_name = event.job_key[1]
+        subquery = self._node(f"subq_{job_name}", "subquery", job_name)
+        for dataset in event.inputs:
+            self._edge(subquery, self._table(dataset.name), "uses_table")
+        for dataset in event.outputs:
+            self._edge(subquery, self._table(dataset.name), "writes_table")
+
+        offsets = event.column_offsets
+        refs = event.refs
+        joined_tables: List[str] = []
+        for c, out_index in enumerate(event.column_output):
+            out_table = event.outputs[out_index].name
+            out_field = self._field(out_table, event.column_name[c])
+            self._edge(subquery, out_field, "produces_field")
+            transformation_ids: Dict[Tuple, str] = {}
+            for i in range(offsets[c], offsets[c + 1]):
+                _, in_table = refs[event.input_ref[i]]
+                in_field = self._field(in_table, event.input_field[i])
+                transformations = event.input_transformations[i] or ()
+                direct = not transformations
+                for transformation in transformations:
+                    operator = _operator(transformation)
+                    if operator is None:
+                        direct = True
+                        self._transformation(out_field, transformation, transformation_ids)
+                        continue
+                    key, edge_type, label = operator
+                    operation = self._operation(f"op_{key}_{job_name}", label,
+                                                transformation.description or event.input_field[i])
+                    self._edge(operation, in_field, edge_type)
+                    if key == "join" and in_table not in joined_tables:
+                        joined_tables.append(in_table)
+                if direct:
+                    self._edge(out_field, in_field, "derived_from")
+
+        for other in joined_tables[1:]:
+            self._edge(self._table(joined_tables[0]), self._table(other), "joins_with")
+
+    def _operation(self, node_id: str, label: str, detail: str) -> str:
+        self._node(node_id, "operation", label)
+        self._operation_labels[node_id] = label
+        details = self._operation_details.setdefault(node_id, [])
+        if detail and detail not in details:
+            details.append(detail)
+        return node_id
+
+    def _transformation(self, out_field: str, transformation: Transformation, ids: Dict[Tuple, str]) -> None:
+        key = (transformation.type, transformation.subtype, transformation.description)
+        node_id = ids.get(key)
+        if node_id is None:
+            node_id = ids[key] = f"op_{out_field[4:]}_{len(ids)}"
+            label = transformation.description or " ".join(v for v in (transformation.type, transformation.subtype) if v)
+            self._node(node_id, "operation", label or "transformation")
+        self._edge(out_field, node_id, "transformation")
+
+    def to_dict(self) -> Dict[str, List[Dict[str, str]]]:
+        """Return the graph as {"nodes": [...], "edges": [...]} in insertion order."""
+        nodes = []
+        for node_id, node in self._nodes.items():
+            details = self._operation_details.get(node_id)
+            if details:
+                node = dict(node, label=f"{self._operation_labels[node_id]}: {', '.join(details)}")
+            nodes.append(node)
+        return {"nodes": nodes, "edges": list(self._edges.values())}
+
+
+def build_knowledge_graph(events: Union[LineageEvent, Dict[str, Any], Iterable[Union[LineageEvent, Dict[str, Any]]]]) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Convert composed OpenLineage events into a {nodes, edges} knowledge graph.
+
+    Args:
+        events: One event (LineageEvent or dict) or an iterable of events
+
+    Returns:
+        Dict[str, List[Dict[str, str]]]: The graph in the SQL graph builder's output schema
+    """
+    if isinstance(events, (LineageEvent, dict)):
+        events = [events]
+    builder = KnowledgeGraphBuilder()
+    for event in events:
+        builder.add_event(event)
+    return builder.to_dict()
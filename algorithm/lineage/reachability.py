@@ -0,0 +1,470 @@
+"""
+Precomputed reachability index over a LineageGraph.
+
+Answers "does A reach B" and "everything downstream of A" without a
+breadth-first walk over the whole graph. The graph is condensed into its
+strongly connected components, numbered by Tarjan's algorithm. That
+numbering is a reverse topological order: an edge between two
+components always goes from the higher id to the lower one. Every
+component then gets labels and, if memory allows, its closure:
+
+- GRAIL interval labels: k random post-order traversals of the condensed
+  DAG. A component can only reach another if each of its intervals
+  contains the other's, so most negative queries stop after a few
+  integer comparisons.
+- A sparse transitive closure: the sorted ids of the components it
+  reaches, built only while its total size stays under
+  max_closure_bytes. Without it, positive queries fall back to a
+  depth-first search pruned by the labels and the topological order.
+  This is the memory-bounded mode.
+
+Edges inserted after the build are patched in. The labels and closures of
+the source's ancestors grow to cover the target. Removals keep the labels
+(they stay valid, only looser) but drop the closure. Changes that merge
+or may split a component mark the index stale. A stale index answers
+every query with a plain traversal until rebuild() is called.
+"""
+
+import random
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+from .graph import LineageGraph
+
+
+DEFAULT_LABELS = 2
+DEFAULT_MAX_CLOSURE_BYTES = 64 * 1024 * 1024
+
+# Per-entry cost of a closure: 4 bytes of array data plus the array header amortised
+_ARRAY_OVERHEAD = 64
+
+
+class ReachabilityIndex:
+    """
+    Reachability labels and bounded transitive closure for a LineageGraph.
+
+    Args:
+        graph: The graph to index
+        labels: Number of GRAIL interval labels per component
+        max_closure_bytes: Memory budget for the transitive closure; 0 disables it, None means unbounded
+        incremental: Patch the index as edges are added to or removed from the graph
+        seed: Seed for the random traversal orders of the labels
+
+    Example:
+        index = ReachabilityIndex(graph)
+        index.reaches(source_column, target_column)
+        index.descendants(table)
+    """
+
+    def __init__(self, graph: LineageGraph, labels: int = DEFAULT_LABELS,
+                 max_closure_bytes: Optional[int] = DEFAULT_MAX_CLOSURE_BYTES,
+                 incremental: bool = True, seed: int = 0):
+        self.graph = graph
+        self.label_count = labels
+        self.max_closure_bytes = max_closure_bytes
+        self.seed = seed
+        self.build()
+        self._incremental = incremental
+        if incremental:
+            graph.add_edge_listener(self._on_edge)
+
+    def close(self) -> None:
+        """Stop following changes to the graph."""
+        if self._incremental:
+            self.graph.remove_edge_listener(self._on_edge)
+            self._incremental = False
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def build(self) -> None:
+        """(Re)build the index from the current graph."""
+        graph = self.graph
+        comp, comp_count = _strongly_connected_components(graph.node_count, graph.successors)
+        self._comp = comp
+        self._comp_count = comp_count
+        # Component id -> its node when the component is a single node; members of larger ones
+        self._comp_node = array('i', [0]) * comp_count
+        self._comp_members: Dict[int, array] = {}
+        self._cyclic: Set[int] = set()
+        sizes = array('i', [0]) * comp_count
+        for node, c in enumerate(comp):
+            sizes[c] += 1
+            self._comp_node[c] = node
+        for node, c in enumerate(comp):
+            if sizes[c] > 1:
+                self._comp_members.setdefault(c, array('i')).append(node)
+                self._cyclic.add(c)
+        for node in range(len(comp)):
+            if node in graph.successors(node):
+                self._cyclic.add(comp[node])
+
+        self._ordered = True
+        self.stale = False
+        self._build_labels()
+        self._build_closure()
+
+    def rebuild(self) -> None:
+        self.build()
+
+    def _build_labels(self) -> None:
+        rng = random.Random(self.seed)
+        count = self._comp_count
+        self._low: List[array] = []
+        self._post: List[array] = []
+        roots = list(range(count))
+        for label in range(self.label_count):
+            low = array('i', [0]) * count
+            post = array('i', [0]) * count
+            visited = bytearray(count)
+            rng.shuffle(roots)
+            reverse_children = label % 2 == 1
+            rank = 0
+            for root in roots:
+                if visited[root]:
+                    continue
+                visited[root] = 1
+                children = self._children(root)
+                if reverse_children:
+                    children.reverse()
+                low[root] = count
+                stack = [(root, children, 0)]
+                while stack:
+                    c, children, i = stack[-1]
+                    while i < len(children):
+                        d = children[i]
+                        i += 1
+                        if not visited[d]:
+                            break
+                        if low[d] < low[c]:
+                            low[c] = low[d]
+                    else:
+                        stack.pop()
+                        post[c] = rank
+                        if rank < low[c]:
+                            low[c] = rank
+                        rank += 1
+                        if stack:
+                            parent = stack[-1][0]
+                            if low[c] < low[parent]:
+                                low[parent] = low[c]
+                        continue
+                    stack[-1] = (c, children, i)
+                    visited[d] = 1
+                    grandchildren = self._children(d)
+                    if reverse_children:
+                        grandchildren.reverse()
+                    low[d] = count
+                    stack.append((d, grandchildren, 0))
+            self._low.append(low)
+            self._post.append(post)
+        self._next_rank = self._comp_count
+
+    def _build_closure(self) -> None:
+        self._closure: Optional[List[array]] = None
+        self.closure_bytes = 0
+        budget = self.max_closure_bytes
+        if budget == 0:
+            return
+        closure: List[array] = []
+        total = 0
+        # Tarjan ids are a reverse topological order, so children are always done first
+        for c in range(self._comp_count):
+            children = set(self._children(c))
+            if not children:
+                reached = array('i')
+            elif len(children) == 1:
+                d = children.pop()
+                reached = array('i', closure[d])
+                reached.insert(bisect_left(reached, d), d)
+            else:
+                merged = set(children)
+                for d in children:
+                    merged.update(closure[d])
+                reached = array('i', sorted(merged))
+            closure.append(reached)
+            total += len(reached) * 4 + _ARRAY_OVERHEAD
+            if budget is not None and total > budget:
+                return
+        self._closure = closure
+        self.closure_bytes = total
+
+    # ------------------------------------------------------------------
+    # Component helpers
+    # ------------------------------------------------------------------
+
+    def _members(self, c: int):
+        members = self._comp_members.get(c)
+        return members if members is not None else (self._comp_node[c],)
+
+    def _children(self, c: int) -> List[int]:
+        comp = self._comp
+        members = self._comp_members.get(c)
+        if members is None:
+            return [comp[w] for w in self.graph.successors(self._comp_node[c]) if comp[w] != c]
+        successors = self.graph.successors
+        return list({comp[w] for node in members for w in successors(node)} - {c})
+
+    def _parents(self, c: int) -> List[int]:
+        comp = self._comp
+        members = self._comp_members.get(c)
+        if members is None:
+            return [comp[w] for w in self.graph.predecessors(self._comp_node[c]) if comp[w] != c]
+        predecessors = self.graph.predecessors
+        return list({comp[w] for node in members for w in predecessors(node)} - {c})
+
+    def _contains(self, outer: int, inner: int) -> bool:
+        """Check the label containment that every reachable pair satisfies."""
+        for low, post in zip(self._low, self._post):
+            if low[inner] < low[outer] or post[inner] > post[outer]:
+                return False
+        return True
+
+    def _comp_reaches(self, source: int, target: int) -> bool:
+        if source == target:
+            return source in self._cyclic
+        if self._ordered and source < target:
+            return False
+        if not self._contains(source, target):
+            return False
+        if self._closure is not None:
+            reached = self._closure[source]
+            i = bisect_left(reached, target)
+            return i < len(reached) and reached[i] == target
+        # Label-pruned depth-first search
+        ordered = self._ordered
+        stack = [source]
+        seen = {source}
+        while stack:
+            for d in self._children(stack.pop()):
+                if d == target:
+                    return True
+                if d in seen:
+                    continue
+                seen.add(d)
+                if ordered and d < target:
+                    continue
+                if self._contains(d, target):
+                    stack.append(d)
+        return False
+
+    def _comp_ancestors(self, target: int) -> List[int]:
+        seen = {target}
+        stack = [target]
+        while stack:
+            for d in self._parents(stack.pop()):
+                if d not in seen:
+                    seen.add(d)
+                    stack.append(d)
+        seen.discard(target)
+        return list(seen)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def reaches(self, source: int, target: int) -> bool:
+        """
+        Check whether target is downstream of source.
+
+        Args:
+            source: Upstream node id
+            target: Downstream node id
+
+        Returns:
+            bool: True if a path of at least one edge leads from source to target
+        """
+        self._sync_nodes()
+        if self.stale:
+            return self._search(source, target)
+        return self._comp_reaches(self._comp[source], self._comp[target])
+
+    def _search(self, source: int, target: int) -> bool:
+        """Plain depth-first search, used while the index is stale."""
+        successors = self.graph.successors
+        stack = list(successors(source))
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            if node not in seen:
+                seen.add(node)
+                stack.extend(successors(node))
+        return False
+
+    def descendants(self, node_id: int) -> Set[int]:
+        """
+        Return every node downstream of a node (the node itself excluded).
+
+        Read from the closure when there is one; otherwise this is a plain
+        traversal, which is as fast as anything the labels could offer.
+        """
+        self._sync_nodes()
+        if self.stale or self._closure is None:
+            return set(self.graph.downstream(node_id))
+        return self._expand(node_id, self._closure[self._comp[node_id]])
+
+    def ancestors(self, node_id: int) -> Set[int]:
+        """Return every node upstream of a node (the node itself excluded); only forward closures are kept."""
+        return set(self.graph.upstream(node_id))
+
+    def _expand(self, node_id: int, comps) -> Set[int]:
+        result: Set[int] = set()
+        comp_node = self._comp_node
+        members = self._comp_members
+        for c in comps:
+            group = members.get(c)
+            if group is None:
+                result.add(comp_node[c])
+            else:
+                result.update(group)
+        own = self._comp_members.get(self._comp[node_id])
+        if own is not None:
+            result.update(own)
+            result.discard(node_id)
+        return result
+
+    def stats(self):
+        return {
+            "nodes": len(self._comp),
+            "components": self._comp_count,
+            "cyclic_components": len(self._cyclic),
+            "labels": self.label_count,
+            "closure": self._closure is not None,
+            "closure_bytes": self.closure_bytes if self._closure is not None else 0,
+            "label_bytes": sum(a.buffer_info()[1] * a.itemsize for a in self._low + self._post),
+            "stale": self.stale,
+        }
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def _sync_nodes(self) -> None:
+        """Give nodes created since the last build their own singleton component."""
+        comp = self._comp
+        for node in range(len(comp), self.graph.node_count):
+            c = self._comp_count
+            self._comp_count += 1
+            comp.append(c)
+            self._comp_node.append(node)
+            # A fresh rank beyond every existing interval keeps containment exact
+            rank = self._next_rank
+            self._next_rank += 1
+            for low, post in zip(self._low, self._post):
+                low.append(rank)
+                post.append(rank)
+            if self._closure is not None:
+                self._closure.append(array('i'))
+                self.closure_bytes += _ARRAY_OVERHEAD
+
+    def _on_edge(self, source: int, target: int, added: bool) -> None:
+        self._sync_nodes()
+        if self.stale:
+            return
+        cu, cv = self._comp[source], self._comp[target]
+        if cu == cv:
+            if source == target:
+                if added:
+                    self._cyclic.add(cu)
+                elif cu not in self._comp_members:
+                    self._cyclic.discard(cu)
+            elif not added:
+                # Removing an edge inside a component may split it
+                self.stale = True
+            return
+
+        if not added:
+            # Labels stay valid supersets; the closure may now be too large
+            self._closure = None
+            return
+
+        if self._comp_reaches(cv, cu):
+            # The edge closes a cycle and merges components
+            self.stale = True
+            return
+        if cu < cv:
+            self._ordered = False
+
+        ancestors = self._comp_ancestors(cu)
+        ancestors.append(cu)
+        for low, post in zip(self._low, self._post):
+            low_v, post_v = low[cv], post[cv]
+            for a in ancestors:
+                if low_v < low[a]:
+                    low[a] = low_v
+                if post_v > post[a]:
+                    post[a] = post_v
+
+        closure = self._closure
+        if closure is None:
+            return
+        added_comps = set(closure[cv])
+        added_comps.add(cv)
+        budget = self.max_closure_bytes
+        for a in ancestors:
+            reached = closure[a]
+            merged = added_comps.union(reached)
+            if len(merged) == len(reached):
+                continue
+            self.closure_bytes += (len(merged) - len(reached)) * 4
+            closure[a] = array('i', sorted(merged))
+            if budget is not None and self.closure_bytes > budget:
+                self._closure = None
+                return
+
+
+def _strongly_connected_components(node_count: int, successors) -> "tuple[array, int]":
+    """
+    Tarjan's algorithm without recursion.
+
+    Returns:
+        (component id per node, number of components). Components are
+        numbered in reverse topological order.
+    """
+    index = array('i', [-1]) * node_count
+    low = array('i', [0]) * node_count
+    comp = array('i', [-1]) * node_count
+    on_stack = bytearray(node_count)
+    stack: List[int] = []
+    counter = 0
+    comp_count = 0
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, successors(root), 0)]
+        while work:
+            node, succ, i = work[-1]
+            if i < len(succ):
+                work[-1] = (node, succ, i + 1)
+                w = succ[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, successors(w), 0))
+                elif on_stack[w] and index[w] < low[node]:
+                    low[node] = index[w]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index[node]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = comp_count
+                    if w == node:
+                        break
+                comp_count += 1
+    return comp, comp_count
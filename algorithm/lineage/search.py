@@ -0,0 +1,455 @@
+"""
+Name and SQL search over a LineageGraph.
+
+Answers "which datasets, columns or jobs are named like *customer_email*"
+and "which jobs' SQL mentions it" without scanning the events. Matching
+is case-insensitive, and results are ranked by how they match:
+
+- exact: the whole name
+- prefix: the start of the name
+- word prefix: the start of a later word in the name, e.g. "email" in
+  customer_email (words are runs of letters and digits)
+- substring: anywhere in the name, for queries of three or more characters
+- sql: anywhere in the SQL text of a job's latest event (its SqlJobFacet);
+  shorter queries must start a word
+- fuzzy: names with similar character trigrams (Jaccard similarity), so
+  typos like "custmer_email" still find the column. Only tried when the
+  other kinds found fewer than `limit` results.
+
+Within a kind, shorter names come first.
+
+Layout: names repeat a lot (every table has an `id`), so the index holds
+each distinct lower-cased text once, as a term with the node ids carrying
+it. There is one term store per node kind, plus one for SQL. A store keeps
+its terms in buckets by length, each bucket one string of fixed-width
+"\\n" + term records, so matching is a literal str.find over the buckets,
+done in C, and a match position maps straight to its record. Buckets are
+scanned from the shortest length up, so matches come out already ranked,
+and a query stops as soon as it has `limit` results instead of collecting
+every match. Name terms also have trigram postings: a query with a
+trigram no name contains skips the names, and one whose rarest trigram is
+in few terms checks just those. Fuzzy matching uses the same postings,
+counting the rarest trigrams of the query first, within a budget.
+
+The index follows the graph as events are applied (see
+LineageGraph.add_job_listener). Node ids only grow, so new nodes are
+indexed from the last indexed id; a job whose SQL changed moves to the
+term of its new SQL.
+"""
+
+import heapq
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .graph import LineageGraph, COLUMN, DATASET, JOB, NODE_KINDS
+
+
+DEFAULT_LIMIT = 20
+DEFAULT_MIN_SIMILARITY = 0.3
+# Queries whose rarest trigram is in at most this many terms check those
+# terms directly instead of scanning the buckets
+MAX_CHECKED_TERMS = 512
+# Posting entries counted and candidates scored by one fuzzy query
+MAX_FUZZY_SCAN = 20000
+MAX_FUZZY_CANDIDATES = 200
+
+# Term stores: the names of each node kind, then job SQL
+SQL = 3
+_NAME_STORES = (DATASET, COLUMN, JOB)
+
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, SQL_TEXT, FUZZY = range(6)
+MATCH_KINDS = ("exact", "prefix", "word_prefix", "substring", "sql", "fuzzy")
+_SCORES = (1.0, 0.9, 0.8, 0.7, 0.5)
+# Fuzzy scores are the similarity scaled below every other kind of match
+_FUZZY_SCALE = 0.6
+
+_SNIPPET_CONTEXT = 40
+_PAD = "\x01"
+
+
+class _Bucket:
+    """Terms of one length, as fixed-width "\\n" + term records."""
+
+    __slots__ = ('blob', 'pending', 'terms')
+
+    def __init__(self):
+        self.blob = ""
+        self.pending: List[str] = []
+        # Term id of each record
+        self.terms = array('i')
+
+    def text(self) -> str:
+        # Appending to a large str copies it, so new records are joined on the next query
+        if self.pending:
+            self.blob += "".join(self.pending)
+            self.pending = []
+        return self.blob
+
+
+class _TermStore:
+    """The distinct texts of one store, bucketed by length."""
+
+    __slots__ = ('ids', 'buckets', 'lengths', 'separators')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.buckets: Dict[int, _Bucket] = {}
+        # Bucket lengths, ascending
+        self.lengths: List[int] = []
+        # Characters seen right before a word start
+        self.separators: Set[str] = set()
+
+    def add(self, text: str, term_id: int) -> None:
+        self.ids[text] = term_id
+        bucket = self.buckets.get(len(text))
+        if bucket is None:
+            bucket = self.buckets[len(text)] = _Bucket()
+            self.lengths.append(len(text))
+            self.lengths.sort()
+        bucket.pending.append("\n" + text)
+        bucket.terms.append(term_id)
+        previous = ""
+        for char in text:
+            if previous and char.isalnum() and not previous.isalnum():
+                self.separators.add(previous)
+            previous = char
+
+    def _scan(self, min_length: int) -> Iterator[Tuple[str, int, array]]:
+        for length in self.lengths:
+            if length >= min_length:
+                bucket = self.buckets[length]
+                yield bucket.text(), length + 1, bucket.terms
+
+    def find(self, text: str, min_length: int) -> Iterator[int]:
+        """Yield the ids of the terms containing text, shortest first."""
+        for blob, width, terms in self._scan(min_length):
+            position = blob.find(text)
+            while position >= 0:
+                record = position // width
+                yield terms[record]
+                position = blob.find(text, (record + 1) * width)
+
+    def find_prefix(self, text: str, min_length: int) -> Iterator[int]:
+        """Yield the ids of the terms starting with text, shortest first."""
+        needle = "\n" + text
+        for blob, width, terms in self._scan(min_length):
+            position = blob.find(needle)
+            while position >= 0:
+                yield terms[position // width]
+                position = blob.find(needle, position + width)
+
+    def find_word_prefix(self, text: str, min_length: int) -> Iterator[int]:
+        """Yield the ids of the terms with a later word starting with text, shortest first."""
+        needles = [separator + text for separator in self.separators]
+        for blob, width, terms in self._scan(min_length):
+            records: Set[int] = set()
+            for needle in needles:
+                position = blob.find(needle)
+                while position >= 0:
+                    # A "\n" separator is the record's own start, matched as a prefix
+                    if position % width:
+                        records.add(position // width)
+                    position = blob.find(needle, position + 1)
+            for record in sorted(records):
+                yield terms[record]
+
+
+class SearchIndex:
+    """
+    Index of the dataset, column and job names and job SQL of a LineageGraph.
+
+    Args:
+        graph: The graph to index
+        incremental: Follow events applied to the graph after the build
+
+    Example:
+        index = SearchIndex(graph)
+        for hit in index.search("customer_email", kinds=["column", "job"]):
+            print(hit["match"], hit["node"]["name"])
+    """
+
+    def __init__(self, graph: LineageGraph, incremental: bool = True):
+        self.graph = graph
+        self.build()
+        self._incremental = incremental
+        if incremental:
+            graph.add_job_listener(self._on_job)
+
+    def close(self) -> None:
+        """Stop following changes to the graph."""
+        if self._incremental:
+            self.graph.remove_job_listener(self._on_job)
+            self._incremental = False
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def build(self) -> None:
+        """Index the whole graph from scratch."""
+        self._stores = tuple(_TermStore() for _ in range(SQL + 1))
+        # Term tables, indexed by term id. A term's nodes are an int while there is one
+        self._term_text: List[str] = []
+        self._term_store = bytearray()
+        self._term_nodes: List[Union[int, array]] = []
+        # Trigram -> ids of the name terms containing it, ascending. Trigrams
+        # are padded at both ends of the name for fuzzy matching
+        self._postings: Dict[str, array] = {}
+        # Job node id -> term id of its SQL text
+        self._job_sql: Dict[int, int] = {}
+        self._indexed_nodes = 0
+        self.update()
+        for job_id, sql in self.graph._job_sql.items():
+            self._job_sql[job_id] = self._add(SQL, _normalise(sql), job_id)
+
+    def update(self) -> None:
+        """Index the nodes added to the graph since the last update."""
+        graph = self.graph
+        keys = graph._keys
+        kinds = graph._kind
+        for node_id in range(self._indexed_nodes, graph.node_count):
+            kind = kinds[node_id]
+            key = keys[node_id]
+            name = key[2] if kind == COLUMN else key[1]
+            # Names come from composed events; one that is not a string cannot be searched for
+            if isinstance(name, str):
+                self._add(kind, _normalise(name), node_id)
+        self._indexed_nodes = graph.node_count
+
+    def _on_job(self, job_id: int) -> None:
+        self.update()
+        sql = self.graph.job_sql(job_id)
+        text = _normalise(sql) if sql is not None else None
+        term_id = self._job_sql.get(job_id)
+        if term_id is not None:
+            if self._term_text[term_id] == text:
+                return
+            self._remove(term_id, job_id)
+            del self._job_sql[job_id]
+        if text is not None:
+            self._job_sql[job_id] = self._add(SQL, text, job_id)
+
+    def _add(self, store_id: int, text: str, node_id: int) -> int:
+        store = self._stores[store_id]
+        term_id = store.ids.get(text)
+        if term_id is not None:
+            nodes = self._term_nodes[term_id]
+            if isinstance(nodes, int):
+                self._term_nodes[term_id] = array('i', (nodes, node_id))
+            else:
+                nodes.append(node_id)
+            return term_id
+        term_id = len(self._term_nodes)
+        self._term_text.append(text)
+        self._term_store.append(store_id)
+        self._term_nodes.append(node_id)
+        store.add(text, term_id)
+        if store_id != SQL:
+            postings = self._postings
+            for gram in _padded_trigrams(text):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('i')
+                posting.append(term_id)
+        return term_id
+
+    def _remove(self, term_id: int, node_id: int) -> None:
+        # The term keeps its record; with no nodes left it matches nothing
+        nodes = self._term_nodes[term_id]
+        if isinstance(nodes, int):
+            self._term_nodes[term_id] = array('i')
+        else:
+            nodes.remove(node_id)
+
+    @property
+    def term_count(self) -> int:
+        """Number of distinct indexed texts."""
+        return len(self._term_nodes)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = DEFAULT_LIMIT,
+               fuzzy: bool = True, min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """
+        Find the nodes whose name or SQL text matches a query.
+
+        Args:
+            query: Text to look for
+            kinds: Optional node kinds to return ("dataset", "column", "job")
+            limit: Maximum number of results
+            fuzzy: Add names similar to the query when fewer than limit results match it
+            min_similarity: Lowest trigram similarity of a fuzzy match, from 0 to 1
+
+        Returns:
+            List[Dict[str, Any]]: Results, best first, each with the node (see
+            LineageGraph.node_info), the matched field ("name" or "sql"), the match
+            kind, a score from 0 to 1 and, for SQL matches, a snippet around the match.
+            A job whose name and SQL both match is returned once
+
+        Raises:
+            ValueError: If a kind is unknown
+        """
+        text = _normalise(query.strip())
+        if not text or limit <= 0:
+            return []
+        if kinds is None:
+            store_ids = list(_NAME_STORES)
+        else:
+            unknown = set(kinds) - set(NODE_KINDS)
+            if unknown:
+                raise ValueError(f"Unknown node kind: {sorted(unknown)[0]!r}")
+            store_ids = [store_id for store_id in _NAME_STORES if NODE_KINDS[store_id] in kinds]
+        term_nodes = self._term_nodes
+        hits: List[Tuple[int, int, int, float]] = []
+        seen: Set[int] = set()
+
+        def take(matches: Iterable[Tuple[int, int]], score: Optional[float] = None) -> bool:
+            """Add the nodes of the (rank, term id) matches, in order, until the limit; True once it is reached."""
+            for rank, term_id in matches:
+                nodes = term_nodes[term_id]
+                for node_id in ((nodes,) if isinstance(nodes, int) else nodes):
+                    if node_id not in seen:
+                        seen.add(node_id)
+                        hits.append((node_id, rank, term_id, _SCORES[rank] if score is None else score))
+                        if len(hits) >= limit:
+                            return True
+            return False
+
+        short = len(text) < 3
+        done = take(self._name_matches(text, store_ids))
+        if not done and JOB in store_ids:
+            sql = self._stores[SQL]
+            if short:
+                terms = chain(sql.find_prefix(text, len(text)), sql.find_word_prefix(text, len(text) + 2))
+            else:
+                terms = sql.find(text, len(text))
+            done = take((SQL_TEXT, term_id) for term_id in terms)
+        if not done and fuzzy and not short:
+            for similarity, term_id in self._fuzzy(text, store_ids, min_similarity):
+                if take(((FUZZY, term_id),), _FUZZY_SCALE * similarity):
+                    break
+        return [self._result(node_id, rank, term_id, score, text) for node_id, rank, term_id, score in hits]
+
+    def _name_matches(self, text: str, store_ids: List[int]) -> Iterator[Tuple[int, int]]:
+        """Yield (rank, term id) of the name terms matching the query, best first."""
+        if len(text) >= 3:
+            postings = [self._postings.get(gram) for gram in _trigrams(text)]
+            if any(posting is None for posting in postings):
+                return
+            rarest = min(postings, key=len)
+            if len(rarest) <= MAX_CHECKED_TERMS:
+                yield from self._check(text, store_ids, rarest)
+                return
+        stores = self._stores
+        for store_id in store_ids:
+            term_id = stores[store_id].ids.get(text)
+            if term_id is not None:
+                yield EXACT, term_id
+        for term_id in self._merged(store_ids, lambda store: store.find_prefix(text, len(text) + 1)):
+            yield PREFIX, term_id
+        if text[0].isalnum():
+            for term_id in self._merged(store_ids, lambda store: store.find_word_prefix(text, len(text) + 2)):
+                yield WORD_PREFIX, term_id
+        if len(text) >= 3:
+            for term_id in self._merged(store_ids, lambda store: store.find(text, len(text) + 1)):
+                yield SUBSTRING, term_id
+
+    def _check(self, text: str, store_ids: List[int], term_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        """Rank the candidate terms containing the query in the order the bucket scans would."""
+        texts = self._term_text
+        term_store = self._term_store
+        wanted = set(store_ids)
+        word = text[0].isalnum()
+        matches = []
+        for term_id in term_ids:
+            term = texts[term_id]
+            if term_store[term_id] not in wanted or text not in term:
+                continue
+            if term == text:
+                rank = EXACT
+            elif term.startswith(text):
+                rank = PREFIX
+            elif word and any(not term[i - 1].isalnum() for i in _positions(term, text) if i > 0):
+                rank = WORD_PREFIX
+            else:
+                rank = SUBSTRING
+            matches.append((rank, len(term), term_store[term_id], term_id))
+        matches.sort()
+        return [(rank, term_id) for rank, _, _, term_id in matches]
+
+    def _merged(self, store_ids: List[int], find: Callable[[_TermStore], Iterator[int]]) -> Iterator[int]:
+        """Merge the terms found in several stores, shortest first."""
+        if len(store_ids) == 1:
+            return find(self._stores[store_ids[0]])
+        texts = self._term_text
+        return heapq.merge(*(find(self._stores[s]) for s in store_ids), key=lambda term_id: len(texts[term_id]))
+
+    def _fuzzy(self, text: str, store_ids: List[int], min_similarity: float) -> List[Tuple[float, int]]:
+        """Return (similarity, term id) of the name terms similar to the query, best first."""
+        grams = _padded_trigrams(text)
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        # Count shared trigrams using the rarest ones first, within the scan budget
+        shared: Counter = Counter()
+        scanned = 0
+        for posting in postings:
+            if scanned and scanned + len(posting) > MAX_FUZZY_SCAN:
+                break
+            shared.update(posting[:MAX_FUZZY_SCAN])
+            scanned += len(posting)
+        texts = self._term_text
+        term_store = self._term_store
+        wanted = set(store_ids)
+        ranked = []
+        for term_id, _ in shared.most_common(MAX_FUZZY_CANDIDATES):
+            if term_store[term_id] not in wanted:
+                continue
+            candidate_grams = _padded_trigrams(texts[term_id])
+            common = len(grams & candidate_grams)
+            similarity = common / (len(grams) + len(candidate_grams) - common)
+            if similarity >= min_similarity:
+                ranked.append((similarity, term_id))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked
+
+    def _result(self, node_id: int, rank: int, term_id: int, score: float, text: str) -> Dict[str, Any]:
+        is_sql = self._term_store[term_id] == SQL
+        result: Dict[str, Any] = {
+            "node": self.graph.node_info(node_id),
+            "field": "sql" if is_sql else "name",
+            "match": MATCH_KINDS[rank],
+            "score": round(score, 3),
+        }
+        if is_sql:
+            sql = self.graph.job_sql(node_id) or ""
+            position = max(self._term_text[term_id].find(text), 0)
+            start = max(position - _SNIPPET_CONTEXT, 0)
+            result["snippet"] = sql[start:position + len(text) + _SNIPPET_CONTEXT]
+        return result
+
+
+_EMPTY = array('i')
+
+
+def _normalise(text: str) -> str:
+    # Records are separated by newlines, so a term cannot contain one
+    return text.lower().replace("\n", " ")
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text: str) -> Set[str]:
+    # The padding makes the ends of a name count, as short names share few inner trigrams
+    return _trigrams(_PAD * 2 + text + _PAD)
+
+
+def _positions(text: str, needle: str) -> Iterator[int]:
+    position = text.find(needle)
+    while position >= 0:
+        yield position
+        position = text.find(needle, position + 1)
@@ -0,0 +1,548 @@
+"""
+Long-lived lineage graph kept in sync with the dump folder.
+
+The API server holds one LineageService for the lifetime of the process.
+The graph is built once from the dump files and then kept current
+incrementally:
+
+- get_lineage_service registers the service as a dump listener, so each
+  event written by dump_json_record in this process is applied to the
+  graph as soon as it is dumped.
+- Every query first tails the dump files from where the last read
+  stopped, which picks up events written by other processes.
+
+The graph is also saved as a binary snapshot (see snapshot.py) next to
+the dump files, together with how far each dump file had been read. The
+dump files are append-only, so they double as the log of the events
+applied since the snapshot: a cold start loads the snapshot and tails the
+files from the saved offsets, replaying only the newer events. A snapshot
+whose files were since truncated, removed or rewritten, or that was built
+with other dataset identity rules, is ignored.
+
+A LineageHistory follows the graph from the start, recording when each
+edge appeared and disappeared, so traversals can also be asked "as of" a
+past time. It is saved with the snapshot, in a ".history" file next to
+it, and keeps $LINEAGENT_HISTORY_RETENTION_DAYS days of removed edges.
+
+Query results are cached per (node, direction, depth). A reverse index
+maps every node to the cached results that contain it, so an event only
+invalidates the results that include an endpoint of an edge it changed.
+"""
+
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from ..utils.file_utils import add_dump_listener
+from .diff import diff_lineage, lineage_from_events, lineage_from_graph
+from .export import export_graph
+from .graph import LineageGraph, decode_dump_lines, DOWNSTREAM, UPSTREAM
+from .history import LineageHistory, DEFAULT_RETENTION_DAYS, Time
+from .identity import DatasetResolver, default_resolver
+from .search import SearchIndex, DEFAULT_LIMIT
+from .snapshot import load_snapshot, save_snapshot
+from .subgraph import extract_subgraph
+
+
+DUMPS_FOLDER_ENV = "LINEAGENT_DUMPS_FOLDER"
+DEFAULT_DUMPS_FOLDER = "lineage_extraction_dumps"
+DEFAULT_CACHE_SIZE = 1024
+SNAPSHOT_PATH_ENV = "LINEAGENT_LINEAGE_SNAPSHOT"
+DEFAULT_SNAPSHOT_NAME = ".lineage-graph.snapshot"
+DEFAULT_SNAPSHOT_EVERY = 1000
+HISTORY_RETENTION_ENV = "LINEAGENT_HISTORY_RETENTION_DAYS"
+
+# Bytes hashed before each saved offset to recognise a rewritten dump file
+_CHECKSUM_BYTES = 4096
+
+
+class NodeNotFoundError(LookupError):
+    """Raised when a dataset or column is not in the lineage graph."""
+
+
+class AmbiguousNodeError(ValueError):
+    """Raised when a dataset name exists in several namespaces and none was given."""
+
+    def __init__(self, message: str, candidates: List[str]):
+        super().__init__(message)
+        self.candidates = candidates
+
+
+class LineageService:
+    """
+    Lineage graph plus a query cache, refreshed from the dump files on demand.
+
+    Args:
+        folder: Dump folder to index (default: $LINEAGENT_DUMPS_FOLDER or "lineage_extraction_dumps")
+        cache_size: Maximum number of cached traversal results
+        snapshot_path: Graph snapshot file (default: $LINEAGENT_LINEAGE_SNAPSHOT or
+            ".lineage-graph.snapshot" in the dump folder)
+        snapshot_every: Save a new snapshot once this many events were applied since
+            the last one; 0 disables automatic snapshots
+        resolver: Dataset identity resolver applied at ingest (default: configured by
+            $LINEAGENT_DATASET_RULES, see identity.default_resolver)
+        history_retention_days: Days of removed edges kept for as-of queries (default:
+            $LINEAGENT_HISTORY_RETENTION_DAYS or 90); 0 keeps them all
+    """
+
+    def __init__(self, folder: Optional[Union[str, Path]] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 snapshot_path: Optional[Union[str, Path]] = None, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+                 resolver: Optional[DatasetResolver] = None, history_retention_days: Optional[float] = None):
+        self.folder = Path(folder or os.getenv(DUMPS_FOLDER_ENV, DEFAULT_DUMPS_FOLDER))
+        self.cache_size = cache_size
+        self.snapshot_path = Path(snapshot_path or os.getenv(SNAPSHOT_PATH_ENV) or self.folder / DEFAULT_SNAPSHOT_NAME)
+        self.history_path = self.snapshot_path.with_name(self.snapshot_path.name + ".history")
+        self.snapshot_every = snapshot_every
+        if history_retention_days is None:
+            history_retention_days = float(os.getenv(HISTORY_RETENTION_ENV, DEFAULT_RETENTION_DAYS))
+        self.history_retention = history_retention_days * 86400 if history_retention_days > 0 else None
+        # Events applied since the last snapshot was saved or loaded
+        self.unsaved_events = 0
+        self.resolver = resolver if resolver is not None else default_resolver()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.RLock()
+        self._graph = LineageGraph(self.resolver)
+        self._history = LineageHistory(self._graph, self.history_retention)
+        self._loaded = False
+        # Dump file path -> bytes already ingested
+        self._offsets: Dict[str, int] = {}
+        self._cache: "OrderedDict[Tuple[int, str, Optional[int]], Tuple[Tuple[int, int], ...]]" = OrderedDict()
+        # Node id -> keys of the cached results that contain it (or start at it)
+        self._cached_by_node: Dict[int, Set[Tuple[int, str, Optional[int]]]] = {}
+        # Built by the first search, then kept current by the graph's job listener
+        self._search: Optional[SearchIndex] = None
+
+    @property
+    def graph(self) -> LineageGraph:
+        return self._graph
+
+    @property
+    def history(self) -> LineageHistory:
+        return self._history
+
+    def refresh(self) -> int:
+        """
+        Ingest events appended to the dump files since the last refresh.
+
+        A dump file that was removed or truncated (clear_json_file) triggers
+        a full rebuild, since its events can no longer be told apart.
+
+        Returns:
+            int: Number of events ingested
+        """
+        with self._lock:
+            if not self._loaded:
+                self._restore()
+            sizes = {}
+            if self.folder.is_dir():
+                for path in sorted(self.folder.glob("*.json")):
+                    try:
+                        sizes[str(path)] = path.stat().st_size
+                    except OSError:
+                        continue
+            if any(sizes.get(path, -1) < offset for path, offset in self._offsets.items()):
+                self._history.close()
+                self._graph = LineageGraph(self.resolver)
+                self._history = LineageHistory(self._graph, self.history_retention)
+                self._offsets = {}
+                self._cache.clear()
+                self._cached_by_node.clear()
+
+            touched: Set[int] = set()
+            ingested = 0
+            for path, size in sizes.items():
+                ingested += self._tail(path, size, touched)
+            self._invalidate(touched)
+            self._loaded = True
+            self.unsaved_events += ingested
+            self._maybe_snapshot()
+            return ingested
+
+    def on_dump(self, file_path: Union[str, Path], record: Any, start: int, end: int) -> None:
+        """
+        Apply a record just appended by dump_json_record (see add_dump_listener).
+
+        When the service has read the file up to the start of the new line,
+        the record is applied directly and the offset moves past it. If
+        there is a gap, e.g. lines from another process, the file is tailed
+        instead.
+        """
+        path = Path(file_path)
+        if path.suffix != ".json" or path.resolve().parent != self.folder.resolve():
+            return
+        key = str(self.folder / path.name)
+        with self._lock:
+            if not self._loaded:
+                # Nothing indexed yet; the first query builds the graph
+                return
+            if self._offsets.get(key, 0) != start:
+                self.refresh()
+                return
+            self._offsets[key] = end
+            touched: Set[int] = set()
+            self.unsaved_events += self._graph.add_records((record,), touched)
+            self._invalidate(touched)
+            self._maybe_snapshot()
+
+    def save_snapshot(self) -> bool:
+        """
+        Save the graph and the dump file offsets it reflects, and the history alongside.
+
+        Returns:
+            bool: True if the snapshot was written
+        """
+        with self._lock:
+            files = {}
+            for path, offset in self._offsets.items():
+                files[Path(path).name] = [offset, _checksum(path, offset)]
+            try:
+                save_snapshot(self._graph, self.snapshot_path, {"files": files, "resolver": self.resolver.to_dict()})
+                self._history.save(self.history_path, {"events": self._graph.event_count})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not save lineage snapshot {self.snapshot_path}: {e}")
+                return False
+            self.unsaved_events = 0
+            return True
+
+    def _maybe_snapshot(self) -> None:
+        if self.snapshot_every and self.unsaved_events >= self.snapshot_every:
+            self.save_snapshot()
+
+    def _restore(self) -> bool:
+        """Start from the saved snapshot if the dump files still hold what it was built from."""
+        if not self.snapshot_path.is_file():
+            return False
+        try:
+            graph, meta = load_snapshot(self.snapshot_path, self.resolver)
+            # Names in a snapshot built with other dataset rules would not match
+            if meta["resolver"] != self.resolver.to_dict():
+                return False
+            offsets = {}
+            for name, (offset, checksum) in meta["files"].items():
+                path = str(self.folder / name)
+                if _checksum(path, offset) != checksum:
+                    return False
+                offsets[path] = offset
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring lineage snapshot {self.snapshot_path}: {e}")
+            return False
+        self._history.close()
+        self._graph = graph
+        self._history = self._restore_history(graph)
+        self._offsets = offsets
+        self.unsaved_events = 0
+        return True
+
+    def _restore_history(self, graph: LineageGraph) -> LineageHistory:
+        """Load the history saved with the snapshot, or date the graph's edges by their jobs' latest events."""
+        if self.history_path.is_file():
+            try:
+                history, meta = LineageHistory.load(graph, self.history_path, self.history_retention)
+                if meta.get("events") == graph.event_count:
+                    return history
+                history.close()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Ignoring lineage history {self.history_path}: {e}")
+        return LineageHistory(graph, self.history_retention)
+
+    def _tail(self, path: str, size: int, touched: Set[int]) -> int:
+        offset = self._offsets.get(path, 0)
+        if size <= offset:
+            return 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        # Leave a partially written last line for the next refresh
+        end = data.rfind(b"\n")
+        if end < 0:
+            return 0
+        count = self._graph.add_records(decode_dump_lines(data[:end].split(b"\n")), touched)
+        # Only past lines that were applied, so that an error leaves them to be read again
+        self._offsets[path] = offset + end + 1
+        return count
+
+    def _invalidate(self, touched: Set[int]) -> None:
+        """Drop the cached results that contain a node whose edges changed."""
+        cached_by_node = self._cached_by_node
+        for node_id in touched:
+            for key in cached_by_node.pop(node_id, ()):
+                self._drop(key)
+
+    def _drop(self, key: Tuple[int, str, Optional[int]]) -> None:
+        result = self._cache.pop(key, None)
+        if result is None:
+            return
+        cached_by_node = self._cached_by_node
+        for node_id in (key[0], *(n for n, _ in result)):
+            keys = cached_by_node.get(node_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del cached_by_node[node_id]
+
+    @property
+    def cached_results(self) -> int:
+        return len(self._cache)
+
+    def resolve(self, dataset: str, column: Optional[str] = None, namespace: Optional[str] = None) -> int:
+        """
+        Find the node id of a dataset, or of one of its columns.
+
+        Args:
+            dataset: Dataset name
+            column: Optional column name
+            namespace: Dataset namespace; may be omitted when the name is unique
+
+        Returns:
+            int: Node id
+
+        Raises:
+            NodeNotFoundError: If the dataset or column is unknown
+            AmbiguousNodeError: If the name exists in several namespaces and none was given
+        """
+        graph = self._graph
+        if namespace is not None:
+            dataset_id = graph.find_dataset(namespace, dataset)
+        else:
+            candidates = graph.find_datasets(dataset)
+            if len(candidates) > 1:
+                namespaces = sorted(str(graph.key(c)[0]) for c in candidates)
+                raise AmbiguousNodeError(
+                    f"Dataset '{dataset}' exists in several namespaces: {', '.join(namespaces)}", namespaces
+                )
+            dataset_id = candidates[0] if candidates else None
+        if dataset_id is None:
+            raise NodeNotFoundError(f"Dataset '{dataset}' not found")
+        if column is None:
+            return dataset_id
+        namespace, name = graph.key(dataset_id)
+        column_id = graph.find_column(namespace, name, column)
+        if column_id is None:
+            raise NodeNotFoundError(f"Column '{column}' not found in dataset '{dataset}'")
+        return column_id
+
+    def lineage(self, direction: str, dataset: str, column: Optional[str] = None,
+                namespace: Optional[str] = None, depth: Optional[int] = None,
+                as_of: Optional[Time] = None) -> Tuple[int, Tuple[Tuple[int, int], ...]]:
+        """
+        Traverse the lineage of a dataset or column.
+
+        Args:
+            direction: "upstream" or "downstream"
+            dataset: Dataset name
+            column: Optional column name
+            namespace: Optional dataset namespace
+            depth: Maximum number of edges to follow, or None for no limit
+            as_of: Optional past time (datetime or ISO 8601 string) to traverse the
+                lineage as it was then; these results are not cached
+
+        Returns:
+            Tuple[int, Tuple[Tuple[int, int], ...]]: The start node id and the (node id, depth) pairs reached
+
+        Raises:
+            ValueError: If as_of cannot be read or is before the history's horizon
+        """
+        self.refresh()
+        with self._lock:
+            return self._lineage(direction, dataset, column, namespace, depth, as_of)
+
+    def lineage_page(self, direction: str, dataset: str, column: Optional[str] = None,
+                     namespace: Optional[str] = None, depth: Optional[int] = None,
+                     as_of: Optional[Time] = None, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Traverse the lineage of a dataset or column and describe one page of the reached nodes.
+
+        The nodes are described while the lock is held, so they come from the
+        graph the traversal ran on even if it is rebuilt meanwhile.
+
+        Args:
+            direction: "upstream" or "downstream"
+            dataset: Dataset name
+            column: Optional column name
+            namespace: Optional dataset namespace
+            depth: Maximum number of edges to follow, or None for no limit
+            as_of: Optional past time to traverse the lineage as it was then
+            offset: Number of reached nodes to skip
+            limit: Maximum number of reached nodes to describe
+
+        Returns:
+            Dict[str, Any]: {"node": start node info, "total": number of nodes reached,
+            "results": node infos of the page, each with its "depth"}
+        """
+        self.refresh()
+        with self._lock:
+            node_id, reached = self._lineage(direction, dataset, column, namespace, depth, as_of)
+            graph = self._graph
+            results = []
+            for reached_id, reached_depth in reached[offset:offset + limit]:
+                info = graph.node_info(reached_id)
+                info["depth"] = reached_depth
+                results.append(info)
+            return {"node": graph.node_info(node_id), "total": len(reached), "results": results}
+
+    def _lineage(self, direction: str, dataset: str, column: Optional[str], namespace: Optional[str],
+                 depth: Optional[int], as_of: Optional[Time]) -> Tuple[int, Tuple[Tuple[int, int], ...]]:
+        """Resolve the start node and traverse from it, from the cache when possible; the lock must be held."""
+        if direction not in (UPSTREAM, DOWNSTREAM):
+            raise ValueError(f"Unknown direction: {direction!r}")
+        node_id = self.resolve(dataset, column, namespace)
+        if as_of is not None:
+            return node_id, tuple(self._history.traverse(node_id, direction, as_of, depth).items())
+        key = (node_id, direction, depth)
+        result = self._cache.get(key)
+        if result is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return node_id, result
+        self.cache_misses += 1
+        result = tuple(self._graph.traverse(node_id, direction, depth).items())
+        self._cache[key] = result
+        cached_by_node = self._cached_by_node
+        cached_by_node.setdefault(node_id, set()).add(key)
+        for reached_id, _ in result:
+            cached_by_node.setdefault(reached_id, set()).add(key)
+        if len(self._cache) > self.cache_size:
+            self._drop(next(iter(self._cache)))
+        return node_id, result
+
+    def subgraph(self, dataset: str, column: Optional[str] = None, namespace: Optional[str] = None,
+                 **options: Any) -> Dict[str, Any]:
+        """
+        Extract the bounded neighbourhood of a dataset or column for visualisation.
+
+        Args:
+            dataset: Dataset name
+            column: Optional column name
+            namespace: Optional dataset namespace
+            **options: Passed to extract_subgraph (hops, direction, max_nodes, max_edges,
+                max_columns, include_columns)
+
+        Returns:
+            Dict[str, Any]: The subgraph, as returned by extract_subgraph
+        """
+        self.refresh()
+        with self._lock:
+            node_id = self.resolve(dataset, column, namespace)
+            return extract_subgraph(self._graph, node_id, **options)
+
+    def search(self, query: str, kinds: Optional[List[str]] = None, limit: int = DEFAULT_LIMIT,
+               fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """
+        Search dataset, column and job names and job SQL (see search.SearchIndex).
+
+        The index is built on the first search and whenever the graph was
+        replaced (a rebuild or a restored snapshot); in between it follows
+        the events applied to the graph.
+
+        Args:
+            query: Text to look for
+            kinds: Optional node kinds to return ("dataset", "column", "job")
+            limit: Maximum number of results
+            fuzzy: Add names similar to the query when fewer than limit results match it
+
+        Returns:
+            List[Dict[str, Any]]: Results, best first
+
+        Raises:
+            ValueError: If a kind is unknown
+        """
+        self.refresh()
+        with self._lock:
+            if self._search is None or self._search.graph is not self._graph:
+                if self._search is not None:
+                    self._search.close()
+                self._search = SearchIndex(self._graph)
+            return self._search.search(query, kinds=kinds, limit=limit, fuzzy=fuzzy)
+
+    def diff(self, new: List[Dict[str, Any]], old: Optional[List[Dict[str, Any]]] = None,
+             jobs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Compare the lineage of new events with old events, or with the graph (see diff.diff_lineage).
+
+        Without old events, the jobs of the new events are compared with their
+        current lineage in the graph: the impact of deploying the new version.
+
+        Args:
+            new: Composed events of the new version
+            old: Optional composed events of the old version
+            jobs: Optional job name patterns restricting the comparison
+
+        Returns:
+            Dict[str, Any]: The diff
+        """
+        after = lineage_from_events(new, self.resolver)
+        if old is not None:
+            return diff_lineage(lineage_from_events(old, self.resolver), after, jobs)
+        self.refresh()
+        with self._lock:
+            before = lineage_from_graph(self._graph, after.keys())
+        return diff_lineage(before, after, jobs)
+
+    def export(self, fmt: str, datasets: Optional[Sequence[str]] = None,
+               jobs: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """
+        Stream the graph as DOT, GraphML or CSV (see export.export_graph).
+
+        The lock is held while each chunk is produced, not between chunks,
+        so a long download does not block ingestion. The export covers the
+        nodes present when it started.
+
+        Args:
+            fmt: Export format
+            datasets: Optional dataset name patterns
+            jobs: Optional job name patterns
+
+        Yields:
+            str: Consecutive pieces of the document
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        self.refresh()
+        with self._lock:
+            chunks = export_graph(self._graph, fmt, datasets, jobs)
+        while True:
+            with self._lock:
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+def _checksum(path: str, offset: int) -> Optional[int]:
+    """CRC of the bytes just before offset, or None if the file is shorter or missing."""
+    try:
+        with open(path, "rb") as f:
+            start = max(offset - _CHECKSUM_BYTES, 0)
+            f.seek(start)
+            data = f.read(offset - start)
+    except OSError:
+        return None
+    if len(data) != offset - start:
+        return None
+    return zlib.crc32(data)
+
+
+_service: Optional[LineageService] = None
+_service_lock = threading.Lock()
+
+
+def get_lineage_service() -> LineageService:
+    """
+    Return the process-wide LineageService, creating it on first use.
+
+    The service is registered as a dump listener, so events dumped by the
+    lineage agents in this process reach the graph without a rebuild.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                service = LineageService()
+                add_dump_listener(service.on_dump)
+                _service = service
+    return _service
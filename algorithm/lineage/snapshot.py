@@ -0,0 +1,274 @@
+"""
+Binary snapshots of a LineageGraph.
+
+Rebuilding the graph means decoding and applying every dumped event, so a
+cold start grows with the history. A snapshot stores the graph's tables as
+flat arrays instead, and loading one only copies those arrays out of a
+memory-mapped file.
+
+File layout (native byte order, recorded in the header):
+
+    8 bytes   magic b"LGSNAP" + format version (2 bytes)
+    8 bytes   header length H (unsigned, little endian)
+    H bytes   JSON header: byte order, event count, skipped references, caller metadata and
+              the section table {name: [offset, typecode, count]}
+    sections  each aligned to 8 bytes
+
+Sections:
+
+    strings             every distinct string, UTF-8, NUL separated
+    kind, parent        node tables, indexed by node id
+    namespace, name, field
+                        node keys as string indexes (-1 for None)
+    down_offsets, down_targets, up_offsets, up_targets
+                        adjacency lists in CSR form, in their in-memory order
+    jobs, job_edge_offsets, job_edges
+                        the packed edge keys each job owns
+    run_ids, event_times, job_sql
+                        (run id, event time, SQL text) of each job's latest event
+
+Column lists, name indexes and edge reference counts are derived from
+these on load.
+"""
+
+import gc
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .graph import LineageGraph, COLUMN, DATASET
+from .identity import DatasetResolver
+
+
+_MAGIC = b"LGSNAP"
+_VERSION = 2
+_PREFIX = struct.Struct("<6sHQ")
+_ALIGN = 8
+
+
+def save_snapshot(graph: LineageGraph, path: Union[str, Path], meta: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Write a snapshot of a graph, replacing the file atomically.
+
+    Args:
+        graph: The graph to save
+        path: Snapshot file path
+        meta: Optional JSON-serialisable metadata stored with the snapshot
+
+    Returns:
+        int: Size of the snapshot in bytes
+
+    Raises:
+        ValueError: If a name contains a NUL character and cannot be pooled
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        index = strings.get(value)
+        if index is None:
+            if "\0" in value:
+                raise ValueError(f"Cannot snapshot a name containing NUL: {value!r}")
+            index = strings[value] = len(strings)
+        return index
+
+    namespaces = array('i')
+    names = array('i')
+    fields = array('i')
+    for key in graph._keys:
+        namespaces.append(intern(key[0]))
+        names.append(intern(key[1]))
+        fields.append(intern(key[2]) if len(key) > 2 else -1)
+
+    jobs = array('i', graph._job_edges)
+    job_edge_offsets = array('q', [0])
+    job_edges = array('q')
+    run_ids = array('i')
+    event_times = array('i')
+    job_sql = array('i')
+    for job in jobs:
+        job_edges.extend(graph._job_edges[job])
+        job_edge_offsets.append(len(job_edges))
+        run_id, event_time = graph._job_runs.get(job, (None, None))
+        run_ids.append(intern(run_id))
+        event_times.append(intern(event_time))
+        job_sql.append(intern(graph._job_sql.get(job)))
+
+    down_offsets, down_targets = _pack_adjacency(graph._down)
+    up_offsets, up_targets = _pack_adjacency(graph._up)
+    sections = {
+        "strings": bytearray("\0".join(strings).encode("utf-8")),
+        "kind": graph._kind,
+        "parent": graph._parent,
+        "namespace": namespaces,
+        "name": names,
+        "field": fields,
+        "down_offsets": down_offsets,
+        "down_targets": down_targets,
+        "up_offsets": up_offsets,
+        "up_targets": up_targets,
+        "jobs": jobs,
+        "job_edge_offsets": job_edge_offsets,
+        "job_edges": job_edges,
+        "run_ids": run_ids,
+        "event_times": event_times,
+        "job_sql": job_sql,
+    }
+
+    table = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        count = len(data)
+        table[name] = [offset, typecode, count]
+        offset += _aligned(count * array(typecode).itemsize)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "event_count": graph.event_count,
+        "skipped_references": graph.skipped_references,
+        "strings": len(strings),
+        "meta": meta or {},
+        "sections": table,
+    }).encode("utf-8")
+    header += b" " * (_aligned(_PREFIX.size + len(header)) - _PREFIX.size - len(header))
+
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, _VERSION, len(header)))
+        f.write(header)
+        for data in sections.values():
+            f.write(data)
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        size = f.tell()
+    os.replace(temp_path, path)
+    return size
+
+
+def load_snapshot(path: Union[str, Path], resolver: Optional[DatasetResolver] = None) -> Tuple[LineageGraph, Dict[str, Any]]:
+    """
+    Load a graph saved by save_snapshot.
+
+    Args:
+        path: Snapshot file path
+        resolver: Dataset identity resolver for the loaded graph; it should be
+            configured like the one the saved graph was built with
+
+    Returns:
+        Tuple[LineageGraph, Dict[str, Any]]: The graph and the metadata saved with it
+
+    Raises:
+        ValueError: If the file is not a snapshot this version can read
+        OSError: If the file cannot be read
+    """
+    # Decoding allocates millions of tuples and arrays; with the cyclic
+    # collector running, repeated full collections would dominate the load
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return _decode(view, resolver)
+            finally:
+                view.release()
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def is_snapshot(path: Union[str, Path]) -> bool:
+    """Return True if the file starts like a graph snapshot (of any version)."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(_MAGIC)) == _MAGIC
+    except OSError:
+        return False
+
+
+def _decode(view: memoryview, resolver: Optional[DatasetResolver]) -> Tuple[LineageGraph, Dict[str, Any]]:
+    if len(view) < _PREFIX.size:
+        raise ValueError("Not a lineage graph snapshot")
+    magic, version, header_size = _PREFIX.unpack_from(view)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not a lineage graph snapshot, or from another version")
+    header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_size]))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("Snapshot was written with another byte order")
+    base = _PREFIX.size + header_size
+
+    def section(name: str) -> array:
+        offset, typecode, count = header["sections"][name]
+        data = array(typecode)
+        start = base + offset
+        data.frombytes(view[start:start + count * data.itemsize])
+        return data
+
+    pool = bytes(section("strings")).decode("utf-8")
+    strings: List[Optional[str]] = [sys.intern(s) for s in pool.split("\0")] if header["strings"] else []
+    strings.append(None)  # index -1
+
+    graph = LineageGraph(resolver)
+    graph.event_count = header["event_count"]
+    graph.skipped_references = header.get("skipped_references", 0)
+    kinds = bytearray(section("kind"))
+    graph._kind = kinds
+    graph._parent = section("parent")
+    keys = graph._keys = [
+        (strings[namespace], strings[name], strings[field]) if kind == COLUMN else (strings[namespace], strings[name])
+        for kind, namespace, name, field in zip(kinds, section("namespace").tolist(), section("name").tolist(),
+                                                section("field").tolist())
+    ]
+    ids = graph._ids
+    parent = graph._parent
+    for node_id, (kind, key) in enumerate(zip(kinds, keys)):
+        ids[kind][key] = node_id
+        if kind == COLUMN:
+            columns = graph._columns.get(parent[node_id])
+            if columns is None:
+                columns = graph._columns[parent[node_id]] = array('i')
+            columns.append(node_id)
+        elif kind == DATASET:
+            graph._dataset_names.setdefault(key[1], []).append(node_id)
+
+    graph._down = _unpack_adjacency(section("down_offsets"), section("down_targets"))
+    graph._up = _unpack_adjacency(section("up_offsets"), section("up_targets"))
+
+    offsets = section("job_edge_offsets").tolist()
+    job_edges = section("job_edges")
+    run_ids = section("run_ids")
+    event_times = section("event_times")
+    job_sql = section("job_sql")
+    for i, job in enumerate(section("jobs")):
+        graph._job_edges[job] = job_edges[offsets[i]:offsets[i + 1]]
+        graph._job_runs[job] = (strings[run_ids[i]], strings[event_times[i]])
+        if job_sql[i] >= 0:
+            graph._job_sql[job] = strings[job_sql[i]]
+    # An edge is referenced once by each job owning it
+    graph._edge_refs = dict(Counter(job_edges))
+    return graph, header["meta"]
+
+
+def _pack_adjacency(adjacency: List[array]) -> Tuple[array, array]:
+    offsets = array('q', [0])
+    targets = array('i')
+    for neighbours in adjacency:
+        targets.extend(neighbours)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _unpack_adjacency(offsets: array, targets: array) -> List[array]:
+    bounds = offsets.tolist()
+    return [targets[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
@@ -0,0 +1,205 @@
+"""
+Bounded neighbourhoods of the lineage graph for visualisation.
+
+The visualisers (the JSONCrack watchdog and the demo) used to receive whole
+events, which for wide tables means megabytes of column lineage. A subgraph
+holds only what can be looked at: the nodes within a few hops of a dataset
+or column, capped in nodes and edges, with wide tables folded.
+
+Column collapsing happens in two places:
+
+- a dataset node lists at most `max_columns` of its column names, plus the
+  total column count;
+- in a column-level neighbourhood, once `max_columns` columns of one dataset
+  are in the subgraph, its further columns are merged into a single
+  "columns" node carrying their count, and their edges are redirected to it.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .events import LineageEvent, iter_events
+from .graph import LineageGraph, DOWNSTREAM, UPSTREAM
+
+
+BOTH = "both"
+
+DEFAULT_HOPS = 2
+DEFAULT_MAX_NODES = 200
+DEFAULT_MAX_EDGES = 500
+DEFAULT_MAX_COLUMNS = 20
+
+
+def extract_subgraph(graph: LineageGraph, node_id: int, hops: int = DEFAULT_HOPS, direction: str = BOTH,
+                     max_nodes: int = DEFAULT_MAX_NODES, max_edges: int = DEFAULT_MAX_EDGES,
+                     max_columns: int = DEFAULT_MAX_COLUMNS, include_columns: bool = False) -> Dict[str, Any]:
+    """
+    Extract the k-hop neighbourhood of a node.
+
+    Nodes are taken in breadth-first order, so when a cap is hit the
+    nearest nodes are the ones kept. Collapsed column groups count as one
+    node each.
+
+    Args:
+        graph: The lineage graph
+        node_id: Centre node (dataset or column)
+        hops: Maximum number of edges between the centre and any node
+        direction: "upstream", "downstream" or "both"
+        max_nodes: Maximum number of nodes, collapsed groups included
+        max_edges: Maximum number of edges
+        max_columns: Columns shown per dataset before the rest are collapsed
+        include_columns: When the centre is a dataset, also start from its
+            columns, so the column-level lineage around it is included
+
+    Returns:
+        Dict[str, Any]: {"center", "hops", "direction", "nodes", "edges", "truncated"}.
+        Nodes are node_info dicts with their "depth"; collapsed groups have
+        type "columns", a string id and a "count".
+    """
+    if direction == DOWNSTREAM:
+        adjacency = (graph.successors,)
+    elif direction == UPSTREAM:
+        adjacency = (graph.predecessors,)
+    elif direction == BOTH:
+        adjacency = (graph.successors, graph.predecessors)
+    else:
+        raise ValueError(f"Unknown direction: {direction!r}")
+    if node_id not in graph:
+        raise ValueError(f"Unknown node id: {node_id}")
+
+    # Node id -> id shown in the subgraph (itself, or its collapsed group)
+    shown: Dict[int, Union[int, str]] = {}
+    # Traversal depth of every node reached, and of every node shown
+    levels: Dict[int, int] = {}
+    depths: Dict[Union[int, str], int] = {}
+    collapsed: Dict[str, int] = {}
+    kept_columns: Dict[int, int] = {}
+    queue: deque = deque()
+
+    def visit(node: int, depth: int) -> bool:
+        dataset_id = graph.dataset_of(node)
+        if dataset_id is not None and kept_columns.get(dataset_id, 0) >= max_columns:
+            group = f"{dataset_id}:columns"
+            if group not in collapsed:
+                if len(depths) >= max_nodes:
+                    return False
+                collapsed[group] = 0
+                depths[group] = depth
+            collapsed[group] += 1
+            shown[node] = group
+        else:
+            if len(depths) >= max_nodes:
+                return False
+            if dataset_id is not None:
+                kept_columns[dataset_id] = kept_columns.get(dataset_id, 0) + 1
+            shown[node] = node
+            depths[node] = depth
+        levels[node] = depth
+        queue.append(node)
+        return True
+
+    shown[node_id] = node_id
+    levels[node_id] = depths[node_id] = 0
+    queue.append(node_id)
+    if graph.dataset_of(node_id) is not None:
+        kept_columns[graph.dataset_of(node_id)] = 1
+    truncated = False
+    if include_columns:
+        for column_id in graph.columns_of(node_id):
+            if not visit(column_id, 0):
+                truncated = True
+                break
+
+    while queue:
+        current = queue.popleft()
+        depth = levels[current]
+        if depth >= hops:
+            continue
+        for neighbours in adjacency:
+            for neighbour in neighbours(current):
+                if neighbour not in shown and not visit(neighbour, depth + 1):
+                    truncated = True
+
+    nodes = []
+    for shown_id, depth in depths.items():
+        if isinstance(shown_id, str):
+            dataset_id = int(shown_id.split(":", 1)[0])
+            namespace, name = graph.key(dataset_id)
+            nodes.append({"id": shown_id, "type": "columns", "namespace": namespace, "name": name,
+                          "count": collapsed[shown_id], "depth": depth})
+            continue
+        info = graph.node_info(shown_id)
+        if graph.kind(shown_id) == "dataset":
+            columns = graph.columns_of(shown_id)
+            info["columnCount"] = len(columns)
+            info["columns"] = [graph.key(c)[2] for c in columns[:max_columns]]
+        info["depth"] = depth
+        nodes.append(info)
+
+    edges: List[Dict[str, Any]] = []
+    seen = set()
+    for source, source_shown in shown.items():
+        for target in graph.successors(source):
+            target_shown = shown.get(target)
+            if target_shown is None:
+                continue
+            edge = (source_shown, target_shown)
+            if edge in seen or (source_shown == target_shown and source != target):
+                continue
+            if len(edges) >= max_edges:
+                truncated = True
+                break
+            seen.add(edge)
+            edges.append({"source": source_shown, "target": target_shown})
+        if len(edges) >= max_edges and truncated:
+            break
+
+    return {
+        "center": graph.node_info(node_id),
+        "hops": hops,
+        "direction": direction,
+        "nodes": nodes,
+        "edges": edges,
+        "truncated": truncated,
+    }
+
+
+def event_subgraph(events: Union[LineageEvent, Dict[str, Any], Iterable[Any]], hops: int = DEFAULT_HOPS,
+                   max_nodes: int = DEFAULT_MAX_NODES, max_edges: int = DEFAULT_MAX_EDGES,
+                   max_columns: int = DEFAULT_MAX_COLUMNS) -> Dict[str, Any]:
+    """
+    Build the viewable subgraph of one or more events, centred on the last event's first output.
+
+    The output's columns are included, so the subgraph shows the column
+    lineage of the event with wide tables collapsed.
+
+    Args:
+        events: An event (LineageEvent or dict) or an iterable of dump records
+        hops: Maximum number of edges between the centre and any node
+        max_nodes: Maximum number of nodes
+        max_edges: Maximum number of edges
+        max_columns: Columns shown per dataset before the rest are collapsed
+
+    Returns:
+        Dict[str, Any]: The subgraph, as returned by extract_subgraph
+
+    Raises:
+        ValueError: If there is no event with a dataset to centre on
+    """
+    if isinstance(events, (LineageEvent, dict)):
+        events = [events]
+    graph = LineageGraph()
+    last: Optional[LineageEvent] = None
+    for event in events:
+        if not isinstance(event, LineageEvent):
+            event = next(iter_events((event,)), None)
+            if event is None:
+                continue
+        graph.add_event(event)
+        last = event
+    datasets: Tuple = last.outputs + last.inputs if last is not None else ()
+    if not datasets:
+        raise ValueError("No lineage event with a dataset to centre the subgraph on")
+    center = graph.find_dataset(*datasets[0].key)
+    return extract_subgraph(graph, center, hops=hops, direction=BOTH, max_nodes=max_nodes,
+                            max_edges=max_edges, max_columns=max_columns, include_columns=True)
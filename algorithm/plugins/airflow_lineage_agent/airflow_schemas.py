@@ -0,0 +1,45 @@
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+from ...schemas.openlineage import OpenLineageEvent
+from ...schemas.stages import LogicalOperators
+
+
+class AirflowTask(BaseModel):
+    task_id: str
+    operator: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    upstream: List[str] = Field(default_factory=list)
+    downstream: List[str] = Field(default_factory=list)
+
+
+class AirflowSyntaxAnalysisOutput(BaseModel):
+    tasks: List[AirflowTask] = Field(default_factory=list)
+
+
+class TaskFieldMapping(BaseModel):
+    task_id: str
+    inputs: List[str] = Field(default_factory=list)
+    outputs: List[str] = Field(default_factory=list)
+    transformations: List[str] = Field(default_factory=list)
+
+
+class AirflowFieldDerivationOutput(BaseModel):
+    task_field_mappings: List[TaskFieldMapping] = Field(default_factory=list)
+
+
+class TaskLogicalOperators(BaseModel):
+    task_id: str
+    source_fields: List[str] = Field(default_factory=list)
+    logical_operators: LogicalOperators = Field(default_factory=LogicalOperators)
+
+
+class AirflowOperationTracingOutput(BaseModel):
+    logical_operators: List[TaskLogicalOperators] = Field(default_factory=list)
+
+
+syntax_analysis_schema = AirflowSyntaxAnalysisOutput
+field_derivation_schema = AirflowFieldDerivationOutput
+operation_tracing_schema = AirflowOperationTracingOutput
+event_composer_schema = OpenLineageEvent
@@ -1,53 +1,30 @@
 import os
 import sys
 from contextlib import AsyncExitStack
-from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
-from openai import AsyncOpenAI
+from agents import Agent, Tool, Runner, trace
 from dotenv import load_dotenv
 from agents.mcp.server import MCPServerStdio
 from typing import Dict, Any, Optional
 
-from ...utils.tracers import log_trace_id
+from ...utils.tracers import log_trace_id, reported_stages
 from ...plugins.python_lineage_agent.python_instructions import (syntax_analysis_instructions,
                         field_derivation_instructions,
                         operation_tracing_instructions,
                         event_composer_instructions)
+from ...plugins.python_lineage_agent.python_schemas import (syntax_analysis_schema,
+                        field_derivation_schema,
+                        operation_tracing_schema,
+                        event_composer_schema)
 from ...plugins.python_lineage_agent.mcp_servers.mcp_params import python_mcp_server_params
+from ...schemas.structured_output import stage_output_type, stage_output_text, stage_output_record
 from ...utils.file_utils import dump_json_record
+from ...providers import get_model
 
 
 load_dotenv(override=True)
 
-deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-google_api_key = os.getenv("GOOGLE_API_KEY")
-grok_api_key = os.getenv("GROK_API_KEY")
-openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-
-DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
-GROK_BASE_URL = "https://api.x.ai/v1"
-GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
-
 MAX_TURNS = 20
 
-openrouter_client = AsyncOpenAI(base_url=OPENROUTER_BASE_URL, api_key=openrouter_api_key)
-deepseek_client = AsyncOpenAI(base_url=DEEPSEEK_BASE_URL, api_key=deepseek_api_key)
-grok_client = AsyncOpenAI(base_url=GROK_BASE_URL, api_key=grok_api_key)
-gemini_client = AsyncOpenAI(base_url=GEMINI_BASE_URL, api_key=google_api_key)
-
-
-def get_model(model_name: str):
-    if "/" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=openrouter_client)
-    elif "deepseek" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=deepseek_client)
-    elif "grok" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=grok_client)
-    elif "gemini" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=gemini_client)
-    else:
-        return model_name
-
 
 class PythonLineageAgent:
     """Plugin agent for Python lineage analysis"""
@@ -57,24 +34,26 @@ class PythonLineageAgent:
         self.model_name = model_name
         self.query = query
 
-    async def create_agent(self, python_mcp_servers, instructions) -> Agent:
+    async def create_agent(self, python_mcp_servers, instructions, output_schema=None) -> Agent:
         agent = Agent(
             name=self.agent_name,
             instructions=instructions,
             model=get_model(self.model_name),
             mcp_servers=python_mcp_servers,
+            output_type=stage_output_type(self.model_name, output_schema),
         )
         return agent
 
     async def run_agent(self, python_mcp_servers, query: str):
         # Step 1: Run structure parsing agent first
-        syntax_analysis_agent = await self.create_agent(python_mcp_servers, syntax_analysis_instructions(self.agent_name))
-        syntax_analysis_result = await Runner.run(syntax_analysis_agent, query, max_turns=MAX_TURNS)
-        syntax_analysis_output = syntax_analysis_result.final_output
+        with reported_stages(self.agent_name, "syntax_analysis"):
+            syntax_analysis_agent = await self.create_agent(python_mcp_servers, syntax_analysis_instructions(self.agent_name), syntax_analysis_schema)
+            syntax_analysis_result = await Runner.run(syntax_analysis_agent, query, max_turns=MAX_TURNS)
+            syntax_analysis_output = stage_output_text(syntax_analysis_result.final_output)
         
         # Step 2: Run field mapping and operation logic agents in parallel using the structure output
-        field_derivation_agent = await self.create_agent(python_mcp_servers, field_derivation_instructions(self.agent_name))
-        operation_tracing_agent = await self.create_agent(python_mcp_servers, operation_tracing_instructions(self.agent_name))
+        field_derivation_agent = await self.create_agent(python_mcp_servers, field_derivation_instructions(self.agent_name), field_derivation_schema)
+        operation_tracing_agent = await self.create_agent(python_mcp_servers, operation_tracing_instructions(self.agent_name), operation_tracing_schema)
         
         # Create enhanced messages that include the structure parsing output
         field_derivation_message = f"Based on the following structure analysis:\n{syntax_analysis_output}\n\nAnalyze the field mappings for the original query: {query}"
@@ -82,17 +61,16 @@ class PythonLineageAgent:
         
         # Run both agents in parallel using asyncio.gather to ensure both complete before aggregation
         import asyncio
-        field_derivation_result, operation_tracing_result = await asyncio.gather(
-            Runner.run(field_derivation_agent, field_derivation_message, max_turns=MAX_TURNS),
-            Runner.run(operation_tracing_agent, operation_tracing_message, max_turns=MAX_TURNS)
-        )
-        
-        field_derivation_output = field_derivation_result.final_output
-        operation_tracing_output = operation_tracing_result.final_output
+        with reported_stages(self.agent_name, "field_derivation", "operation_tracing"):
+            field_derivation_result, operation_tracing_result = await asyncio.gather(
+                Runner.run(field_derivation_agent, field_derivation_message, max_turns=MAX_TURNS),
+                Runner.run(operation_tracing_agent, operation_tracing_message, max_turns=MAX_TURNS)
+            )
+            
+            field_derivation_output = stage_output_text(field_derivation_result.final_output)
+            operation_tracing_output = stage_output_text(operation_tracing_result.final_output)
         
         # Step 3: Aggregate all outputs and run aggregation logic agent
-        event_composer_agent = await self.create_agent(python_mcp_servers, event_composer_instructions(self.agent_name))
-        
         # Combine all outputs for the aggregation agent
         combined_output = f"""
         Parsed Python Blocks Output:
@@ -108,8 +86,11 @@ class PythonLineageAgent:
         {query}
         """
         
-        event_composer_result = await Runner.run(event_composer_agent, combined_output, max_turns=MAX_TURNS)
-        event_composer_output = event_composer_result.final_output
+        with reported_stages(self.agent_name, "event_composer"):
+            event_composer_agent = await self.create_agent(python_mcp_servers, event_composer_instructions(self.agent_name), event_composer_schema)
+            event_composer_result = await Runner.run(event_composer_agent, combined_output, max_turns=MAX_TURNS)
+            # Structured outputs arrive validated, so they are dumped as-is
+            event_composer_output = stage_output_record(event_composer_result.final_output)
         
         dumped_event_composer = dump_json_record(self.agent_name, event_composer_output)
 
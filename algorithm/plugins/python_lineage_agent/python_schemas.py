@@ -0,0 +1,26 @@
+from typing import Dict, List
+
+from pydantic import BaseModel, Field, RootModel
+
+from ...schemas.openlineage import OpenLineageEvent
+from ...schemas.stages import CodeBlock, FieldDerivationOutput, LogicalOperators
+
+
+class PythonSyntaxAnalysisOutput(RootModel[Dict[str, CodeBlock]]):
+    """Python blocks keyed sp1, sp2, ... as in the syntax analysis template."""
+
+
+class PythonOperationTracing(BaseModel):
+    source_dataframe: str
+    source_fields: List[str] = Field(default_factory=list)
+    logical_operators: LogicalOperators = Field(default_factory=LogicalOperators)
+
+
+class PythonOperationTracingOutput(BaseModel):
+    output_fields: List[PythonOperationTracing] = Field(default_factory=list)
+
+
+syntax_analysis_schema = PythonSyntaxAnalysisOutput
+field_derivation_schema = FieldDerivationOutput
+operation_tracing_schema = PythonOperationTracingOutput
+event_composer_schema = OpenLineageEvent
@@ -1,3 +1,7 @@
+import sys
+from pathlib import Path
+from typing import Union
+
 from mcp.server.fastmcp import FastMCP
 
 mcp = FastMCP("lineage_aql_server")
@@ -5,8 +9,13 @@ mcp = FastMCP("lineage_aql_server")
 from templates import (sql_lineage_syntax_analysis as syntax_analysis_template, 
                        sql_lineage_field_derivation as field_derivation_template, 
                        sql_lineage_operation_tracing as operation_tracing_template, 
-                       sql_lineage_event_composer as event_composer_template, 
-                       sql_graph_builder as graph_builder_template)
+                       sql_lineage_event_composer as event_composer_template)
+
+# The server runs as a script; make the project root importable for the graph builder
+sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+
+from algorithm.lineage.knowledge_graph import build_knowledge_graph
+from algorithm.utils.json_extract import extract_json
 
 
 @mcp.tool()
@@ -30,9 +39,10 @@ async def sql_lineage_event_composer() -> dict:
     return {"instructions": event_composer_template()}
 
 @mcp.tool()
-async def sql_lineage_graph_builder() -> dict:
-    """Knowledge graph extraction and graph building expert"""
-    return {"instructions": graph_builder_template()}
+async def sql_lineage_graph_builder(lineage: Union[dict, list, str]) -> dict:
+    """Build the {nodes, edges} knowledge graph of composed OpenLineage events, without a model call"""
+    events = extract_json(lineage) if isinstance(lineage, str) else lineage
+    return build_knowledge_graph(events)
 
 if __name__ == "__main__":
     mcp.run(transport='stdio')
@@ -11,5 +11,5 @@ def event_composer_instructions(name: str):
     return """use sql_lineage_event_composer function, This is very important, do not generate any other text than than given json output also only give json output, no other text."""
 
 def graph_builder_instructions(name: str):  
-    return """use sql_lineage_graph_builder function"""
+    return """use sql_lineage_graph_builder function, pass the composed OpenLineage event json as lineage and return its output unchanged"""
        
\ No newline at end of file
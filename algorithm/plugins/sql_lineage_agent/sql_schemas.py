@@ -0,0 +1,26 @@
+from typing import Dict, List
+
+from pydantic import BaseModel, Field, RootModel
+
+from ...schemas.openlineage import OpenLineageEvent
+from ...schemas.stages import CodeBlock, FieldDerivationOutput, LogicalOperators
+
+
+class SqlSyntaxAnalysisOutput(RootModel[Dict[str, CodeBlock]]):
+    """SQL blocks keyed sp1, sp2, ... as in the syntax analysis template."""
+
+
+class SqlOperationTracing(BaseModel):
+    source_table: str
+    source_fields: List[str] = Field(default_factory=list)
+    logical_operators: LogicalOperators = Field(default_factory=LogicalOperators)
+
+
+class SqlOperationTracingOutput(BaseModel):
+    output_fields: List[SqlOperationTracing] = Field(default_factory=list)
+
+
+syntax_analysis_schema = SqlSyntaxAnalysisOutput
+field_derivation_schema = FieldDerivationOutput
+operation_tracing_schema = SqlOperationTracingOutput
+event_composer_schema = OpenLineageEvent
@@ -0,0 +1,193 @@
+"""
+Shared clients for the model providers.
+
+Model names are routed to a provider (OpenAI, OpenRouter, DeepSeek, Grok or
+Gemini). Each provider's AsyncOpenAI client is created on first use, and all
+of them send their requests through one pooled HTTP client, so connections and
+TLS sessions are reused across stages, runs and plugins. Model wrappers are
+cached per model name, and their calls go through the provider's rate limiter
+(see algorithm.scheduler).
+
+Pooled connections and the limiters belong to the event loop that created
+them, so registries are kept per event loop.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+from agents import Model, OpenAIChatCompletionsModel, OpenAIProvider
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from .scheduler import LLMScheduler, ScheduledModel
+
+try:
+    import h2  # noqa: F401  # HTTP/2 support for httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Base URL and API key variable of each provider; None is the OpenAI default URL
+PROVIDERS = {
+    "openai": (None, "OPENAI_API_KEY"),
+    "openrouter": ("https://openrouter.ai/api/v1", "OPENROUTER_API_KEY"),
+    "deepseek": ("https://api.deepseek.com/v1", "DEEPSEEK_API_KEY"),
+    "grok": ("https://api.x.ai/v1", "GROK_API_KEY"),
+    "gemini": ("https://generativelanguage.googleapis.com/v1beta/openai/", "GOOGLE_API_KEY"),
+}
+
+# Connection pool shared by every provider
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 120.0
+
+
+def provider_for_model(model_name: str) -> str:
+    """Return the provider a model name is routed to, matching get_model."""
+    if "/" in model_name:
+        return "openrouter"
+    elif "deepseek" in model_name:
+        return "deepseek"
+    elif "grok" in model_name:
+        return "grok"
+    elif "gemini" in model_name:
+        return "gemini"
+    else:
+        return "openai"
+
+
+class ProviderRegistry:
+    """Provider clients and model wrappers sharing one connection pool"""
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY, http2: Optional[bool] = None):
+        """
+        Args:
+            max_connections (int): Connections open at once, across all providers
+            max_keepalive_connections (int): Idle connections kept open for reuse
+            keepalive_expiry (float): Seconds an idle connection is kept open
+            http2 (Optional[bool]): Whether to use HTTP/2; defaults to whether h2 is installed
+        """
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[str, AsyncOpenAI] = {}
+        self._models: Dict[str, Model] = {}
+        self._openai_provider: Optional[OpenAIProvider] = None
+        self._lock = threading.Lock()
+        self.scheduler = LLMScheduler()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on first use"""
+        with self._lock:
+            if self._http_client is None:
+                # Keeps the openai defaults for timeouts and redirects
+                self._http_client = DefaultAsyncHttpxClient(limits=self.limits, http2=self.http2)
+            return self._http_client
+
+    def client(self, provider: str) -> AsyncOpenAI:
+        """
+        Get a provider's client, creating it on first use.
+
+        Args:
+            provider (str): A provider in PROVIDERS
+
+        Returns:
+            AsyncOpenAI: The provider's client
+
+        Raises:
+            ValueError: If the provider is unknown
+        """
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider: {provider}")
+        client = self._clients.get(provider)
+        if client is None:
+            http_client = self.http_client
+            with self._lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    base_url, api_key_env = PROVIDERS[provider]
+                    # Retries are left to the scheduler, which coordinates them across callers
+                    client = AsyncOpenAI(base_url=base_url, api_key=os.getenv(api_key_env),
+                                         http_client=http_client, max_retries=0)
+                    self._clients[provider] = client
+        return client
+
+    def model(self, model_name: str) -> Model:
+        """
+        Get the model to give an agent for a model name.
+
+        Args:
+            model_name (str): The model name, e.g. "gpt-4o-mini" or "meta-llama/llama-3"
+
+        Returns:
+            Model: A cached model of the model's provider, scheduled by its limiter.
+            OpenAI models are the agents SDK's default model on the shared client.
+        """
+        model = self._models.get(model_name)
+        if model is None:
+            provider = provider_for_model(model_name)
+            if provider == "openai":
+                if self._openai_provider is None:
+                    self._openai_provider = OpenAIProvider(openai_client=self.client(provider))
+                inner = self._openai_provider.get_model(model_name)
+            else:
+                inner = OpenAIChatCompletionsModel(model=model_name, openai_client=self.client(provider))
+            model = ScheduledModel(inner, self.scheduler.limiter(provider))
+            self._models[model_name] = model
+        return model
+
+    def stats(self) -> Dict[str, Any]:
+        """What the registry has created so far"""
+        return {
+            "http2": self.http2,
+            "clients": sorted(self._clients),
+            "models": sorted(self._models),
+            "limits": self.scheduler.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled connections; the registry creates new ones if used again"""
+        with self._lock:
+            http_client, self._http_client = self._http_client, None
+            self._clients.clear()
+            self._models.clear()
+            self._openai_provider = None
+        if http_client is not None:
+            await http_client.aclose()
+
+
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ProviderRegistry]" = weakref.WeakKeyDictionary()
+_loopless_registry: Optional[ProviderRegistry] = None
+_registries_lock = threading.Lock()
+
+
+def get_registry() -> ProviderRegistry:
+    """Get the provider registry of the running event loop."""
+    global _loopless_registry
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _registries_lock:
+        if loop is None:
+            if _loopless_registry is None:
+                _loopless_registry = ProviderRegistry()
+            return _loopless_registry
+        registry = _registries.get(loop)
+        if registry is None:
+            registry = _registries[loop] = ProviderRegistry()
+        return registry
+
+
+def get_model(model_name: str) -> Model:
+    """Get the model to give an agent for a model name, from the running loop's registry."""
+    return get_registry().model(model_name)
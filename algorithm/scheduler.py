@@ -0,0 +1,379 @@
+"""
+Rate limiting and scheduling for model calls.
+
+Every model call of a stage agent goes through its provider's limiter. A
+limiter admits calls in arrival order, caps how many run at once, and keeps
+token buckets for the provider's requests and tokens per minute, so
+concurrent runs share a quota instead of racing for it. A call rejected with
+429 is retried after the provider's Retry-After delay, and the whole provider
+pauses for that delay so that other callers don't hit the limit too. Server
+and connection errors are retried with jittered exponential backoff.
+
+Quotas are read from the environment per provider, e.g.
+
+    LINEAGENT_OPENAI_RPM=500           requests per minute
+    LINEAGENT_OPENAI_TPM=200000        tokens per minute
+    LINEAGENT_OPENAI_CONCURRENCY=8     calls in flight
+
+Unset quotas are not limited. Limiters use asyncio primitives, so each event
+loop has its own scheduler (see algorithm.providers.get_registry).
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import openai
+from agents import Model
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 6
+
+# Seconds of quota a bucket may spend at once
+BURST_SECONDS = 10.0
+
+# Backoff for retries without a Retry-After delay: BASE * 2**attempt, at most MAX, jittered
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# Tokens reserved for a response whose model settings set no max_tokens
+DEFAULT_RESPONSE_TOKENS = 1024
+
+# Roughly four characters per token for the request estimate
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """A budget refilled continuously at a rate per minute"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            per_minute (float): Units added per minute
+            burst_seconds (float): Seconds of refill the bucket holds when full
+            clock (Callable[[], float]): Monotonic time in seconds
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until the bucket can pay for amount; larger amounts wait for a full bucket"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Spend amount; the bucket goes into debt for amounts over its level"""
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Give back amount, e.g. when a call used fewer tokens than estimated"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ProviderLimiter:
+    """Admits the model calls of one provider within its quotas"""
+
+    def __init__(self, provider: str, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES, burst_seconds: float = BURST_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            provider (str): The provider, for messages and stats
+            requests_per_minute (Optional[float]): Request quota, or None for no limit
+            tokens_per_minute (Optional[float]): Token quota, or None for no limit
+            max_concurrency (int): Calls in flight at once
+            max_retries (int): Retries of a call before its error is raised
+            burst_seconds (float): Seconds of quota that may be spent at once
+            clock (Callable[[], float]): Monotonic time in seconds
+        """
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.requests = TokenBucket(requests_per_minute, burst_seconds, clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds, clock) if tokens_per_minute else None
+        self._clock = clock
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # Held by the caller at the head of the queue while it waits for a slot and for quota
+        self._admission = asyncio.Lock()
+        self._paused_until = 0.0
+        self._stats = {"calls": 0, "retries": 0, "rateLimited": 0, "failed": 0, "waitSeconds": 0.0}
+
+    @classmethod
+    def from_env(cls, provider: str) -> "ProviderLimiter":
+        """Create a provider's limiter from LINEAGENT_<PROVIDER>_RPM, _TPM and _CONCURRENCY"""
+        prefix = f"LINEAGENT_{provider.upper()}_"
+
+        def setting(name: str) -> Optional[float]:
+            value = os.getenv(prefix + name)
+            if not value:
+                return None
+            try:
+                return float(value)
+            except ValueError:
+                print(f"Warning: ignoring {prefix + name}={value!r}, which is not a number")
+                return None
+
+        concurrency = setting("CONCURRENCY")
+        return cls(provider, requests_per_minute=setting("RPM"), tokens_per_minute=setting("TPM"),
+                   max_concurrency=int(concurrency) if concurrency else DEFAULT_CONCURRENCY)
+
+    def pause(self, seconds: float) -> None:
+        """Admit no calls for the next seconds"""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    async def _admit(self, tokens: int) -> None:
+        """Wait for this call's turn, a free slot and quota; the caller releases the slot"""
+        start = self._clock()
+        async with self._admission:
+            await self._slots.acquire()
+            try:
+                while True:
+                    delay = self._paused_until - self._clock()
+                    if self.requests is not None:
+                        delay = max(delay, self.requests.delay(1))
+                    if self.tokens is not None:
+                        delay = max(delay, self.tokens.delay(tokens))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self._slots.release()
+                raise
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+        self._stats["calls"] += 1
+        self._stats["waitSeconds"] += self._clock() - start
+
+    def settle(self, estimated: int, used: int) -> None:
+        """Correct the token bucket once a call's actual usage is known"""
+        if self.tokens is None or used <= 0:
+            return
+        if used > estimated:
+            self.tokens.take(used - estimated)
+        else:
+            self.tokens.refund(estimated - used)
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Decide whether a failed call is retried.
+
+        Args:
+            error (BaseException): The call's error
+            attempt (int): Retries made so far
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying, or None to raise the error
+        """
+        if attempt >= self.max_retries:
+            return None
+        backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt)
+        if isinstance(error, openai.RateLimitError):
+            self._stats["rateLimited"] += 1
+            retry_after = retry_after_seconds(error)
+            if retry_after is None:
+                delay = backoff * random.uniform(0.5, 1.0)
+            else:
+                delay = retry_after + random.uniform(0, min(1.0, 0.1 * retry_after + 0.05))
+            # Everyone waits, so the provider isn't hit again before the limit resets
+            self.pause(delay)
+            return delay
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS:
+                return None
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                return retry_after
+            return backoff * random.uniform(0.5, 1.0)
+        if isinstance(error, openai.APIConnectionError):
+            return backoff * random.uniform(0.5, 1.0)
+        return None
+
+    async def call(self, request: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """
+        Make a model call within the provider's limits, retrying it when allowed.
+
+        Args:
+            request (Callable[[], Awaitable[Any]]): Starts the call; called again for each retry
+            tokens (int): Estimated tokens of the call
+
+        Returns:
+            Any: The call's result
+        """
+        attempt = 0
+        while True:
+            await self._admit(tokens)
+            try:
+                response = await request()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    self._stats["failed"] += 1
+                    raise
+            else:
+                self.settle(tokens, response_tokens(response))
+                return response
+            finally:
+                self._slots.release()
+            attempt += 1
+            self._stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def stream(self, request: Callable[[], AsyncIterator[Any]], tokens: int = 0) -> AsyncIterator[Any]:
+        """
+        Stream a model call within the provider's limits. A stream is only retried
+        if it fails before its first event.
+
+        Args:
+            request (Callable[[], AsyncIterator[Any]]): Starts the stream; called again for each retry
+            tokens (int): Estimated tokens of the call
+
+        Yields:
+            Any: The stream's events
+        """
+        attempt = 0
+        while True:
+            await self._admit(tokens)
+            started = False
+            try:
+                async for event in request():
+                    started = True
+                    used = response_tokens(getattr(event, "response", None))
+                    if used:
+                        self.settle(tokens, used)
+                    yield event
+                return
+            except Exception as e:
+                delay = None if started else self.retry_delay(e, attempt)
+                if delay is None:
+                    self._stats["failed"] += 1
+                    raise
+            finally:
+                self._slots.release()
+            attempt += 1
+            self._stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current budgets of the limiter"""
+        stats = dict(self._stats, waitSeconds=round(self._stats["waitSeconds"], 3),
+                     maxConcurrency=self.max_concurrency)
+        if self.requests is not None:
+            stats["requestBudget"] = round(self.requests.level, 1)
+        if self.tokens is not None:
+            stats["tokenBudget"] = round(self.tokens.level, 1)
+        return stats
+
+
+class LLMScheduler:
+    """The limiters of every provider, created from the environment on first use"""
+
+    def __init__(self, limiter_factory: Callable[[str], ProviderLimiter] = ProviderLimiter.from_env):
+        self._limiter_factory = limiter_factory
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        """Get a provider's limiter"""
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = self._limiters[provider] = self._limiter_factory(provider)
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Stats of each provider's limiter"""
+        return {provider: limiter.stats() for provider, limiter in sorted(self._limiters.items())}
+
+
+class ScheduledModel(Model):
+    """A model whose calls go through a provider limiter"""
+
+    def __init__(self, model: Model, limiter: ProviderLimiter):
+        self.model = model
+        self.limiter = limiter
+
+    async def get_response(self, *args, **kwargs):
+        return await self.limiter.call(lambda: self.model.get_response(*args, **kwargs),
+                                       estimate_tokens(*args, **kwargs))
+
+    async def stream_response(self, *args, **kwargs):
+        async for event in self.limiter.stream(lambda: self.model.stream_response(*args, **kwargs),
+                                               estimate_tokens(*args, **kwargs)):
+            yield event
+
+    async def close(self) -> None:
+        close = getattr(self.model, "close", None)
+        if close is not None:
+            await close()
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def estimate_tokens(system_instructions: Optional[str] = None, input: Any = None,
+                    model_settings: Any = None, *args, **kwargs) -> int:
+    """
+    Estimate the tokens a model call will count against a quota: its prompt,
+    from its length, and the response tokens it may produce.
+
+    Takes the arguments of Model.get_response.
+    """
+    system_instructions = kwargs.get("system_instructions", system_instructions)
+    input = kwargs.get("input", input)
+    model_settings = kwargs.get("model_settings", model_settings)
+    text = input if isinstance(input, str) else json.dumps(input, default=str)
+    prompt_chars = len(system_instructions or "") + len(text)
+    response_tokens_limit = getattr(model_settings, "max_tokens", None) or DEFAULT_RESPONSE_TOKENS
+    return math.ceil(prompt_chars / CHARS_PER_TOKEN) + response_tokens_limit
+
+
+def response_tokens(response: Any) -> int:
+    """Total tokens a response reports using, or 0 when unknown"""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+
+def retry_after_seconds(error: openai.APIStatusError) -> Optional[float]:
+    """Read the delay a provider asks for from retry-after-ms or Retry-After"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
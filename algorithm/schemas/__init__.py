@@ -0,0 +1,17 @@
+from .openlineage import OpenLineageEvent
+from .stages import CodeBlock, FieldDerivation, FieldDerivationOutput, LogicalOperators
+from .structured_output import (provider_for_model, supports_structured_output, stage_output_type,
+                                stage_output_record, stage_output_text)
+
+__all__ = [
+    'OpenLineageEvent',
+    'CodeBlock',
+    'FieldDerivation',
+    'FieldDerivationOutput',
+    'LogicalOperators',
+    'provider_for_model',
+    'supports_structured_output',
+    'stage_output_type',
+    'stage_output_record',
+    'stage_output_text',
+]
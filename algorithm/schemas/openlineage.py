@@ -0,0 +1,165 @@
+"""
+Pydantic model of the OpenLineage event the event composer templates describe.
+
+Used as the composer's structured output type, so providers that support
+structured output return a validated event instead of free text.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Facet(BaseModel):
+    """Base class for facets; keeps the `_producer` and `_schemaURL` keys."""
+
+    model_config = ConfigDict(populate_by_name=True, extra="allow")
+
+    producer: Optional[str] = Field(default=None, alias="_producer")
+    schema_url: Optional[str] = Field(default=None, alias="_schemaURL")
+
+
+class SqlJobFacet(Facet):
+    query: str
+
+
+class JobTypeJobFacet(Facet):
+    processingType: Optional[str] = None
+    integration: Optional[str] = None
+    jobType: Optional[str] = None
+
+
+class SourceCodeJobFacet(Facet):
+    language: Optional[str] = None
+    sourceCode: Optional[str] = None
+
+
+class JobFacets(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    sql: Optional[SqlJobFacet] = None
+    jobType: Optional[JobTypeJobFacet] = None
+    sourceCode: Optional[SourceCodeJobFacet] = None
+
+
+class Job(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    namespace: Optional[str] = None
+    name: Optional[str] = None
+    facets: JobFacets = Field(default_factory=JobFacets)
+
+
+class ParentJob(BaseModel):
+    name: str
+    namespace: str
+
+
+class ParentRun(BaseModel):
+    runId: str
+
+
+class ParentRunFacet(Facet):
+    job: ParentJob
+    run: ParentRun
+
+
+class RunFacets(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    parent: Optional[ParentRunFacet] = None
+
+
+class Run(BaseModel):
+    runId: str
+    facets: RunFacets = Field(default_factory=RunFacets)
+
+
+class SchemaField(BaseModel):
+    name: str
+    type: Optional[str] = None
+    description: Optional[str] = None
+
+
+class SchemaDatasetFacet(Facet):
+    fields: List[SchemaField] = Field(default_factory=list)
+
+
+class StorageDatasetFacet(Facet):
+    storageLayer: Optional[str] = None
+    fileFormat: Optional[str] = None
+
+
+class DatasetTypeDatasetFacet(Facet):
+    datasetType: Optional[str] = None
+    subType: Optional[str] = None
+
+
+class LifecycleStateChangeDatasetFacet(Facet):
+    lifecycleStateChange: Optional[str] = None
+
+
+class Owner(BaseModel):
+    name: str
+    type: Optional[str] = None
+
+
+class OwnershipDatasetFacet(Facet):
+    owners: List[Owner] = Field(default_factory=list)
+
+
+class Transformation(BaseModel):
+    type: str
+    subtype: Optional[str] = None
+    description: Optional[str] = None
+    masking: bool = False
+
+
+class InputField(BaseModel):
+    namespace: str
+    name: str
+    field: str
+    transformations: List[Transformation] = Field(default_factory=list)
+
+
+class ColumnLineageField(BaseModel):
+    inputFields: List[InputField] = Field(default_factory=list)
+
+
+class ColumnLineageDatasetFacet(Facet):
+    fields: Dict[str, ColumnLineageField] = Field(default_factory=dict)
+
+
+class DatasetFacets(BaseModel):
+    model_config = ConfigDict(populate_by_name=True, extra="allow")
+
+    # `schema` would shadow a BaseModel attribute, so it is aliased
+    schema_: Optional[SchemaDatasetFacet] = Field(default=None, alias="schema")
+    storage: Optional[StorageDatasetFacet] = None
+    datasetType: Optional[DatasetTypeDatasetFacet] = None
+    lifecycleStateChange: Optional[LifecycleStateChangeDatasetFacet] = None
+    ownership: Optional[OwnershipDatasetFacet] = None
+    columnLineage: Optional[ColumnLineageDatasetFacet] = None
+
+
+class Dataset(BaseModel):
+    namespace: str
+    name: str
+    facets: DatasetFacets = Field(default_factory=DatasetFacets)
+
+
+class OpenLineageEvent(BaseModel):
+    """A single OpenLineage run event covering the whole analysed script."""
+
+    model_config = ConfigDict(extra="allow")
+
+    eventType: str
+    eventTime: str
+    run: Run
+    job: Job
+    inputs: List[Dataset] = Field(default_factory=list)
+    outputs: List[Dataset] = Field(default_factory=list)
+
+    def to_record(self) -> Dict[str, Any]:
+        """Return the event as a plain dict using the OpenLineage key names."""
+        return self.model_dump(mode="json", by_alias=True, exclude_none=True)
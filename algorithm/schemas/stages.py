@@ -0,0 +1,42 @@
+"""
+Pydantic models for the intermediate stage outputs shared by the plugins.
+
+Plugin-specific stage shapes live next to each plugin's instructions.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class LogicalOperators(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    filters: List[str] = Field(default_factory=list)
+    joins: List[str] = Field(default_factory=list)
+    group_by: List[str] = Field(default_factory=list)
+    having: List[str] = Field(default_factory=list)
+    order_by: List[str] = Field(default_factory=list)
+    other: List[str] = Field(default_factory=list)
+
+
+class FieldDerivation(BaseModel):
+    name: str
+    source: str
+    transformation: str
+
+
+class FieldDerivationOutput(BaseModel):
+    """Output of the field derivation stage for SQL and Python scripts."""
+
+    output_fields: List[FieldDerivation] = Field(default_factory=list)
+
+
+class CodeBlock(BaseModel):
+    """One block produced by syntax analysis; SQL blocks set `sql`, Python blocks set `code`."""
+
+    model_config = ConfigDict(extra="allow")
+
+    name: str
+    sql: Optional[str] = None
+    code: Optional[str] = None
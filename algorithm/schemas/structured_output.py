@@ -0,0 +1,66 @@
+"""
+Structured output support for the agent stages.
+
+Stages pass a Pydantic schema for their output. When the model's provider
+supports structured output, the schema becomes the agent's `output_type` and
+the stage returns a validated object; otherwise the stage falls back to free
+text that is parsed downstream.
+"""
+
+import json
+import os
+from typing import Any, Optional, Type
+
+from agents import AgentOutputSchema
+from pydantic import BaseModel
+
+from ..providers import provider_for_model
+
+
+# Set to "false" to always use free-text outputs, or "true" to force structured outputs
+STRUCTURED_OUTPUT_ENV = "LINEAGENT_STRUCTURED_OUTPUT"
+
+# Providers whose chat completions endpoint accepts a json_schema response format
+STRUCTURED_OUTPUT_PROVIDERS = {"openai", "gemini", "grok"}
+
+
+def supports_structured_output(model_name: str) -> bool:
+    """Check whether a model should be asked for schema-constrained output."""
+    setting = os.getenv(STRUCTURED_OUTPUT_ENV, "auto").lower()
+    if setting in ("false", "0", "off"):
+        return False
+    if setting in ("true", "1", "on"):
+        return True
+    return provider_for_model(model_name) in STRUCTURED_OUTPUT_PROVIDERS
+
+
+def stage_output_type(model_name: str, schema: Optional[Type[BaseModel]]) -> Optional[AgentOutputSchema]:
+    """
+    Build the `output_type` for a stage agent.
+    
+    Args:
+        model_name (str): The model the stage runs on
+        schema (Optional[Type[BaseModel]]): The stage's output model
+    
+    Returns:
+        Optional[AgentOutputSchema]: The output schema, or None for free-text output
+    """
+    if schema is None or not supports_structured_output(model_name):
+        return None
+    # Column lineage maps output field names to their inputs, which strict
+    # JSON schemas cannot express, so the schema is sent non-strict.
+    return AgentOutputSchema(schema, strict_json_schema=False)
+
+
+def stage_output_record(output: Any) -> Any:
+    """Convert a stage's final output to plain JSON-compatible data."""
+    if isinstance(output, BaseModel):
+        return output.model_dump(mode="json", by_alias=True, exclude_none=True)
+    return output
+
+
+def stage_output_text(output: Any) -> str:
+    """Render a stage's final output for the prompt of the next stage."""
+    if isinstance(output, str):
+        return output
+    return json.dumps(stage_output_record(output), ensure_ascii=False)
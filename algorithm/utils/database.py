@@ -1,19 +1,27 @@
 import sqlite3
 import json
 import os
+import threading
+from contextvars import ContextVar
 from datetime import datetime
-from dotenv import load_dotenv
 from enum import Enum
+from typing import Optional
 
-load_dotenv(override=True)
-
-# Create the agents_log_db directory if it doesn't exist
+# The agents_log_db directory is created with the database on first use
 agents_log_dir = "agents_log_db"
-os.makedirs(agents_log_dir, exist_ok=True)
 
 # Set the database path inside the agents_log_db folder
 DB = os.path.join(agents_log_dir, "agents_logs.db")
 
+# The database whose table has been created, so importing this module touches no files
+_initialized_db = None
+_init_lock = threading.Lock()
+
+# Run id written with each log entry. A caller that follows one run's logs,
+# such as a demo session, sets it around the run; tasks started inside the
+# run copy it, so concurrent runs of the same agent are told apart.
+log_run_id: ContextVar[Optional[str]] = ContextVar("log_run_id", default=None)
+
 # Color enum for console output
 class Color(Enum):
     WHITE = "\033[97m"
@@ -32,27 +40,57 @@ color_mapper = {
     "generation": Color.YELLOW,
     "response": Color.MAGENTA,
     "account": Color.RED,
+    "stage": Color.GREEN,
     "span": Color.CYAN,  # Default for span type
 }
 
-with sqlite3.connect(DB) as conn:
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS lineage_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            datetime DATETIME,
-            type TEXT,
-            message TEXT
-        )
-    ''')
-    conn.commit()
+
+def _connect() -> sqlite3.Connection:
+    """
+    Open the log database, loading .env and creating its directory and table on first use.
+    
+    Returns:
+        sqlite3.Connection: A connection to DB
+    """
+    global _initialized_db
+    if _initialized_db != DB:
+        with _init_lock:
+            if _initialized_db != DB:
+                # Imported here so that importing this module stays light
+                from dotenv import load_dotenv
+                load_dotenv(override=True)
+                os.makedirs(os.path.dirname(DB) or ".", exist_ok=True)
+                with sqlite3.connect(DB) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS lineage_log (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT,
+                            datetime DATETIME,
+                            type TEXT,
+                            message TEXT,
+                            run_id TEXT
+                        )
+                    ''')
+                    # Databases created before runs were logged lack the column
+                    columns = [row[1] for row in cursor.execute('PRAGMA table_info(lineage_log)')]
+                    if 'run_id' not in columns:
+                        cursor.execute('ALTER TABLE lineage_log ADD COLUMN run_id TEXT')
+                    # Live log panels read the rows of one name, or one run, after the last id they saw
+                    cursor.execute('CREATE INDEX IF NOT EXISTS lineage_log_name_id ON lineage_log (name, id)')
+                    cursor.execute('CREATE INDEX IF NOT EXISTS lineage_log_run_id_id ON lineage_log (run_id, id)')
+                    conn.commit()
+                conn.close()
+                _initialized_db = DB
+    return sqlite3.connect(DB)
 
 
 def write_lineage_log(name: str, type: str, message: str):
     """
     Write a log entry to the logs table and console with colors.
     
+    The entry records the current log_run_id, if one is set.
+    
     Args:
         name (str): The name associated with the log
         type (str): The type of log entry
@@ -67,12 +105,12 @@ def write_lineage_log(name: str, type: str, message: str):
     print(f"{color.value}[{now}] {name.upper()}: {type} - {message}{Color.RESET.value}")
     
     # Database logging
-    with sqlite3.connect(DB) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO lineage_log (name, datetime, type, message)
-            VALUES (?, datetime('now'), ?, ?)
-        ''', (name.lower(), type, message))
+            INSERT INTO lineage_log (name, datetime, type, message, run_id)
+            VALUES (?, datetime('now'), ?, ?, ?)
+        ''', (name.lower(), type, message, log_run_id.get()))
         conn.commit()
 
 def read_lineage_log(name: str, last_n=10):
@@ -86,7 +124,7 @@ def read_lineage_log(name: str, last_n=10):
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
-    with sqlite3.connect(DB) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT datetime, type, message FROM lineage_log 
@@ -97,3 +135,42 @@ def read_lineage_log(name: str, last_n=10):
         
         return reversed(cursor.fetchall())
 
+
+def read_lineage_log_after(name: str, after_id: Optional[int] = None, limit: int = 200,
+                           run_id: Optional[str] = None):
+    """
+    Read the log entries for a given name that were written after a given entry.
+    
+    Args:
+        name (str): The name to retrieve logs for
+        after_id (Optional[int]): The id of the last entry already read, or None for
+            the most recent entries
+        limit (int): Maximum number of entries to retrieve
+        run_id (Optional[str]): Only retrieve the entries written during this run
+            (see log_run_id)
+        
+    Returns:
+        list: A list of tuples containing (id, datetime, type, message), oldest first
+    """
+    where = 'name = ?'
+    params = [name.lower()]
+    if run_id is not None:
+        where += ' AND run_id = ?'
+        params.append(run_id)
+    with _connect() as conn:
+        cursor = conn.cursor()
+        if after_id is None:
+            cursor.execute(f'''
+                SELECT id, datetime, type, message FROM lineage_log
+                WHERE {where}
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (*params, limit))
+            return cursor.fetchall()[::-1]
+        cursor.execute(f'''
+            SELECT id, datetime, type, message FROM lineage_log
+            WHERE {where} AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (*params, after_id, limit))
+        return cursor.fetchall()
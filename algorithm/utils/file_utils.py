@@ -2,17 +2,50 @@ import json
 import os
 import re
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Callable, List, Optional, Union
 from datetime import datetime
 
+from .json_extract import extract_json, JSONExtractionError
+
+
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*\n?')
+
+# Callables notified after dump_json_record appends a record
+_dump_listeners: List[Callable[[Path, Any, int, int], None]] = []
+
+
+def add_dump_listener(listener: Callable[[Path, Any, int, int], None]) -> None:
+    """
+    Register a callable to be notified of every record appended by dump_json_record.
+    
+    The listener is called as listener(file_path, record, start, end), where
+    start and end are the byte offsets of the appended line in the file.
+    Exceptions raised by a listener are reported and do not fail the dump.
+    
+    Args:
+        listener (Callable[[Path, Any, int, int], None]): The callable to register
+    """
+    if listener not in _dump_listeners:
+        _dump_listeners.append(listener)
+
+
+def remove_dump_listener(listener: Callable[[Path, Any, int, int], None]) -> None:
+    """
+    Unregister a callable added with add_dump_listener.
+    
+    Args:
+        listener (Callable[[Path, Any, int, int], None]): The callable to remove
+    """
+    if listener in _dump_listeners:
+        _dump_listeners.remove(listener)
+
 
 def clean_json_string(text: str) -> str:
     """
     Clean a string that might contain markdown formatting and extract just the JSON content.
     """
     # Remove markdown code blocks
-    text = re.sub(r'```json\s*\n?', '', text)
-    text = re.sub(r'```\s*\n?', '', text)
+    text = _CODE_FENCE_RE.sub('', text)
     
     # Remove leading/trailing whitespace and newlines
     text = text.strip()
@@ -20,6 +53,25 @@ def clean_json_string(text: str) -> str:
     return text
 
 
+def parse_model_output(text: str) -> Union[Dict[str, Any], list, str]:
+    """
+    Recover the JSON payload from a model output string.
+    
+    Uses extract_json, so prose, markdown fences, trailing commas and truncated
+    tails do not prevent the event from being stored as JSON.
+    
+    Args:
+        text (str): Raw model output
+    
+    Returns:
+        Union[Dict[str, Any], list, str]: The parsed JSON value, or the cleaned string if no JSON could be recovered
+    """
+    try:
+        return extract_json(text)
+    except JSONExtractionError:
+        return clean_json_string(text)
+
+
 def dump_json_record(filename: str, record: Union[Dict[str, Any], str], lineage_extraction_dumps_folder: str = "lineage_extraction_dumps") -> Union[Dict[str, Any], str]:
     """
     Create a file under the lineagedb folder and dump a JSON record as a new line.
@@ -44,40 +96,28 @@ def dump_json_record(filename: str, record: Union[Dict[str, Any], str], lineage_
     file_path = folder_path / f"{filename}.json"
     
     # Handle different input types
-    if isinstance(record, str):
-        # Clean the string first to remove any markdown formatting
-        cleaned_record = clean_json_string(record)
-        
-        # Try to parse as JSON first, then re-serialize properly
-        try:
-            # Parse the string as JSON to get the actual data
-            parsed_data = json.loads(cleaned_record)
-            # Re-serialize without escaping newlines and with proper formatting
-            json_line = json.dumps(parsed_data, ensure_ascii=False, separators=(',', ':'))
-            processed_record = parsed_data
-        except json.JSONDecodeError:
-            # If it's not valid JSON, treat it as a plain string
-            json_line = json.dumps(cleaned_record, ensure_ascii=False)
-            processed_record = cleaned_record
-            
-    elif isinstance(record, dict):
+    if isinstance(record, dict):
         # If it's already a dict, convert to JSON string
-        json_line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
         processed_record = record
     else:
-        # For other types, convert to string and then to JSON
-        cleaned_record = clean_json_string(str(record))
-        try:
-            parsed_data = json.loads(cleaned_record)
-            json_line = json.dumps(parsed_data, ensure_ascii=False, separators=(',', ':'))
-            processed_record = parsed_data
-        except json.JSONDecodeError:
-            json_line = json.dumps(cleaned_record, ensure_ascii=False)
-            processed_record = cleaned_record
+        # Recover the JSON payload from strings (or anything stringable),
+        # tolerating prose, fences, trailing commas and truncated tails
+        processed_record = parse_model_output(record if isinstance(record, str) else str(record))
+    
+    # Re-serialize without escaping newlines and with compact formatting
+    json_line = json.dumps(processed_record, ensure_ascii=False, separators=(',', ':'))
     
     # Append the JSON record as a new line to the file
-    with open(file_path, "a", encoding="utf-8") as f:
-        f.write(json_line + "\n")
+    data = (json_line + "\n").encode("utf-8")
+    with open(file_path, "ab") as f:
+        f.write(data)
+        end = f.tell()
+    
+    for listener in list(_dump_listeners):
+        try:
+            listener(file_path, processed_record, end - len(data), end)
+        except Exception as e:
+            print(f"Warning: dump listener {listener!r} failed: {e}")
     
     return processed_record
 
@@ -0,0 +1,234 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+
+_OPENERS = {'{': '}', '[': ']'}
+_CLOSERS = {'}': '{', ']': '['}
+_OPENER_RE = re.compile(r'[\[{]')
+_TOKEN_RE = re.compile(r'[\[\]{}",:]')
+_STRING_RE = re.compile(r'["\\]')
+
+_DECODER = json.JSONDecoder()
+
+# Bound on rescans after a failed span so worst-case input stays linear
+MAX_RESCANS = 8
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object or array can be recovered from a text."""
+
+
+class _Candidate:
+    """A top-level bracketed span found while scanning model output."""
+
+    __slots__ = ('start', 'end', 'dropped_commas', 'safe_cut', 'safe_depth', 'stack')
+
+    def __init__(self, start: int):
+        self.start = start
+        self.end = -1
+        self.dropped_commas: List[int] = []
+        self.safe_cut = start + 1
+        self.safe_depth = 1
+        self.stack: List[str] = []
+
+    def text(self, source: str) -> str:
+        """Return the span with trailing commas removed."""
+        end = self.end if self.end >= 0 else len(source)
+        if not self.dropped_commas:
+            return source[self.start:end]
+        parts = []
+        last = self.start
+        for comma in self.dropped_commas:
+            if comma >= end:
+                break
+            parts.append(source[last:comma])
+            last = comma + 1
+        parts.append(source[last:end])
+        return ''.join(parts)
+
+    def repaired_text(self, source: str) -> str:
+        """Cut a truncated span back to its last complete value and close it."""
+        end = self.end
+        self.end = self.safe_cut
+        body = self.text(source)
+        self.end = end
+        closers = ''.join(_OPENERS[opener] for opener in reversed(self.stack[:self.safe_depth]))
+        return body.rstrip().rstrip(',') + closers
+
+
+def scan_json_candidates(text: str, offset: int = 0) -> List[_Candidate]:
+    """
+    Scan text once and return every top-level balanced JSON object or array.
+
+    The scanner jumps between structural characters with precompiled regexes
+    and tracks bracket depth and string state, so braces inside JSON strings
+    are ignored and prose around the JSON (markdown fences, leading
+    explanations, trailing remarks) is skipped. A mismatched closing bracket
+    abandons the current span. If the text ends inside a span, that span is
+    returned unterminated so it can be repaired.
+
+    Args:
+        text (str): Arbitrary model output
+        offset (int): Position to start scanning from (default: 0)
+
+    Returns:
+        List[_Candidate]: Spans in order of appearance
+    """
+    candidates: List[_Candidate] = []
+    current: Optional[_Candidate] = None
+    stack: List[str] = []
+    # Per-depth flag: True while an object at that depth expects a key
+    expecting_key: List[bool] = []
+    pending_comma = -1
+
+    pos = offset
+    n = len(text)
+    while pos < n:
+        if current is None:
+            match = _OPENER_RE.search(text, pos)
+            if match is None:
+                break
+            i = match.start()
+            ch = text[i]
+            current = _Candidate(i)
+            stack = [ch]
+            expecting_key = [ch == '{']
+            pending_comma = -1
+            pos = i + 1
+            continue
+
+        match = _TOKEN_RE.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        ch = text[i]
+        pos = i + 1
+
+        if pending_comma >= 0:
+            if ch in _CLOSERS and not text[pending_comma + 1:i].strip():
+                current.dropped_commas.append(pending_comma)
+            pending_comma = -1
+
+        if ch == '"':
+            string_is_key = stack[-1] == '{' and expecting_key[-1]
+            closed = False
+            while True:
+                match = _STRING_RE.search(text, pos)
+                if match is None:
+                    pos = n
+                    break
+                if text[match.start()] == '\\':
+                    pos = match.start() + 2
+                    continue
+                pos = match.start() + 1
+                closed = True
+                break
+            if closed and not string_is_key:
+                current.safe_cut = pos
+                current.safe_depth = len(stack)
+        elif ch in _OPENERS:
+            stack.append(ch)
+            expecting_key.append(ch == '{')
+            current.safe_cut = pos
+            current.safe_depth = len(stack)
+        elif ch in _CLOSERS:
+            if stack[-1] != _CLOSERS[ch]:
+                # Not JSON after all; restart the search from this point.
+                current = None
+                continue
+            stack.pop()
+            expecting_key.pop()
+            if not stack:
+                current.end = pos
+                candidates.append(current)
+                current = None
+            else:
+                current.safe_cut = pos
+                current.safe_depth = len(stack)
+        elif ch == ',':
+            current.safe_cut = i
+            current.safe_depth = len(stack)
+            pending_comma = i
+            if stack[-1] == '{':
+                expecting_key[-1] = True
+        elif ch == ':':
+            if stack[-1] == '{':
+                expecting_key[-1] = False
+
+    if current is not None:
+        current.stack = stack
+        candidates.append(current)
+
+    return candidates
+
+
+def _parse_candidate(text: str, candidate: _Candidate, repair: bool) -> Tuple[bool, Any]:
+    if candidate.end >= 0:
+        try:
+            return True, json.loads(candidate.text(text))
+        except json.JSONDecodeError:
+            return False, None
+    if not repair:
+        return False, None
+    try:
+        return True, json.loads(candidate.repaired_text(text))
+    except json.JSONDecodeError:
+        return False, None
+
+
+def _span_length(text: str, candidate: _Candidate) -> int:
+    return (candidate.end if candidate.end >= 0 else len(text)) - candidate.start
+
+
+def extract_json(text: str, repair: bool = True) -> Any:
+    """
+    Extract the outermost JSON object or array from arbitrary model output.
+
+    Runs in time linear in the length of the text. Markdown fences and prose
+    around the JSON are ignored, trailing commas are dropped, and a truncated
+    tail is cut back to its last complete value and closed when repair is
+    enabled. When several top-level spans are present, the longest one that
+    parses wins. If none parses, the text is rescanned from just past the
+    first span, at most MAX_RESCANS times.
+
+    Args:
+        text (str): Model output that should contain JSON
+        repair (bool): Whether to attempt to close a truncated trailing span (default: True)
+
+    Returns:
+        Any: The parsed JSON value (dict or list)
+
+    Raises:
+        JSONExtractionError: If no span can be parsed
+
+    Example:
+        extract_json('Here you go:\\n```json\\n{"a": [1, 2,]}\\n```')  # {"a": [1, 2]}
+    """
+    first = _OPENER_RE.search(text)
+    if first is None:
+        raise JSONExtractionError("No JSON object or array found in text")
+
+    # Fast path: well-formed JSON decoded at C speed, with only the tail
+    # scanned to make sure no longer span follows it.
+    try:
+        value, end = _DECODER.raw_decode(text, first.start())
+        if all(_span_length(text, c) <= end - first.start() for c in scan_json_candidates(text, end)):
+            return value
+    except json.JSONDecodeError:
+        pass
+
+    offset = 0
+    for _ in range(MAX_RESCANS):
+        candidates = scan_json_candidates(text, offset)
+        if not candidates:
+            break
+        ranked = sorted(candidates, key=lambda c: _span_length(text, c), reverse=True)
+        for candidate in ranked:
+            ok, value = _parse_candidate(text, candidate, repair)
+            if ok:
+                return value
+        # A stray opening bracket in prose can swallow the real JSON as a
+        # nested span; rescan from just past the first failed span.
+        offset = candidates[0].start + 1
+    raise JSONExtractionError("No JSON object or array found in text")
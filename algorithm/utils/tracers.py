@@ -1,4 +1,7 @@
 from agents import TracingProcessor, Trace, Span
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
 import sys
 import os
 
@@ -18,6 +21,49 @@ def log_trace_id(tag: str) -> str:
     random_suffix = ''.join(secrets.choice(ALPHANUM) for _ in range(pad_len))
     return f"trace_{tag}{random_suffix}"
 
+
+# Called with (stage, status) as a plugin moves through its stages. It is a
+# context variable so that each caller, such as one demo session, only hears
+# about the runs it started itself.
+stage_listener: ContextVar[Optional[Callable[[str, str], None]]] = ContextVar("stage_listener", default=None)
+
+
+def report_stage(name: str, stage: str, status: str) -> None:
+    """
+    Record that a stage of an agent run has started, completed or failed.
+
+    Args:
+        name (str): The name the run logs under
+        stage (str): The stage, e.g. "syntax_analysis"
+        status (str): "started", "completed" or "failed"
+    """
+    write_lineage_log(name, "stage", f"{status.capitalize()} {stage}")
+    listener = stage_listener.get()
+    if listener is not None:
+        listener(stage, status)
+
+
+@contextmanager
+def reported_stages(name: str, *stages: str) -> Iterator[None]:
+    """
+    Report stages as started, then as completed, or as failed if the block raises.
+
+    Args:
+        name (str): The name the run logs under
+        *stages (str): The stages the block runs, e.g. "field_derivation", "operation_tracing"
+    """
+    for stage in stages:
+        report_stage(name, stage, "started")
+    try:
+        yield
+    except BaseException:
+        # Includes cancellation, so a stage never stays "started"
+        for stage in stages:
+            report_stage(name, stage, "failed")
+        raise
+    for stage in stages:
+        report_stage(name, stage, "completed")
+
 class LogTracer(TracingProcessor):
 
     def get_name(self, trace_or_span: Trace | Span) -> str | None:
@@ -1,11 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+from datetime import datetime
 import uvicorn
 import asyncio
 import json
 from algorithm.framework_agent import AgentFramework
+from algorithm.lineage import UPSTREAM, DOWNSTREAM
+from algorithm.lineage.export import EXPORT_FORMATS, MEDIA_TYPES
+from algorithm.lineage.subgraph import BOTH, DEFAULT_HOPS, DEFAULT_MAX_NODES, DEFAULT_MAX_EDGES, DEFAULT_MAX_COLUMNS
+from algorithm.lineage.service import LineageService, NodeNotFoundError, AmbiguousNodeError, get_lineage_service
 
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
@@ -32,6 +38,39 @@ class HealthResponse(BaseModel):
     status: str
     message: str
 
+class LineageResponse(BaseModel):
+    node: Dict[str, Any]
+    direction: str
+    depth: Optional[int] = None
+    as_of: Optional[datetime] = None
+    total: int
+    offset: int
+    limit: int
+    results: List[Dict[str, Any]]
+
+class SubgraphResponse(BaseModel):
+    center: Dict[str, Any]
+    hops: int
+    direction: str
+    nodes: List[Dict[str, Any]]
+    edges: List[Dict[str, Any]]
+    truncated: bool
+
+class DiffRequest(BaseModel):
+    new: Union[Dict[str, Any], List[Dict[str, Any]]]
+    old: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None
+    jobs: Optional[List[str]] = None
+
+class DiffResponse(BaseModel):
+    changed: bool
+    summary: Dict[str, int]
+    datasets: Dict[str, List[Dict[str, Any]]]
+    jobs: List[Dict[str, Any]]
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[Dict[str, Any]]
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Lineage Analysis API",
@@ -167,3 +206,252 @@ async def run_operation(operation_name: str, request: QueryRequest):
             detail=f"Error running operation '{operation_name}': {str(e)}"
         )
 
+# The lineage endpoints are plain functions: FastAPI runs them in its threadpool,
+# so the service's blocking work (tailing dumps, snapshots, traversals) does not
+# hold up the event loop and the agent endpoints.
+def lineage_query(service: LineageService, direction: str, dataset: str, column: Optional[str],
+                  namespace: Optional[str], depth: Optional[int], offset: int, limit: int,
+                  as_of: Optional[datetime] = None) -> LineageResponse:
+    """
+    Run a lineage traversal and return one page of the reached nodes.
+    
+    Args:
+        service: The lineage service holding the graph index
+        direction: "upstream" or "downstream"
+        dataset: Dataset name
+        column: Optional column name
+        namespace: Optional dataset namespace
+        depth: Maximum number of edges to follow, or None for no limit
+        offset: Number of results to skip
+        limit: Maximum number of results to return
+        as_of: Optional past time; the traversal follows the edges that existed then
+        
+    Returns:
+        LineageResponse with the start node and the requested page of results
+    """
+    try:
+        page = service.lineage_page(direction, dataset, column=column, namespace=namespace, depth=depth,
+                                    as_of=as_of, offset=offset, limit=limit)
+        return LineageResponse(
+            node=page["node"],
+            direction=direction,
+            depth=depth,
+            as_of=as_of,
+            total=page["total"],
+            offset=offset,
+            limit=limit,
+            results=page["results"]
+        )
+    except NodeNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (AmbiguousNodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error querying {direction} lineage: {str(e)}"
+        )
+
+@app.get("/lineage/downstream", response_model=LineageResponse)
+def lineage_downstream(
+    dataset: str,
+    column: Optional[str] = None,
+    namespace: Optional[str] = None,
+    depth: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    as_of: Optional[datetime] = None,
+    service: LineageService = Depends(get_lineage_service)
+):
+    """
+    Impact analysis: everything derived from a dataset or column.
+    
+    Args:
+        dataset: Dataset name
+        column: Optional column name; when given, the traversal is column-level
+        namespace: Dataset namespace, required only if the name exists in several namespaces
+        depth: Maximum number of edges to follow (default: unlimited)
+        offset: Number of results to skip
+        limit: Maximum number of results to return
+        as_of: Optional past time (ISO 8601, UTC unless an offset is given) to
+            query the lineage as it was then, e.g. for incident analysis
+        
+    Returns:
+        LineageResponse with the reached nodes, nearest first
+    """
+    return lineage_query(service, DOWNSTREAM, dataset, column, namespace, depth, offset, limit, as_of)
+
+@app.get("/lineage/upstream", response_model=LineageResponse)
+def lineage_upstream(
+    dataset: str,
+    column: Optional[str] = None,
+    namespace: Optional[str] = None,
+    depth: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    as_of: Optional[datetime] = None,
+    service: LineageService = Depends(get_lineage_service)
+):
+    """
+    Provenance: everything a dataset or column is derived from.
+    
+    Args:
+        dataset: Dataset name
+        column: Optional column name; when given, the traversal is column-level
+        namespace: Dataset namespace, required only if the name exists in several namespaces
+        depth: Maximum number of edges to follow (default: unlimited)
+        offset: Number of results to skip
+        limit: Maximum number of results to return
+        as_of: Optional past time (ISO 8601, UTC unless an offset is given) to
+            query the lineage as it was then, e.g. for incident analysis
+        
+    Returns:
+        LineageResponse with the reached nodes, nearest first
+    """
+    return lineage_query(service, UPSTREAM, dataset, column, namespace, depth, offset, limit, as_of)
+
+@app.get("/lineage/subgraph", response_model=SubgraphResponse)
+def lineage_subgraph(
+    dataset: str,
+    column: Optional[str] = None,
+    namespace: Optional[str] = None,
+    hops: int = Query(DEFAULT_HOPS, ge=1, le=10),
+    direction: str = Query(BOTH, pattern=f"^({BOTH}|{UPSTREAM}|{DOWNSTREAM})$"),
+    max_nodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=2000),
+    max_edges: int = Query(DEFAULT_MAX_EDGES, ge=1, le=10000),
+    max_columns: int = Query(DEFAULT_MAX_COLUMNS, ge=0, le=1000),
+    include_columns: bool = False,
+    service: LineageService = Depends(get_lineage_service)
+):
+    """
+    Visualisation: the bounded neighbourhood of a dataset or column.
+    
+    Args:
+        dataset: Dataset name
+        column: Optional column name; when given, the neighbourhood is column-level
+        namespace: Dataset namespace, required only if the name exists in several namespaces
+        hops: Maximum number of edges between the centre and any node
+        direction: "upstream", "downstream" or "both"
+        max_nodes: Maximum number of nodes; the nearest are kept
+        max_edges: Maximum number of edges
+        max_columns: Columns shown per dataset before the rest are collapsed into one node
+        include_columns: For a dataset, also include the column-level lineage of its columns
+        
+    Returns:
+        SubgraphResponse with the nodes and edges, and whether a cap was hit
+    """
+    try:
+        return SubgraphResponse(**service.subgraph(
+            dataset, column=column, namespace=namespace, hops=hops, direction=direction,
+            max_nodes=max_nodes, max_edges=max_edges, max_columns=max_columns,
+            include_columns=include_columns
+        ))
+    except NodeNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (AmbiguousNodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error extracting lineage subgraph: {str(e)}"
+        )
+
+@app.post("/lineage/diff", response_model=DiffResponse)
+def lineage_diff(request: DiffRequest, service: LineageService = Depends(get_lineage_service)):
+    """
+    Review: the lineage changes between two versions of jobs.
+    
+    Args:
+        request: DiffRequest with the new event(s), optionally the old event(s) and
+            job name patterns. Without old events, the new ones are compared with
+            the jobs' current lineage in the store
+        
+    Returns:
+        DiffResponse with the added and removed datasets, and per changed job the
+        inputs, outputs, columns and column mappings added and removed, changed
+        transformations and whether the SQL changed
+    """
+    def events(value):
+        return value if isinstance(value, list) else [value]
+
+    try:
+        old = events(request.old) if request.old is not None else None
+        return DiffResponse(**service.diff(events(request.new), old, request.jobs))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error comparing lineage: {str(e)}"
+        )
+
+@app.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1),
+    kind: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=200),
+    fuzzy: bool = True,
+    service: LineageService = Depends(get_lineage_service)
+):
+    """
+    Search: datasets, columns and jobs by name, and jobs by their SQL text.
+    
+    Args:
+        q: Text to look for; three or more characters match anywhere in a name,
+            shorter text matches the start of a word
+        kind: Node kinds to return ("dataset", "column", "job"); repeat the parameter for several
+        limit: Maximum number of results
+        fuzzy: Also return names similar to q when fewer than limit results match it
+        
+    Returns:
+        SearchResponse with the results, best first
+    """
+    try:
+        return SearchResponse(query=q, results=service.search(q, kinds=kind, limit=limit, fuzzy=fuzzy))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching lineage: {str(e)}"
+        )
+
+@app.get("/lineage/export")
+def lineage_export(
+    format: str = Query("graphml", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    dataset: Optional[List[str]] = Query(None),
+    job: Optional[List[str]] = Query(None),
+    service: LineageService = Depends(get_lineage_service)
+):
+    """
+    Export: the lineage graph as DOT, GraphML or CSV, streamed in chunks.
+    
+    Args:
+        format: "dot", "graphml", "csv" (edge list) or "csv-nodes" (node list)
+        dataset: Dataset name patterns (fnmatch); repeat the parameter for several
+        job: Job name patterns (fnmatch); repeat the parameter for several
+        
+    Returns:
+        StreamingResponse with the document, sent with chunked transfer encoding
+    """
+    try:
+        chunks = service.export(format, dataset, job)
+        first = next(chunks, "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error exporting lineage graph: {str(e)}"
+        )
+
+    def stream():
+        yield first
+        yield from chunks
+
+    extension = "csv" if format.startswith("csv") else format
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="lineage.{extension}"'}
+    )
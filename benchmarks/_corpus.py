@@ -0,0 +1,102 @@
+"""
+Synthetic OpenLineage events and model-output variants shared by the benchmarks.
+"""
+
+import json
+import random
+from typing import Any, Dict, List
+
+
+PRODUCER = "https://openlineage.io/sql"
+SCHEMA_BASE = "https://openlineage.io/spec/facets/1-0-0"
+
+
+def make_event(job: str, inputs: List[str], output: str, columns: int = 4,
+               namespace: str = "warehouse.postgres", event_time: str = "2025-08-02T11:00:00Z") -> Dict[str, Any]:
+    """Build an event in the shape the event composer templates describe."""
+    fields = {}
+    for c in range(columns):
+        source = inputs[c % len(inputs)]
+        fields[f"col_{c}"] = {
+            "inputFields": [
+                {
+                    "namespace": namespace,
+                    "name": source,
+                    "field": f"col_{c}",
+                    "transformations": [
+                        {"type": "projection", "subtype": "direct", "description": f"col_{c} copied", "masking": False}
+                    ],
+                }
+            ]
+        }
+    return {
+        "eventType": "START",
+        "eventTime": event_time,
+        "run": {"runId": f"run-{job}", "facets": {}},
+        "job": {
+            "namespace": namespace,
+            "name": job,
+            "facets": {
+                "sql": {
+                    "_producer": PRODUCER,
+                    "_schemaURL": f"{SCHEMA_BASE}/SqlJobFacet.json",
+                    "query": f"INSERT INTO {output} SELECT * FROM {', '.join(inputs)}",
+                },
+            },
+        },
+        "inputs": [
+            {
+                "namespace": namespace,
+                "name": name,
+                "facets": {
+                    "schema": {
+                        "_producer": PRODUCER,
+                        "_schemaURL": f"{SCHEMA_BASE}/SchemaDatasetFacet.json",
+                        "fields": [{"name": f"col_{c}", "type": "string", "description": ""} for c in range(columns)],
+                    }
+                },
+            }
+            for name in inputs
+        ],
+        "outputs": [
+            {
+                "namespace": namespace,
+                "name": output,
+                "facets": {
+                    "columnLineage": {
+                        "_producer": PRODUCER,
+                        "_schemaURL": f"{SCHEMA_BASE}/ColumnLineageDatasetFacet.json",
+                        "fields": fields,
+                    }
+                },
+            }
+        ],
+    }
+
+
+def make_pipeline_events(count: int, columns: int = 4, fan_in: int = 2, seed: int = 7) -> List[Dict[str, Any]]:
+    """Build a chain of jobs where each output table feeds later jobs."""
+    rng = random.Random(seed)
+    events = []
+    tables = [f"raw.source_{i}" for i in range(max(fan_in, 2))]
+    for i in range(count):
+        inputs = rng.sample(tables, min(fan_in, len(tables)))
+        output = f"mart.table_{i}"
+        events.append(make_event(f"job_{i}", inputs, output, columns=columns))
+        tables.append(output)
+    return events
+
+
+def model_output_variants(event: Dict[str, Any]) -> Dict[str, str]:
+    """Render one event the ways models have been seen to format it."""
+    pretty = json.dumps(event, indent=2)
+    compact = json.dumps(event)
+    trailing_commas = pretty.replace("\n  }", ",\n  }").replace("\n    ]", ",\n    ]")
+    return {
+        "bare": compact,
+        "fenced": f"```json\n{pretty}\n```",
+        "prose": f"Here is the OpenLineage event for the query:\n\n{pretty}\n\nLet me know if you need changes.",
+        "fenced_prose": f"Sure! Below is the event.\n```json\n{pretty}\n```\nThe inputs are the source tables {{see above}}.",
+        "trailing_commas": f"```json\n{trailing_commas}\n```",
+        "truncated": pretty[: int(len(pretty) * 0.9)],
+    }
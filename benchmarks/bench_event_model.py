@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory footprint and codec speed of LineageEvent.
+
+Decodes the same newline-delimited events twice: once as nested dicts (what
+read_json_records returns) and once as LineageEvent objects. It reports
+the memory held by each form, measured with tracemalloc, and the decode and
+encode throughput.
+
+Run with: python benchmarks/bench_event_model.py --events 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.lineage.events import LineageEvent
+from _corpus import make_pipeline_events
+
+
+def measure(lines, decode):
+    """Return the decoded objects, the bytes they hold and the decode time."""
+    gc.collect()
+    start = time.perf_counter()
+    held = [decode(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    del held
+    # Memory is measured in a second pass since tracing slows allocation
+    gc.collect()
+    tracemalloc.start()
+    held = [decode(line) for line in lines]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LineageEvent against dict events")
+    parser.add_argument("--events", type=int, default=100000, help="Number of events (default: 100000)")
+    parser.add_argument("--columns", type=int, default=8, help="Output columns per event (default: 8)")
+    parser.add_argument("--distinct-jobs", type=int, default=2000,
+                        help="Distinct jobs the events cycle through, as in repeated runs (default: 2000)")
+    args = parser.parse_args()
+
+    templates = [json.dumps(e, separators=(',', ':'))
+                 for e in make_pipeline_events(args.distinct_jobs, columns=args.columns)]
+    lines = [templates[i % len(templates)] for i in range(args.events)]
+    print(f"{args.events} events, {args.columns} columns each, "
+          f"{sum(len(line) for line in lines) / 1e6:.1f} MB of JSON")
+
+    dicts, dict_bytes, dict_time = measure(lines, json.loads)
+    del dicts
+    events, event_bytes, event_time = measure(lines, LineageEvent.from_json)
+
+    start = time.perf_counter()
+    for event in events:
+        event.to_json()
+    encode_time = time.perf_counter() - start
+
+    print(f"\n{'form':<14}{'memory':>12}{'per event':>12}{'decode':>12}")
+    print(f"{'dict':<14}{dict_bytes / 1e6:>10.1f}MB{dict_bytes / args.events:>11.0f}B{dict_time:>11.2f}s")
+    print(f"{'LineageEvent':<14}{event_bytes / 1e6:>10.1f}MB{event_bytes / args.events:>11.0f}B{event_time:>11.2f}s")
+    print(f"\nLineageEvent uses {event_bytes / dict_bytes:.1%} of the dict footprint")
+    print(f"LineageEvent.to_json: {args.events / encode_time:,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
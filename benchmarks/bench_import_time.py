@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import time of the algorithm package against a budget.
+
+Each module is imported --runs times in a fresh interpreter with
+python -X importtime, and the median cumulative import time is compared with
+its budget. CLI tools, the API server and worker processes import these, so
+they should start without pulling in the agents SDK, the model clients or the
+plugins, and without touching the log database.
+
+Budgets (ms, median):
+
+    algorithm                    20   public symbols resolve on first access
+    algorithm.utils.database     20   the database is created on first use
+    algorithm.lineage           250   lineage graph, search, history and service
+    algorithm.agent_manager      50   plugins are discovered on first use
+
+Exits with status 1 when a module is over its budget.
+
+Run with: python benchmarks/bench_import_time.py --runs 7 --top 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGETS_MS = {
+    "algorithm": 20,
+    "algorithm.utils.database": 20,
+    "algorithm.lineage": 250,
+    "algorithm.agent_manager": 50,
+}
+
+
+def import_times(module=None):
+    """Import a module in a fresh interpreter; returns {module: (self µs, cumulative µs)}
+
+    Without a module, returns what the interpreter itself imports at startup.
+    """
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import times against their budgets")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per module (default: 7)")
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports of each module")
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: all with a budget)")
+    args = parser.parse_args()
+
+    startup = set(import_times())
+    over = []
+    print(f"{'module':<28} {'p50 ms':>8} {'max ms':>8} {'budget':>8}")
+    for module in args.modules or BUDGETS_MS:
+        runs = [import_times(module) for _ in range(args.runs)]
+        totals = [times[module][1] / 1e3 for times in runs]
+        budget = BUDGETS_MS.get(module)
+        p50 = statistics.median(totals)
+        verdict = ""
+        if budget is not None and p50 > budget:
+            verdict = "  OVER BUDGET"
+            over.append(module)
+        print(f"{module:<28} {p50:8.1f} {max(totals):8.1f} {budget if budget is not None else '-':>8}{verdict}")
+        if args.top:
+            own_imports = [(name, times) for name, times in runs[0].items() if name not in startup]
+            slowest = sorted(own_imports, key=lambda item: item[1][0], reverse=True)[:args.top]
+            for name, (own, _) in slowest:
+                print(f"    {own / 1e3:7.1f} ms  {name}")
+
+    if over:
+        print(f"\nOver budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
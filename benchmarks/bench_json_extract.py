@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON recovery from event composer outputs.
+
+Compares the old fence-stripping path (clean_json_string + json.loads) with
+extract_json on a corpus of model outputs. By default the corpus is built
+from synthetic events rendered in the formats models produce (bare, fenced,
+wrapped in prose, trailing commas, truncated). Pass --corpus with a file of
+newline-delimited JSON strings to benchmark captured outputs instead.
+
+Run with: python benchmarks/bench_json_extract.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.utils.file_utils import clean_json_string
+from algorithm.utils.json_extract import extract_json, JSONExtractionError
+from _corpus import make_pipeline_events, model_output_variants
+
+
+def legacy_parse(text):
+    return json.loads(clean_json_string(text))
+
+
+def load_corpus(path):
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                samples.append(("captured", json.loads(line)))
+    return samples
+
+
+def build_corpus(events, columns):
+    samples = []
+    for event in make_pipeline_events(events, columns=columns):
+        for kind, text in model_output_variants(event).items():
+            samples.append((kind, text))
+    return samples
+
+
+def run(samples, parser, repeat):
+    ok = defaultdict(int)
+    total = defaultdict(int)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for kind, text in samples:
+            total[kind] += 1
+            try:
+                value = parser(text)
+                if isinstance(value, (dict, list)):
+                    ok[kind] += 1
+            except (ValueError, JSONExtractionError):
+                pass
+    elapsed = time.perf_counter() - start
+    return elapsed, ok, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from model outputs")
+    parser.add_argument("--corpus", help="Newline-delimited JSON strings of raw model outputs")
+    parser.add_argument("--events", type=int, default=50, help="Synthetic events to render (default: 50)")
+    parser.add_argument("--columns", type=int, default=40, help="Columns per synthetic event (default: 40)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the corpus (default: 5)")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus) if args.corpus else build_corpus(args.events, args.columns)
+    total_bytes = sum(len(text) for _, text in samples) * args.repeat
+    print(f"Corpus: {len(samples)} outputs, {total_bytes / args.repeat / 1e6:.2f} MB per pass")
+
+    for name, fn in (("legacy", legacy_parse), ("extract_json", extract_json)):
+        elapsed, ok, total = run(samples, fn, args.repeat)
+        print(f"\n{name}: {elapsed * 1000:.1f} ms total, {total_bytes / elapsed / 1e6:.1f} MB/s")
+        for kind in sorted(total):
+            print(f"  {kind:<16} {ok[kind] / total[kind]:>6.1%} recovered")
+
+
+if __name__ == "__main__":
+    main()
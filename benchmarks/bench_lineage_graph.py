@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark LineageGraph ingestion and traversal.
+
+Builds a graph from a synthetic pipeline (every job reads earlier tables and
+writes a new one) and times upstream/downstream traversals from random
+column and dataset nodes at several depth limits. Finally it times applying
+single events to the built graph, the incremental path used after each
+dump, against the full rebuild.
+
+Run with: python benchmarks/bench_lineage_graph.py --events 60000 --columns 16
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.lineage.graph import LineageGraph
+from _corpus import make_event
+
+
+def iter_pipeline_events(count, columns, fan_in, seed=7):
+    """Yield the events of make_pipeline_events one at a time to bound memory."""
+    rng = random.Random(seed)
+    tables = [f"raw.source_{i}" for i in range(max(fan_in, 2))]
+    for i in range(count):
+        inputs = rng.sample(tables, min(fan_in, len(tables)))
+        output = f"mart.table_{i}"
+        yield make_event(f"job_{i}", inputs, output, columns=columns)
+        tables.append(output)
+
+
+def time_queries(graph, starts, direction, depth):
+    timings = []
+    reached = 0
+    for node in starts:
+        start = time.perf_counter()
+        result = graph.traverse(node, direction, depth)
+        timings.append(time.perf_counter() - start)
+        reached += len(result)
+    timings.sort()
+    return (statistics.median(timings) * 1e3, timings[int(len(timings) * 0.99) - 1] * 1e3, reached / len(starts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LineageGraph traversal")
+    parser.add_argument("--events", type=int, default=60000, help="Number of events (default: 60000)")
+    parser.add_argument("--columns", type=int, default=16, help="Output columns per event (default: 16)")
+    parser.add_argument("--fan-in", type=int, default=2, help="Input tables per job (default: 2)")
+    parser.add_argument("--queries", type=int, default=200, help="Traversals per configuration (default: 200)")
+    args = parser.parse_args()
+
+    graph = LineageGraph()
+    start = time.perf_counter()
+    for event in iter_pipeline_events(args.events, args.columns, args.fan_in):
+        graph.add_event(event)
+    build_time = time.perf_counter() - start
+    stats = graph.stats()
+    print(f"Built graph in {build_time:.1f}s ({args.events / build_time:,.0f} events/s): "
+          f"{stats['nodes']:,} nodes, {stats['edges']:,} edges")
+
+    rng = random.Random(11)
+    print(f"\n{'start':<10}{'direction':<12}{'depth':>8}{'p50':>10}{'p99':>10}{'avg reached':>14}")
+    for kind in ("column", "dataset"):
+        nodes = list(graph.nodes(kind))
+        starts = [rng.choice(nodes) for _ in range(args.queries)]
+        for direction in ("upstream", "downstream"):
+            for depth in (1, 3, 5, None):
+                p50, p99, reached = time_queries(graph, starts, direction, depth)
+                label = "all" if depth is None else str(depth)
+                print(f"{kind:<10}{direction:<12}{label:>8}{p50:>8.3f}ms{p99:>8.3f}ms{reached:>14,.0f}")
+
+    # Re-run existing jobs with one column dropped: each event retracts and adds edges
+    updates = []
+    for i in rng.sample(range(args.events), min(1000, args.events)):
+        event = make_event(f"job_{i}", ["raw.source_0", "raw.source_1"], f"mart.table_{i}", columns=args.columns - 1)
+        event["eventTime"] = "2025-08-03T11:00:00Z"
+        updates.append(event)
+    timings = []
+    for event in updates:
+        touched = set()
+        start = time.perf_counter()
+        graph.add_event(event, touched)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"\nIncremental update: p50 {statistics.median(timings) * 1e3:.3f}ms, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e3:.3f}ms per event "
+          f"(full rebuild: {build_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
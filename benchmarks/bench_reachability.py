@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark ReachabilityIndex build time and query latency.
+
+For each target graph size, builds a LineageGraph from a synthetic pipeline
+(see bench_lineage_graph.py), then builds the index twice: with the default
+closure budget and in the memory-bounded mode without a closure. Each
+configuration answers random "does A reach B" queries (negative and positive
+pairs) and "all transitive consumers" queries from the earliest tables of
+the pipeline, timed against the plain breadth-first walk.
+
+Run with: python benchmarks/bench_reachability.py --nodes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.reachability import ReachabilityIndex
+from bench_lineage_graph import iter_pipeline_events
+
+
+def build_graph(nodes, columns, fan_in):
+    """Ingest pipeline events until the graph has the requested number of nodes."""
+    graph = LineageGraph()
+    for event in iter_pipeline_events(nodes, columns, fan_in):
+        graph.add_event(event)
+        if graph.node_count >= nodes:
+            break
+    return graph
+
+
+def p50(func, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lineage reachability index")
+    parser.add_argument("--nodes", default="10000,100000,1000000",
+                        help="Comma-separated graph sizes in nodes (default: 10000,100000,1000000)")
+    parser.add_argument("--columns", type=int, default=16, help="Output columns per event (default: 16)")
+    parser.add_argument("--fan-in", type=int, default=2, help="Input tables per job (default: 2)")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per measurement (default: 500)")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>9}{'edges':>10}  {'mode':<9}{'build':>8}{'memory':>9}"
+          f"{'A->B bfs':>10}{'A->B idx':>10}{'desc bfs':>10}{'desc idx':>10}")
+    for size in (int(n) for n in args.nodes.split(",")):
+        graph = build_graph(size, args.columns, args.fan_in)
+        rng = random.Random(5)
+        nodes = list(range(graph.node_count))
+        # Early tables feed most of the pipeline, so their queries are the expensive ones
+        datasets = sorted(graph.nodes("dataset"))
+        early = datasets[:max(len(datasets) // 20, 1)]
+        sources = [rng.choice(early) for _ in range(args.queries)]
+        pairs = [(s, rng.choice(nodes)) for s in sources]
+        # Half the pairs are reachable, the other half random (almost always unreachable)
+        for i in range(0, len(pairs), 2):
+            reached = list(graph.downstream(pairs[i][0]))
+            if reached:
+                pairs[i] = (pairs[i][0], rng.choice(reached))
+        tables = [(rng.choice(early),) for _ in range(args.queries)]
+
+        bfs_pair = p50(lambda s, t: t in graph.downstream(s), pairs)
+        bfs_desc = p50(lambda s: set(graph.downstream(s)), tables)
+        for mode, budget in (("closure", None), ("bounded", 0)):
+            start = time.perf_counter()
+            index = ReachabilityIndex(graph, max_closure_bytes=budget, incremental=False)
+            build_time = time.perf_counter() - start
+            stats = index.stats()
+            memory = (stats["closure_bytes"] + stats["label_bytes"]) / 1e6
+            for (s, t) in pairs[:50]:
+                assert index.reaches(s, t) == (t in graph.downstream(s))
+            idx_pair = p50(index.reaches, pairs)
+            idx_desc = p50(index.descendants, tables)
+            print(f"{graph.node_count:>9,}{graph.edge_count:>10,}  {mode:<9}{build_time:>7.1f}s{memory:>7.1f}MB"
+                  f"{bfs_pair:>8.3f}ms{idx_pair:>8.3f}ms{bfs_desc:>8.3f}ms{idx_desc:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark SearchIndex builds and queries.
+
+Builds a graph from a synthetic pipeline (see bench_lineage_graph.py),
+indexes it, and times queries sampled from the indexed names: exact names,
+prefixes, substrings, one-character typos (fuzzy), two-character word
+prefixes and SQL fragments. Prints p50/p95 per query type and overall.
+
+Run with: python benchmarks/bench_search.py --events 55000 --columns 16
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.search import SearchIndex
+from bench_lineage_graph import iter_pipeline_events
+
+
+def make_queries(graph, rng, count):
+    datasets = list(graph.nodes("dataset"))
+    jobs = list(graph.nodes("job"))
+    columns = list(graph.nodes("column"))
+
+    def name():
+        node = rng.choice(rng.choice((datasets, jobs, columns)))
+        key = graph.key(node)
+        return key[2] if len(key) > 2 else key[1]
+
+    def typo(text):
+        i = rng.randrange(len(text))
+        return text[:i] + text[i + 1:]
+
+    queries = {"exact": [], "prefix": [], "substring": [], "fuzzy": [], "short": [], "sql": []}
+    for _ in range(count):
+        text = name()
+        queries["exact"].append(text)
+        queries["prefix"].append(text[:max(3, len(text) * 2 // 3)])
+        queries["substring"].append(text[len(text) // 3:])
+        queries["fuzzy"].append(typo(text))
+        queries["short"].append(text[:2])
+        queries["sql"].append(f"from {graph.key(rng.choice(datasets))[1]}")
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lineage search")
+    parser.add_argument("--events", type=int, default=55000, help="Number of events (default: 55000)")
+    parser.add_argument("--columns", type=int, default=16, help="Output columns per event (default: 16)")
+    parser.add_argument("--fan-in", type=int, default=2, help="Input tables per job (default: 2)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per type (default: 200)")
+    parser.add_argument("--limit", type=int, default=20, help="Results per query (default: 20)")
+    args = parser.parse_args()
+
+    graph = LineageGraph.from_events(iter_pipeline_events(args.events, args.columns, args.fan_in))
+    start = time.perf_counter()
+    index = SearchIndex(graph)
+    build_time = time.perf_counter() - start
+    print(f"Indexed {graph.node_count + len(graph._job_sql):,} entries ({index.term_count:,} distinct texts) in {build_time:.1f}s")
+
+    queries = make_queries(graph, random.Random(3), args.queries)
+    everything = []
+    print(f"\n{'query':<12}{'p50':>10}{'p95':>10}{'avg hits':>10}")
+    for kind, texts in queries.items():
+        timings = []
+        hits = 0
+        for text in texts:
+            start = time.perf_counter()
+            hits += len(index.search(text, limit=args.limit))
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        everything.extend(timings)
+        print(f"{kind:<12}{statistics.median(timings) * 1e3:>8.2f}ms"
+              f"{timings[int(len(timings) * 0.95) - 1] * 1e3:>8.2f}ms{hits / len(texts):>10.1f}")
+    everything.sort()
+    print(f"{'all':<12}{statistics.median(everything) * 1e3:>8.2f}ms{everything[int(len(everything) * 0.95) - 1] * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
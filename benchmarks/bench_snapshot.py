@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark LineageService cold start with and without a graph snapshot.
+
+Writes a synthetic pipeline (see bench_lineage_graph.py) to a dump file,
+then times a service's first refresh when it must re-ingest every event,
+against a restarted service that loads the snapshot and replays only the
+events appended after it was saved.
+
+Run with: python benchmarks/bench_snapshot.py --events 60000 --replay 500
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from algorithm.lineage.service import LineageService
+from bench_lineage_graph import iter_pipeline_events
+
+
+def timed_refresh(folder, **kwargs):
+    service = LineageService(folder, **kwargs)
+    start = time.perf_counter()
+    service.refresh()
+    return service, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lineage graph snapshots")
+    parser.add_argument("--events", type=int, default=60000, help="Events in the dump history (default: 60000)")
+    parser.add_argument("--replay", type=int, default=500, help="Events appended after the snapshot (default: 500)")
+    parser.add_argument("--columns", type=int, default=16, help="Output columns per event (default: 16)")
+    parser.add_argument("--fan-in", type=int, default=2, help="Input tables per job (default: 2)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        dump = os.path.join(folder, "sql-lineage-agent.json")
+        events = iter_pipeline_events(args.events + args.replay, args.columns, args.fan_in)
+        with open(dump, "w", encoding="utf-8") as f:
+            for _ in range(args.events):
+                f.write(json.dumps(next(events)) + "\n")
+
+        service, _ = timed_refresh(folder, snapshot_every=0)
+        start = time.perf_counter()
+        service.save_snapshot()
+        save_time = time.perf_counter() - start
+        with open(dump, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+        snapshot_size = os.path.getsize(service.snapshot_path)
+        # Each start runs without the other graphs alive, as in a fresh process
+        del service
+        restored, restore_time = timed_refresh(folder, snapshot_every=0)
+        restored_stats = restored.graph.stats()
+        del restored
+        full, full_time = timed_refresh(folder, snapshot_path=os.path.join(folder, "none"), snapshot_every=0)
+        stats = full.graph.stats()
+        assert restored_stats == stats
+
+        print(f"History: {args.events:,} events + {args.replay:,} after the snapshot, "
+              f"{stats['nodes']:,} nodes, {stats['edges']:,} edges")
+        print(f"Dump files:       {os.path.getsize(dump) / 1e6:8.1f} MB")
+        print(f"Snapshot:         {snapshot_size / 1e6:8.1f} MB, saved in {save_time:.2f}s")
+        print(f"Full re-ingest:   {full_time:8.2f}s")
+        print(f"Snapshot+replay:  {restore_time:8.2f}s ({full_time / restore_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the watchdog's polling fallback on a folder of many dump files.
+
+Creates --files dump files of --records events each, then measures:
+
+- the CPU time of one pass of the previous fallback, which globbed the
+  folder and re-read every file to count its lines
+- the CPU time of one StatPoller scan when nothing changed
+- the CPU used by StatPoller.run over --idle seconds of idle time, with
+  its backing-off interval, as a share of one core
+- how long a scan takes to notice an append to one file
+
+Run with: python benchmarks/bench_watchdog_poll.py --files 5000 --records 20
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _corpus import make_event
+
+
+def load_watchdog():
+    """Import json-watchdog.py, whose name is not a module name."""
+    spec = importlib.util.spec_from_file_location(
+        "json_watchdog", os.path.join(ROOT, "lineage_visualizer", "jsoncrack", "json-watchdog.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class QueueCounter:
+    """Stands in for JSONFileHandler: counts the files the poller queues."""
+
+    def __init__(self, directory):
+        self.watch_directory = Path(directory)
+        self.queued = []
+
+    def enqueue(self, path):
+        self.queued.append(path)
+        return True
+
+
+def line_count_pass(directory):
+    """One pass of the previous fallback: glob, then count the lines of every file."""
+    total = 0
+    for json_file in Path(directory).glob("*.json"):
+        with open(json_file, "r") as f:
+            total += sum(1 for line in f if line.strip())
+    return total
+
+
+def cpu_time(function, *args):
+    start = time.process_time()
+    function(*args)
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the watchdog polling fallback")
+    parser.add_argument("--files", type=int, default=5000, help="Number of dump files (default: 5000)")
+    parser.add_argument("--records", type=int, default=20, help="Events per dump file (default: 20)")
+    parser.add_argument("--columns", type=int, default=8, help="Output columns per event (default: 8)")
+    parser.add_argument("--idle", type=float, default=30.0, help="Seconds of idle polling to measure (default: 30)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        # The watchdog logs to json-watchdog.log in the working directory
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            watchdog = load_watchdog()
+        finally:
+            os.chdir(cwd)
+        watchdog.logger.disabled = True
+
+        dumps = os.path.join(folder, "dumps")
+        os.mkdir(dumps)
+        for i in range(args.files):
+            with open(os.path.join(dumps, f"agent-{i}.json"), "w") as f:
+                for j in range(args.records):
+                    f.write(json.dumps(make_event(f"job_{i}_{j}", ["raw.source"], f"mart.table_{i}",
+                                                  columns=args.columns)) + "\n")
+        size = sum(entry.stat().st_size for entry in os.scandir(dumps))
+        print(f"{args.files:,} files, {size / 1e6:.1f} MB")
+
+        full = min(cpu_time(line_count_pass, dumps) for _ in range(3))
+        print(f"\nline-count pass:   {full * 1e3:8.1f} ms CPU "
+              f"({full / watchdog.DEFAULT_POLL_INTERVAL * 100:.1f}% of a core at one pass per "
+              f"{watchdog.DEFAULT_POLL_INTERVAL:g}s)")
+
+        handler = QueueCounter(dumps)
+        poller = watchdog.StatPoller(handler)
+        scan = min(cpu_time(poller.scan) for _ in range(5))
+        print(f"idle stat scan:    {scan * 1e3:8.1f} ms CPU")
+
+        thread = threading.Thread(target=poller.run, daemon=True)
+        scans = poller.scans
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        thread.start()
+        time.sleep(args.idle)
+        poller.stop()
+        thread.join()
+        idle_cpu = time.process_time() - start_cpu
+        elapsed = time.perf_counter() - start
+        print(f"idle polling:      {idle_cpu * 1e3:8.1f} ms CPU over {elapsed:.0f}s, "
+              f"{poller.scans - scans} scans ({idle_cpu / elapsed * 100:.2f}% of a core)")
+
+        with open(os.path.join(dumps, "agent-0.json"), "a") as f:
+            f.write(json.dumps(make_event("job_new", ["raw.source"], "mart.table_0")) + "\n")
+        handler.queued.clear()
+        start = time.perf_counter()
+        changed = poller.scan()
+        print(f"scan after append: {(time.perf_counter() - start) * 1e3:8.1f} ms, "
+              f"{changed} changed, queued {[path.name for path in handler.queued]}")
+
+
+if __name__ == "__main__":
+    main()
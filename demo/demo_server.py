@@ -1,28 +1,104 @@
 import gradio as gr
 import asyncio
 import json
-import threading
-import time
 import sys
 import os
-from typing import Optional, Dict, Any
+import uuid
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 
 
 
 from algorithm.framework_agent import AgentFramework
-from algorithm.utils.database import read_lineage_log, write_lineage_log
+from algorithm.utils.database import log_run_id, read_lineage_log_after, write_lineage_log
+from algorithm.utils.tracers import stage_listener
+from algorithm.lineage.subgraph import event_subgraph
+
+# Analyses that run at once; further clicks wait in Gradio's queue
+DEMO_CONCURRENCY_ENV = "DEMO_CONCURRENCY"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_QUEUE_SIZE = 64
+
+# Seconds between live log updates, and the most log lines a panel keeps
+LOG_INTERVAL = 1.0
+LOG_BUFFER = 500
+
+# Color coding based on log type
+LOG_COLORS = {
+    "trace": "#007bff",
+    "agent": "#28a745",
+    "function": "#ffc107",
+    "generation": "#17a2b8",
+    "response": "#6f42c1",
+    "span": "#6c757d",
+    "stage": "#28a745"
+}
+
+# The stages every lineage plugin reports, in order
+STAGES = [
+    ("syntax_analysis", "Syntax analysis"),
+    ("field_derivation", "Field derivation"),
+    ("operation_tracing", "Operation tracing"),
+    ("event_composer", "Event composition"),
+]
+STAGE_ICONS = {"pending": "⏸️", "started": "⏳", "completed": "✅", "failed": "❌"}
+
+# Appends a poll_logs batch to the panel, skipping lines it already shows, so
+# repeating a batch is harmless. A batch of another run replaces the lines.
+# The panel keeps the last LOG_BUFFER lines.
+APPEND_LOGS_JS = """
+(batch) => {
+    const panel = document.getElementById("lineage-log-lines");
+    if (!panel || !batch || !batch.rows) return;
+    if (panel.dataset.run !== batch.run) {
+        panel.replaceChildren();
+        panel.dataset.run = batch.run;
+        panel.dataset.last = "0";
+    }
+    const colors = %s;
+    let last = Number(panel.dataset.last);
+    for (const [id, time, type, message] of batch.rows) {
+        if (id <= last) continue;
+        const line = document.createElement("div");
+        line.style.margin = "2px 0";
+        const label = document.createElement("span");
+        label.style.color = colors[type.toLowerCase()] || "#000000";
+        label.style.fontWeight = "bold";
+        label.textContent = "[" + type.toUpperCase() + "] ";
+        const stamp = document.createElement("span");
+        stamp.style.color = "#6c757d";
+        stamp.textContent = time + " ";
+        line.append(label, stamp, message);
+        panel.append(line);
+        last = id;
+    }
+    panel.dataset.last = String(last);
+    while (panel.childElementCount > %d) panel.firstElementChild.remove();
+    panel.scrollTop = panel.scrollHeight;
+}
+""" % (json.dumps(LOG_COLORS), LOG_BUFFER)
+
+
+def new_session() -> Dict[str, Any]:
+    """The state each browser session keeps: its last results, and the agent and run id of its last run"""
+    return {"results": None, "agent_name": None, "run_id": None}
+
 
 class SQLLineageFrontend:
-    def __init__(self):
-        self.agent_framework = None
-        self.current_results = None
-        self.current_agent_name = None
-        self.log_thread = None
-        self.should_stop_logging = False
-
-    def get_visualize_link(self) -> str:
+    def __init__(self, concurrency_limit: Optional[int] = None, max_queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            concurrency_limit (Optional[int]): Analyses that run at once. Defaults to
+                $DEMO_CONCURRENCY, or DEFAULT_CONCURRENCY
+            max_queue_size (int): Analyses that may wait for a free slot before clicks are refused
+        """
+        if concurrency_limit is None:
+            concurrency_limit = int(os.getenv(DEMO_CONCURRENCY_ENV, DEFAULT_CONCURRENCY))
+        self.concurrency_limit = concurrency_limit
+        self.max_queue_size = max_queue_size
+
+    def get_visualize_link(self, results: Any = None) -> str:
         """Generate JSONCrack visualization interface for aggregation data"""
-        if self.current_results is None:
+        if results is None:
             return """
             <div style='text-align: center; padding: 20px; color: #868e96;'>
                 <div style='font-size: 16px; margin-bottom: 15px;'>📊 Visualization Ready</div>
@@ -38,8 +114,8 @@ class SQLLineageFrontend:
             """
         
         try:
-            # Get the aggregation data - now it's directly the current_results
-            aggregation_data = self.current_results
+            # Get the aggregation data - now it's directly the session's results
+            aggregation_data = results
             
             # If it's a string, try to parse it as JSON, otherwise wrap it in a dict
             if isinstance(aggregation_data, str):
@@ -53,8 +129,18 @@ class SQLLineageFrontend:
             else:
                 data_to_encode = aggregation_data
             
+            # Offer the viewable lineage subgraph too, so wide tables stay small,
+            # while the analysis result itself stays visible
+            try:
+                subgraph_json = json.dumps(event_subgraph(data_to_encode), indent=2)
+            except ValueError:
+                subgraph_json = None
+            
             # Format JSON for display
             formatted_json = json.dumps(data_to_encode, indent=2)
+            subgraph_box = ""
+            if subgraph_json is not None:
+                subgraph_box = self._json_box("subgraph-textarea", "🕸️ Lineage Subgraph (JSON)", subgraph_json)
             
             return f"""
             <div style='text-align: center; padding: 10px;'>
@@ -65,92 +151,154 @@ class SQLLineageFrontend:
                     📋 Steps to visualize your results:<br>
                     1. Click "Open JSONCrack Editor" below<br>
                     2. Click "Copy JSON" button or click the JSON data below to select all<br>
-                    3. Paste it into the JSONCrack editor
+                    3. Paste it into the JSONCrack editor<br>
+                    For large tables, copy the lineage subgraph instead, which keeps the graph small
                 </div>
                 <a href='https://jsoncrack.com/editor' target='_blank' style='color: #007bff; text-decoration: none; font-weight: bold; font-size: 16px; padding: 10px 20px; border: 2px solid #007bff; border-radius: 5px; display: inline-block; margin-bottom: 15px;'>
                     🔗 Open JSONCrack Editor
                 </a>
                 <br><br>
-                <div style='background: #f8f9fa; border: 1px solid #e0e0e0; border-radius: 5px; padding: 15px; margin: 10px 0;'>
-                    <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;'>
-                        <div style='font-weight: bold; color: #333;'>📄 Analysis Results (JSON)</div>
-                        <button onclick="document.getElementById('json-textarea').select(); document.getElementById('json-textarea').setSelectionRange(0, 99999); navigator.clipboard.writeText(document.getElementById('json-textarea').value).then(() => alert('JSON copied to clipboard!')).catch(() => alert('Failed to copy. Please select and copy manually.'));" style='background: #28a745; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; font-weight: bold; width: 120px;'>📋 Copy JSON</button>
-                    </div>
-                    <textarea id="json-textarea" readonly style='background: #ffffff; color: #000000; padding: 12px; border-radius: 3px; border: 1px solid #e0e0e0; font-family: monospace; font-size: 12px; width: 100%; height: 250px; resize: vertical; cursor: text;' onclick="this.select(); this.setSelectionRange(0, 99999);" title="Click to select all JSON">{formatted_json}</textarea>
-                </div>
+                {self._json_box("json-textarea", "📄 Analysis Results (JSON)", formatted_json)}
+                {subgraph_box}
             </div>
             """
         except Exception as e:
             return f"<div style='color: #ff6b6b;'>❌ Error generating visualization data: {str(e)}</div>"
 
+    def _json_box(self, element_id: str, title: str, text: str) -> str:
+        """Generate a read-only JSON box with a button copying its content"""
+        return f"""
+                <div style='background: #f8f9fa; border: 1px solid #e0e0e0; border-radius: 5px; padding: 15px; margin: 10px 0;'>
+                    <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;'>
+                        <div style='font-weight: bold; color: #333;'>{title}</div>
+                        <button onclick="document.getElementById('{element_id}').select(); document.getElementById('{element_id}').setSelectionRange(0, 99999); navigator.clipboard.writeText(document.getElementById('{element_id}').value).then(() => alert('JSON copied to clipboard!')).catch(() => alert('Failed to copy. Please select and copy manually.'));" style='background: #28a745; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; font-weight: bold; width: 120px;'>📋 Copy JSON</button>
+                    </div>
+                    <textarea id="{element_id}" readonly style='background: #ffffff; color: #000000; padding: 12px; border-radius: 3px; border: 1px solid #e0e0e0; font-family: monospace; font-size: 12px; width: 100%; height: 250px; resize: vertical; cursor: text;' onclick="this.select(); this.setSelectionRange(0, 99999);" title="Click to select all JSON">{text}</textarea>
+                </div>
+        """
+
+    def get_stages_html(self, stages: Optional[Dict[str, str]] = None) -> str:
+        """Generate HTML for the progress of each analysis stage"""
+        stages = stages or {}
+        html = "<div style='font-size: 14px;'>"
+        for stage, label in STAGES:
+            status = stages.get(stage, "pending")
+            html += f"<div style='margin: 2px 0;'>{STAGE_ICONS[status]} {label}</div>"
+        html += "</div>"
+        return html
+
     def get_logs_html(self) -> str:
-        """Generate HTML for live logs display"""
-        if self.current_agent_name is None:
-            return "<div style='color: #868e96;'>No agent initialized yet</div>"
-        
+        """Generate the live logs panel, which the browser fills from poll_logs batches"""
+        return """
+        <div id='lineage-log-lines' style='background: #f8f9fa; border: 1px solid #e0e0e0; border-radius: 5px; padding: 10px; max-height: 300px; overflow-y: auto; font-family: monospace; font-size: 12px;'>
+            <div style='color: #868e96;'>No agent initialized yet</div>
+        </div>
+        """
+
+    def poll_logs(self, session: Dict[str, Any], cursor: Dict[str, Any]):
+        """
+        Fetch the log lines of the session's last run written since the last poll.
+
+        Only lines logged under the session's run id are read, so sessions running
+        the same agent at once do not see each other's logs.
+
+        Args:
+            session (Dict[str, Any]): The session state
+            cursor (Dict[str, Any]): The run whose logs were read, and the id of the last line read
+
+        Returns:
+            ({"run", "rows"} batch for the browser to append, or no update; the new cursor)
+        """
+        agent_name, run_id = session["agent_name"], session.get("run_id")
+        if run_id is None:
+            return gr.update(), cursor
+        # A new run is read from its first line
+        after = cursor["after"] if cursor["run_id"] == run_id else 0
         try:
-            logs = read_lineage_log(self.current_agent_name, last_n=20)
-            if not logs:
-                return "<div style='color: #868e96;'>No logs available yet</div>"
-            
-            log_html = "<div style='background: #f8f9fa; border: 1px solid #e0e0e0; border-radius: 5px; padding: 10px; max-height: 300px; overflow-y: auto;'>"
-            log_html += "<div style='font-family: monospace; font-size: 12px;'>"
-            
-            for datetime_str, log_type, message in logs:
-                # Color coding based on log type
-                color_map = {
-                    "trace": "#007bff",
-                    "agent": "#28a745", 
-                    "function": "#ffc107",
-                    "generation": "#17a2b8",
-                    "response": "#6f42c1",
-                    "span": "#6c757d"
-                }
-                color = color_map.get(log_type.lower(), "#000000")
-                
-                log_html += f"<div style='margin: 2px 0;'>"
-                log_html += f"<span style='color: {color}; font-weight: bold;'>[{log_type.upper()}]</span> "
-                log_html += f"<span style='color: #6c757d;'>{datetime_str}</span> "
-                log_html += f"<span style='color: #000000;'>{message}</span>"
-                log_html += "</div>"
-            
-            log_html += "</div></div>"
-            return log_html
-            
+            rows = read_lineage_log_after(agent_name, after, limit=LOG_BUFFER, run_id=run_id)
         except Exception as e:
-            return f"<div style='color: #ff6b6b;'>❌ Error reading logs: {str(e)}</div>"
+            print(f"Warning: could not read logs for {agent_name}: {e}")
+            return gr.update(), cursor
+        if not rows:
+            return gr.update(), {"run_id": run_id, "after": after}
+        return {"run": run_id, "rows": rows}, {"run_id": run_id, "after": rows[-1][0]}
 
-    def test_log_writing(self):
+    def test_log_writing(self, session: Dict[str, Any]):
         """Test function to write a sample log entry"""
-        if self.current_agent_name:
-            write_lineage_log(self.current_agent_name, "test", "Test log entry from frontend")
+        if session["agent_name"]:
+            token = log_run_id.set(session.get("run_id"))
+            try:
+                write_lineage_log(session["agent_name"], "test", "Test log entry from frontend")
+            finally:
+                log_run_id.reset(token)
             return "Test log written successfully!"
         else:
             return "Please initialize an agent first"
 
-    async def run_analysis(self, agent_name: str, model_name: str, query: str):
-        """Run SQL lineage analysis"""
+    async def run_analysis(self, agent_name: str, model_name: str, query: str,
+                           session: Dict[str, Any]) -> AsyncIterator[Tuple[Any, ...]]:
+        """
+        Run SQL lineage analysis, streaming its progress.
+
+        Yields (status, stages html, visualization html, session) whenever a stage
+        starts or completes. The logs panel follows the run on its own timer.
+        """
+        session = dict(session or new_session())
+        session["agent_name"] = agent_name
+        session["run_id"] = uuid.uuid4().hex
+        stages = {stage: "pending" for stage, _ in STAGES}
+        changes: asyncio.Queue = asyncio.Queue()
+
+        # The task copies the context as it is created, so only this session's run
+        # reports here, and its log lines carry the session's run id
+        token = stage_listener.set(lambda stage, status: changes.put_nowait((stage, status)))
+        run_token = log_run_id.set(session["run_id"])
         try:
-            # Initialize the agent framework
-            self.agent_framework = AgentFramework(agent_name=agent_name, model_name=model_name)
-            self.current_agent_name = agent_name
-            
-            # Run the analysis using the correct framework method
-            results = await self.agent_framework.run_agent_plugin("sql_lineage_agent", query)
-            self.current_results = results
-            
-            return f"""✅ Analysis completed successfully! Results are now available in the visualization section. 
+            framework = AgentFramework(agent_name=agent_name, model_name=model_name)
+            run = asyncio.create_task(framework.run_agent_plugin("sql_lineage_agent", query))
+        finally:
+            log_run_id.reset(run_token)
+            stage_listener.reset(token)
+
+        try:
+            while not run.done():
+                yield "⏳ Running analysis...", self.get_stages_html(stages), gr.update(), session
+
+                change = asyncio.ensure_future(changes.get())
+                await asyncio.wait((run, change), return_when=asyncio.FIRST_COMPLETED)
+                if change.done():
+                    stage, status = change.result()
+                    stages[stage] = status
+                else:
+                    change.cancel()
+                while not changes.empty():
+                    stage, status = changes.get_nowait()
+                    stages[stage] = status
+
+            try:
+                results = run.result()
+            except Exception as e:
+                results = {"error": str(e)}
+
+            if isinstance(results, dict) and "error" in results:
+                for stage, status in stages.items():
+                    if status == "started":
+                        stages[stage] = "failed"
+                yield (f"❌ Error running analysis: {results['error']}", self.get_stages_html(stages),
+                       gr.update(), session)
+                return
+
+            session["results"] = results
+            yield (f"""✅ Analysis completed successfully! Results are now available in the visualization section. 
             Click 'Open JSONCrack Editor' to visualize your data lineage.
             
             If you want to set up your own local development environment or deploy this in production, 
-            please refer to the GitHub repository mentioned above."""
-            
-        except Exception as e:
-            return f"❌ Error running analysis: {str(e)}"
-
-    def run_analysis_sync(self, agent_name: str, model_name: str, query: str):
-        """Synchronous wrapper for run_analysis"""
-        return asyncio.run(self.run_analysis(agent_name, model_name, query))
+            please refer to the GitHub repository mentioned above.""",
+                   self.get_stages_html(stages), self.get_visualize_link(results), session)
+        finally:
+            # The browser went away, or the analysis finished
+            if not run.done():
+                run.cancel()
 
     def create_ui(self):
         """Create the Gradio interface"""
@@ -198,6 +346,7 @@ class SQLLineageFrontend:
                     
                     analyze_button = gr.Button("🚀 Run Analysis", variant="primary", size="lg")
                     status_output = gr.Textbox(label="Status", interactive=False)
+                    stages_html = gr.HTML(self.get_stages_html())
                 
                 # Right column - Visualization and Logs
                 with gr.Column(scale=1):
@@ -206,40 +355,45 @@ class SQLLineageFrontend:
                     visualize_html = gr.HTML(self.get_visualize_link())
                     
                     gr.Markdown("### 4. Live Logs")
-                    logs_html = gr.HTML(self.get_logs_html())
+                    gr.HTML(self.get_logs_html())
                     test_log_button = gr.Button("Test Log Writing", variant="secondary", size="sm")
                     
-                    # Auto-refresh logs every 5 seconds
-                    refresh_logs = gr.Button("🔄 Refresh Logs", variant="secondary", size="sm")
+                    # New log lines arrive every LOG_INTERVAL seconds and are appended by the browser
+                    log_batch = gr.JSON(visible=False)
+                    log_cursor = gr.State({"run_id": None, "after": 0})
+                    log_timer = gr.Timer(LOG_INTERVAL)
             
-            # Event handlers
-            def run_analysis_and_update(agent_name, model_name, query):
-                """Run analysis and update visualization"""
-                # Run the analysis
-                status_result = self.run_analysis_sync(agent_name, model_name, query)
-                # Update visualization and logs
-                viz_html = self.get_visualize_link()
-                logs_html = self.get_logs_html()
-                return status_result, viz_html, logs_html
+            # Each browser session keeps its own results
+            session = gr.State(new_session())
             
+            # Event handlers
             analyze_button.click(
-                fn=run_analysis_and_update,
-                inputs=[agent_dropdown, model_dropdown, query_input],
-                outputs=[status_output, visualize_html, logs_html]
+                fn=self.run_analysis,
+                inputs=[agent_dropdown, model_dropdown, query_input, session],
+                outputs=[status_output, stages_html, visualize_html, session],
+                concurrency_limit=self.concurrency_limit,
+                concurrency_id="analysis"
             )
             
             test_log_button.click(
                 fn=self.test_log_writing,
-                inputs=[],
+                inputs=[session],
                 outputs=[status_output]
             )
             
-            refresh_logs.click(
-                fn=self.get_logs_html,
-                inputs=[],
-                outputs=[logs_html]
+            log_timer.tick(
+                fn=self.poll_logs,
+                inputs=[session, log_cursor],
+                outputs=[log_batch, log_cursor],
+                concurrency_limit=None,
+                show_progress="hidden"
+            ).then(
+                fn=None,
+                inputs=[log_batch],
+                js=APPEND_LOGS_JS
             )
         
+        ui.queue(max_size=self.max_queue_size)
         return ui
 
     def run(self):
@@ -7,6 +7,7 @@
 
 const fs = require('fs');
 const path = require('path');
+const readline = require('readline');
 const { exec } = require('child_process');
 
 // Function to copy text to clipboard
@@ -172,18 +173,60 @@ async function processJsonData(jsonData, options = {}) {
   }
 }
 
+// Serve mode: process records streamed on stdin until it closes.
+// Each request is one line of JSON, {"id": <n>, "data": <record>}; once a
+// record is processed, one line {"id": <n>, "ok": true|false, "error"?: <text>}
+// is written to stdout. Requests are processed one at a time, in order, and
+// logs go to stderr so that stdout only carries the replies.
+function serve(options) {
+  console.log = (...args) => console.error(...args);
+  const input = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  let queue = Promise.resolve();
+
+  const reply = (message) => {
+    process.stdout.write(JSON.stringify(message) + '\n');
+  };
+
+  input.on('line', (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    queue = queue.then(async () => {
+      let request;
+      try {
+        request = JSON.parse(line);
+      } catch (error) {
+        reply({ id: null, ok: false, error: `Invalid request: ${error.message}` });
+        return;
+      }
+      try {
+        await processJsonData(request.data, options);
+        reply({ id: request.id, ok: true });
+      } catch (error) {
+        reply({ id: request.id, ok: false, error: error.message });
+      }
+    });
+  });
+  input.on('close', () => {
+    queue.then(() => process.exit(0));
+  });
+  console.error('🚀 JSONCrack generator serving records on stdin');
+}
+
 // Main function
 async function main() {
-  console.log('🚀 JSONCrack JSON Processor\n');
-  
   // Parse command line arguments
   const args = process.argv.slice(2);
+  if (!args.includes('--serve')) {
+    console.log('🚀 JSONCrack JSON Processor\n');
+  }
   
   let inputFile = null;
   let shouldCopy = true;
   let shouldOpen = true;
   let delay = 2000;
   let saveToFile = false;
+  let serveMode = false;
   
   // Parse arguments
   for (let i = 0; i < args.length; i++) {
@@ -201,6 +244,8 @@ async function main() {
       i++; // Skip next argument
     } else if (arg === '--save') {
       saveToFile = true;
+    } else if (arg === '--serve') {
+      serveMode = true;
     } else if (arg === '--help' || arg === '-h') {
       console.log(`
 Usage: node json-generator.js [options]
@@ -211,17 +256,25 @@ Options:
   --no-open             Don't open browser automatically
   --delay <seconds>     Delay between multiple URLs (default: 2)
   --save                Save processed JSON to file
+  --serve               Keep running and process records streamed on stdin
+                        (one JSON request per line, one JSON reply per line on stdout)
   --help, -h           Show this help message
 
 Examples:
   node json-generator.js --input-file data.json
   node json-generator.js --input-file data.json --no-copy
   node json-generator.js --input-file data.json --delay 5
+  node json-generator.js --serve --no-copy
       `);
       return;
     }
   }
   
+  if (serveMode) {
+    serve({ copyToClipboard: shouldCopy, openInBrowser: shouldOpen, delay: delay, saveToFile: saveToFile });
+    return;
+  }
+  
   let jsonData = null;
   
   // Read JSON from file if provided
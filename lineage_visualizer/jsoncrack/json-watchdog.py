@@ -3,6 +3,19 @@
 JSONCrack Watchdog
 Monitors JSON files in the lineage_extraction_dumps directory and automatically calls json-generator.js
 when new records are added to any of the files.
+
+json-generator.js runs as one long-lived worker process (--serve). New
+records are streamed to it over a pipe instead of starting Node for each
+of them.
+
+Each file is read from the byte offset where the previous read stopped,
+so a new record costs only its own bytes. The offsets are checkpointed
+next to the files, and a restarted watchdog resumes from them; a file
+that was rotated or truncated is read again from the start.
+
+Only the viewable part of the new record is sent: the lineage subgraph around
+its output, capped in nodes and edges, with wide tables collapsed. Use
+--full-record to send the record unchanged.
 """
 
 import json
@@ -16,6 +29,12 @@ from watchdog.events import FileSystemEventHandler
 import argparse
 import logging
 import threading
+import queue
+import zlib
+
+# Make the algorithm package importable when run from anywhere
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from algorithm.lineage.subgraph import event_subgraph, DEFAULT_MAX_NODES, DEFAULT_MAX_EDGES, DEFAULT_MAX_COLUMNS
 
 # Configure logging
 logging.basicConfig(
@@ -28,180 +47,465 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHECKPOINT_NAME = '.json-watchdog.offsets'
+# Seconds a file's first change waits for more appends before its records are read
+DEFAULT_DEBOUNCE = 1.0
+# Threads reading changed files, and changed files that may wait for them
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 256
+# Polling fallback: seconds between scans after a change, and at most when idle
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_MAX_POLL_INTERVAL = 30.0
+# Records sent to the generator worker and not yet processed before send() waits
+DEFAULT_MAX_PENDING = 8
+# Options passed to the generator; by default it copies each record's URL to
+# the clipboard and opens it in the browser (see --no-copy and --no-open)
+DEFAULT_GENERATOR_OPTIONS = ()
+# Seconds send() waits for the worker before restarting it
+DEFAULT_SEND_TIMEOUT = 120
+MAX_RESTART_DELAY = 30
+# Bytes hashed before a saved offset to recognise a file rewritten while the watchdog was down
+CHECKSUM_BYTES = 4096
+
+def _tail_checksum(json_file, offset):
+    """CRC of the bytes just before offset, or None if the file is shorter or unreadable."""
+    try:
+        with open(json_file, 'rb') as f:
+            start = max(offset - CHECKSUM_BYTES, 0)
+            f.seek(start)
+            data = f.read(offset - start)
+    except OSError:
+        return None
+    if len(data) != offset - start:
+        return None
+    return zlib.crc32(data)
+
+class GeneratorWorker:
+    """
+    One long-running `json-generator.js --serve` process, fed records over its stdin.
+    
+    Each record is written as one JSON line {"id", "data"}, and the
+    generator answers each with one JSON line on stdout once it has
+    processed it. At most max_pending records may be unanswered; send()
+    waits for a slot beyond that, so a slow generator slows the watchdog
+    down instead of letting records pile up in the pipe. A generator that
+    exited, or answered nothing for send_timeout seconds, is restarted,
+    with delays growing up to MAX_RESTART_DELAY seconds while it keeps
+    failing. Records a crashed generator had not answered are not resent:
+    the next record replaces them in the view anyway.
+    """
+    
+    def __init__(self, generator_script, options=DEFAULT_GENERATOR_OPTIONS, max_pending=DEFAULT_MAX_PENDING,
+                 send_timeout=DEFAULT_SEND_TIMEOUT):
+        self.generator_script = Path(generator_script)
+        self.options = list(options)
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.restarts = 0
+        self._process = None
+        self._slots = None
+        self._next_id = 0
+        self._restart_delay = 0
+        self._lock = threading.Lock()
+    
+    def send(self, data):
+        """
+        Send one record, starting or restarting the generator if needed.
+        
+        Returns:
+            bool: True if the record was handed to the generator
+        """
+        with self._lock:
+            self._next_id += 1
+            line = (json.dumps({'id': self._next_id, 'data': data}) + '\n').encode('utf-8')
+            for _ in range(2):
+                if not self._ensure_running():
+                    return False
+                process, slots = self._process, self._slots
+                if not slots.acquire(timeout=self.send_timeout):
+                    logger.error(f"❌ JSON generator answered nothing for {self.send_timeout}s, restarting it")
+                    self._terminate(process)
+                    continue
+                try:
+                    process.stdin.write(line)
+                    process.stdin.flush()
+                    return True
+                except (OSError, ValueError):
+                    logger.warning("⚠️ JSON generator pipe closed, restarting it")
+                    self._terminate(process)
+            logger.error(f"❌ Dropped record {self._next_id}: the JSON generator is not accepting records")
+            return False
+    
+    def stop(self):
+        """Close the generator's stdin and wait for it to finish the records it has."""
+        with self._lock:
+            process = self._process
+            self._process = None
+            if process is None:
+                return
+            try:
+                process.stdin.close()
+                process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+    
+    def _ensure_running(self):
+        process = self._process
+        if process is not None and process.poll() is None:
+            return True
+        if process is not None:
+            logger.warning(f"⚠️ JSON generator exited with code {process.returncode}")
+            self.restarts += 1
+            if self._restart_delay:
+                logger.info(f"⏳ Restarting the JSON generator in {self._restart_delay}s")
+                time.sleep(self._restart_delay)
+            self._restart_delay = min(max(2 * self._restart_delay, 1), MAX_RESTART_DELAY)
+        try:
+            process = subprocess.Popen(
+                ['node', str(self.generator_script), '--serve', *self.options],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=self.generator_script.parent
+            )
+        except OSError as e:
+            logger.error(f"❌ Could not start the JSON generator: {e}")
+            self._process = None
+            return False
+        slots = threading.BoundedSemaphore(self.max_pending)
+        threading.Thread(target=self._read_replies, args=(process, slots), daemon=True).start()
+        threading.Thread(target=self._read_logs, args=(process,), daemon=True).start()
+        self._process, self._slots = process, slots
+        logger.info(f"🚀 Started JSON generator worker (pid {process.pid})")
+        return True
+    
+    def _terminate(self, process):
+        process.kill()
+        process.wait()
+    
+    def _read_replies(self, process, slots):
+        """Free a slot for every answer of one generator process."""
+        for line in process.stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                logger.info(f"📋 {line.decode('utf-8', 'replace').rstrip()}")
+                continue
+            try:
+                slots.release()
+            except ValueError:
+                pass
+            if reply.get('ok'):
+                self._restart_delay = 0
+                logger.info(f"✅ JSON generator processed record {reply.get('id')}")
+            else:
+                logger.error(f"❌ JSON generator failed on record {reply.get('id')}: {reply.get('error')}")
+    
+    def _read_logs(self, process):
+        for line in process.stderr:
+            logger.info(f"📋 {line.decode('utf-8', 'replace').rstrip()}")
+
 class JSONFileHandler(FileSystemEventHandler):
-    """Handles file system events for JSON files."""
+    """
+    Handles file system events for JSON files.
+    
+    Events only schedule work, so the observer thread never blocks. The
+    first change to a file opens a debounce window for that file alone;
+    further changes within it are absorbed, and when it closes the file is
+    queued once. A pool of worker threads reads the queued files, each
+    file by one thread at a time, and sends every record appended since
+    the previous read, in order. When the bounded queue is full, the
+    change is left to the polling fallback; the file's offset keeps its
+    records until then.
+    """
     
-    def __init__(self, watch_directory, generator_script):
+    def __init__(self, watch_directory, generator_script, full_record=False, max_nodes=DEFAULT_MAX_NODES,
+                 max_edges=DEFAULT_MAX_EDGES, max_columns=DEFAULT_MAX_COLUMNS, checkpoint_path=None, worker=None,
+                 debounce=DEFAULT_DEBOUNCE, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
         self.watch_directory = Path(watch_directory)
         self.generator_script = Path(generator_script)
-        self.file_trackers = {}  # Track each file's state
-        self.last_modified = 0
+        self.worker = worker or GeneratorWorker(generator_script)
+        self.full_record = full_record
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+        self.max_columns = max_columns
+        self.file_trackers = {}  # Track each file's read offset and inode
+        self.debounce = debounce
+        # Guards the trackers, the checkpoint and the scheduling state below
+        self._lock = threading.Lock()
+        # One lock per file, held while its new records are read and sent
+        self._file_locks = {}
+        # Files whose debounce window is open -> the timer closing it
+        self._timers = {}
+        # Files waiting in the queue, so a file is queued at most once
+        self._queued = set()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
         
         # Ensure the watch directory exists
         if not self.watch_directory.exists():
             self.watch_directory.mkdir(parents=True, exist_ok=True)
             logger.info(f"✅ Created watch directory: {self.watch_directory}")
         
+        # Offsets saved by the previous run, by file name
+        self.checkpoint_path = Path(checkpoint_path or self.watch_directory / DEFAULT_CHECKPOINT_NAME)
+        self.checkpoint = self._load_checkpoint()
+        
         # Initialize tracking for existing files
         self._initialize_file_tracking()
         
+        for thread in self._workers:
+            thread.start()
+        
         logger.info(f"🔍 Watching directory: {self.watch_directory}")
         logger.info(f"📜 Generator script: {self.generator_script}")
     
     def _initialize_file_tracking(self):
         """Initialize tracking for all existing JSON files in the directory."""
-        for json_file in self.watch_directory.glob("*.json"):
-            self._initialize_single_file_tracking(json_file)
-    
-    def _initialize_single_file_tracking(self, json_file):
-        """Initialize tracking for a single JSON file."""
-        if json_file not in self.file_trackers:
-            self.file_trackers[json_file] = {
-                'last_modified': 0,
-                'last_content': None,
-                'last_line_count': self._get_line_count(json_file)
-            }
-            logger.info(f"📄 Initialized tracking for: {json_file.name}")
+        with self._lock:
+            for json_file in self.watch_directory.glob("*.json"):
+                self._initialize_single_file_tracking(json_file, existing=True)
     
-    def _get_line_count(self, json_file):
-        """Get the number of non-empty lines in the file."""
+    def _initialize_single_file_tracking(self, json_file, existing=False):
+        """
+        Initialize tracking for a single JSON file; call with the lock held.
+        
+        A file that existed when the watchdog started resumes from its
+        checkpointed offset, or from its current end if it has none, so old
+        records are not sent again. A file created later is read from the start.
+        """
+        if json_file in self.file_trackers:
+            return
         try:
-            if not json_file.exists():
-                return 0
-            with open(json_file, 'r') as f:
-                return sum(1 for line in f if line.strip())
-        except Exception as e:
-            logger.error(f"❌ Error counting lines in {json_file}: {e}")
-            return 0
+            stat = json_file.stat()
+        except OSError:
+            return
+        offset = 0
+        saved = self.checkpoint.get(json_file.name)
+        if saved and saved.get('inode') == stat.st_ino and saved.get('offset', 0) <= stat.st_size \
+                and saved.get('checksum') == _tail_checksum(json_file, saved.get('offset', 0)):
+            offset = saved['offset']
+            logger.info(f"📍 Resuming {json_file.name} from byte {offset}")
+        elif existing:
+            offset = stat.st_size
+        self.file_trackers[json_file] = {
+            'offset': offset,
+            'inode': stat.st_ino,
+            'checksum': _tail_checksum(json_file, offset),
+            'last_content': None,
+        }
+        logger.info(f"📄 Initialized tracking for: {json_file.name}")
     
-    def _read_json_lines(self, json_file):
-        """Read and parse the newline-delimited JSON file."""
+    def _load_checkpoint(self):
+        """Load the saved file offsets, if any."""
+        if not self.checkpoint_path.exists():
+            return {}
         try:
-            records = []
-            if not json_file.exists():
-                return []
-            with open(json_file, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:  # Skip empty lines
-                        try:
-                            record = json.loads(line)
-                            records.append(record)
-                        except json.JSONDecodeError as e:
-                            logger.error(f"❌ Invalid JSON on line {line_num} in {json_file.name}: {e}")
-                            continue
-            return records
-        except Exception as e:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            return checkpoint if isinstance(checkpoint, dict) else {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return {}
+    
+    def _save_checkpoint(self):
+        """Save how far each file was read, replacing the checkpoint atomically."""
+        self.checkpoint = {
+            json_file.name: {
+                'offset': tracker['offset'],
+                'inode': tracker['inode'],
+                'checksum': tracker['checksum'],
+            }
+            for json_file, tracker in self.file_trackers.items()
+        }
+        temp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(self.checkpoint, f)
+            os.replace(temp_path, self.checkpoint_path)
+        except OSError as e:
+            logger.error(f"❌ Error saving checkpoint {self.checkpoint_path}: {e}")
+    
+    def _read_new_records(self, json_file, tracker):
+        """
+        Read the records appended since the tracked offset.
+        
+        Only the new bytes are read. A partially written last line is left
+        for the next read. A file that was replaced (new inode, or bytes
+        before the offset that changed) or truncated (smaller than the
+        offset) is read again from the start.
+        """
+        try:
+            stat = json_file.stat()
+        except OSError:
+            return []
+        if stat.st_ino != tracker['inode'] or stat.st_size < tracker['offset'] or (
+                stat.st_size > tracker['offset'] and _tail_checksum(json_file, tracker['offset']) != tracker['checksum']):
+            logger.info(f"🔄 {json_file.name} was rotated or truncated, reading it from the start")
+            with self._lock:
+                tracker.update(inode=stat.st_ino, offset=0, checksum=_tail_checksum(json_file, 0))
+        if stat.st_size == tracker['offset']:
+            return []
+        try:
+            with open(json_file, 'rb') as f:
+                f.seek(tracker['offset'])
+                data = f.read(stat.st_size - tracker['offset'])
+        except OSError as e:
             logger.error(f"❌ Error reading file {json_file}: {e}")
             return []
+        end = data.rfind(b'\n')
+        if end < 0:
+            return []
+        offset = tracker['offset'] + end + 1
+        with self._lock:
+            tracker.update(offset=offset, checksum=_tail_checksum(json_file, offset))
+        records = []
+        for line in data[:end].split(b'\n'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                logger.error(f"❌ Invalid JSON in {json_file.name}: {e}")
+        return records
     
-    def _get_last_record(self, json_file):
-        """Get the last record from the newline-delimited JSON file."""
-        records = self._read_json_lines(json_file)
-        if records:
-            return records[-1]
-        return None
+    def _viewable_data(self, record):
+        """Reduce a record to its lineage subgraph, or return it unchanged if it is not an event."""
+        if self.full_record:
+            return record
+        try:
+            subgraph = event_subgraph(record, max_nodes=self.max_nodes, max_edges=self.max_edges,
+                                      max_columns=self.max_columns)
+        except ValueError:
+            return record
+        if subgraph['truncated']:
+            logger.info(f"✂️ Subgraph capped at {self.max_nodes} nodes / {self.max_edges} edges")
+        return subgraph
     
     def _call_json_generator(self, json_data, source_file):
-        """Call the JSON generator script with the provided data."""
+        """Send the viewable part of the provided data to the JSON generator worker."""
         try:
-            logger.info(f"📤 Calling JSON generator with last record from {source_file.name}")
-            
-            # Create a temporary file in the same directory as the generator script
-            temp_file = self.generator_script.parent / f"temp_data_{int(time.time())}.json"
-            with open(temp_file, 'w') as f:
-                json.dump(json_data, f, indent=2)
-            
-            logger.info(f"📄 Created temporary file: {temp_file}")
-            logger.info(f"📊 JSON data: {json.dumps(json_data, indent=2)[:200]}...")
-            
-            # Call the Node.js script with the temporary file
-            result = subprocess.run([
-                'node', str(self.generator_script),
-                '--input-file', str(temp_file)
-            ], capture_output=True, text=True, cwd=self.generator_script.parent)
-            
-            # Clean up temporary file
-            if temp_file.exists():
-                temp_file.unlink()
-                logger.info(f"🗑️ Cleaned up temporary file: {temp_file}")
-            
-            if result.returncode == 0:
-                logger.info("✅ JSON generator executed successfully")
-                if result.stdout:
-                    logger.info(f"📋 Output: {result.stdout.strip()}")
-            else:
-                logger.error(f"❌ JSON generator failed: {result.stderr}")
-                
+            json_data = self._viewable_data(json_data)
+            logger.info(f"📤 Sending last record from {source_file.name} to the JSON generator")
+            logger.info(f"📊 JSON data: {json.dumps(json_data)[:200]}...")
+            self.worker.send(json_data)
         except Exception as e:
             logger.error(f"❌ Error calling JSON generator: {e}")
-            # Clean up temp file even if there's an error
-            if 'temp_file' in locals() and temp_file.exists():
-                temp_file.unlink()
-                logger.info(f"🗑️ Cleaned up temporary file after error: {temp_file}")
     
-    def _handle_file_change(self, json_file):
-        """Handle changes to a specific JSON file."""
-        if not json_file.exists():
-            logger.warning(f"⚠️ File no longer exists: {json_file}")
-            return
-        
-        # Initialize tracking if this is a new file
-        if json_file not in self.file_trackers:
-            self._initialize_single_file_tracking(json_file)
-        
-        tracker = self.file_trackers[json_file]
-        current_line_count = self._get_line_count(json_file)
+    def schedule(self, json_file):
+        """Open a debounce window for a file, unless one is open already."""
+        with self._lock:
+            if json_file in self._timers:
+                logger.info(f"⏱️  Coalescing change to {json_file.name} into its pending batch")
+                return
+            timer = threading.Timer(self.debounce, self.enqueue, (json_file,))
+            timer.daemon = True
+            self._timers[json_file] = timer
+        timer.start()
+    
+    def enqueue(self, json_file):
+        """
+        Queue a file for the workers now, unless it is queued already; never blocks.
         
-        # Check if new records were added
-        if current_line_count > tracker['last_line_count']:
-            logger.info(f"🆕 New records detected in {json_file.name}! Line count: {tracker['last_line_count']} → {current_line_count}")
+        Returns:
+            bool: False if the queue was full
+        """
+        with self._lock:
+            self._timers.pop(json_file, None)
+            if json_file in self._queued:
+                return True
+            try:
+                self._queue.put_nowait(json_file)
+            except queue.Full:
+                logger.warning(f"⚠️ Work queue full, leaving {json_file.name} to the next poll")
+                return False
+            self._queued.add(json_file)
+            return True
+    
+    def enqueue_unread(self):
+        """Queue the tracked files holding bytes past their offset, e.g. appended while the watchdog was stopped."""
+        with self._lock:
+            trackers = list(self.file_trackers.items())
+        for json_file, tracker in trackers:
+            try:
+                size = json_file.stat().st_size
+            except OSError:
+                continue
+            if size != tracker['offset']:
+                self.enqueue(json_file)
+    
+    def close(self):
+        """Cancel open debounce windows and stop the workers once the queued files are read."""
+        with self._lock:
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join()
+    
+    def _work(self):
+        while True:
+            json_file = self._queue.get()
+            if json_file is None:
+                return
+            with self._lock:
+                # Changes from here on queue the file again
+                self._queued.discard(json_file)
+            try:
+                self._handle_file_change(json_file)
+            except Exception as e:
+                logger.error(f"❌ Error handling {json_file.name}: {e}")
+    
+    def _file_lock(self, json_file):
+        with self._lock:
+            lock = self._file_locks.get(json_file)
+            if lock is None:
+                lock = self._file_locks[json_file] = threading.Lock()
+            return lock
+    
+    def _handle_file_change(self, json_file):
+        """Read the records appended to a file and send each of them to the generator."""
+        with self._file_lock(json_file):
+            if not json_file.exists():
+                logger.warning(f"⚠️ File no longer exists: {json_file}")
+                return
             
-            # Get the last record
-            last_record = self._get_last_record(json_file)
-            if last_record:
-                logger.info(f"📄 Processing last record from {json_file.name}: {last_record.get('eventType', 'Unknown')} event")
-                
-                # Call the JSON generator with the last record
-                self._call_json_generator(last_record, json_file)
-                
-                # Update our tracking
-                tracker['last_line_count'] = current_line_count
-                tracker['last_content'] = last_record
-            else:
-                logger.warning(f"⚠️ No valid records found in {json_file.name}")
-                
-        elif current_line_count != tracker['last_line_count']:
-            logger.info(f"📊 Line count changed in {json_file.name}: {tracker['last_line_count']} → {current_line_count}")
-            tracker['last_line_count'] = current_line_count
+            # Initialize tracking if this is a new file
+            with self._lock:
+                if json_file not in self.file_trackers:
+                    self._initialize_single_file_tracking(json_file)
+                tracker = self.file_trackers.get(json_file)
+            if tracker is None:
+                return
+            offset = tracker['offset']
+            records = self._read_new_records(json_file, tracker)
+            if records:
+                logger.info(f"🆕 {len(records)} new record(s) in {json_file.name}, read up to byte {tracker['offset']}")
+                for record in records:
+                    if isinstance(record, dict):
+                        logger.info(f"📄 Processing record from {json_file.name}: {record.get('eventType', 'Unknown')} event")
+                    self._call_json_generator(record, json_file)
+                tracker['last_content'] = records[-1]
+            # Checkpoint once the records were handed over, so a crash resends rather than skips them
+            if tracker['offset'] != offset:
+                with self._lock:
+                    self._save_checkpoint()
     
     def on_modified(self, event):
         """Handle file modification events."""
-        logger.info(f"🔍 File system event detected: {event.src_path}")
-        
         if event.is_directory:
-            logger.info("📁 Event is for directory, ignoring")
             return
         
         file_path = Path(event.src_path)
         
         # Only handle JSON files in the watch directory
         if file_path.parent != self.watch_directory or file_path.suffix != '.json':
-            logger.info(f"📄 Event is for different file or not a JSON file: {event.src_path}")
             return
         
         logger.info(f"✅ File modification detected for watched file: {file_path.name}")
-        
-        # Avoid duplicate events
-        current_time = time.time()
-        if current_time - self.last_modified < 1:  # Debounce for 1 second
-            logger.info("⏱️  Debouncing event (too soon after last event)")
-            return
-        
-        self.last_modified = current_time
-        
-        # Handle the file change
-        self._handle_file_change(file_path)
+        self.schedule(file_path)
     
     def on_created(self, event):
         """Handle file creation events."""
@@ -209,9 +513,10 @@ class JSONFileHandler(FileSystemEventHandler):
         if file_path.parent == self.watch_directory and file_path.suffix == '.json':
             logger.info(f"📄 New JSON file created: {file_path.name}")
             # Initialize tracking for the new file
-            self._initialize_single_file_tracking(file_path)
+            with self._lock:
+                self._initialize_single_file_tracking(file_path)
             # Handle any initial content
-            self._handle_file_change(file_path)
+            self.schedule(file_path)
     
     def on_deleted(self, event):
         """Handle file deletion events."""
@@ -219,9 +524,85 @@ class JSONFileHandler(FileSystemEventHandler):
         if file_path.parent == self.watch_directory and file_path.suffix == '.json':
             logger.warning(f"🗑️ JSON file deleted: {file_path.name}")
             # Remove from tracking
-            if file_path in self.file_trackers:
-                del self.file_trackers[file_path]
-                logger.info(f"🗑️ Removed {file_path.name} from tracking")
+            with self._lock:
+                if file_path in self.file_trackers:
+                    del self.file_trackers[file_path]
+                    self._save_checkpoint()
+                    logger.info(f"🗑️ Removed {file_path.name} from tracking")
+
+class StatPoller:
+    """
+    Polling fallback for changes the observer missed, from file metadata alone.
+    
+    Each scan lists the directory once and compares every JSON file's
+    (inode, size, mtime_ns) with the previous scan; only files whose
+    metadata changed are queued for reading, so an idle scan opens no
+    file. The interval doubles after each scan that found nothing, up to
+    max_interval, and drops back to interval after a change.
+    """
+    
+    def __init__(self, handler, interval=DEFAULT_POLL_INTERVAL, max_interval=DEFAULT_MAX_POLL_INTERVAL):
+        self.handler = handler
+        self.directory = handler.watch_directory
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.scans = 0
+        # File path -> (inode, size, mtime_ns) at the last scan
+        self._signatures = {}
+        self._stop = threading.Event()
+        # The files as they are now; the handler's trackers cover their content
+        self.scan(queue_changes=False)
+    
+    def scan(self, queue_changes=True):
+        """
+        Queue the files whose metadata changed since the previous scan.
+        
+        Returns:
+            int: Number of changed files
+        """
+        self.scans += 1
+        signatures = self._signatures
+        seen = set()
+        changed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                path = Path(entry.path)
+                seen.add(path)
+                signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                if signatures.get(path) == signature:
+                    continue
+                changed += 1
+                # A file the queue had no room for is retried at the next scan
+                if not queue_changes or self.handler.enqueue(path):
+                    signatures[path] = signature
+        if len(seen) != len(signatures):
+            for path in signatures.keys() - seen:
+                del signatures[path]
+        return changed
+    
+    def run(self):
+        """Scan until stop() is called, backing off while nothing changes."""
+        interval = self.interval
+        while not self._stop.wait(interval):
+            try:
+                changed = self.scan()
+            except OSError as e:
+                logger.error(f"❌ Polling error: {e}")
+                changed = 0
+            if changed:
+                logger.info(f"📊 Polling detected {changed} changed file(s)")
+                interval = self.interval
+            else:
+                interval = min(interval * 2, self.max_interval)
+    
+    def stop(self):
+        self._stop.set()
 
 def main():
     """Main function to run the watchdog."""
@@ -236,6 +617,74 @@ def main():
         default='lineage_visualizer/jsoncrack/json-generator.js',
         help='Path to the JSON generator script (default: lineage_visualizer/jsoncrack/json-generator.js)'
     )
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f'Seconds to collect appends to a file before reading them (default: {DEFAULT_DEBOUNCE})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Threads reading changed files (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f'Seconds between fallback scans after a change (default: {DEFAULT_POLL_INTERVAL})'
+    )
+    parser.add_argument(
+        '--max-poll-interval',
+        type=float,
+        default=DEFAULT_MAX_POLL_INTERVAL,
+        help=f'Seconds between fallback scans when idle (default: {DEFAULT_MAX_POLL_INTERVAL})'
+    )
+    parser.add_argument(
+        '--max-pending',
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help=f'Records the generator may have queued before the watchdog waits for it (default: {DEFAULT_MAX_PENDING})'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help=f'File recording how far each JSON file was read (default: <watch-directory>/{DEFAULT_CHECKPOINT_NAME})'
+    )
+    parser.add_argument(
+        '--no-copy',
+        action='store_true',
+        help="Don't copy each new record's URL to the clipboard"
+    )
+    parser.add_argument(
+        '--no-open',
+        action='store_true',
+        help="Don't open each new record in the browser; its URL is still logged"
+    )
+    parser.add_argument(
+        '--full-record',
+        action='store_true',
+        help='Send the whole record instead of its lineage subgraph'
+    )
+    parser.add_argument(
+        '--max-nodes',
+        type=int,
+        default=DEFAULT_MAX_NODES,
+        help=f'Maximum nodes in the visualized subgraph (default: {DEFAULT_MAX_NODES})'
+    )
+    parser.add_argument(
+        '--max-edges',
+        type=int,
+        default=DEFAULT_MAX_EDGES,
+        help=f'Maximum edges in the visualized subgraph (default: {DEFAULT_MAX_EDGES})'
+    )
+    parser.add_argument(
+        '--max-columns',
+        type=int,
+        default=DEFAULT_MAX_COLUMNS,
+        help=f'Columns shown per table before the rest are collapsed (default: {DEFAULT_MAX_COLUMNS})'
+    )
     
     args = parser.parse_args()
     
@@ -252,8 +701,19 @@ def main():
         logger.error(f"❌ Generator script does not exist: {generator_script}")
         sys.exit(1)
     
-    # Create event handler
-    event_handler = JSONFileHandler(watch_directory, generator_script)
+    # Create the generator worker and the event handler
+    options = list(DEFAULT_GENERATOR_OPTIONS)
+    if args.no_copy:
+        options.append('--no-copy')
+    if args.no_open:
+        options.append('--no-open')
+    worker = GeneratorWorker(generator_script, options=options, max_pending=args.max_pending)
+    event_handler = JSONFileHandler(watch_directory, generator_script, full_record=args.full_record,
+                                    max_nodes=args.max_nodes, max_edges=args.max_edges,
+                                    max_columns=args.max_columns, checkpoint_path=args.checkpoint,
+                                    worker=worker, debounce=args.debounce, workers=args.workers)
+    
+    poller = StatPoller(event_handler, interval=args.poll_interval, max_interval=args.max_poll_interval)
     
     # Create observer
     observer = Observer()
@@ -269,46 +729,14 @@ def main():
         observer.start()
         logger.info("✅ Observer started successfully")
         
-        # Initialize tracking with current content for all files
-        for json_file in watch_directory.glob("*.json"):
-            if json_file not in event_handler.file_trackers:
-                event_handler._initialize_single_file_tracking(json_file)
-            tracker = event_handler.file_trackers[json_file]
-            tracker['last_line_count'] = event_handler._get_line_count(json_file)
-            last_record = event_handler._get_last_record(json_file)
-            if last_record:
-                tracker['last_content'] = last_record
-                logger.info(f"📊 Initial line count for {json_file.name}: {tracker['last_line_count']}")
-                logger.info(f"📄 Last record type in {json_file.name}: {last_record.get('eventType', 'Unknown')}")
+        logger.info(f"📊 Tracking {len(event_handler.file_trackers)} JSON file(s)")
         
         # Keep running with polling backup
         logger.info("🔄 Watchdog loop started - monitoring for changes...")
         
-        # Start polling thread as backup
-        def poll_files():
-            while True:
-                try:
-                    for json_file in watch_directory.glob("*.json"):
-                        if json_file not in event_handler.file_trackers:
-                            event_handler._initialize_single_file_tracking(json_file)
-                        
-                        tracker = event_handler.file_trackers[json_file]
-                        current_line_count = event_handler._get_line_count(json_file)
-                        
-                        if current_line_count > tracker['last_line_count']:
-                            logger.info(f"📊 Polling detected file change: {json_file.name}")
-                            logger.info(f"🆕 Polling: New records detected in {json_file.name}! Line count: {tracker['last_line_count']} → {current_line_count}")
-                            last_record = event_handler._get_last_record(json_file)
-                            if last_record:
-                                event_handler._call_json_generator(last_record, json_file)
-                                tracker['last_line_count'] = current_line_count
-                                tracker['last_content'] = last_record
-                except Exception as e:
-                    logger.error(f"❌ Polling error: {e}")
-                time.sleep(2)  # Poll every 2 seconds
-        
-        # Start polling in background
-        poll_thread = threading.Thread(target=poll_files, daemon=True)
+        # Read what was appended while the watchdog was stopped, then start the polling fallback
+        event_handler.enqueue_unread()
+        poll_thread = threading.Thread(target=poller.run, daemon=True)
         poll_thread.start()
         logger.info("✅ Polling backup started")
         
@@ -317,9 +745,12 @@ def main():
             
     except KeyboardInterrupt:
         logger.info("🛑 Stopping watchdog...")
+        poller.stop()
         observer.stop()
     
     observer.join()
+    event_handler.close()
+    worker.stop()
     logger.info("✅ Watchdog stopped")
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.agent_manager module.
+Run with: python -m tests.test_agent_manager
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import importlib.metadata
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.agent_manager import AgentManager, PLUGIN_GROUP
+
+PLUGIN_SOURCE = '''
+raise_on_import = {raise_on_import}
+if raise_on_import:
+    raise RuntimeError("plugin failed to import")
+
+
+class FakeAgent:
+    def __init__(self, agent_name, query):
+        self.agent_name = agent_name
+        self.query = query
+
+
+def create_fake_agent(agent_name, query):
+    return FakeAgent(agent_name, query)
+
+
+def get_plugin_info():
+    return {{
+        "name": "fake-agent",
+        "description": "Fake agent " + "for tests" if True else "",
+        "version": "1.0.0",
+        "supported_operations": ["lineage_analysis"],
+        "agent_class": FakeAgent,
+        "factory_function": create_fake_agent,
+    }}
+
+
+def get_computed_info():
+    info = dict(name="computed-agent", factory_function=create_fake_agent)
+    return info
+'''
+
+
+class TestAgentManager(unittest.TestCase):
+    """Test cases for lazy plugin discovery"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.module = f"fake_plugin_{id(self)}"
+        sys.path.insert(0, self.folder.name)
+
+    def tearDown(self):
+        sys.path.remove(self.folder.name)
+        sys.modules.pop(self.module, None)
+        self.folder.cleanup()
+
+    def manager(self, *attrs, raise_on_import=False):
+        """An AgentManager over entry points to functions of a fresh fake plugin module"""
+        with open(os.path.join(self.folder.name, f"{self.module}.py"), "w") as f:
+            f.write(PLUGIN_SOURCE.format(raise_on_import=raise_on_import))
+        entry_points = [importlib.metadata.EntryPoint(name=attr.replace("_", "-"), value=f"{self.module}:{attr}",
+                                                      group=PLUGIN_GROUP)
+                        for attr in attrs]
+        manager = AgentManager()
+        with patch("algorithm.agent_manager.importlib.metadata.entry_points", return_value=entry_points):
+            manager.plugins
+        return manager
+
+    def test_metadata_without_import(self):
+        """Test that names, descriptions and operations are listed without importing the plugin"""
+        manager = self.manager("get_plugin_info")
+        agents = manager.list_agents()
+        self.assertEqual(list(agents), ["fake-agent"])
+        self.assertEqual(agents["fake-agent"]["version"], "1.0.0")
+        self.assertNotIn("description", agents["fake-agent"])  # not a literal
+        self.assertEqual(manager.get_agents_for_operation("lineage_analysis"), ["fake-agent"])
+        self.assertNotIn(self.module, sys.modules)
+        self.assertFalse(manager.plugins["fake-agent"].loaded)
+
+    def test_create_agent_imports_plugin(self):
+        """Test that the plugin is imported on first create_agent and then lists its full info"""
+        manager = self.manager("get_plugin_info")
+        agent = manager.create_agent("fake-agent", query="SELECT 1")
+        self.assertEqual((agent.agent_name, agent.query), ("fake-agent", "SELECT 1"))
+        self.assertIn(self.module, sys.modules)
+        self.assertEqual(manager.get_agent("fake-agent")["description"], "Fake agent for tests")
+        with self.assertRaises(ValueError):
+            manager.create_agent("missing-agent", query="SELECT 1")
+
+    def test_computed_info_is_loaded_when_listed(self):
+        """Test that plugin info that is not a dict display is loaded to list it"""
+        manager = self.manager("get_computed_info")
+        self.assertNotIn(self.module, sys.modules)
+        self.assertEqual(list(manager.plugins), ["get-computed-info"])
+        self.assertEqual(manager.list_agents()["get-computed-info"]["name"], "computed-agent")
+        self.assertIn(self.module, sys.modules)
+
+    def test_broken_plugin(self):
+        """Test that a plugin failing to import is left out of listings and refused by create_agent"""
+        manager = self.manager("get_plugin_info", "get_computed_info", raise_on_import=True)
+        self.assertEqual(list(manager.list_agents()), ["fake-agent"])
+        with self.assertRaises(ValueError):
+            manager.create_agent("fake-agent", query="SELECT 1")
+
+    def test_installed_plugins(self):
+        """Test that the bundled plugins are described from their source"""
+        agents = AgentManager().list_agents()
+        for name in ("sql-lineage-agent", "python-lineage-agent", "airflow-lineage-agent"):
+            self.assertIn("description", agents[name])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
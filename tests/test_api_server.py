@@ -8,6 +8,9 @@ import pytest
 import sys
 import os
 import json
+import time
+import asyncio
+import httpx
 from unittest.mock import patch, MagicMock, AsyncMock
 from typing import Dict, Any
 
@@ -16,6 +19,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi.testclient import TestClient
 from backend.api_server import app, QueryRequest, BatchQueryRequest, QueryResponse, BatchQueryResponse, HealthResponse
+from algorithm.lineage.service import LineageService, get_lineage_service
+from tests.test_lineage_graph import pipeline_events
 
 
 class TestAPIServerModels:
@@ -430,5 +435,186 @@ class TestAPIServerEdgeCases:
         assert response.status_code in [200, 500]  # Either success or expected error
 
 
+
+class TestLineageEndpoints:
+    """Test the upstream/downstream lineage endpoints"""
+    
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Lineage service over a dump folder holding a two-job pipeline"""
+        with open(tmp_path / "sql-lineage-agent.json", "w", encoding="utf-8") as f:
+            for event in pipeline_events():
+                f.write(json.dumps(event) + "\n")
+        return LineageService(tmp_path)
+    
+    @pytest.fixture
+    def client(self, service):
+        """Create test client using the temporary lineage service"""
+        app.dependency_overrides[get_lineage_service] = lambda: service
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+    
+    def test_column_downstream(self, client):
+        """Test column-level impact analysis"""
+        response = client.get("/lineage/downstream", params={"dataset": "raw.orders", "column": "amount"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["node"]["field"] == "amount"
+        assert data["total"] == 2
+        assert [(r["name"], r["field"], r["depth"]) for r in data["results"]] == [
+            ("stage.orders", "amount", 1),
+            ("mart.summary", "total", 2),
+        ]
+    
+    def test_dataset_upstream_with_depth(self, client):
+        """Test dataset-level provenance limited by depth"""
+        response = client.get("/lineage/upstream", params={"dataset": "mart.summary", "depth": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert [(r["type"], r["name"]) for r in data["results"]] == [
+            ("job", "summarise"),
+            ("dataset", "stage.orders"),
+        ]
+    
+    def test_pagination(self, client):
+        """Test offset and limit"""
+        response = client.get("/lineage/downstream", params={"dataset": "raw.orders", "offset": 1, "limit": 2})
+        data = response.json()
+        assert data["total"] == 4
+        assert len(data["results"]) == 2
+        assert data["results"][0]["type"] == "dataset"
+    
+    def test_results_are_cached_until_new_events(self, client, service, tmp_path):
+        """Test that repeated queries hit the cache and new events invalidate it"""
+        params = {"dataset": "raw.orders", "column": "id"}
+        client.get("/lineage/downstream", params=params)
+        client.get("/lineage/downstream", params=params)
+        assert service.cache_hits == 1
+        
+        event = pipeline_events()[1]
+        event["job"]["name"] = "order_export"
+        event["outputs"][0]["name"] = "export.orders"
+        with open(tmp_path / "sql-lineage-agent.json", "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+        data = client.get("/lineage/downstream", params=params).json()
+        assert data["total"] == 3
+    
+    def test_unknown_dataset(self, client):
+        """Test that unknown datasets return 404"""
+        response = client.get("/lineage/upstream", params={"dataset": "missing"})
+        assert response.status_code == 404
+        response = client.get("/lineage/upstream", params={"dataset": "raw.orders", "column": "missing"})
+        assert response.status_code == 404
+    
+    def test_invalid_parameters(self, client):
+        """Test parameter validation"""
+        assert client.get("/lineage/downstream").status_code == 422
+        assert client.get("/lineage/downstream", params={"dataset": "raw.orders", "depth": 0}).status_code == 422
+        assert client.get("/lineage/downstream", params={"dataset": "raw.orders", "limit": 0}).status_code == 422
+
+    def test_subgraph(self, client):
+        """Test the capped neighbourhood used for visualisation"""
+        response = client.get("/lineage/subgraph", params={"dataset": "stage.orders", "hops": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["center"]["name"] == "stage.orders"
+        assert sorted(n["name"] for n in data["nodes"]) == ["stage.orders", "stage_orders", "summarise"]
+        assert len(data["edges"]) == 2
+        assert not data["truncated"]
+
+        data = client.get("/lineage/subgraph", params={"dataset": "stage.orders", "max_nodes": 2}).json()
+        assert len(data["nodes"]) == 2
+        assert data["truncated"]
+
+    def test_subgraph_invalid_parameters(self, client):
+        """Test subgraph parameter validation and unknown nodes"""
+        assert client.get("/lineage/subgraph", params={"dataset": "raw.orders", "direction": "sideways"}).status_code == 422
+        assert client.get("/lineage/subgraph", params={"dataset": "raw.orders", "hops": 0}).status_code == 422
+        assert client.get("/lineage/subgraph", params={"dataset": "missing"}).status_code == 404
+
+    def test_subgraph_builder_errors_are_bad_requests(self, client):
+        """Test that a ValueError from the subgraph builder returns 400, as for the other lineage endpoints"""
+        with patch("algorithm.lineage.service.extract_subgraph", side_effect=ValueError("Unknown direction: 'x'")):
+            response = client.get("/lineage/subgraph", params={"dataset": "raw.orders"})
+        assert response.status_code == 400
+        assert "Unknown direction" in response.json()["detail"]
+
+    def test_search(self, client):
+        """Test ranked name search and kind filters"""
+        response = client.get("/search", params={"q": "orders"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["query"] == "orders"
+        assert [r["node"]["name"] for r in data["results"][:3]] == ["raw.orders", "stage.orders", "stage_orders"]
+
+        data = client.get("/search", params={"q": "amont", "kind": "column"}).json()
+        assert {(r["node"]["field"], r["match"]) for r in data["results"]} == {("amount", "fuzzy")}
+        assert client.get("/search", params={"q": "orders", "kind": "table"}).status_code == 400
+        assert client.get("/search", params={"q": ""}).status_code == 422
+
+    def test_as_of(self, client):
+        """Test as-of lineage queries and their validation"""
+        response = client.get("/lineage/upstream", params={"dataset": "mart.summary", "as_of": "2025-08-02T12:00:00Z"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 4
+        assert data["as_of"].startswith("2025-08-02T12:00:00")
+        data = client.get("/lineage/upstream", params={"dataset": "mart.summary", "as_of": "2025-08-01"}).json()
+        assert data["total"] == 0
+        assert client.get("/lineage/upstream", params={"dataset": "mart.summary", "as_of": "soon"}).status_code == 422
+
+    def test_diff(self, client):
+        """Test diffs of posted events, and of new events against the store"""
+        new = pipeline_events()[1]
+        new["outputs"][0]["facets"]["columnLineage"]["fields"]["total"]["inputFields"][0]["field"] = "net_amount"
+        response = client.post("/lineage/diff", json={"new": new})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["changed"]
+        assert [(job["job"]["name"], job["status"]) for job in data["jobs"]] == [("summarise", "changed")]
+        assert data["summary"]["mappingsAdded"] == 1 and data["summary"]["mappingsRemoved"] == 1
+
+        data = client.post("/lineage/diff", json={"old": pipeline_events(), "new": pipeline_events()}).json()
+        assert not data["changed"]
+        assert client.post("/lineage/diff", json={"old": pipeline_events()}).status_code == 422
+
+    def test_export(self, client):
+        """Test the streamed export and its filters"""
+        response = client.get("/lineage/export", params={"format": "csv-nodes", "job": "summarise"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        names = {line.split(",")[3] for line in response.text.splitlines()[1:]}
+        assert names == {"summarise", "stage.orders", "mart.summary"}
+
+        response = client.get("/lineage/export", params={"format": "graphml"})
+        assert response.status_code == 200
+        assert response.text.count("<node ") == 11
+        assert client.get("/lineage/export", params={"format": "pdf"}).status_code == 422
+
+
+    def test_lineage_queries_do_not_block_the_event_loop(self, client, service):
+        """Test that other endpoints answer while a lineage query is busy in the service"""
+        refresh = service.refresh
+
+        def slow_refresh():
+            time.sleep(0.5)
+            refresh()
+
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                start = time.monotonic()
+                lineage = asyncio.create_task(async_client.get("/lineage/downstream", params={"dataset": "raw.orders"}))
+                await asyncio.sleep(0.1)
+                health = await async_client.get("/health")
+                elapsed = time.monotonic() - start
+                return (await lineage).status_code, health.status_code, elapsed
+
+        with patch.object(service, "refresh", slow_refresh):
+            lineage_status, health_status, elapsed = asyncio.run(main())
+        assert (lineage_status, health_status) == (200, 200)
+        assert elapsed < 0.3
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
@@ -9,12 +9,14 @@ import sys
 import os
 import tempfile
 import shutil
+import sqlite3
 from unittest.mock import patch, MagicMock
 
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from algorithm.utils.database import write_lineage_log, read_lineage_log, Color, color_mapper
+from algorithm.utils.database import (write_lineage_log, read_lineage_log, read_lineage_log_after, log_run_id,
+                                      Color, color_mapper)
 
 
 class TestDatabase(unittest.TestCase):
@@ -69,6 +71,62 @@ class TestDatabase(unittest.TestCase):
             # We're just testing that the function structure is correct
             pass
 
+    
+    def test_read_lineage_log_after(self):
+        """Test that read_lineage_log_after returns the latest entries, then only newer ones"""
+        name = f"test_after_{os.getpid()}_{id(self)}"
+        with patch('builtins.print'):
+            for i in range(5):
+                write_lineage_log(name, "trace", f"Message {i}")
+        
+        latest = read_lineage_log_after(name, limit=2)
+        self.assertEqual([message for _, _, _, message in latest], ["Message 3", "Message 4"])
+        self.assertEqual(read_lineage_log_after(name, latest[-1][0]), [])
+        
+        with patch('builtins.print'):
+            write_lineage_log(name, "stage", "Message 5")
+        newer = read_lineage_log_after(name, latest[-1][0])
+        self.assertEqual([(log_type, message) for _, _, log_type, message in newer], [("stage", "Message 5")])
+        self.assertGreater(newer[0][0], latest[-1][0])
+    
+    def test_read_lineage_log_after_by_run(self):
+        """Test that entries can be read for one run of an agent only"""
+        name = f"test_run_{os.getpid()}_{id(self)}"
+        with patch('builtins.print'):
+            write_lineage_log(name, "trace", "Outside any run")
+            for run in ("first", "second"):
+                token = log_run_id.set(f"{name}_{run}")
+                try:
+                    write_lineage_log(name, "trace", f"Message of the {run} run")
+                finally:
+                    log_run_id.reset(token)
+        
+        rows = read_lineage_log_after(name, 0, run_id=f"{name}_first")
+        self.assertEqual([message for _, _, _, message in rows], ["Message of the first run"])
+        self.assertEqual(len(read_lineage_log_after(name, 0)), 3)
+    
+    def test_database_without_run_ids_is_upgraded(self):
+        """Test that a log database created before runs were recorded gains the run_id column"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "agents_logs.db")
+            with sqlite3.connect(path) as conn:
+                conn.execute("CREATE TABLE lineage_log (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, "
+                             "datetime DATETIME, type TEXT, message TEXT)")
+                conn.execute("INSERT INTO lineage_log (name, datetime, type, message) "
+                             "VALUES ('old_agent', datetime('now'), 'trace', 'Old message')")
+            conn.close()
+            with patch('algorithm.utils.database.DB', path), patch('algorithm.utils.database._initialized_db', None), \
+                    patch('builtins.print'):
+                token = log_run_id.set("run")
+                try:
+                    write_lineage_log("old_agent", "trace", "New message")
+                finally:
+                    log_run_id.reset(token)
+                self.assertEqual([message for _, _, _, message in read_lineage_log_after("old_agent", 0)],
+                                 ["Old message", "New message"])
+                self.assertEqual([message for _, _, _, message in read_lineage_log_after("old_agent", 0, run_id="run")],
+                                 ["New message"])
+
 
 class TestDatabaseIntegration(unittest.TestCase):
     """Integration tests for database module"""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.utils.json_extract module.
+Run with: python -m tests.test_json_extract
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.utils.json_extract import extract_json, scan_json_candidates, JSONExtractionError
+from algorithm.utils.file_utils import dump_json_record, add_dump_listener, remove_dump_listener
+
+
+EVENT = {
+    "eventType": "START",
+    "inputs": [{"namespace": "warehouse", "name": "raw.orders"}],
+    "outputs": [{"namespace": "warehouse", "name": "mart.summary", "facets": {"note": "braces {} and [] in strings"}}],
+}
+
+
+class TestExtractJson(unittest.TestCase):
+    """Test cases for extract_json"""
+
+    def test_bare_json(self):
+        """Test that plain JSON is returned unchanged"""
+        self.assertEqual(extract_json(json.dumps(EVENT)), EVENT)
+
+    def test_markdown_fence(self):
+        """Test that markdown code fences are ignored"""
+        text = f"```json\n{json.dumps(EVENT, indent=2)}\n```"
+        self.assertEqual(extract_json(text), EVENT)
+
+    def test_leading_and_trailing_prose(self):
+        """Test that prose around the JSON is ignored"""
+        text = f"Here is the event:\n{json.dumps(EVENT)}\nLet me know {{if}} you need more."
+        self.assertEqual(extract_json(text), EVENT)
+
+    def test_stray_opening_brace_in_prose(self):
+        """Test that an unclosed brace before the JSON does not hide it"""
+        text = f"Use {{braces like this. {json.dumps(EVENT)}"
+        self.assertEqual(extract_json(text), EVENT)
+
+    def test_longest_span_wins(self):
+        """Test that the largest top-level span is preferred"""
+        text = f"Options [1, 2] then {json.dumps(EVENT)}"
+        self.assertEqual(extract_json(text), EVENT)
+
+    def test_trailing_commas(self):
+        """Test that trailing commas before closing brackets are dropped"""
+        text = '{"inputs": [{"name": "a",}, {"name": "b"},],}'
+        self.assertEqual(extract_json(text), {"inputs": [{"name": "a"}, {"name": "b"}]})
+
+    def test_comma_inside_string_is_kept(self):
+        """Test that commas inside strings are never dropped"""
+        self.assertEqual(extract_json('{"q": "a,]"}'), {"q": "a,]"})
+
+    def test_truncated_tail_is_repaired(self):
+        """Test that a truncated object is closed at its last complete value"""
+        text = '{"inputs": [{"name": "a"}, {"name": "b"}], "outputs": [{"name": "c", "facets": {"x": "tru'
+        self.assertEqual(
+            extract_json(text),
+            {"inputs": [{"name": "a"}, {"name": "b"}], "outputs": [{"name": "c", "facets": {}}]},
+        )
+
+    def test_truncated_after_key(self):
+        """Test that a dangling key is dropped during repair"""
+        self.assertEqual(extract_json('{"a": "b", "c'), {"a": "b"})
+
+    def test_repair_can_be_disabled(self):
+        """Test that truncated input raises when repair is disabled"""
+        with self.assertRaises(JSONExtractionError):
+            extract_json('{"a": "b", "c', repair=False)
+
+    def test_no_json(self):
+        """Test that text without JSON raises JSONExtractionError"""
+        with self.assertRaises(JSONExtractionError):
+            extract_json("The model refused to answer.")
+        self.assertTrue(issubclass(JSONExtractionError, ValueError))
+
+    def test_escaped_quotes(self):
+        """Test that escaped quotes do not end strings"""
+        self.assertEqual(extract_json('x {"a": "say \\"}\\" ok"} y'), {"a": 'say "}" ok'})
+
+    def test_scan_returns_spans_in_order(self):
+        """Test that scan_json_candidates finds each top-level span"""
+        text = 'a {"x": 1} b [2] c {"y": '
+        spans = scan_json_candidates(text)
+        self.assertEqual(len(spans), 3)
+        self.assertEqual(spans[0].text(text), '{"x": 1}')
+        self.assertEqual(spans[1].text(text), '[2]')
+        self.assertEqual(spans[2].end, -1)
+
+
+class TestDumpJsonRecordExtraction(unittest.TestCase):
+    """Test that dump_json_record stores events recovered from prose"""
+
+    def test_prose_output_is_stored_as_event(self):
+        """Test that a prose-wrapped event is dumped as a JSON object"""
+        with tempfile.TemporaryDirectory() as folder:
+            text = f"Sure! Here it is:\n```json\n{json.dumps(EVENT, indent=2)}\n```\nDone."
+            result = dump_json_record("events", text, lineage_extraction_dumps_folder=folder)
+            self.assertEqual(result, EVENT)
+            with open(os.path.join(folder, "events.json"), encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline()), EVENT)
+
+    def test_listener_receives_line_offsets(self):
+        """Test that dump listeners get the record and its byte range"""
+        calls = []
+        listener = lambda path, record, start, end: calls.append((record, start, end))
+        add_dump_listener(listener)
+        try:
+            with tempfile.TemporaryDirectory() as folder:
+                dump_json_record("events", EVENT, lineage_extraction_dumps_folder=folder)
+                dump_json_record("events", "second", lineage_extraction_dumps_folder=folder)
+                with open(os.path.join(folder, "events.json"), "rb") as f:
+                    data = f.read()
+        finally:
+            remove_dump_listener(listener)
+        self.assertEqual(calls[0][0], EVENT)
+        self.assertEqual(json.loads(data[calls[1][1]:calls[1][2]]), "second")
+        self.assertEqual(calls[1][2], len(data))
+
+    def test_plain_text_is_stored_as_string(self):
+        """Test that output without JSON is still dumped as a string"""
+        with tempfile.TemporaryDirectory() as folder:
+            result = dump_json_record("events", "no json here", lineage_extraction_dumps_folder=folder)
+            self.assertEqual(result, "no json here")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
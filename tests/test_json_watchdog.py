@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests for the lineage_visualizer/jsoncrack/json-watchdog.py script.
+Run with: python -m tests.test_json_watchdog
+"""
+
+import unittest
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import importlib.util
+from pathlib import Path
+
+# Add the project root to the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRIPT = os.path.join(ROOT, "lineage_visualizer", "jsoncrack", "json-watchdog.py")
+GENERATOR = os.path.join(ROOT, "lineage_visualizer", "jsoncrack", "json-generator.js")
+
+
+def load_watchdog():
+    """Import the script as a module; its log file is created in a temporary folder"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            spec = importlib.util.spec_from_file_location("json_watchdog", SCRIPT)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            os.chdir(cwd)
+    module.logger.disabled = True
+    return module
+
+
+watchdog = load_watchdog()
+
+
+class FakeWorker:
+    """Collects the records a handler sends"""
+
+    def __init__(self):
+        self.records = []
+
+    def send(self, data):
+        self.records.append(data)
+        return True
+
+
+def append(path, *records):
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+class TestFileTailing(unittest.TestCase):
+    """Test cases for reading dump files from saved byte offsets"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.directory = Path(self.folder.name)
+        self.dump = self.directory / "sql-lineage-agent.json"
+        append(self.dump, {"n": 0}, {"n": 1})
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def handler(self, worker, **options):
+        handler = watchdog.JSONFileHandler(self.directory, GENERATOR, full_record=True, worker=worker,
+                                           workers=1, **options)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_resume_from_checkpoint(self):
+        """Test that a restarted handler reads only what was appended since the saved offset"""
+        worker = FakeWorker()
+        handler = self.handler(worker)
+        append(self.dump, {"n": 2})
+        handler._handle_file_change(self.dump)
+        self.assertEqual(worker.records, [{"n": 2}])
+        handler.close()
+        checkpoint = json.loads((self.directory / watchdog.DEFAULT_CHECKPOINT_NAME).read_text())
+        self.assertEqual(checkpoint[self.dump.name]["offset"], self.dump.stat().st_size)
+
+        # Appended while the watchdog was stopped, with a partial last line
+        append(self.dump, {"n": 3})
+        with open(self.dump, "a", encoding="utf-8") as f:
+            f.write('{"n": ')
+        restarted_worker = FakeWorker()
+        restarted = self.handler(restarted_worker)
+        restarted.enqueue_unread()
+        restarted.close()
+        self.assertEqual(restarted_worker.records, [{"n": 3}])
+
+        with open(self.dump, "a", encoding="utf-8") as f:
+            f.write('4}\n')
+        restarted._handle_file_change(self.dump)
+        self.assertEqual(restarted_worker.records, [{"n": 3}, {"n": 4}])
+
+    def test_changed_checkpointed_file_is_not_resumed(self):
+        """Test that a file rewritten while the watchdog was stopped starts from its end, not the stale offset"""
+        handler = self.handler(FakeWorker())
+        append(self.dump, {"n": 2})
+        handler._handle_file_change(self.dump)
+        handler.close()
+        self.dump.write_text(json.dumps({"m": 0}) + "\n" + json.dumps({"m": 1}) + "\n" + json.dumps({"m": 2}) + "\n")
+
+        worker = FakeWorker()
+        restarted = self.handler(worker)
+        self.assertEqual(restarted.file_trackers[self.dump]["offset"], self.dump.stat().st_size)
+        restarted.enqueue_unread()
+        restarted.close()
+        self.assertEqual(worker.records, [])
+
+    def test_truncated_file_is_read_from_start(self):
+        """Test that a file cut below the read offset is read again from byte 0"""
+        worker = FakeWorker()
+        handler = self.handler(worker)
+        with open(self.dump, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"t": 0}) + "\n")
+        handler._handle_file_change(self.dump)
+        self.assertEqual(worker.records, [{"t": 0}])
+        self.assertEqual(handler.file_trackers[self.dump]["offset"], self.dump.stat().st_size)
+
+    def test_rotated_file_is_read_from_start(self):
+        """Test that a file replaced by another (new inode) is read from byte 0"""
+        worker = FakeWorker()
+        handler = self.handler(worker)
+        rotated = self.directory / "next.tmp"
+        append(rotated, {"r": 0}, {"r": 1}, {"r": 2}, {"r": 3})
+        os.replace(rotated, self.dump)
+        handler._handle_file_change(self.dump)
+        self.assertEqual(worker.records, [{"r": 0}, {"r": 1}, {"r": 2}, {"r": 3}])
+
+    def test_rewritten_file_is_read_from_start(self):
+        """Test that a file rewritten in place with more bytes than the offset is recognised by its checksum"""
+        worker = FakeWorker()
+        handler = self.handler(worker)
+        with open(self.dump, "w", encoding="utf-8") as f:
+            for i in range(4):
+                f.write(json.dumps({"w": i}) + "\n")
+        handler._handle_file_change(self.dump)
+        self.assertEqual(worker.records, [{"w": i} for i in range(4)])
+
+
+class TestScheduling(unittest.TestCase):
+    """Test cases for per-file debouncing and the bounded work queue"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.directory = Path(self.folder.name)
+        self.dump = self.directory / "sql-lineage-agent.json"
+        self.dump.touch()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_debounce_merges_bursts_into_one_read(self):
+        """Test that changes within a file's debounce window lead to one read of all appended records"""
+        worker = FakeWorker()
+        handler = watchdog.JSONFileHandler(self.directory, GENERATOR, full_record=True, worker=worker,
+                                           debounce=0.2, workers=2)
+        reads = []
+        read_new_records = handler._read_new_records
+
+        def counting_read(json_file, tracker):
+            records = read_new_records(json_file, tracker)
+            reads.append(len(records))
+            return records
+
+        handler._read_new_records = counting_read
+        for i in range(5):
+            append(self.dump, {"n": i})
+            handler.schedule(self.dump)
+        time.sleep(0.5)
+        handler.close()
+        self.assertEqual(reads, [5])
+        self.assertEqual(worker.records, [{"n": i} for i in range(5)])
+
+    def test_full_queue_leaves_files_to_the_poller(self):
+        """Test that enqueue never blocks, queues a file once, and that the poller retries what did not fit"""
+        handler = watchdog.JSONFileHandler(self.directory, GENERATOR, full_record=True, worker=FakeWorker(),
+                                           workers=0, queue_size=1)
+        other = self.directory / "python-lineage-agent.json"
+        poller = watchdog.StatPoller(handler)
+        append(self.dump, {"n": 0})
+        append(other, {"n": 0})
+        self.assertTrue(handler.enqueue(self.dump))
+        self.assertTrue(handler.enqueue(self.dump))
+        self.assertFalse(handler.enqueue(other))
+        # Both changed; the queued file is recorded, the other is retried until the queue has room
+        self.assertEqual(poller.scan(), 2)
+        self.assertEqual(poller.scan(), 1)
+        handler._queue.get_nowait()
+        handler._queued.clear()
+        self.assertEqual(poller.scan(), 1)
+        self.assertEqual(poller.scan(), 0)
+
+
+class TestGeneratorWorker(unittest.TestCase):
+    """Test cases for GeneratorWorker"""
+
+    def test_generator_defaults_are_kept(self):
+        """Test that the generator copies and opens records unless told otherwise"""
+        self.assertEqual(watchdog.GeneratorWorker(GENERATOR).options, [])
+
+    @unittest.skipUnless(shutil.which("node"), "node is not installed")
+    def test_serve_protocol(self):
+        """Test that records stream to one generator process, started with the given options"""
+        worker = watchdog.GeneratorWorker(GENERATOR, options=("--no-copy", "--no-open"), max_pending=1,
+                                          send_timeout=30)
+        try:
+            for i in range(3):
+                self.assertTrue(worker.send({"record": i}))
+            process = worker._process
+            self.assertEqual(process.args[-2:], ["--no-copy", "--no-open"])
+            # With one pending record allowed, each send waited for the previous reply
+            self.assertTrue(worker._slots.acquire(timeout=30))
+            worker._slots.release()
+        finally:
+            worker.stop()
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(worker.restarts, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
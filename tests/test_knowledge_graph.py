@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.knowledge_graph module.
+Run with: python -m tests.test_knowledge_graph
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.knowledge_graph import build_knowledge_graph
+from algorithm.lineage.events import LineageEvent
+from tests.test_lineage_events import make_event
+
+
+def transformation(type_, subtype, description):
+    return {"type": type_, "subtype": subtype, "description": description, "masking": False}
+
+
+def sales_summary_event():
+    """The graph builder template's sales_summary example as an OpenLineage event"""
+    event = make_event(job="sales_summary", inputs=("orders",), output="sales_summary", columns={
+        "region": [("orders", "region")],
+        "total_sales": [("orders", "amount")],
+    })
+    fields = event["outputs"][0]["facets"]["columnLineage"]["fields"]
+    fields["region"]["inputFields"][0]["transformations"] = [transformation("INDIRECT", "GROUP_BY", "region")]
+    fields["total_sales"]["inputFields"][0]["transformations"] = [transformation("aggregation", "SUM", "SUM(amount)")]
+    fields["total_sales"]["inputFields"].append({
+        "namespace": "warehouse", "name": "orders", "field": "order_date",
+        "transformations": [transformation("INDIRECT", "FILTER", "order_date >= '2023-01-01'")],
+    })
+    return event
+
+
+class TestKnowledgeGraph(unittest.TestCase):
+    """Test cases for build_knowledge_graph"""
+
+    def setUp(self):
+        self.graph = build_knowledge_graph(sales_summary_event())
+        self.nodes = {node["id"]: node for node in self.graph["nodes"]}
+        self.edges = {(e["source"], e["target"], e["type"]) for e in self.graph["edges"]}
+
+    def test_documented_node_types(self):
+        """Test that nodes use the template's node types and id prefixes"""
+        self.assertEqual(self.nodes["subq_sales_summary"]["type"], "subquery")
+        self.assertEqual(self.nodes["tbl_orders"]["type"], "table")
+        self.assertEqual(self.nodes["fld_orders.amount"], {"id": "fld_orders.amount", "type": "field", "label": "amount"})
+        self.assertEqual({n["type"] for n in self.graph["nodes"]}, {"subquery", "table", "field", "operation"})
+
+    def test_lineage_edges(self):
+        """Test table usage, produced fields and derivations"""
+        self.assertIn(("subq_sales_summary", "tbl_orders", "uses_table"), self.edges)
+        self.assertIn(("subq_sales_summary", "fld_sales_summary.total_sales", "produces_field"), self.edges)
+        self.assertIn(("fld_sales_summary.total_sales", "fld_orders.amount", "derived_from"), self.edges)
+
+    def test_operators(self):
+        """Test that group by and filter become operation nodes"""
+        self.assertIn(("op_groupby_sales_summary", "fld_orders.region", "grouped_by"), self.edges)
+        self.assertIn(("op_filter_sales_summary", "fld_orders.order_date", "filters_by"), self.edges)
+        self.assertEqual(self.nodes["op_filter_sales_summary"]["label"], "filter: order_date >= '2023-01-01'")
+        # Indirect inputs are not derivations
+        self.assertNotIn(("fld_sales_summary.total_sales", "fld_orders.order_date", "derived_from"), self.edges)
+
+    def test_transformations(self):
+        """Test that direct transformations are linked to the output field"""
+        transformations = [e for e in self.graph["edges"] if e["type"] == "transformation"]
+        self.assertEqual(len(transformations), 1)
+        self.assertEqual(transformations[0]["source"], "fld_sales_summary.total_sales")
+        self.assertEqual(self.nodes[transformations[0]["target"]]["label"], "SUM(amount)")
+
+    def test_joins(self):
+        """Test that joined tables are linked"""
+        event = make_event(job="enrich", inputs=("orders", "customers"), output="enriched", columns={
+            "name": [("customers", "name")],
+        })
+        field = event["outputs"][0]["facets"]["columnLineage"]["fields"]["name"]
+        field["inputFields"] = [
+            {"namespace": "warehouse", "name": "orders", "field": "customer_id",
+             "transformations": [transformation("INDIRECT", "JOIN", "orders.customer_id = customers.id")]},
+            {"namespace": "warehouse", "name": "customers", "field": "id",
+             "transformations": [transformation("INDIRECT", "JOIN", "orders.customer_id = customers.id")]},
+        ]
+        edges = {(e["source"], e["target"], e["type"]) for e in build_knowledge_graph(event)["edges"]}
+        self.assertIn(("tbl_orders", "tbl_customers", "joins_with"), edges)
+        self.assertIn(("op_join_enrich", "fld_customers.id", "applies_operator"), edges)
+
+    def test_edges_reference_existing_nodes(self):
+        """Test that every edge endpoint is a node"""
+        for edge in self.graph["edges"]:
+            self.assertIn(edge["source"], self.nodes)
+            self.assertIn(edge["target"], self.nodes)
+
+    def test_deterministic(self):
+        """Test that the same events give the same graph, whatever their form"""
+        event = sales_summary_event()
+        self.assertEqual(build_knowledge_graph([event]), self.graph)
+        self.assertEqual(build_knowledge_graph(LineageEvent.from_dict(event)), self.graph)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
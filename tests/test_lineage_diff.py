@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.diff module.
+Run with: python -m tests.test_lineage_diff
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.diff import (diff_events, diff_lineage, format_diff, lineage_from_events, lineage_from_graph,
+                                    load_lineage, main)
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.snapshot import save_snapshot
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+def summarise_v2():
+    """summarise reading raw.customers too, with total no longer from amount and a new column"""
+    event = make_event(
+        job="summarise", inputs=("stage.orders", "raw.customers"), output="mart.summary",
+        columns={"total": [("stage.orders", "net_amount")], "order_count": [("stage.orders", "id")],
+                 "customers": [("raw.customers", "id")]},
+    )
+    event["eventTime"] = "2025-08-03T11:00:00Z"
+    event["job"]["facets"]["sql"]["query"] = "SELECT 2"
+    return event
+
+
+def column(dataset, field):
+    return {"namespace": "warehouse", "name": dataset, "field": field}
+
+
+class TestLineageDiff(unittest.TestCase):
+    """Test cases for the lineage diff"""
+
+    def test_changed_job(self):
+        """Test that inputs, columns, mappings and SQL changes of a job are reported"""
+        diff = diff_events(pipeline_events(), [pipeline_events()[0], summarise_v2()])
+        self.assertTrue(diff["changed"])
+        self.assertEqual(diff["summary"], {"jobsAdded": 0, "jobsRemoved": 0, "jobsChanged": 1,
+                                           "mappingsAdded": 2, "mappingsRemoved": 1, "transformationsChanged": 0})
+        self.assertEqual(diff["datasets"], {"added": [{"namespace": "warehouse", "name": "raw.customers"}],
+                                            "removed": []})
+        job = diff["jobs"][0]
+        self.assertEqual((job["job"]["name"], job["status"]), ("summarise", "changed"))
+        self.assertEqual(job["inputs"]["added"], [{"namespace": "warehouse", "name": "raw.customers"}])
+        self.assertEqual(job["columns"], {"added": [column("mart.summary", "customers")], "removed": []})
+        self.assertEqual(job["mappings"]["removed"],
+                         [{"input": column("stage.orders", "amount"), "output": column("mart.summary", "total")}])
+        self.assertTrue(job["sqlChanged"])
+
+    def test_transformations_and_unchanged_jobs(self):
+        """Test that changed transformations are reported and identical jobs are not"""
+        old = pipeline_events()
+        new = pipeline_events()
+        new[1]["outputs"][0]["facets"]["columnLineage"]["fields"]["total"]["inputFields"][0]["transformations"] = [
+            {"type": "aggregation", "subtype": "sum", "masking": False}
+        ]
+        diff = diff_events(old, new)
+        self.assertEqual(diff["summary"]["transformationsChanged"], 1)
+        self.assertEqual(diff["jobs"][0]["transformations"][0]["new"][0]["subtype"], "sum")
+        self.assertIn("~ transformation warehouse/stage.orders.amount -> warehouse/mart.summary.total: "
+                      "projection/direct => aggregation/sum", format_diff(diff))
+        unchanged = diff_events(pipeline_events(), pipeline_events())
+        self.assertFalse(unchanged["changed"])
+        self.assertEqual(format_diff(unchanged), "No lineage changes")
+
+    def test_added_removed_jobs_and_filter(self):
+        """Test jobs that exist on one side only, and job name patterns"""
+        diff = diff_events(pipeline_events()[:1], pipeline_events()[1:])
+        self.assertEqual([(job["job"]["name"], job["status"]) for job in diff["jobs"]],
+                         [("stage_orders", "removed"), ("summarise", "added")])
+        self.assertEqual(diff["datasets"]["removed"], [{"namespace": "warehouse", "name": "raw.orders"}])
+        filtered = diff_events(pipeline_events()[:1], pipeline_events()[1:], jobs=["summ*"])
+        self.assertEqual([job["job"]["name"] for job in filtered["jobs"]], ["summarise"])
+
+    def test_older_events_are_ignored(self):
+        """Test that the latest event of a job wins, whatever the order"""
+        old = summarise_v2()
+        old["eventTime"] = "2025-08-01T11:00:00Z"
+        self.assertFalse(diff_events(pipeline_events(), pipeline_events() + [old])["changed"])
+
+    def test_graph_side(self):
+        """Test comparing a graph with events, where transformations are unknown"""
+        graph = LineageGraph.from_events(pipeline_events())
+        before = lineage_from_graph(graph)
+        self.assertFalse(diff_lineage(before, lineage_from_graph(LineageGraph.from_events(pipeline_events())))["changed"])
+        diff = diff_lineage(before, lineage_from_events([pipeline_events()[0], summarise_v2()]))
+        self.assertEqual(diff["summary"]["jobsChanged"], 1)
+        self.assertEqual(diff["summary"]["mappingsRemoved"], 1)
+
+    def test_unchanged_event_against_its_graph(self):
+        """Test that an event reads the same as the graph built from it"""
+        event = make_event(
+            job="enrich", inputs=("raw.orders",), output="mart.enriched",
+            columns={"region": [("raw.customers", "region"), ("raw.customers", "code")], "loaded_at": []},
+        )
+        # An input field without a field name adds no edge to the graph
+        del event["outputs"][0]["facets"]["columnLineage"]["fields"]["region"]["inputFields"][1]["field"]
+        with patch("builtins.print"):
+            graph = LineageGraph.from_events([event])
+        diff = diff_lineage(lineage_from_graph(graph), lineage_from_events([event]))
+        self.assertFalse(diff["changed"], format_diff(diff))
+        self.assertEqual(diff["datasets"], {"added": [], "removed": []})
+
+
+class TestDiffFiles(unittest.TestCase):
+    """Test cases for load_lineage and the command line"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def run_main(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(list(argv))
+        return code, out.getvalue()
+
+    def test_load_formats(self):
+        """Test that single events, arrays and snapshots load the same lineage"""
+        single = load_lineage(self.write("one.json", pipeline_events()[0]))
+        self.assertEqual(list(single), [("warehouse", "stage_orders")])
+        array = load_lineage(self.write("all.json", pipeline_events()))
+        snapshot = os.path.join(self.folder.name, "graph.snapshot")
+        save_snapshot(LineageGraph.from_events(pipeline_events()), snapshot)
+        self.assertFalse(diff_lineage(load_lineage(snapshot), array)["changed"])
+
+    def test_cli(self):
+        """Test the text and JSON output and --exit-code"""
+        old = self.write("old.json", pipeline_events())
+        new = self.write("new.json", [pipeline_events()[0], summarise_v2()])
+        code, text = self.run_main(old, new, "--exit-code")
+        self.assertEqual(code, 1)
+        self.assertIn("~ job warehouse/summarise", text)
+        self.assertIn("+ dataset warehouse/raw.customers", text)
+        code, text = self.run_main(old, old, "--exit-code", "--json")
+        self.assertEqual(code, 0)
+        self.assertFalse(json.loads(text)["changed"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.events module.
+Run with: python -m tests.test_lineage_events
+"""
+
+import unittest
+import sys
+import os
+import json
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.events import LineageEvent, Transformation, iter_events
+
+
+def make_event(job="daily_summary", inputs=("raw.orders",), output="mart.summary", columns=None):
+    """Build a small OpenLineage event in the composer's format"""
+    columns = columns or {"customer_id": [("raw.orders", "customer_id")], "total": [("raw.orders", "amount")]}
+    return {
+        "eventType": "START",
+        "eventTime": "2025-08-02T11:00:00Z",
+        "run": {"runId": "r1", "facets": {}},
+        "job": {
+            "namespace": "warehouse",
+            "name": job,
+            "facets": {"sql": {"_producer": "p", "_schemaURL": "s", "query": "SELECT 1"}},
+        },
+        "inputs": [
+            {
+                "namespace": "warehouse",
+                "name": name,
+                "facets": {"schema": {"_producer": "p", "fields": [{"name": "amount", "type": "decimal"}]}},
+            }
+            for name in inputs
+        ],
+        "outputs": [
+            {
+                "namespace": "warehouse",
+                "name": output,
+                "facets": {
+                    "columnLineage": {
+                        "_producer": "p",
+                        "fields": {
+                            column: {
+                                "inputFields": [
+                                    {
+                                        "namespace": "warehouse",
+                                        "name": source,
+                                        "field": field,
+                                        "transformations": [{"type": "projection", "subtype": "direct", "masking": False}],
+                                    }
+                                    for source, field in sources
+                                ]
+                            }
+                            for column, sources in columns.items()
+                        },
+                    }
+                },
+            }
+        ],
+    }
+
+
+class TestLineageEvent(unittest.TestCase):
+    """Test cases for LineageEvent"""
+
+    def test_round_trip(self):
+        """Test that to_dict reproduces the original event"""
+        data = make_event()
+        self.assertEqual(LineageEvent.from_dict(data).to_dict(), data)
+
+    def test_round_trip_keeps_optional_keys_as_given(self):
+        """Test that keys are emitted only if the event had them, and input facets are kept"""
+        data = make_event()
+        total = data["outputs"][0]["facets"]["columnLineage"]["fields"]["total"]
+        del total["inputFields"][0]["transformations"]
+        customer = data["outputs"][0]["facets"]["columnLineage"]["fields"]["customer_id"]
+        customer["inputFields"][0]["transformations"] = [
+            {"type": "indirect", "subtype": "join"},
+            {"type": "projection", "masking": True, "source": "parser"},
+        ]
+        customer["inputFields"][0]["origin"] = "alias"
+        data["outputs"][0]["facets"]["columnLineage"]["fields"]["loaded_at"] = {"transformationType": "constant"}
+        data["inputs"][0]["facets"]["columnLineage"] = {
+            "_producer": "p",
+            "fields": {"amount": {"inputFields": [{"namespace": "erp", "name": "orders", "field": "amt"}]}},
+        }
+        event = LineageEvent.from_dict(data)
+        self.assertEqual(event.to_dict(), data)
+        self.assertEqual(LineageEvent.from_json(event.to_json()).to_dict(), data)
+        self.assertIsNone(event.input_transformations[1])
+        self.assertEqual(event.column_name, ("customer_id", "total", "loaded_at"))
+        self.assertEqual(list(event.column_offsets), [0, 1, 2, 2])
+        self.assertEqual(event.input_transformations[0][0], Transformation("indirect", "join", masking=False))
+
+    def test_round_trip_keeps_schema_field_keys_and_null_facets(self):
+        """Test that schema field extras, a null columnLineage and a schema without fields survive"""
+        data = make_event()
+        data["inputs"][0]["facets"]["schema"]["fields"] = [
+            {"name": "amount", "type": "decimal", "tags": ["pii"]},
+            {"name": "address", "type": "struct", "fields": [{"name": "city", "type": "string"}]},
+            {"name": "note", "type": None},
+            {"type": "string"},
+        ]
+        data["inputs"].append({"namespace": "warehouse", "name": "raw.refunds",
+                               "facets": {"schema": {"_producer": "p"}}, "inputFacets": {}})
+        data["outputs"].append({"namespace": "warehouse", "name": "mart.empty", "facets": {"columnLineage": None}})
+        data["outputs"].append({"name": "mart.nameless_namespace"})
+        event = LineageEvent.from_dict(data)
+        self.assertEqual(event.to_dict(), data)
+        self.assertEqual(json.loads(event.to_json()), data)
+        self.assertEqual([f[0] for f in event.inputs[0].fields], ["amount", "address", "note", None])
+
+    def test_round_trip_adds_no_top_level_keys(self):
+        """Test that run, job, inputs and outputs are emitted only if the event had them"""
+        data = make_event()
+        for key in ("run", "job", "inputs"):
+            del data[key]
+        self.assertEqual(LineageEvent.from_dict(data).to_dict(), data)
+        data = {"eventType": None, "inputs": [{"namespace": "warehouse", "name": "raw.orders"}], "outputs": None}
+        self.assertEqual(LineageEvent.from_dict(data).to_dict(), data)
+
+    def test_json_round_trip(self):
+        """Test that from_json and to_json are inverse"""
+        data = make_event()
+        event = LineageEvent.from_json(json.dumps(data))
+        self.assertEqual(json.loads(event.to_json()), data)
+        self.assertEqual(LineageEvent.from_json(event.to_json()).to_dict(), data)
+
+    def test_flat_column_arrays(self):
+        """Test that column lineage is stored as flat parallel arrays"""
+        event = LineageEvent.from_dict(make_event())
+        self.assertEqual(event.column_name, ("customer_id", "total"))
+        self.assertEqual(list(event.column_output), [0, 0])
+        self.assertEqual(list(event.column_offsets), [0, 1, 2])
+        self.assertEqual(event.input_field, ("customer_id", "amount"))
+        self.assertEqual([event.refs[i] for i in event.input_ref], [("warehouse", "raw.orders")] * 2)
+        self.assertEqual(event.input_transformations[0], (Transformation("projection", "direct"),))
+
+    def test_strings_are_interned(self):
+        """Test that names from different events share one string object"""
+        first = LineageEvent.from_json(json.dumps(make_event()))
+        second = LineageEvent.from_json(json.dumps(make_event()))
+        self.assertIs(first.inputs[0].name, second.inputs[0].name)
+        self.assertIs(first.column_name[0], second.column_name[0])
+
+    def test_iter_column_edges(self):
+        """Test column edge iteration"""
+        event = LineageEvent.from_dict(make_event())
+        self.assertEqual(
+            list(event.iter_column_edges()),
+            [
+                ("warehouse", "raw.orders", "customer_id", "warehouse", "mart.summary", "customer_id"),
+                ("warehouse", "raw.orders", "amount", "warehouse", "mart.summary", "total"),
+            ],
+        )
+
+    def test_job_key_fallbacks(self):
+        """Test that job_key falls back to the parent job and then the outputs"""
+        data = make_event()
+        self.assertEqual(LineageEvent.from_dict(data).job_key, ("warehouse", "daily_summary"))
+
+        del data["job"]["name"]
+        data["run"]["facets"] = {"parent": {"job": {"namespace": "sched", "name": "parent_job"}, "run": {"runId": "p"}}}
+        self.assertEqual(LineageEvent.from_dict(data).job_key, ("sched", "parent_job"))
+
+        data["run"]["facets"] = {}
+        self.assertEqual(LineageEvent.from_dict(data).job_key, (None, "outputs:warehouse/mart.summary"))
+
+    def test_rejects_non_objects(self):
+        """Test that non-object records raise ValueError"""
+        with self.assertRaises(ValueError):
+            LineageEvent.from_dict("not an event")
+
+    def test_iter_events_skips_strings(self):
+        """Test that iter_events skips records that are not events"""
+        events = list(iter_events([make_event(), "raw text", {"other": 1}]))
+        self.assertEqual(len(events), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.export module.
+Run with: python -m tests.test_lineage_export
+"""
+
+import unittest
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.export import export_graph, iter_export_nodes, iter_export_edges, main
+from algorithm.lineage.graph import LineageGraph
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+GRAPHML = "{http://graphml.graphdrawing.org/xmlns}"
+
+
+def export_text(graph, fmt, **filters):
+    return "".join(export_graph(graph, fmt, **filters))
+
+
+class TestExport(unittest.TestCase):
+    """Test cases for export_graph"""
+
+    def setUp(self):
+        events = pipeline_events()
+        events.append(make_event(job="audit", inputs=("raw.payments",), output="audit.log",
+                                 columns={"ref": [("raw.payments", "id")]}))
+        self.graph = LineageGraph.from_events(events)
+
+    def names(self, nodes):
+        return sorted(self.graph.key(node_id)[1] for node_id in nodes)
+
+    def test_graphml_round_trip(self):
+        """Test that the GraphML document parses and holds every node and edge"""
+        root = ET.fromstring(export_text(self.graph, "graphml"))
+        graph = root.find(f"{GRAPHML}graph")
+        self.assertEqual(len(graph.findall(f"{GRAPHML}node")), self.graph.node_count)
+        self.assertEqual(len(graph.findall(f"{GRAPHML}edge")), self.graph.edge_count)
+
+    def test_csv_edges_describe_both_endpoints(self):
+        """Test that the edge list is self-describing"""
+        rows = list(csv.DictReader(io.StringIO(export_text(self.graph, "csv"))))
+        self.assertEqual(len(rows), self.graph.edge_count)
+        self.assertIn({"source": ("raw.orders", "amount"), "target": ("stage.orders", "amount")},
+                      [{"source": (r["source_name"], r["source_field"]), "target": (r["target_name"], r["target_field"])}
+                       for r in rows])
+
+    def test_dot_escapes_labels(self):
+        """Test that quotes in names do not break the DOT document"""
+        graph = LineageGraph.from_events([make_event(job='say "hi"', inputs=("a",), output="b")])
+        text = export_text(graph, "dot")
+        self.assertIn('label="say \\"hi\\""', text)
+        self.assertTrue(text.startswith("digraph lineage {") and text.endswith("}\n"))
+
+    def test_columns_without_field_and_names_that_are_not_strings(self):
+        """Test that every format handles a column without a field, as older snapshots may hold, and a numeric job name"""
+        event = make_event(job="numbered", inputs=("t",), output="u")
+        event["job"]["name"] = 7
+        self.graph.add_event(event)
+        self.graph._column(self.graph.find_dataset("warehouse", "t"), None)
+        root = ET.fromstring(export_text(self.graph, "graphml"))
+        self.assertEqual(len(root.find(f"{GRAPHML}graph").findall(f"{GRAPHML}node")), self.graph.node_count)
+        dot = export_text(self.graph, "dot")
+        self.assertNotIn("None", dot)
+        self.assertIn('label="7"', dot)
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(export_text(self.graph, "csv-nodes"))))),
+                         self.graph.node_count)
+        self.assertEqual(self.names(iter_export_nodes(self.graph, jobs=["7"])), [])
+
+    def test_dataset_filter(self):
+        """Test that a dataset filter keeps matching datasets, their columns and the jobs touching them"""
+        nodes = list(iter_export_nodes(self.graph, datasets=["stage.*", "mart.*"]))
+        self.assertEqual(self.names(nodes), ["mart.summary", "mart.summary", "mart.summary", "stage.orders",
+                                             "stage.orders", "stage.orders", "stage_orders", "summarise"])
+        for source, target in iter_export_edges(self.graph, datasets=["stage.*", "mart.*"]):
+            self.assertIn(source, nodes)
+            self.assertIn(target, nodes)
+
+    def test_job_filter(self):
+        """Test that a job filter keeps the job, its datasets and the column edges it writes"""
+        edges = list(iter_export_edges(self.graph, jobs=["stage_*"]))
+        column_edges = [(s, t) for s, t in edges if self.graph.kind(t) == "column"]
+        self.assertEqual(len(column_edges), 2)
+        self.assertEqual(self.names(iter_export_nodes(self.graph, jobs=["stage_*"], datasets=["raw.*"])),
+                         ["raw.orders", "raw.orders", "raw.orders", "stage_orders"])
+
+    def test_patterns_ignore_case(self):
+        """Test that patterns match folded dataset names and job names whatever their case"""
+        self.assertEqual(self.names(iter_export_nodes(self.graph, datasets=["Stage.*"], jobs=["STAGE_*"])),
+                         ["stage.orders", "stage.orders", "stage.orders", "stage_orders"])
+
+    def test_output_is_chunked(self):
+        """Test that small chunk sizes split the document without changing it"""
+        chunks = list(export_graph(self.graph, "graphml", chunk_size=64))
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual("".join(chunks), export_text(self.graph, "graphml"))
+        with self.assertRaises(ValueError):
+            export_text(self.graph, "pdf")
+
+    def test_cli(self):
+        """Test exporting a dump folder from the command line, which leaves the folder as it was"""
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "sql-lineage-agent.json"), "w", encoding="utf-8") as f:
+                # Enough events for the service to save a snapshot by default
+                for event in pipeline_events() * 500:
+                    f.write(json.dumps(event) + "\n")
+            output = os.path.join(folder, "nodes.csv")
+            self.assertEqual(main(["--folder", folder, "--format", "csv-nodes", "--output", output,
+                                   "--dataset", "mart.*"]), 0)
+            with open(output, encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(sorted(os.listdir(folder)), ["nodes.csv", "sql-lineage-agent.json"])
+        self.assertEqual(sorted((r["type"], r["name"]) for r in rows)[:2], [("column", "mart.summary")] * 2)
+        self.assertEqual(len(rows), 4)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.graph module.
+Run with: python -m tests.test_lineage_graph
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from tests.test_lineage_events import make_event
+
+
+def pipeline_events():
+    """raw.orders -> stage.orders -> mart.summary, through two jobs"""
+    return [
+        make_event(
+            job="stage_orders", inputs=("raw.orders",), output="stage.orders",
+            columns={"id": [("raw.orders", "id")], "amount": [("raw.orders", "amount")]},
+        ),
+        make_event(
+            job="summarise", inputs=("stage.orders",), output="mart.summary",
+            columns={"total": [("stage.orders", "amount")], "order_count": [("stage.orders", "id")]},
+        ),
+    ]
+
+
+class TestLineageGraph(unittest.TestCase):
+    """Test cases for LineageGraph"""
+
+    def setUp(self):
+        self.graph = LineageGraph.from_events(pipeline_events())
+
+    def test_nodes_are_created(self):
+        """Test that datasets, columns and jobs become nodes"""
+        stats = self.graph.stats()
+        self.assertEqual(stats["jobs"], 2)
+        self.assertEqual(stats["datasets"], 3)
+        self.assertIsNotNone(self.graph.find_column("warehouse", "mart.summary", "total"))
+        job = self.graph.find_job("warehouse", "summarise")
+        self.assertEqual(self.graph.node_info(job)["type"], "job")
+
+    def test_column_upstream(self):
+        """Test upstream traversal across two jobs"""
+        graph = self.graph
+        total = graph.find_column("warehouse", "mart.summary", "total")
+        upstream = graph.upstream(total)
+        self.assertEqual(
+            {graph.key(n): d for n, d in upstream.items()},
+            {("warehouse", "stage.orders", "amount"): 1, ("warehouse", "raw.orders", "amount"): 2},
+        )
+
+    def test_column_downstream_with_depth(self):
+        """Test that max_depth limits the traversal"""
+        graph = self.graph
+        source = graph.find_column("warehouse", "raw.orders", "id")
+        self.assertEqual(len(graph.downstream(source)), 2)
+        limited = graph.downstream(source, max_depth=1)
+        self.assertEqual([graph.key(n) for n in limited], [("warehouse", "stage.orders", "id")])
+
+    def test_dataset_traversal_goes_through_jobs(self):
+        """Test that dataset lineage alternates datasets and jobs"""
+        graph = self.graph
+        raw = graph.find_dataset("warehouse", "raw.orders")
+        kinds = [graph.kind(n) for n in graph.downstream(raw)]
+        self.assertEqual(kinds, ["job", "dataset", "job", "dataset"])
+
+    def test_columns_belong_to_datasets(self):
+        """Test the column to dataset mapping"""
+        graph = self.graph
+        stage = graph.find_dataset("warehouse", "stage.orders")
+        columns = {graph.key(c)[2] for c in graph.columns_of(stage)}
+        self.assertEqual(columns, {"id", "amount"})
+        self.assertEqual(graph.dataset_of(graph.columns_of(stage)[0]), stage)
+
+    def test_newer_event_replaces_job_edges(self):
+        """Test that re-ingesting a job retracts its old edges"""
+        graph = self.graph
+        edges = graph.edge_count
+        graph.add_event(make_event(
+            job="summarise", inputs=("stage.orders",), output="mart.summary",
+            columns={"total": [("stage.orders", "amount")]},
+        ))
+        self.assertEqual(graph.edge_count, edges - 1)
+        order_count = graph.find_column("warehouse", "mart.summary", "order_count")
+        self.assertEqual(graph.upstream(order_count), {})
+
+    def test_shared_edges_are_reference_counted(self):
+        """Test that an edge claimed by two jobs survives removal of one"""
+        graph = self.graph
+        graph.add_event(make_event(
+            job="backfill", inputs=("stage.orders",), output="mart.summary",
+            columns={"total": [("stage.orders", "amount")]},
+        ))
+        amount = graph.find_column("warehouse", "stage.orders", "amount")
+        total = graph.find_column("warehouse", "mart.summary", "total")
+        graph.remove_job(graph.find_job("warehouse", "summarise"))
+        self.assertTrue(graph.has_edge(amount, total))
+        graph.remove_job(graph.find_job("warehouse", "backfill"))
+        self.assertFalse(graph.has_edge(amount, total))
+
+    def test_superseded_run_is_ignored(self):
+        """Test that an event older than the job's current one is not applied"""
+        graph = self.graph
+        stale = make_event(job="summarise", inputs=("stage.orders",), output="mart.other")
+        stale["eventTime"] = "2025-08-01T11:00:00Z"
+        edges = graph.edge_count
+        self.assertIsNone(graph.add_event(stale))
+        self.assertEqual(graph.edge_count, edges)
+        self.assertIsNone(graph.find_column("warehouse", "mart.other", "total"))
+
+    def test_touched_nodes_are_reported(self):
+        """Test that only endpoints of changed edges are reported"""
+        graph = self.graph
+        touched = set()
+        graph.add_event(pipeline_events()[1], touched)
+        self.assertEqual(touched, set())
+
+        graph.add_event(make_event(
+            job="summarise", inputs=("stage.orders",), output="mart.summary",
+            columns={"total": [("stage.orders", "amount")]},
+        ), touched)
+        self.assertEqual(touched, {
+            graph.find_column("warehouse", "stage.orders", "id"),
+            graph.find_column("warehouse", "mart.summary", "order_count"),
+        })
+
+    def test_references_without_names_are_skipped(self):
+        """Test that refs without a name and input fields without a field add no nodes and are counted"""
+        event = make_event(job="load", inputs=("raw.orders",), output="mart.orders",
+                           columns={"id": [("raw.orders", "id"), ("raw.orders", "customer_id")],
+                                    "region": [("raw.customers", "region")]})
+        fields = event["outputs"][0]["facets"]["columnLineage"]["fields"]
+        del fields["id"]["inputFields"][1]["field"]
+        fields["region"]["inputFields"][0]["name"] = None
+        with patch("builtins.print"):
+            graph = LineageGraph.from_events([event])
+        self.assertEqual(graph.skipped_references, 2)
+        self.assertEqual(graph.stats()["skipped"], 2)
+        self.assertTrue(all(isinstance(graph.key(c)[2], str) for c in graph.nodes("column")))
+        self.assertIsNone(graph.find_dataset("warehouse", None))
+        self.assertEqual(sorted(graph.key(d)[1] for d in graph.nodes("dataset")), ["mart.orders", "raw.orders"])
+        source = graph.find_column("warehouse", "raw.orders", "id")
+        self.assertEqual(list(graph.successors(source)), [graph.find_column("warehouse", "mart.orders", "id")])
+
+    def test_traverse_rejects_unknown_direction(self):
+        """Test that traverse validates the direction"""
+        with self.assertRaises(ValueError):
+            self.graph.traverse(0, "sideways")
+
+    def test_from_folder(self):
+        """Test loading events from dump files, skipping non-event lines"""
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "sql-lineage-agent.json"), "w", encoding="utf-8") as f:
+                for event in pipeline_events():
+                    f.write(json.dumps(event) + "\n")
+                f.write('"plain text output"\n')
+                f.write("not json\n")
+            graph = LineageGraph.from_folder(folder)
+        self.assertEqual(graph.event_count, 2)
+        self.assertEqual(graph.edge_count, self.graph.edge_count)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.history module.
+Run with: python -m tests.test_lineage_history
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.history import LineageHistory
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+def summarise(source, field, time):
+    """The summarise job reading one column of one table, at a time"""
+    event = make_event(job="summarise", inputs=(source,), output="mart.summary",
+                       columns={"total": [(source, field)]})
+    event["eventTime"] = time
+    return event
+
+
+class TestLineageHistory(unittest.TestCase):
+    """Test cases for LineageHistory"""
+
+    def setUp(self):
+        self.graph = LineageGraph()
+        self.history = LineageHistory(self.graph)
+        self.graph.add_event(summarise("stage.orders", "amount", "2026-08-01T00:00:00Z"))
+        self.graph.add_event(summarise("stage.payments", "net", "2026-09-10T00:00:00Z"))
+        self.summary = self.graph.find_dataset("warehouse", "mart.summary")
+        self.total = self.graph.find_column("warehouse", "mart.summary", "total")
+
+    def names(self, reached):
+        return sorted(self.graph.key(node_id)[-1] for node_id in reached)
+
+    def test_as_of_traversal(self):
+        """Test that traversals follow the edges that existed at the requested time"""
+        self.assertEqual(self.names(self.history.upstream(self.summary, "2026-07-01T00:00:00Z")), [])
+        self.assertEqual(self.names(self.history.upstream(self.summary, "2026-09-01")), ["stage.orders", "summarise"])
+        self.assertEqual(self.names(self.history.upstream(self.total, "2026-09-01T00:00:00+02:00")), ["amount"])
+        self.assertEqual(self.names(self.history.upstream(self.total, "2026-10-01T00:00:00Z")), ["net"])
+        orders = self.graph.find_dataset("warehouse", "stage.orders")
+        self.assertEqual(self.names(self.history.downstream(orders, "2026-09-01", max_depth=1)), ["summarise"])
+        self.assertEqual(self.history.downstream(orders, "2026-10-01"), {})
+        with self.assertRaises(ValueError):
+            self.history.upstream(self.summary, "last tuesday")
+
+    def test_intervals(self):
+        """Test that an edge's intervals are closed when it disappears and reopened when it returns"""
+        amount = self.graph.find_column("warehouse", "stage.orders", "amount")
+        self.assertEqual(self.history.intervals(amount, self.total),
+                         [("2026-08-01T00:00:00Z", "2026-09-10T00:00:00Z")])
+        self.graph.add_event(summarise("stage.orders", "amount", "2026-10-01T00:00:00Z"))
+        self.assertEqual(self.history.intervals(amount, self.total),
+                         [("2026-08-01T00:00:00Z", "2026-09-10T00:00:00Z"), ("2026-10-01T00:00:00Z", None)])
+        self.assertTrue(self.history.has_edge(amount, self.total, "2026-10-02"))
+        self.assertFalse(self.history.has_edge(amount, self.total, "2026-09-20"))
+
+    def test_late_event_of_another_job(self):
+        """Test that an edge also owned by a job whose event arrives late dates back to that event"""
+        event = make_event(job="backfill", inputs=("stage.payments",), output="mart.summary",
+                           columns={"total": [("stage.payments", "net")]})
+        event["eventTime"] = "2026-06-01T00:00:00Z"
+        self.graph.add_event(event)
+        net = self.graph.find_column("warehouse", "stage.payments", "net")
+        self.assertEqual(self.history.intervals(net, self.total), [("2026-06-01T00:00:00Z", None)])
+
+    def test_compaction(self):
+        """Test that compaction drops intervals ended before the horizon and refuses older queries"""
+        self.assertEqual(self.history.stats()["closedIntervals"], 2)
+        self.assertEqual(self.history.compact("2026-09-15T00:00:00Z"), 2)
+        self.assertEqual(self.history.stats()["pastEdges"], 0)
+        self.assertEqual(self.names(self.history.upstream(self.total, "2026-10-01")), ["net"])
+        with self.assertRaises(ValueError):
+            self.history.upstream(self.total, "2026-09-01")
+
+    def test_save_and_load(self):
+        """Test that a saved history answers the same queries after loading"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "history")
+            self.history.save(path, {"events": self.graph.event_count})
+            loaded, meta = LineageHistory.load(self.graph, path)
+        self.history.close()
+        self.assertEqual(meta, {"events": 2})
+        self.assertEqual(self.names(loaded.upstream(self.total, "2026-09-01")), ["amount"])
+        self.graph.remove_job(self.graph.find_job("warehouse", "summarise"))
+        self.assertEqual(loaded.upstream(self.total, "2100-01-01"), {})
+        self.assertEqual(self.names(loaded.upstream(self.total, "2026-10-01")), ["net"])
+
+    def test_existing_graph_is_dated_by_latest_events(self):
+        """Test that a history made for a built graph dates its edges by their jobs' events"""
+        history = LineageHistory(LineageGraph.from_events(pipeline_events()))
+        self.assertEqual(history.stats()["liveEdges"], history.graph.edge_count)
+        summary = history.graph.find_dataset("warehouse", "mart.summary")
+        self.assertEqual(len(history.upstream(summary, "2025-08-02T11:00:00Z")), 4)
+        self.assertEqual(history.upstream(summary, "2025-08-01T00:00:00Z"), {})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
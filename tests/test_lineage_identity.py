@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.identity module.
+Run with: python -m tests.test_lineage_identity
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.diff import diff_lineage, lineage_from_events, lineage_from_graph
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.identity import DatasetResolver, NamespaceRule, default_resolver, DATASET_RULES_ENV
+from algorithm.lineage.service import LineageService
+from tests.test_lineage_events import make_event
+
+
+def warehouse_resolver():
+    return DatasetResolver(
+        namespaces={"postgres://prod-db:5432": "warehouse"},
+        rules=[NamespaceRule("warehouse", default_database="analytics", default_schema="public")],
+        aliases={(None, "legacy_orders"): (None, "public.orders")},
+    )
+
+
+class TestDatasetResolver(unittest.TestCase):
+    """Test cases for DatasetResolver"""
+
+    def test_table_spellings_resolve_to_one_dataset(self):
+        """Test qualification, quoting, case folding and namespace aliases"""
+        resolver = warehouse_resolver()
+        spellings = [
+            ("warehouse", "public.orders"),
+            ("warehouse", "Analytics.Public.Orders"),
+            ("WAREHOUSE", '"Public"."ORDERS"'),
+            ("warehouse", "[public].[orders]"),
+            ("postgres://prod-db:5432", "orders"),
+            ("warehouse", "Legacy_Orders"),
+        ]
+        for namespace, name in spellings:
+            self.assertEqual(resolver.resolve(namespace, name), ("warehouse", "public.orders"), name)
+        # Another database is a different table
+        self.assertEqual(resolver.resolve("warehouse", "staging.public.orders"), ("warehouse", "staging.public.orders"))
+
+    def test_file_datasets(self):
+        """Test that paths and file URIs share the file namespace and keep their case"""
+        resolver = DatasetResolver()
+        for namespace, name in [("file", "/data/in/../Orders.csv"), (None, "file:///data/Orders.csv"),
+                                ("file://localhost", "//data/Orders.csv"), (None, "/data/Orders.csv")]:
+            self.assertEqual(resolver.resolve(namespace, name), ("file", "/data/Orders.csv"), name)
+
+    def test_case_folding_can_be_disabled(self):
+        """Test global and per-rule case folding"""
+        self.assertEqual(DatasetResolver(case_insensitive=False).resolve("Lake", "Raw.Orders"), ("Lake", "Raw.Orders"))
+        resolver = DatasetResolver(rules=[NamespaceRule("s3://*", case_insensitive=False)])
+        self.assertEqual(resolver.resolve("s3://bucket", "Raw.Orders"), ("s3://bucket", "Raw.Orders"))
+        self.assertEqual(resolver.resolve("warehouse", "Raw.Orders"), ("warehouse", "raw.orders"))
+
+    def test_results_are_interned(self):
+        """Test that canonical pairs are cached and their strings shared"""
+        resolver = DatasetResolver()
+        first = resolver.resolve("warehouse", "Raw.Orders")
+        self.assertIs(resolver.resolve("warehouse", "Raw.Orders"), first)
+        self.assertIs(resolver.resolve("warehouse", "raw.ORDERS")[1], first[1])
+
+    def test_rejects_names_that_are_not_strings(self):
+        """Test that a missing name or a namespace that is not a string raises ValueError"""
+        resolver = DatasetResolver()
+        for namespace, name in ((None, None), ("warehouse", None), (5, "orders"), ("warehouse", ["orders"])):
+            with self.assertRaises(ValueError):
+                resolver.resolve(namespace, name)
+
+    def test_config_round_trip(self):
+        """Test loading rules from JSON and from $LINEAGENT_DATASET_RULES"""
+        resolver = warehouse_resolver()
+        config = json.loads(json.dumps(resolver.to_dict()))
+        self.assertEqual(DatasetResolver.from_dict(config).to_dict(), resolver.to_dict())
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(config, f)
+        try:
+            os.environ[DATASET_RULES_ENV] = f.name
+            self.assertEqual(default_resolver().resolve("warehouse", "orders"), ("warehouse", "public.orders"))
+        finally:
+            del os.environ[DATASET_RULES_ENV]
+            os.remove(f.name)
+        self.assertEqual(default_resolver().to_dict(), DatasetResolver().to_dict())
+
+
+class TestResolvedGraph(unittest.TestCase):
+    """Test cases for a LineageGraph with a resolver"""
+
+    def test_spellings_merge_at_ingest(self):
+        """Test that events naming a table differently share its node"""
+        events = [
+            make_event(job="load", inputs=("raw.orders",), output="Analytics.Public.Orders",
+                       columns={"id": [("raw.orders", "id")]}),
+            make_event(job="report", inputs=("public.orders",), output="mart.report",
+                       columns={"id": [("public.orders", "id")]}),
+        ]
+        graph = LineageGraph.from_events(events, resolver=warehouse_resolver())
+        self.assertEqual(len(list(graph.nodes("dataset"))), 3)
+        source = graph.find_column("warehouse", "RAW.ORDERS", "id")
+        report = graph.find_column("warehouse", "mart.report", "id")
+        self.assertIn(report, graph.downstream(source))
+        self.assertEqual(graph.find_datasets("orders"), [graph.find_dataset("warehouse", "legacy_orders")])
+        # Without a resolver the spellings stay apart
+        self.assertNotIn(LineageGraph.from_events(events).find_column("warehouse", "mart.report", "id"),
+                         LineageGraph.from_events(events).downstream(0))
+
+    def test_nameless_input_dataset_is_skipped(self):
+        """Test that a dataset without a name is left out of the graph and its lineage queries still work"""
+        event = make_event(job="load", inputs=("raw.orders", "raw.customers"), output="mart.orders",
+                           columns={"id": [("raw.orders", "id")], "region": [("raw.customers", "region")]})
+        del event["inputs"][1]["name"]
+        del event["outputs"][0]["facets"]["columnLineage"]["fields"]["region"]["inputFields"][0]["name"]
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "sql-lineage-agent.json"), "w", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+            service = LineageService(folder, snapshot_every=0, resolver=warehouse_resolver())
+            with patch("builtins.print") as warn:
+                self.assertEqual(service.refresh(), 1)
+            self.assertIn("without a name", warn.call_args[0][0])
+            graph = service.graph
+            self.assertEqual(sorted(graph.key(d)[1] for d in graph.nodes("dataset")),
+                             ["mart.orders", "raw.orders"])
+            node, results = service.lineage("downstream", "raw.orders", column="id")
+            self.assertEqual([graph.key(node_id)[2] for node_id, _ in results], ["id"])
+        with patch("builtins.print"):
+            diff = diff_lineage(lineage_from_graph(graph), lineage_from_events([event], warehouse_resolver()))
+        self.assertFalse(diff["changed"])
+
+    def test_snapshot_built_with_other_rules_is_ignored(self):
+        """Test that the service rebuilds when the dataset rules changed"""
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "sql-lineage-agent.json"), "w", encoding="utf-8") as f:
+                f.write(json.dumps(make_event(job="load", inputs=("raw.orders",), output="Orders")) + "\n")
+            service = LineageService(folder)
+            service.refresh()
+            service.save_snapshot()
+            restarted = LineageService(folder, resolver=warehouse_resolver())
+            self.assertEqual(restarted.refresh(), 1)
+            self.assertEqual(restarted.resolve("public.orders"), restarted.resolve("Orders"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.reachability module.
+Run with: python -m tests.test_lineage_reachability
+"""
+
+import unittest
+import sys
+import os
+import random
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.reachability import ReachabilityIndex
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+def copy_event(job, source, target):
+    """Event for a job copying the id column of one table into another"""
+    return make_event(job=job, inputs=(source,), output=target, columns={"id": [(source, "id")]})
+
+
+def random_pipeline(seed, tables=30, jobs=45):
+    """Events wiring random tables together, cycles included"""
+    rng = random.Random(seed)
+    return [
+        copy_event(f"job_{i}", f"t{rng.randrange(tables)}", f"t{rng.randrange(tables)}")
+        for i in range(jobs)
+    ]
+
+
+class TestReachabilityIndex(unittest.TestCase):
+    """Test cases for ReachabilityIndex"""
+
+    def assert_matches_traversal(self, graph, index):
+        for source in range(graph.node_count):
+            downstream = set(graph.downstream(source))
+            self.assertEqual(index.descendants(source), downstream)
+            for target in range(graph.node_count):
+                if target != source:
+                    self.assertEqual(index.reaches(source, target), target in downstream, (source, target))
+
+    def test_pipeline_queries(self):
+        """Test reachability along a two-job pipeline"""
+        graph = LineageGraph.from_events(pipeline_events())
+        index = ReachabilityIndex(graph)
+        raw_id = graph.find_column("warehouse", "raw.orders", "id")
+        count = graph.find_column("warehouse", "mart.summary", "order_count")
+        total = graph.find_column("warehouse", "mart.summary", "total")
+        self.assertTrue(index.reaches(raw_id, count))
+        self.assertFalse(index.reaches(raw_id, total))
+        self.assertFalse(index.reaches(count, raw_id))
+        self.assertEqual(index.ancestors(count), set(graph.upstream(count)))
+
+    def test_matches_traversal_in_all_modes(self):
+        """Test that every mode agrees with a plain traversal, cycles included"""
+        for seed in range(3):
+            graph = LineageGraph.from_events(random_pipeline(seed))
+            for budget in (None, 0, 512):
+                index = ReachabilityIndex(graph, max_closure_bytes=budget, incremental=False, seed=seed)
+                self.assert_matches_traversal(graph, index)
+
+    def test_cycles_reach_themselves(self):
+        """Test that nodes on a cycle reach themselves and acyclic nodes do not"""
+        graph = LineageGraph.from_events([copy_event("a", "x", "y"), copy_event("b", "y", "x")])
+        index = ReachabilityIndex(graph)
+        x = graph.find_dataset("warehouse", "x")
+        self.assertTrue(index.reaches(x, x))
+        self.assertEqual(index.stats()["cyclic_components"], 2)
+        chain = LineageGraph.from_events([copy_event("a", "x", "y")])
+        x = chain.find_dataset("warehouse", "x")
+        self.assertFalse(ReachabilityIndex(chain).reaches(x, x))
+
+    def test_incremental_insertions_are_patched(self):
+        """Test that new events are patched in without going stale"""
+        graph = LineageGraph.from_events(pipeline_events())
+        index = ReachabilityIndex(graph)
+        graph.add_event(copy_event("export", "mart.summary", "export.summary"))
+        graph.add_event(make_event(
+            job="export_totals", inputs=("mart.summary",), output="export.totals",
+            columns={"total": [("mart.summary", "total")]},
+        ))
+        self.assertFalse(index.stale)
+        self.assertTrue(index.stats()["closure"])
+        self.assert_matches_traversal(graph, index)
+
+    def test_removals_drop_the_closure(self):
+        """Test that removing edges keeps answers exact"""
+        graph = LineageGraph.from_events(pipeline_events())
+        index = ReachabilityIndex(graph)
+        graph.remove_job(graph.find_job("warehouse", "stage_orders"))
+        self.assertFalse(index.stats()["closure"])
+        self.assert_matches_traversal(graph, index)
+        index.rebuild()
+        self.assertTrue(index.stats()["closure"])
+
+    def test_new_cycle_marks_index_stale(self):
+        """Test that an edge merging components falls back to traversal until rebuilt"""
+        graph = LineageGraph.from_events([copy_event("a", "x", "y")])
+        index = ReachabilityIndex(graph)
+        graph.add_event(copy_event("b", "y", "x"))
+        self.assertTrue(index.stale)
+        self.assert_matches_traversal(graph, index)
+        index.rebuild()
+        self.assertFalse(index.stale)
+        self.assert_matches_traversal(graph, index)
+
+    def test_random_incremental_updates(self):
+        """Test random event sequences against a plain traversal"""
+        for seed in range(3):
+            events = random_pipeline(seed)
+            graph = LineageGraph.from_events(events[:20])
+            index = ReachabilityIndex(graph, max_closure_bytes=None if seed % 2 else 0, seed=seed)
+            for event in events[20:]:
+                graph.add_event(event)
+            self.assert_matches_traversal(graph, index)
+
+    def test_close_stops_following_the_graph(self):
+        """Test that a closed index no longer receives edge updates"""
+        graph = LineageGraph.from_events(pipeline_events())
+        index = ReachabilityIndex(graph)
+        index.close()
+        self.assertEqual(graph._edge_listeners, [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.search module.
+Run with: python -m tests.test_lineage_search
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.search import SearchIndex
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+def customers_event(sql="INSERT INTO crm.customers SELECT email AS customer_email FROM raw.customers"):
+    event = make_event(job="load_customers", inputs=("raw.customers",), output="crm.customers",
+                       columns={"customer_email": [("raw.customers", "email")]})
+    event["job"]["facets"]["sql"]["query"] = sql
+    return event
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for SearchIndex"""
+
+    def setUp(self):
+        self.graph = LineageGraph.from_events(pipeline_events() + [customers_event()])
+        self.index = SearchIndex(self.graph)
+
+    def found(self, query, **options):
+        return [(hit["node"]["type"], hit["node"].get("field") or hit["node"]["name"], hit["match"])
+                for hit in self.index.search(query, **options)]
+
+    def test_ranking(self):
+        """Test that exact matches come before prefixes, word prefixes and substrings"""
+        self.assertEqual(self.found("orders", fuzzy=False), [
+            ("dataset", "raw.orders", "word_prefix"),
+            ("dataset", "stage.orders", "word_prefix"),
+            ("job", "stage_orders", "word_prefix"),
+        ])
+        self.assertEqual(self.found("AMOUNT", fuzzy=False)[0], ("column", "amount", "exact"))
+        self.assertEqual(self.found("mart.sum", fuzzy=False), [("dataset", "mart.summary", "prefix")])
+        self.assertEqual(self.found("ummar", fuzzy=False),
+                         [("job", "summarise", "substring"), ("dataset", "mart.summary", "substring")])
+
+    def test_short_queries_match_word_starts(self):
+        """Test that one and two character queries match the start of a word only"""
+        self.assertEqual(self.found("em", kinds=["column"]),
+                         [("column", "email", "prefix"), ("column", "customer_email", "word_prefix")])
+        self.assertEqual(self.found("ai", kinds=["column"]), [])
+
+    def test_sql_text(self):
+        """Test that jobs are found by their SQL, with a snippet"""
+        hits = self.index.search("email as customer", kinds=["job"])
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["field"], "sql")
+        self.assertIn("SELECT email AS customer_email", hits[0]["snippet"])
+
+    def test_fuzzy(self):
+        """Test that typos find names by trigram similarity, below the exact matches"""
+        self.assertEqual(self.found("custmer_email", kinds=["column"])[0], ("column", "customer_email", "fuzzy"))
+        self.assertEqual(self.found("custmer_email", fuzzy=False), [])
+        with self.assertRaises(ValueError):
+            self.index.search("orders", kinds=["table"])
+
+    def test_incremental_updates(self):
+        """Test that new nodes and changed SQL are indexed as events are applied"""
+        self.graph.add_event(make_event(job="export_invoices", inputs=("mart.summary",), output="out.invoices"))
+        self.assertEqual(self.found("invoices", fuzzy=False),
+                         [("dataset", "out.invoices", "word_prefix"), ("job", "export_invoices", "word_prefix")])
+        self.graph.add_event(customers_event("SELECT * FROM crm.contacts"))
+        self.assertEqual(self.found("crm.contacts", kinds=["job"]), [("job", "load_customers", "sql")])
+        self.assertEqual(self.found("email as customer", kinds=["job"], fuzzy=False), [])
+        self.graph.remove_job(self.graph.find_job("warehouse", "load_customers"))
+        self.assertEqual(self.found("crm.contacts", kinds=["job"], fuzzy=False), [])
+        self.index.close()
+        self.graph.add_event(make_event(job="ignored_job"))
+        self.assertEqual(self.found("ignored_job", fuzzy=False), [])
+
+    def test_names_that_are_not_strings_are_not_indexed(self):
+        """Test that a job named by a number is applied and left out of the index"""
+        self.index.search("orders")
+        event = make_event(job="export", inputs=("mart.summary",), output="out.export")
+        event["job"]["name"] = 42
+        self.graph.add_event(event)
+        self.assertIsNotNone(self.graph.find_job("warehouse", 42))
+        self.assertEqual(self.found("out.export", fuzzy=False), [("dataset", "out.export", "exact")])
+
+    def test_failing_listener_does_not_stop_ingestion(self):
+        """Test that the event is applied and later listeners run when a listener raises"""
+        def failing(job_id):
+            raise RuntimeError("listener bug")
+
+        self.graph.add_job_listener(failing)
+        self.graph.remove_job_listener(self.index._on_job)
+        self.graph.add_job_listener(self.index._on_job)
+        with patch("builtins.print") as warn:
+            self.graph.add_event(make_event(job="export_invoices", inputs=("mart.summary",), output="out.invoices"))
+        self.assertIn("listener bug", warn.call_args[0][0])
+        self.assertIsNotNone(self.graph.find_dataset("warehouse", "out.invoices"))
+        self.assertEqual(self.found("out.invoices", fuzzy=False), [("dataset", "out.invoices", "exact")])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.service module.
+Run with: python -m tests.test_lineage_service
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.service import LineageService, NodeNotFoundError, AmbiguousNodeError
+from algorithm.utils.file_utils import dump_json_record, add_dump_listener, remove_dump_listener
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+class TestLineageService(unittest.TestCase):
+    """Test cases for LineageService"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "sql-lineage-agent.json")
+        self.append(*pipeline_events())
+        self.service = LineageService(self.folder.name)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def append(self, *events, tail=""):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.write(tail)
+
+    def test_refresh_reads_only_new_lines(self):
+        """Test that refresh ingests appended events once"""
+        self.assertEqual(self.service.refresh(), 2)
+        self.assertEqual(self.service.refresh(), 0)
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+        self.assertEqual(self.service.refresh(), 1)
+        self.assertEqual(self.service.graph.event_count, 3)
+
+    def test_partial_line_waits_for_newline(self):
+        """Test that a half-written line is ingested once it is complete"""
+        self.service.refresh()
+        line = json.dumps(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+        self.append(tail=line[:40])
+        self.assertEqual(self.service.refresh(), 0)
+        self.append(tail=line[40:] + "\n")
+        self.assertEqual(self.service.refresh(), 1)
+
+    def test_malformed_event_does_not_drop_its_neighbours(self):
+        """Test that the events around a malformed one in the same chunk are applied"""
+        self.service.refresh()
+        self.append(make_event(job="before", inputs=("raw.orders",), output="mart.before"),
+                    {"inputs": ["not a dataset"], "outputs": []},
+                    make_event(job="after", inputs=("raw.orders",), output="mart.after"))
+        with patch("builtins.print") as warn:
+            self.assertEqual(self.service.refresh(), 2)
+        self.assertIn("malformed", warn.call_args[0][0])
+        self.assertIsNotNone(self.service.graph.find_dataset("warehouse", "mart.after"))
+
+    def test_failed_chunk_is_read_again(self):
+        """Test that an error while applying a chunk leaves its lines for the next refresh"""
+        self.service.refresh()
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+        with patch.object(LineageGraph, "add_records", side_effect=MemoryError):
+            with self.assertRaises(MemoryError):
+                self.service.refresh()
+        self.assertEqual(self.service.refresh(), 1)
+        self.assertIsNotNone(self.service.graph.find_dataset("warehouse", "mart.other"))
+
+    def test_cleared_file_triggers_rebuild(self):
+        """Test that truncating a dump file rebuilds the graph"""
+        self.service.refresh()
+        os.remove(self.path)
+        self.append(pipeline_events()[0])
+        self.service.refresh()
+        self.assertEqual(self.service.graph.event_count, 1)
+
+    def test_lineage_is_cached(self):
+        """Test that identical queries are served from the cache"""
+        first = self.service.lineage("downstream", "raw.orders", column="amount")
+        second = self.service.lineage("downstream", "raw.orders", column="amount")
+        self.assertIs(first[1], second[1])
+        self.assertEqual(self.service.cache_hits, 1)
+        self.service.lineage("downstream", "raw.orders", column="amount", depth=1)
+        self.assertEqual(self.service.cache_misses, 2)
+
+    def test_new_event_invalidates_only_affected_results(self):
+        """Test that an event drops the cached results containing its nodes"""
+        service = self.service
+        service.lineage("downstream", "raw.orders", column="amount")
+        service.lineage("upstream", "mart.summary", column="order_count")
+        self.assertEqual(service.cached_results, 2)
+
+        self.append(make_event(
+            job="export", inputs=("mart.summary",), output="export.summary",
+            columns={"total": [("mart.summary", "total")]},
+        ))
+        _, reached = service.lineage("downstream", "raw.orders", column="amount")
+        self.assertEqual(len(reached), 3)
+        service.lineage("upstream", "mart.summary", column="order_count")
+        self.assertEqual(service.cache_hits, 1)
+
+    def test_dump_listener_applies_events(self):
+        """Test that events dumped in process reach the graph without tailing"""
+        service = self.service
+        service.refresh()
+        add_dump_listener(service.on_dump)
+        try:
+            event = make_event(job="export", inputs=("mart.summary",), output="export.summary")
+            dump_json_record("sql-lineage-agent", event, lineage_extraction_dumps_folder=self.folder.name)
+        finally:
+            remove_dump_listener(service.on_dump)
+        self.assertIsNotNone(service.graph.find_dataset("warehouse", "export.summary"))
+        self.assertEqual(service.refresh(), 0)
+        self.assertEqual(service.graph.event_count, 3)
+
+    def test_dump_listener_tails_after_gap(self):
+        """Test that lines written by another process are read before the dumped one"""
+        service = self.service
+        service.refresh()
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+        event = make_event(job="export", inputs=("mart.summary",), output="export.summary")
+        add_dump_listener(service.on_dump)
+        try:
+            dump_json_record("sql-lineage-agent", event, lineage_extraction_dumps_folder=self.folder.name)
+        finally:
+            remove_dump_listener(service.on_dump)
+        self.assertEqual(service.graph.event_count, 4)
+        self.assertEqual(service.refresh(), 0)
+
+    def test_resolve_errors(self):
+        """Test unknown and ambiguous names"""
+        event = make_event(job="copy", inputs=("raw.orders",), output="mart.summary")
+        for dataset in event["inputs"] + event["outputs"]:
+            dataset["namespace"] = "lake"
+        self.append(event)
+        self.service.refresh()
+        with self.assertRaises(NodeNotFoundError):
+            self.service.resolve("missing")
+        with self.assertRaises(AmbiguousNodeError) as context:
+            self.service.resolve("raw.orders")
+        self.assertEqual(context.exception.candidates, ["lake", "warehouse"])
+        self.assertIsNotNone(self.service.resolve("raw.orders", namespace="lake"))
+
+    def test_search_follows_new_events(self):
+        """Test that the search index picks up appended events and graph rebuilds"""
+        self.assertEqual(self.service.search("invoices"), [])
+        self.append(make_event(job="bill", inputs=("raw.orders",), output="mart.invoices"))
+        self.assertEqual([r["node"]["name"] for r in self.service.search("invoices")], ["mart.invoices"])
+        os.remove(self.path)
+        self.append(make_event(job="bill", inputs=("raw.orders",), output="mart.receipts"))
+        self.assertEqual([r["node"]["name"] for r in self.service.search("invoices", fuzzy=False)], [])
+        self.assertEqual([r["node"]["name"] for r in self.service.search("receipts")], ["mart.receipts"])
+
+    def test_search_index_survives_field_less_input(self):
+        """Test that lineage queries keep working after a field-less input field reaches a built search index"""
+        self.service.search("orders")
+        event = make_event(job="load", inputs=("raw.orders",), output="mart.load",
+                           columns={"id": [("raw.orders", "id")]})
+        del event["outputs"][0]["facets"]["columnLineage"]["fields"]["id"]["inputFields"][0]["field"]
+        self.append(event)
+        with patch("builtins.print"):
+            node, results = self.service.lineage("downstream", "raw.orders")
+        self.assertIn(self.service.resolve("mart.load"), [node_id for node_id, _ in results])
+
+    def test_snapshot_restart_replays_only_new_events(self):
+        """Test that a restarted service loads the snapshot and tails the newer events"""
+        self.service.refresh()
+        self.assertTrue(self.service.save_snapshot())
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+
+        restarted = LineageService(self.folder.name)
+        self.assertEqual(restarted.refresh(), 1)
+        self.assertEqual(restarted.graph.event_count, 3)
+        self.assertEqual(restarted.lineage("downstream", "raw.orders")[1],
+                         LineageService(self.folder.name, snapshot_every=0).lineage("downstream", "raw.orders")[1])
+
+    def test_as_of_lineage_survives_restart(self):
+        """Test that as-of queries see replaced lineage, also after loading the snapshot"""
+        replaced = make_event(job="summarise", inputs=("raw.payments",), output="mart.summary",
+                              columns={"total": [("raw.payments", "amount")]})
+        replaced["eventTime"] = "2025-09-01T00:00:00Z"
+        self.append(replaced)
+        self.service.refresh()
+        self.service.save_snapshot()
+        self.assertTrue(self.service.history_path.exists())
+
+        restarted = LineageService(self.folder.name)
+        for service in (self.service, restarted):
+            before = service.lineage("upstream", "mart.summary", "total", as_of="2025-08-15T00:00:00Z")[1]
+            self.assertEqual([service.graph.key(node_id)[1:] for node_id, _ in before],
+                             [("stage.orders", "amount"), ("raw.orders", "amount")])
+            after = service.lineage("upstream", "mart.summary", "total")[1]
+            self.assertEqual([service.graph.key(node_id)[1:] for node_id, _ in after], [("raw.payments", "amount")])
+
+    def test_stale_snapshot_is_ignored(self):
+        """Test that a snapshot of a since rewritten dump file is not used"""
+        self.service.refresh()
+        self.service.save_snapshot()
+        os.remove(self.path)
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"),
+                    *pipeline_events())
+        restarted = LineageService(self.folder.name)
+        self.assertEqual(restarted.refresh(), 3)
+        self.assertEqual(restarted.graph.event_count, 3)
+
+    def test_snapshot_saved_automatically(self):
+        """Test that a snapshot is written once enough events were applied"""
+        service = LineageService(self.folder.name, snapshot_every=3)
+        service.refresh()
+        self.assertFalse(service.snapshot_path.exists())
+        self.append(make_event(job="other", inputs=("raw.orders",), output="mart.other"))
+        service.refresh()
+        self.assertTrue(service.snapshot_path.exists())
+        self.assertEqual(service.unsaved_events, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.snapshot module.
+Run with: python -m tests.test_lineage_snapshot
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.snapshot import save_snapshot, load_snapshot
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test cases for save_snapshot and load_snapshot"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "graph.snapshot")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def round_trip(self, graph, meta=None):
+        save_snapshot(graph, self.path, meta)
+        return load_snapshot(self.path)
+
+    def assert_same_graph(self, graph, loaded):
+        self.assertEqual(loaded.stats(), graph.stats())
+        self.assertEqual(loaded._keys, graph._keys)
+        self.assertEqual(loaded._down, graph._down)
+        self.assertEqual(loaded._up, graph._up)
+        self.assertEqual(loaded._edge_refs, graph._edge_refs)
+        self.assertEqual(loaded._job_edges, graph._job_edges)
+        self.assertEqual(loaded._job_runs, graph._job_runs)
+        self.assertEqual(loaded._job_sql, graph._job_sql)
+        self.assertEqual(loaded._columns, graph._columns)
+        self.assertEqual(loaded._dataset_names, graph._dataset_names)
+
+    def test_round_trip(self):
+        """Test that a loaded graph equals the saved one, metadata included"""
+        events = pipeline_events()
+        events.append(make_event(job="copy", inputs=("raw.orders",), output="mart.copy",
+                                 columns={"id": [("raw.orders", "id")]}))
+        events[-1]["job"]["namespace"] = None
+        graph = LineageGraph.from_events(events)
+        graph.remove_job(graph.find_job("warehouse", "stage_orders"))
+        loaded, meta = self.round_trip(graph, {"files": {"a.json": [10, 1]}})
+        self.assert_same_graph(graph, loaded)
+        self.assertEqual(meta, {"files": {"a.json": [10, 1]}})
+        column = graph.find_column("warehouse", "raw.orders", "id")
+        self.assertEqual(loaded.downstream(column), graph.downstream(column))
+
+    def test_loaded_graph_stays_incremental(self):
+        """Test that events applied after loading behave as on the original graph"""
+        graph = LineageGraph.from_events(pipeline_events()[:1])
+        loaded, _ = self.round_trip(graph)
+        for target in (graph, loaded):
+            target.add_event(pipeline_events()[1])
+            target.add_event(pipeline_events()[0])
+        self.assert_same_graph(graph, loaded)
+
+    def test_empty_graph(self):
+        """Test that an empty graph round-trips"""
+        loaded, meta = self.round_trip(LineageGraph())
+        self.assertEqual(loaded.node_count, 0)
+        self.assertEqual(meta, {})
+
+    def test_rejects_other_files(self):
+        """Test that files that are not snapshots raise ValueError"""
+        with open(self.path, "wb") as f:
+            f.write(b'{"not": "a snapshot"}\n')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.lineage.subgraph module.
+Run with: python -m tests.test_lineage_subgraph
+"""
+
+import json
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.lineage.graph import LineageGraph
+from algorithm.lineage.subgraph import extract_subgraph, event_subgraph
+from tests.test_lineage_events import make_event
+from tests.test_lineage_graph import pipeline_events
+
+
+def wide_event(columns=500):
+    """Event copying every column of a wide table"""
+    return make_event(job="copy_wide", inputs=("wide.src",), output="wide.dst", columns={
+        f"c{i}": [("wide.src", f"c{i}")] for i in range(columns)
+    })
+
+
+class TestExtractSubgraph(unittest.TestCase):
+    """Test cases for extract_subgraph"""
+
+    def setUp(self):
+        self.graph = LineageGraph.from_events(pipeline_events())
+
+    def names(self, subgraph):
+        return {(n["type"], n["name"], n.get("field")) for n in subgraph["nodes"]}
+
+    def test_hops_and_direction(self):
+        """Test that only nodes within the hop limit, in the given direction, are returned"""
+        stage = self.graph.find_dataset("warehouse", "stage.orders")
+        subgraph = extract_subgraph(self.graph, stage, hops=2, direction="downstream")
+        self.assertEqual(self.names(subgraph), {
+            ("dataset", "stage.orders", None), ("job", "summarise", None), ("dataset", "mart.summary", None),
+        })
+        self.assertEqual({n["name"]: n["depth"] for n in subgraph["nodes"]}["mart.summary"], 2)
+        both = extract_subgraph(self.graph, stage, hops=2)
+        self.assertIn(("dataset", "raw.orders", None), self.names(both))
+        self.assertEqual(len(both["edges"]), 4)
+
+    def test_dataset_nodes_list_their_columns(self):
+        """Test that dataset nodes carry a capped list of column names"""
+        stage = self.graph.find_dataset("warehouse", "stage.orders")
+        node = extract_subgraph(self.graph, stage, hops=1, max_columns=1)["nodes"][0]
+        self.assertEqual(node["columnCount"], 2)
+        self.assertEqual(node["columns"], ["id"])
+
+    def test_node_and_edge_caps(self):
+        """Test that caps keep the nearest nodes and flag truncation"""
+        raw_id = self.graph.find_column("warehouse", "raw.orders", "id")
+        subgraph = extract_subgraph(self.graph, raw_id, hops=5, max_nodes=2)
+        self.assertTrue(subgraph["truncated"])
+        self.assertEqual([n["field"] for n in subgraph["nodes"]], ["id", "id"])
+        capped = extract_subgraph(self.graph, raw_id, hops=5, max_edges=1)
+        self.assertEqual(len(capped["edges"]), 1)
+        self.assertTrue(capped["truncated"])
+        self.assertFalse(extract_subgraph(self.graph, raw_id, hops=5)["truncated"])
+
+    def test_columns_are_collapsed(self):
+        """Test that columns beyond max_columns merge into one node per dataset"""
+        graph = LineageGraph.from_events([wide_event()])
+        source = graph.find_column("warehouse", "wide.src", "c0")
+        target = graph.find_dataset("warehouse", "wide.dst")
+        subgraph = extract_subgraph(graph, target, hops=1, max_columns=3, include_columns=True)
+        groups = {n["name"]: n for n in subgraph["nodes"] if n["type"] == "columns"}
+        self.assertEqual(groups["wide.dst"]["count"], 497)
+        self.assertEqual(groups["wide.src"]["count"], 497)
+        self.assertIn({"source": groups["wide.src"]["id"], "target": groups["wide.dst"]["id"]}, subgraph["edges"])
+        self.assertIn({"source": source, "target": graph.find_column("warehouse", "wide.dst", "c0")},
+                      subgraph["edges"])
+        # The dataset and the job, three columns and one group per table
+        self.assertEqual(len(subgraph["nodes"]), 10)
+        self.assertFalse(subgraph["truncated"])
+
+    def test_edges_reference_subgraph_nodes(self):
+        """Test that every edge endpoint is one of the returned nodes"""
+        graph = LineageGraph.from_events(pipeline_events() + [wide_event(50)])
+        for node_id in range(graph.node_count):
+            subgraph = extract_subgraph(graph, node_id, hops=3, max_nodes=10, max_columns=2, include_columns=True)
+            ids = {n["id"] for n in subgraph["nodes"]}
+            self.assertLessEqual(len(ids), 10)
+            for edge in subgraph["edges"]:
+                self.assertIn(edge["source"], ids)
+                self.assertIn(edge["target"], ids)
+
+    def test_invalid_arguments(self):
+        """Test that unknown directions and nodes are rejected"""
+        with self.assertRaises(ValueError):
+            extract_subgraph(self.graph, 0, direction="sideways")
+        with self.assertRaises(ValueError):
+            extract_subgraph(self.graph, self.graph.node_count)
+
+
+class TestEventSubgraph(unittest.TestCase):
+    """Test cases for event_subgraph"""
+
+    def test_wide_event_is_small(self):
+        """Test that a wide event's subgraph is a fraction of the event"""
+        event = wide_event(3000)
+        subgraph = event_subgraph(event)
+        self.assertEqual(subgraph["center"]["name"], "wide.dst")
+        self.assertLess(len(json.dumps(subgraph)), len(json.dumps(event)) // 20)
+
+    def test_centres_on_last_event(self):
+        """Test that several records are combined and non-events skipped"""
+        subgraph = event_subgraph(pipeline_events() + ["not an event"])
+        self.assertEqual(subgraph["center"]["name"], "mart.summary")
+        self.assertIn("raw.orders", {n["name"] for n in subgraph["nodes"]})
+
+    def test_no_event(self):
+        """Test that records without events are rejected"""
+        with self.assertRaises(ValueError):
+            event_subgraph({"status": "ok"})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the algorithm package's lazy imports.
+Run with: python -m tests.test_package_imports
+"""
+
+import unittest
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# Add the project root to the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ["agents", "openai", "dotenv", "algorithm.framework_agent",
+                 "algorithm.plugins.sql_lineage_agent.lineage_agent"]
+
+
+def run_fresh(code):
+    """Run code in a fresh interpreter in an empty folder; returns its JSON output and the folder's contents"""
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        result = subprocess.run([sys.executable, "-c", code], cwd=folder, env=env,
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.splitlines()[-1]), sorted(os.listdir(folder))
+
+
+class TestPackageImports(unittest.TestCase):
+    """Test cases for importing algorithm without side effects"""
+
+    def test_import_is_light(self):
+        """Test that importing the package and its lineage modules loads no SDKs and touches no files"""
+        loaded, files = run_fresh(
+            "import sys, json, algorithm, algorithm.lineage, algorithm.utils.database, algorithm.agent_manager\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        )
+        self.assertEqual(loaded, [])
+        self.assertEqual(files, [])
+
+    def test_public_symbols_resolve(self):
+        """Test that the public symbols import on access, and that the log database is created on first use"""
+        loaded, files = run_fresh(
+            "import sys, json, algorithm\n"
+            "from algorithm import extract_json, write_lineage_log, read_lineage_log\n"
+            "write_lineage_log('test', 'trace', 'message')\n"
+            "names = [message for _, _, message in read_lineage_log('test')]\n"
+            "print(json.dumps([extract_json('{\"a\": 1}'), names, sorted(set(algorithm.__all__) - set(dir(algorithm)))]))"
+        )
+        self.assertEqual(loaded, [{"a": 1}, ["message"], []])
+        self.assertEqual(files, ["agents_log_db"])
+        with self.assertRaises(AttributeError):
+            import algorithm
+            algorithm.not_a_symbol
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.providers module.
+Run with: python -m tests.test_providers
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import OpenAIChatCompletionsModel
+
+from algorithm.providers import ProviderRegistry, get_model, get_registry
+from algorithm.scheduler import ScheduledModel
+
+API_KEYS = {"OPENAI_API_KEY": "openai-key", "DEEPSEEK_API_KEY": "deepseek-key", "GROK_API_KEY": "grok-key",
+            "GOOGLE_API_KEY": "google-key", "OPENROUTER_API_KEY": "openrouter-key"}
+
+
+class TestProviderRegistry(unittest.TestCase):
+    """Test cases for ProviderRegistry"""
+
+    def setUp(self):
+        patcher = patch.dict(os.environ, API_KEYS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = ProviderRegistry(max_connections=10, http2=False)
+
+    def tearDown(self):
+        asyncio.run(self.registry.aclose())
+
+    def test_clients_are_created_once_and_share_a_pool(self):
+        """Test that each provider gets one client, all on the same HTTP client"""
+        self.assertEqual(self.registry.stats()["clients"], [])
+        deepseek = self.registry.client("deepseek")
+        self.assertIs(self.registry.client("deepseek"), deepseek)
+        self.assertEqual(deepseek.api_key, "deepseek-key")
+        self.assertEqual(str(deepseek.base_url), "https://api.deepseek.com/v1/")
+        self.assertIs(deepseek._client, self.registry.client("gemini")._client)
+        self.assertIs(deepseek._client, self.registry.http_client)
+        self.assertEqual(deepseek.max_retries, 0)
+        with self.assertRaises(ValueError):
+            self.registry.client("anthropic")
+
+    def test_models_are_cached_per_name(self):
+        """Test that model wrappers are routed by name, scheduled by their provider's limiter and reused"""
+        model = self.registry.model("deepseek-chat")
+        self.assertIsInstance(model, ScheduledModel)
+        self.assertIsInstance(model.model, OpenAIChatCompletionsModel)
+        self.assertEqual(model.limiter.provider, "deepseek")
+        self.assertIs(self.registry.model("deepseek-chat"), model)
+        self.assertIsNot(self.registry.model("deepseek-coder"), model)
+        self.assertIs(self.registry.model("deepseek-coder").limiter, model.limiter)
+        self.assertIs(self.registry.model("meta-llama/llama-3").model._client, self.registry.client("openrouter"))
+        self.assertEqual(self.registry.model("gpt-4o-mini").limiter.provider, "openai")
+        self.assertEqual(self.registry.stats()["clients"], ["deepseek", "openai", "openrouter"])
+        self.assertEqual(sorted(self.registry.stats()["limits"]), ["deepseek", "openai", "openrouter"])
+
+    def test_aclose_starts_over(self):
+        """Test that a closed registry creates new clients when used again"""
+        client = self.registry.client("grok")
+        asyncio.run(self.registry.aclose())
+        self.assertTrue(client._client.is_closed)
+        self.assertIsNot(self.registry.client("grok"), client)
+
+
+class TestGetModel(unittest.TestCase):
+    """Test cases for the per event loop registries"""
+
+    def test_registry_per_event_loop(self):
+        """Test that each event loop has its own registry, reused within the loop"""
+        async def models():
+            return get_registry(), get_model("grok-3"), get_model("grok-3")
+
+        with patch.dict(os.environ, API_KEYS):
+            first, model, again = asyncio.run(models())
+            second, _, _ = asyncio.run(models())
+        self.assertIs(model, again)
+        self.assertIsNot(first, second)
+        self.assertIs(get_registry(), get_registry())
+        asyncio.run(first.aclose())
+        asyncio.run(second.aclose())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.scheduler module.
+Run with: python -m tests.test_scheduler
+"""
+
+import unittest
+import sys
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithm.scheduler import (ProviderLimiter, ScheduledModel, TokenBucket, estimate_tokens,
+                                 retry_after_seconds)
+
+
+def status_error(status, headers=None):
+    """An openai error for a response with a status and headers"""
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.test/v1"))
+    if status == 429:
+        return openai.RateLimitError("rate limited", response=response, body=None)
+    if status >= 500:
+        return openai.InternalServerError("server error", response=response, body=None)
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket"""
+
+    def test_refill_burst_and_debt(self):
+        """Test that a bucket holds burst_seconds of quota, refills at its rate and can go into debt"""
+        clock = FakeClock()
+        bucket = TokenBucket(600, burst_seconds=1, clock=clock)  # 10 per second
+        self.assertEqual(bucket.capacity, 10)
+        self.assertEqual(bucket.delay(10), 0)
+        bucket.take(25)
+        self.assertEqual(bucket.delay(1), 1.6)
+        self.assertEqual(bucket.delay(1000), 2.5)  # waits for a full bucket at most
+        clock.now = 100
+        self.assertEqual(bucket.level, -15)
+        self.assertEqual(bucket.delay(10), 0)
+
+
+class TestProviderLimiter(unittest.TestCase):
+    """Test cases for ProviderLimiter"""
+
+    def test_concurrency_cap_and_fifo(self):
+        """Test that no more than max_concurrency calls run at once, admitted in arrival order"""
+        limiter = ProviderLimiter("test", max_concurrency=2)
+        running, started = [], []
+        peak = 0
+
+        async def request(i):
+            nonlocal peak
+            started.append(i)
+            running.append(i)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+            return i
+
+        async def main():
+            return await asyncio.gather(*(limiter.call(lambda i=i: request(i)) for i in range(8)))
+
+        self.assertEqual(asyncio.run(main()), list(range(8)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(started, list(range(8)))
+        self.assertEqual(limiter.stats()["calls"], 8)
+
+    def test_request_quota(self):
+        """Test that calls beyond the request bucket wait for it to refill"""
+        limiter = ProviderLimiter("test", requests_per_minute=1200, burst_seconds=0.1)  # 20/s, 2 at once
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.call(lambda: asyncio.sleep(0)) for _ in range(6)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(main()), 0.18)
+
+    def test_rate_limited_call_is_retried_after_retry_after(self):
+        """Test that a 429 is retried after Retry-After, and pauses the other callers too"""
+        limiter = ProviderLimiter("test")
+        attempts = []
+        admitted = {}
+
+        async def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise status_error(429, {"retry-after-ms": "100"})
+            return "ok"
+
+        async def other():
+            await asyncio.sleep(0.02)
+            start = time.monotonic()
+            await limiter.call(lambda: asyncio.sleep(0))
+            admitted["waited"] = time.monotonic() - start
+
+        async def main():
+            result, _ = await asyncio.gather(limiter.call(flaky), other())
+            return result
+
+        self.assertEqual(asyncio.run(main()), "ok")
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.1)
+        self.assertGreaterEqual(admitted["waited"], 0.05)
+        stats = limiter.stats()
+        self.assertEqual((stats["retries"], stats["rateLimited"], stats["failed"]), (1, 1, 0))
+
+    def test_errors_that_are_not_retried(self):
+        """Test that client errors raise at once and retryable errors raise after max_retries"""
+        limiter = ProviderLimiter("test", max_retries=2)
+        calls = []
+
+        async def failing(status):
+            calls.append(status)
+            raise status_error(status)
+
+        with self.assertRaises(openai.BadRequestError):
+            asyncio.run(limiter.call(lambda: failing(400)))
+        self.assertEqual(calls, [400])
+
+        with patch("algorithm.scheduler.BASE_BACKOFF", 0.001):
+            with self.assertRaises(openai.InternalServerError):
+                asyncio.run(limiter.call(lambda: failing(503)))
+        self.assertEqual(calls, [400, 503, 503, 503])
+        self.assertEqual(limiter.stats()["failed"], 2)
+
+    def test_token_usage_settles_the_estimate(self):
+        """Test that the token bucket is charged what a response reports using"""
+        clock = FakeClock()
+        limiter = ProviderLimiter("test", tokens_per_minute=60000, burst_seconds=1, clock=clock)
+
+        async def request():
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=300))
+
+        asyncio.run(limiter.call(request, tokens=100))
+        self.assertEqual(limiter.tokens.level, 1000 - 300)
+        asyncio.run(limiter.call(request, tokens=500))
+        self.assertEqual(limiter.tokens.level, 1000 - 600)
+
+    def test_from_env(self):
+        """Test that quotas are read from the provider's variables"""
+        with patch.dict(os.environ, {"LINEAGENT_GROK_RPM": "60", "LINEAGENT_GROK_CONCURRENCY": "3",
+                                     "LINEAGENT_GROK_TPM": "lots"}):
+            with patch("builtins.print"):
+                limiter = ProviderLimiter.from_env("grok")
+        self.assertEqual(limiter.requests.rate, 1)
+        self.assertIsNone(limiter.tokens)
+        self.assertEqual(limiter.max_concurrency, 3)
+        self.assertIsNone(ProviderLimiter.from_env("gemini").requests)
+
+
+class TestScheduledModel(unittest.TestCase):
+    """Test cases for ScheduledModel and the helpers"""
+
+    def test_calls_go_through_the_limiter(self):
+        """Test that responses and streams are scheduled and retried"""
+        class FakeModel:
+            def __init__(self):
+                self.calls = 0
+
+            async def get_response(self, system_instructions, input, model_settings, *args, **kwargs):
+                self.calls += 1
+                if self.calls == 1:
+                    raise status_error(429, {"retry-after": "0"})
+                return f"{system_instructions}: {input}"
+
+            async def stream_response(self, *args, **kwargs):
+                for event in ("a", "b"):
+                    yield event
+
+        inner = FakeModel()
+        model = ScheduledModel(inner, ProviderLimiter("test"))
+
+        async def main():
+            response = await model.get_response("be brief", "hello", None, [], None, [], None,
+                                                previous_response_id=None)
+            events = [event async for event in model.stream_response("be brief", "hello", None)]
+            return response, events
+
+        self.assertEqual(asyncio.run(main()), ("be brief: hello", ["a", "b"]))
+        self.assertEqual(inner.calls, 2)
+        self.assertEqual(model.limiter.stats()["calls"], 3)
+        self.assertEqual(model.calls, 2)  # other attributes come from the wrapped model
+
+    def test_estimate_tokens(self):
+        """Test that estimates count the prompt and the response allowance"""
+        self.assertEqual(estimate_tokens("x" * 40, "y" * 40, SimpleNamespace(max_tokens=100)), 120)
+        self.assertEqual(estimate_tokens(input=[{"role": "user", "content": "hi"}]), 1024 + 9)
+
+    def test_retry_after_seconds(self):
+        """Test the retry-after-ms, seconds and HTTP date forms"""
+        self.assertEqual(retry_after_seconds(status_error(429, {"retry-after-ms": "1500"})), 1.5)
+        self.assertEqual(retry_after_seconds(status_error(429, {"retry-after": "7"})), 7)
+        self.assertEqual(retry_after_seconds(status_error(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})), 0)
+        self.assertIsNone(retry_after_seconds(status_error(429)))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
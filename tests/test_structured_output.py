@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for algorithm.schemas module.
+Run with: python -m tests.test_structured_output
+"""
+
+import unittest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import AgentOutputSchema
+
+from algorithm.schemas import (OpenLineageEvent, FieldDerivationOutput, provider_for_model,
+                               supports_structured_output, stage_output_type, stage_output_record,
+                               stage_output_text)
+from algorithm.schemas.structured_output import STRUCTURED_OUTPUT_ENV
+from algorithm.utils.json_extract import scan_json_candidates
+from algorithm.plugins.sql_lineage_agent.sql_schemas import SqlSyntaxAnalysisOutput
+from algorithm.plugins.sql_lineage_agent.mcp_servers.mcp_sql_lineage.templates import sql_lineage_event_composer
+from algorithm.plugins.airflow_lineage_agent.mcp_servers.mcp_airflow_lineage.templates import airflow_lineage_event_composer
+
+
+def template_examples(template: str) -> list:
+    """Return the complete example events embedded in a composer template"""
+    events = []
+    for candidate in scan_json_candidates(template):
+        if candidate.end < 0:
+            continue
+        try:
+            value = json.loads(candidate.text(template))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict) and "eventType" in value:
+            events.append(value)
+    return events
+
+
+class TestOpenLineageEvent(unittest.TestCase):
+    """Test cases for the OpenLineageEvent model"""
+
+    def test_sql_template_example_round_trips(self):
+        """Test that the SQL composer example validates and dumps unchanged"""
+        examples = template_examples(sql_lineage_event_composer())
+        self.assertTrue(examples)
+        for example in examples:
+            event = OpenLineageEvent.model_validate(example)
+            self.assertEqual(event.to_record(), example)
+
+    def test_airflow_template_example_validates(self):
+        """Test that the Airflow composer example validates"""
+        examples = template_examples(airflow_lineage_event_composer())
+        self.assertTrue(examples)
+        for example in examples:
+            event = OpenLineageEvent.model_validate(example)
+            self.assertEqual(event.to_record()["outputs"], example["outputs"])
+
+    def test_schema_uses_openlineage_key_names(self):
+        """Test that the JSON schema sent to the model uses the aliased keys"""
+        schema = json.dumps(OpenLineageEvent.model_json_schema())
+        self.assertIn('"_producer"', schema)
+        self.assertIn('"_schemaURL"', schema)
+        self.assertIn('"columnLineage"', schema)
+
+
+class TestStructuredOutput(unittest.TestCase):
+    """Test cases for structured output helpers"""
+
+    def test_provider_routing(self):
+        """Test that model names map to the same providers as get_model"""
+        self.assertEqual(provider_for_model("gpt-4o-mini"), "openai")
+        self.assertEqual(provider_for_model("deepseek-chat"), "deepseek")
+        self.assertEqual(provider_for_model("grok-3"), "grok")
+        self.assertEqual(provider_for_model("gemini-pro"), "gemini")
+        self.assertEqual(provider_for_model("meta-llama/llama-3"), "openrouter")
+
+    def test_stage_output_type_by_provider(self):
+        """Test that only supporting providers get an output schema"""
+        with patch.dict(os.environ, {STRUCTURED_OUTPUT_ENV: "auto"}):
+            self.assertIsInstance(stage_output_type("gpt-4o-mini", OpenLineageEvent), AgentOutputSchema)
+            self.assertIsNone(stage_output_type("deepseek-chat", OpenLineageEvent))
+            self.assertIsNone(stage_output_type("gpt-4o-mini", None))
+
+    def test_env_override(self):
+        """Test that the environment variable forces the mode"""
+        with patch.dict(os.environ, {STRUCTURED_OUTPUT_ENV: "false"}):
+            self.assertFalse(supports_structured_output("gpt-4o"))
+        with patch.dict(os.environ, {STRUCTURED_OUTPUT_ENV: "true"}):
+            self.assertTrue(supports_structured_output("deepseek-chat"))
+
+    def test_output_schema_validates_model_json(self):
+        """Test that the agent output schema validates a model response"""
+        output_schema = stage_output_type("gpt-4o-mini", FieldDerivationOutput)
+        result = output_schema.validate_json('{"output_fields": [{"name": "a", "source": "t.a", "transformation": "direct"}]}')
+        self.assertIsInstance(result, FieldDerivationOutput)
+        self.assertEqual(result.output_fields[0].source, "t.a")
+
+    def test_keyed_blocks_schema(self):
+        """Test that keyed syntax analysis blocks round-trip through the root model"""
+        output_schema = stage_output_type("gpt-4o-mini", SqlSyntaxAnalysisOutput)
+        result = output_schema.validate_json('{"sp1": {"name": "main_query", "sql": "SELECT 1"}}')
+        self.assertEqual(stage_output_record(result), {"sp1": {"name": "main_query", "sql": "SELECT 1"}})
+
+    def test_stage_output_text(self):
+        """Test that stage outputs render as text for the next prompt"""
+        self.assertEqual(stage_output_text("already text"), "already text")
+        output = FieldDerivationOutput.model_validate({"output_fields": []})
+        self.assertEqual(json.loads(stage_output_text(output)), {"output_fields": []})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -7,12 +7,13 @@ Run with: python -m tests.test_tracers
 import unittest
 import sys
 import os
+import asyncio
 from unittest.mock import Mock, patch
 
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from algorithm.utils.tracers import LogTracer, log_trace_id
+from algorithm.utils.tracers import LogTracer, log_trace_id, report_stage, reported_stages, stage_listener
 
 
 class TestLogTracer(unittest.TestCase):
@@ -119,6 +120,51 @@ class TestLogTracer(unittest.TestCase):
         mock_write_log.assert_called_once_with("test", "function", "Ended function")
 
 
+class TestReportStage(unittest.TestCase):
+    """Test cases for report_stage"""
+    
+    @patch('algorithm.utils.tracers.write_lineage_log')
+    def test_listeners_hear_their_own_runs(self, mock_write_log):
+        """Test that each task's listener only hears the stages reported inside that task"""
+        async def run(stage):
+            heard = []
+            stage_listener.set(lambda *change: heard.append(change))
+            await asyncio.sleep(0)
+            report_stage("test", stage, "started")
+            await asyncio.sleep(0)
+            report_stage("test", stage, "completed")
+            return heard
+        
+        async def main():
+            return await asyncio.gather(run("syntax_analysis"), run("event_composer"))
+        
+        first, second = asyncio.run(main())
+        self.assertEqual(first, [("syntax_analysis", "started"), ("syntax_analysis", "completed")])
+        self.assertEqual(second, [("event_composer", "started"), ("event_composer", "completed")])
+        mock_write_log.assert_any_call("test", "stage", "Started syntax_analysis")
+        self.assertIsNone(stage_listener.get())
+    
+    @patch('algorithm.utils.tracers.write_lineage_log')
+    def test_reported_stages(self, mock_write_log):
+        """Test that stages are reported completed, or failed when their block raises"""
+        heard = []
+        token = stage_listener.set(lambda *change: heard.append(change))
+        try:
+            with reported_stages("test", "field_derivation", "operation_tracing"):
+                pass
+            with self.assertRaises(RuntimeError):
+                with reported_stages("test", "event_composer"):
+                    raise RuntimeError("model error")
+        finally:
+            stage_listener.reset(token)
+        self.assertEqual(heard, [
+            ("field_derivation", "started"), ("operation_tracing", "started"),
+            ("field_derivation", "completed"), ("operation_tracing", "completed"),
+            ("event_composer", "started"), ("event_composer", "failed"),
+        ])
+        mock_write_log.assert_called_with("test", "stage", "Failed event_composer")
+
+
 class TestLogTraceId(unittest.TestCase):
     """Test cases for log_trace_id function"""
     